@@ -204,11 +204,10 @@ async def get_campaign_acos_metrics(
 ) -> ACOSMetrics:
     """Get ACOS metrics for a specific campaign."""
     try:
-        current_acos = await acos_engine._calculate_campaign_acos(campaign_id, period_hours)
-        previous_acos = await acos_engine._calculate_campaign_acos(
-            campaign_id, 
-            period_hours * 2
-        )
+        metrics = acos_engine.get_campaign_window_metrics(campaign_id, {period_hours, period_hours * 2})
+        total_spend, period_revenue = metrics[period_hours]
+        current_acos = acos_engine._acos(total_spend, period_revenue)
+        previous_acos = acos_engine._acos(*metrics[period_hours * 2])
         
         # Determine trend
         trend = "stable"
@@ -218,13 +217,8 @@ async def get_campaign_acos_metrics(
             elif current_acos < previous_acos * 0.9:
                 trend = "decreasing"
         
-        # Get spend and revenue
-        total_spend = await acos_engine._get_campaign_spend(campaign_id, period_hours)
-        
-        # Calculate revenue (reverse engineering from ACOS)
-        total_revenue = 0.0
-        if current_acos and current_acos > 0:
-            total_revenue = (total_spend / current_acos) * 100
+        total_spend = total_spend or 0.0
+        total_revenue = period_revenue if current_acos else 0.0
         
         # Generate recommendations
         recommendations = []
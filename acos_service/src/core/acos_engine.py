@@ -1,9 +1,8 @@
 """ACOS automation engine for campaign optimization."""
 
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Set, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
 import asyncio
 import httpx
 import logging
@@ -12,10 +11,14 @@ from ..models.acos_models import (
     ACOSRule, ACOSRuleExecution, ACOSAlert, ACOSActionType, 
     ACOSAlertSeverity, ACOSThresholdType, ACOSAnalysis
 )
-from ...campaign_automation_service.src.models.campaign_models import Campaign, CampaignMetric
+from ...campaign_automation_service.src.models.campaign_models import Campaign
 from ...campaign_automation_service.src.core.metrics_analyzer import MetricsAnalyzer
+from ...campaign_automation_service.src.core.metrics_rollup import MetricsRollup
 from ..utils.logger import logger
 
+# (campaign_id, evaluation_period_hours) -> (total_cost, total_revenue)
+WindowMetrics = Dict[Tuple[int, int], Tuple[float, float]]
+
 class ACOSAutomationEngine:
     """ACOS-based campaign automation engine."""
     
@@ -25,7 +28,13 @@ class ACOSAutomationEngine:
         self.logger = logging.getLogger(__name__)
     
     async def evaluate_all_rules(self) -> Dict[str, Any]:
-        """Evaluate all active ACOS rules and execute actions."""
+        """
+        Evaluate all active ACOS rules and execute actions.
+        
+        Cost and revenue for every candidate campaign and every distinct rule
+        window are loaded in a single grouped query; thresholds are then
+        evaluated in memory.
+        """
         try:
             active_rules = self.db.query(ACOSRule).filter(ACOSRule.is_active == True).all()
             
@@ -36,9 +45,28 @@ class ACOSAutomationEngine:
                 "errors": []
             }
             
+            rule_campaigns = {}
+            for rule in active_rules:
+                try:
+                    rule_campaigns[rule.id] = await self._get_campaigns_for_rule(rule)
+                except Exception as e:
+                    error_msg = f"Error evaluating rule {rule.id}: {str(e)}"
+                    results["errors"].append(error_msg)
+                    self.logger.error(error_msg)
+            
+            campaign_ids = {
+                campaign.id for campaigns in rule_campaigns.values() for campaign in campaigns
+            }
+            windows = {rule.evaluation_period_hours for rule in active_rules if rule.id in rule_campaigns}
+            metrics = self._get_window_metrics(campaign_ids, windows)
+            
+            # Regras continuam sendo aplicadas em ordem: uma campanha pausada
+            # por uma regra não é avaliada pelas seguintes
             for rule in active_rules:
+                if rule.id not in rule_campaigns:
+                    continue
                 try:
-                    rule_result = await self._evaluate_rule(rule)
+                    rule_result = await self._apply_rule(rule, rule_campaigns[rule.id], metrics)
                     results["actions_taken"] += rule_result["actions_taken"]
                     results["alerts_created"] += rule_result["alerts_created"]
                 except Exception as e:
@@ -54,51 +82,83 @@ class ACOSAutomationEngine:
     
     async def _evaluate_rule(self, rule: ACOSRule) -> Dict[str, Any]:
         """Evaluate a single ACOS rule."""
-        result = {"actions_taken": 0, "alerts_created": 0}
-        
-        # Get campaigns to evaluate
         campaigns = await self._get_campaigns_for_rule(rule)
+        metrics = self._get_window_metrics(
+            {campaign.id for campaign in campaigns}, 
+            {rule.evaluation_period_hours}
+        )
+        return await self._apply_rule(rule, campaigns, metrics)
+    
+    async def _apply_rule(
+        self, 
+        rule: ACOSRule, 
+        campaigns: List[Campaign], 
+        metrics: WindowMetrics
+    ) -> Dict[str, Any]:
+        """Check the rule against preloaded metrics and dispatch its actions."""
+        result = {"actions_taken": 0, "alerts_created": 0}
         
+        triggered = []
         for campaign in campaigns:
-            # Calculate current ACOS for the evaluation period
-            current_acos = await self._calculate_campaign_acos(
-                campaign.id, 
-                rule.evaluation_period_hours
-            )
+            if campaign.status != "active":
+                continue
             
+            total_cost, total_revenue = metrics.get(
+                (campaign.id, rule.evaluation_period_hours), (0.0, 0.0)
+            )
+            current_acos = self._acos(total_cost, total_revenue)
             if current_acos is None:
                 continue
             
-            # Check if rule threshold is met
-            threshold_met = self._check_threshold(
-                current_acos, 
-                rule.threshold_value, 
-                rule.threshold_type
-            )
+            # Check if rule threshold is met and minimum spend requirement
+            if not self._check_threshold(current_acos, rule.threshold_value, rule.threshold_type):
+                continue
+            if (total_cost or 0.0) < rule.minimum_spend:
+                continue
             
-            if threshold_met:
-                # Check minimum spend requirement
-                period_spend = await self._get_campaign_spend(
-                    campaign.id, 
-                    rule.evaluation_period_hours
-                )
+            triggered.append((campaign, current_acos, total_cost))
+        
+        # Actions run one at a time: they share this engine's Session and
+        # each commits or rolls back its own changes
+        for campaign, current_acos, period_spend in triggered:
+            try:
+                action_result = await self._execute_action(rule, campaign, current_acos, period_spend)
+                if action_result["success"]:
+                    result["actions_taken"] += 1
                 
-                if period_spend >= rule.minimum_spend:
-                    # Execute the action
-                    action_result = await self._execute_action(
-                        rule, campaign, current_acos, period_spend
-                    )
-                    
-                    if action_result["success"]:
-                        result["actions_taken"] += 1
-                    
-                    # Create alert if configured
-                    if rule.action_type in [ACOSActionType.SEND_ALERT]:
-                        await self._create_alert(rule, campaign, current_acos)
-                        result["alerts_created"] += 1
+                # Create alert if configured
+                if rule.action_type in [ACOSActionType.SEND_ALERT]:
+                    await self._create_alert(rule, campaign, current_acos)
+                    result["alerts_created"] += 1
+            except Exception as e:
+                self.logger.error(f"Error dispatching rule {rule.id} for campaign {campaign.id}: {e}")
         
         return result
     
+    def _get_window_metrics(self, campaign_ids: Set[int], windows: Set[int]) -> WindowMetrics:
+        """
+        Load cost and revenue for every campaign and window in one pass.
+        
+        Compacted hours are read from the hourly rollup and only the
+        uncovered edges from raw metrics, each with conditional sums per
+        evaluation period grouped by campaign.
+        """
+        if not campaign_ids or not windows:
+            return {}
+        return MetricsRollup(self.db).get_window_totals(campaign_ids, windows)
+    
+    def get_campaign_window_metrics(self, campaign_id: int, windows: Set[int]) -> Dict[int, Tuple[float, float]]:
+        """Cost and revenue of one campaign for each trailing window, in hours."""
+        metrics = self._get_window_metrics({campaign_id}, windows)
+        return {hours: metrics.get((campaign_id, hours), (0.0, 0.0)) for hours in windows}
+    
+    @staticmethod
+    def _acos(total_cost: Optional[float], total_revenue: Optional[float]) -> Optional[float]:
+        """ACOS in percent, or None without cost or revenue."""
+        if total_cost and total_revenue and total_revenue > 0:
+            return (total_cost / total_revenue) * 100
+        return None
+    
     async def _get_campaigns_for_rule(self, rule: ACOSRule) -> List[Campaign]:
         """Get campaigns that should be evaluated for the rule."""
         query = self.db.query(Campaign)
@@ -118,59 +178,6 @@ class ACOSAutomationEngine:
         
         return query.all()
     
-    async def _calculate_campaign_acos(
-        self, 
-        campaign_id: int, 
-        period_hours: int
-    ) -> Optional[float]:
-        """Calculate ACOS for a campaign over the specified period."""
-        try:
-            end_date = datetime.utcnow()
-            start_date = end_date - timedelta(hours=period_hours)
-            
-            # Get aggregated metrics for the period
-            metrics = self.db.query(
-                func.sum(CampaignMetric.cost).label("total_cost"),
-                func.sum(CampaignMetric.revenue).label("total_revenue")
-            ).filter(
-                and_(
-                    CampaignMetric.campaign_id == campaign_id,
-                    CampaignMetric.date >= start_date,
-                    CampaignMetric.date <= end_date
-                )
-            ).first()
-            
-            if metrics.total_cost and metrics.total_revenue and metrics.total_revenue > 0:
-                return (metrics.total_cost / metrics.total_revenue) * 100
-            
-            return None
-            
-        except Exception as e:
-            self.logger.error(f"Error calculating ACOS for campaign {campaign_id}: {e}")
-            return None
-    
-    async def _get_campaign_spend(self, campaign_id: int, period_hours: int) -> float:
-        """Get total spend for a campaign over the specified period."""
-        try:
-            end_date = datetime.utcnow()
-            start_date = end_date - timedelta(hours=period_hours)
-            
-            spend = self.db.query(
-                func.sum(CampaignMetric.cost)
-            ).filter(
-                and_(
-                    CampaignMetric.campaign_id == campaign_id,
-                    CampaignMetric.date >= start_date,
-                    CampaignMetric.date <= end_date
-                )
-            ).scalar()
-            
-            return spend or 0.0
-            
-        except Exception as e:
-            self.logger.error(f"Error getting spend for campaign {campaign_id}: {e}")
-            return 0.0
-    
     def _check_threshold(
         self, 
         current_acos: float, 
@@ -435,8 +442,9 @@ class ACOSAutomationEngine:
     async def analyze_campaign_acos(self, campaign_id: int, period_hours: int = 168) -> ACOSAnalysis:
         """Analyze ACOS performance for a campaign."""
         try:
-            current_acos = await self._calculate_campaign_acos(campaign_id, 24)
-            week_acos = await self._calculate_campaign_acos(campaign_id, period_hours)
+            metrics = self.get_campaign_window_metrics(campaign_id, {24, period_hours})
+            current_acos = self._acos(*metrics[24])
+            week_acos = self._acos(*metrics[period_hours])
             
             # Determine performance status
             performance_status = "good"
@@ -82,19 +82,91 @@ class TestACOSCalculation:
 class TestACOSAutomationEngine:
     """Test ACOS automation engine."""
     
+    def test_campaign_window_metrics(self, acos_engine):
+        """Test campaign ACOS inputs come from one window-metrics load."""
+        totals = {(1, 24): (200.0, 1000.0)}
+        
+        with patch.object(acos_engine, "_get_window_metrics", return_value=totals) as mock_totals:
+            metrics = acos_engine.get_campaign_window_metrics(1, {24, 48})
+        
+        mock_totals.assert_called_once_with({1}, {24, 48})
+        assert metrics == {24: (200.0, 1000.0), 48: (0.0, 0.0)}
+        assert acos_engine._acos(*metrics[24]) == 20.0  # (200/1000) * 100
+        assert acos_engine._acos(*metrics[48]) is None
+    
     @pytest.mark.asyncio
-    async def test_calculate_campaign_acos(self, acos_engine, mock_db):
-        """Test campaign ACOS calculation."""
-        # Mock database query result
-        mock_metrics = Mock()
-        mock_metrics.total_cost = 200.0
-        mock_metrics.total_revenue = 1000.0
+    async def test_apply_rule_uses_preloaded_metrics(self, acos_engine, mock_db):
+        """Test rule evaluation from batched window metrics."""
+        rule = Mock()
+        rule.id = 1
+        rule.evaluation_period_hours = 24
+        rule.threshold_value = 25.0
+        rule.threshold_type = ACOSThresholdType.MAXIMUM
+        rule.minimum_spend = 50.0
+        rule.action_type = ACOSActionType.PAUSE_CAMPAIGN
         
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_metrics
+        campaigns = []
+        for campaign_id in (1, 2, 3):
+            campaign = Mock()
+            campaign.id = campaign_id
+            campaign.status = "active"
+            campaigns.append(campaign)
         
-        acos = await acos_engine._calculate_campaign_acos(1, 24)
+        metrics = {
+            (1, 24): (300.0, 1000.0),  # ACOS 30% -> paused
+            (2, 24): (100.0, 1000.0),  # ACOS 10% -> below threshold
+            (3, 24): (40.0, 100.0),    # ACOS 40% but below minimum spend
+        }
         
-        assert acos == 20.0  # (200/1000) * 100
+        result = await acos_engine._apply_rule(rule, campaigns, metrics)
+        
+        assert result["actions_taken"] == 1
+        assert campaigns[0].status == "paused"
+        assert campaigns[1].status == "active"
+        assert campaigns[2].status == "active"
+        mock_db.query.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_apply_rule_runs_actions_sequentially(self, acos_engine):
+        """Test that actions on the shared session never interleave."""
+        rule = Mock()
+        rule.id = 1
+        rule.evaluation_period_hours = 24
+        rule.threshold_value = 25.0
+        rule.threshold_type = ACOSThresholdType.MAXIMUM
+        rule.minimum_spend = 0.0
+        rule.action_type = ACOSActionType.PAUSE_CAMPAIGN
+        
+        campaigns = []
+        for campaign_id in (1, 2, 3):
+            campaign = Mock()
+            campaign.id = campaign_id
+            campaign.status = "active"
+            campaigns.append(campaign)
+        metrics = {(campaign.id, 24): (300.0, 1000.0) for campaign in campaigns}
+        
+        events = []
+        
+        async def execute(rule, campaign, current_acos, period_spend):
+            events.append(("start", campaign.id))
+            await asyncio.sleep(0)
+            events.append(("end", campaign.id))
+            if campaign.id == 2:
+                raise RuntimeError("action failed")
+            return {"success": True}
+        
+        with patch.object(acos_engine, "_execute_action", side_effect=execute):
+            result = await acos_engine._apply_rule(rule, campaigns, metrics)
+        
+        assert events == [
+            ("start", 1), ("end", 1), ("start", 2), ("end", 2), ("start", 3), ("end", 3)
+        ]
+        assert result["actions_taken"] == 2
+    
+    def test_window_metrics_without_campaigns(self, acos_engine, mock_db):
+        """Test that no query is issued without candidates."""
+        assert acos_engine._get_window_metrics(set(), {24}) == {}
+        mock_db.query.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_check_threshold_maximum(self, acos_engine):
@@ -9,6 +9,9 @@ from app.startup import create_admin_user
 from app.monitoring.sentry_config import init_sentry
 from app.monitoring.loki_config import setup_loki_logging
 from app.monitoring.middleware import MonitoringMiddleware
+from app.monitoring.prometheus_metrics import system_sampler
+from meli.http_client import close_shared_client
+from meli.response_cache import configure_response_cache
 import logging
 
 # Initialize Sentry before other imports
@@ -114,11 +117,18 @@ app.include_router(metrics.router)
 @app.on_event("startup")
 def on_startup():
     init_db()
+    configure_response_cache(settings.enable_cache, settings.redis_url)
+    system_sampler.start(settings.metrics_sample_interval)
 
 @app.on_event("startup")
 def startup_event():
     # create_admin_user()  # Temporariamente desabilitado para teste
     pass
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_shared_client()
+    system_sampler.stop()
     
 @app.get("/health")
 def health():
@@ -2,61 +2,81 @@
 Monitoring middleware for automatic metrics collection
 """
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import time
-from typing import Callable
 
-from .prometheus_metrics import record_request
+from .prometheus_metrics import record_request, active_connections
 from .loki_config import api_logger
 
-class MonitoringMiddleware(BaseHTTPMiddleware):
+# Label for requests that matched no route (404s, scanners): one series, not one per path
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Route template of the request (``/api/items/{item_id}``), resolved by the
+    router during the call; the raw path is never used as a metric label
+    """
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return scope.get("root_path", "") + template if template else UNMATCHED_ROUTE
+
+
+class MonitoringMiddleware:
     """
     Middleware to automatically collect request metrics and logs
+
+    Plain ASGI instead of ``BaseHTTPMiddleware``: no extra task, no body
+    re-streaming, and exceptions propagate untouched; the status code is
+    read from the ``http.response.start`` message.
     """
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Record start time
-        start_time = time.time()
-        
-        # Get request details
-        method = request.method
-        path = request.url.path
-        
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        active_connections.inc()
         try:
-            # Process request
-            response = await call_next(request)
-            
-            # Calculate duration
-            duration = time.time() - start_time
-            
-            # Record metrics
-            record_request(method, path, response.status_code, duration)
-            
-            # Log request
-            api_logger.log_request(
-                method=method,
-                path=path,
-                status_code=response.status_code,
-                duration=duration,
-                user_id=getattr(request.state, 'user_id', None)
-            )
-            
-            return response
-            
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            # Calculate duration for failed requests
-            duration = time.time() - start_time
-            
+            duration = time.perf_counter() - start_time
+
             # Record failed request metrics
-            record_request(method, path, 500, duration)
-            
-            # Log error
+            record_request(scope["method"], route_template(scope), 500, duration)
+
+            # Log error (raw path only in logs)
             api_logger.log_error(e, {
-                "method": method,
-                "path": path,
+                "method": scope["method"],
+                "path": scope["path"],
                 "duration": duration
             })
-            
-            # Re-raise the exception
-            raise e
\ No newline at end of file
+            raise
+        else:
+            duration = time.perf_counter() - start_time
+            record_request(scope["method"], route_template(scope), status_code, duration)
+
+            state = scope.get("state") or {}
+            api_logger.log_request(
+                method=scope["method"],
+                path=scope["path"],
+                status_code=status_code,
+                duration=duration,
+                user_id=state.get("user_id")
+            )
+        finally:
+            active_connections.dec()
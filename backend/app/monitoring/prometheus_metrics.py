@@ -1,12 +1,36 @@
 """
 Prometheus metrics configuration and collectors
+
+Label values must come from a bounded set: HTTP metrics are labeled with the
+route template (``/items/{item_id}``), never the raw path, and per-entity ids
+(campaigns, client IPs) belong in logs, not in labels. As a last line of
+defense, every free-form label goes through ``bounded_label``, which folds
+values beyond ``MAX_LABEL_VALUES`` into ``"other"``.
+
+System gauges are refreshed by ``SystemMetricsSampler`` in a background
+thread, so a scrape only serializes what is already in memory.
+
+Multi-worker deployments (gunicorn/uvicorn ``--workers``) must set
+``PROMETHEUS_MULTIPROC_DIR`` to an empty directory before the workers start;
+``get_metrics`` then aggregates the samples of every worker.
 """
 
-from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import (
+    Counter, Histogram, Gauge, CollectorRegistry, REGISTRY,
+    generate_latest, multiprocess, CONTENT_TYPE_LATEST
+)
+from typing import Dict, Optional, Set
+import os
+import threading
 import time
 import psutil
 import logging
 
+MULTIPROCESS_MODE = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+MAX_LABEL_VALUES = int(os.environ.get("METRICS_MAX_LABEL_VALUES", "200"))
+OVERFLOW_LABEL = "other"
+DEFAULT_SAMPLE_INTERVAL = 15.0  # seconds
+
 # Request metrics
 request_count = Counter(
     'http_requests_total', 
@@ -21,13 +45,14 @@ request_duration = Histogram(
 )
 
 # System metrics
-system_cpu_usage = Gauge('system_cpu_usage_percent', 'System CPU usage percentage')
-system_memory_usage = Gauge('system_memory_usage_percent', 'System memory usage percentage')
-system_disk_usage = Gauge('system_disk_usage_percent', 'System disk usage percentage')
+# (host-wide values: in multiprocess mode every worker samples the same host, keep the latest)
+system_cpu_usage = Gauge('system_cpu_usage_percent', 'System CPU usage percentage', multiprocess_mode='mostrecent')
+system_memory_usage = Gauge('system_memory_usage_percent', 'System memory usage percentage', multiprocess_mode='mostrecent')
+system_disk_usage = Gauge('system_disk_usage_percent', 'System disk usage percentage', multiprocess_mode='mostrecent')
 
 # Application metrics
-active_connections = Gauge('active_connections_total', 'Number of active connections')
-database_connections = Gauge('database_connections_active', 'Active database connections')
+active_connections = Gauge('active_connections_total', 'Number of active connections', multiprocess_mode='livesum')
+database_connections = Gauge('database_connections_active', 'Active database connections', multiprocess_mode='livesum')
 cache_hits = Counter('cache_hits_total', 'Total cache hits')
 cache_misses = Counter('cache_misses_total', 'Total cache misses')
 
@@ -37,30 +62,51 @@ api_calls = Counter('api_calls_total', 'Total API calls', ['service', 'endpoint'
 errors = Counter('application_errors_total', 'Application errors', ['error_type'])
 
 # Campaign metrics
-campaigns_active = Gauge('campaigns_active_total', 'Number of active campaigns')
-campaigns_clicks = Counter('campaigns_clicks_total', 'Total campaign clicks', ['campaign_id'])
-campaigns_conversions = Counter('campaigns_conversions_total', 'Total campaign conversions', ['campaign_id'])
+campaigns_active = Gauge('campaigns_active_total', 'Number of active campaigns', multiprocess_mode='mostrecent')
+campaigns_clicks = Counter('campaigns_clicks_total', 'Total campaign clicks')
+campaigns_conversions = Counter('campaigns_conversions_total', 'Total campaign conversions')
 
 # ML Model metrics
 model_predictions = Counter('ml_model_predictions_total', 'Total ML model predictions', ['model_name'])
 model_training_duration = Histogram('ml_model_training_duration_seconds', 'ML model training duration')
-model_accuracy = Gauge('ml_model_accuracy', 'ML model accuracy score', ['model_name'])
+model_accuracy = Gauge('ml_model_accuracy', 'ML model accuracy score', ['model_name'], multiprocess_mode='mostrecent')
 
 # Security metrics
 security_events = Counter('security_events_total', 'Security events', ['event_type'])
-failed_auth_attempts = Counter('failed_auth_attempts_total', 'Failed authentication attempts', ['ip_address'])
+failed_auth_attempts = Counter('failed_auth_attempts_total', 'Failed authentication attempts')
 
 # Infrastructure metrics  
-queue_size = Gauge('queue_size', 'Background task queue size', ['queue_name'])
+queue_size = Gauge('queue_size', 'Background task queue size', ['queue_name'], multiprocess_mode='livesum')
 cache_operations = Counter('cache_operations_total', 'Cache operations', ['operation', 'result'])
 
 logger = logging.getLogger(__name__)
+security_logger = logging.getLogger('security.auth')
+
+_label_values: Dict[str, Set[str]] = {}
+_label_lock = threading.Lock()
+
+def bounded_label(label: str, value: str) -> str:
+    """
+    Return ``value`` while ``label`` has fewer than MAX_LABEL_VALUES distinct
+    values, ``"other"`` afterwards (keeps the series count bounded per process)
+    """
+    seen = _label_values.get(label)
+    if seen is not None and value in seen:
+        return value
+    with _label_lock:
+        seen = _label_values.setdefault(label, set())
+        if value in seen:
+            return value
+        if len(seen) >= MAX_LABEL_VALUES:
+            return OVERFLOW_LABEL
+        seen.add(value)
+        return value
 
 def update_system_metrics():
-    """Update system performance metrics"""
+    """Update system performance metrics (non-blocking sample)"""
     try:
-        # CPU usage
-        cpu_percent = psutil.cpu_percent(interval=1)
+        # CPU usage since the previous call; never sleeps on the caller's thread
+        cpu_percent = psutil.cpu_percent(interval=None)
         system_cpu_usage.set(cpu_percent)
         
         # Memory usage
@@ -75,8 +121,44 @@ def update_system_metrics():
     except Exception as e:
         logger.error(f"Error updating system metrics: {e}")
 
+class SystemMetricsSampler:
+    """Refreshes the system gauges every ``interval`` seconds in a daemon thread"""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None):
+        if interval is not None:
+            self.interval = interval
+        if self.running:
+            return
+        self._stop.clear()
+        # Prime psutil so the first sample covers a real interval instead of returning 0.0
+        psutil.cpu_percent(interval=None)
+        self._thread = threading.Thread(target=self._run, name="system-metrics-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            update_system_metrics()
+
+system_sampler = SystemMetricsSampler()
+
 def record_request(method: str, endpoint: str, status_code: int, duration: float):
     """Record HTTP request metrics"""
+    endpoint = bounded_label('endpoint', endpoint)
     request_count.labels(method=method, endpoint=endpoint, status_code=status_code).inc()
     request_duration.labels(method=method, endpoint=endpoint).observe(duration)
 
@@ -87,46 +169,54 @@ def record_user_login(success: bool):
 
 def record_api_call(service: str, endpoint: str):
     """Record API call"""
-    api_calls.labels(service=service, endpoint=endpoint).inc()
+    api_calls.labels(service=service, endpoint=bounded_label('api_endpoint', endpoint)).inc()
 
 def record_error(error_type: str):
     """Record application error"""
-    errors.labels(error_type=error_type).inc()
+    errors.labels(error_type=bounded_label('error_type', error_type)).inc()
 
 def record_campaign_click(campaign_id: str):
-    """Record campaign click"""
-    campaigns_clicks.labels(campaign_id=campaign_id).inc()
+    """Record campaign click (per-campaign breakdowns come from the campaign analytics, not labels)"""
+    campaigns_clicks.inc()
 
 def record_campaign_conversion(campaign_id: str):
     """Record campaign conversion"""
-    campaigns_conversions.labels(campaign_id=campaign_id).inc()
+    campaigns_conversions.inc()
 
 def record_model_prediction(model_name: str):
     """Record ML model prediction"""
-    model_predictions.labels(model_name=model_name).inc()
+    model_predictions.labels(model_name=bounded_label('model_name', model_name)).inc()
 
 def set_model_accuracy(model_name: str, accuracy: float):
     """Set ML model accuracy"""
-    model_accuracy.labels(model_name=model_name).set(accuracy)
+    model_accuracy.labels(model_name=bounded_label('model_name', model_name)).set(accuracy)
 
 def record_security_event(event_type: str):
     """Record security event"""
-    security_events.labels(event_type=event_type).inc()
+    security_events.labels(event_type=bounded_label('event_type', event_type)).inc()
 
 def record_failed_auth(ip_address: str):
-    """Record failed authentication attempt"""
-    failed_auth_attempts.labels(ip_address=ip_address).inc()
+    """Record failed authentication attempt (the IP goes to the security log, not to a label)"""
+    failed_auth_attempts.inc()
+    security_logger.warning(f"FAILED_AUTH - IP: {ip_address}")
 
 def set_queue_size(queue_name: str, size: int):
     """Set queue size"""
-    queue_size.labels(queue_name=queue_name).set(size)
+    queue_size.labels(queue_name=bounded_label('queue_name', queue_name)).set(size)
 
 def record_cache_operation(operation: str, result: str):
     """Record cache operation"""
-    cache_operations.labels(operation=operation, result=result).inc()
+    cache_operations.labels(operation=bounded_label('cache_operation', operation), result=bounded_label('cache_result', result)).inc()
 
 def get_metrics():
-    """Get all metrics in Prometheus format"""
-    # Update system metrics before returning
-    update_system_metrics()
-    return generate_latest()
\ No newline at end of file
+    """
+    Get all metrics in Prometheus format
+
+    Only serializes current values; system gauges are kept fresh by
+    ``system_sampler``. In multiprocess mode the samples of all workers are merged.
+    """
+    if MULTIPROCESS_MODE:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
\ No newline at end of file
@@ -12,8 +12,6 @@ from typing import Dict, Any, Optional
 
 from ..monitoring.prometheus_metrics import (
     get_metrics,
-    update_system_metrics,
-    active_connections,
     campaigns_active,
     set_model_accuracy
 )
@@ -49,9 +47,7 @@ async def prometheus_metrics(auth: bool = Depends(verify_metrics_auth)):
     Requires authentication in production environment
     """
     try:
-        # Update system metrics before serving
-        update_system_metrics()
-        
+        # System gauges are refreshed by the background sampler; a scrape never blocks on psutil
         # Record API call
         api_logger.log_request("GET", "/api/metrics/prometheus", 200, 0.1)
         
@@ -76,7 +72,7 @@ async def health_check():
     
     try:
         # Get system information
-        cpu_percent = psutil.cpu_percent(interval=0.1)
+        cpu_percent = psutil.cpu_percent(interval=None)
         memory = psutil.virtual_memory()
         disk = psutil.disk_usage('/')
         
@@ -229,8 +225,7 @@ async def test_metrics():
     Endpoint to generate test metrics for demonstration
     """
     try:
-        # Simulate some metrics
-        active_connections.set(42)
+        # Simulate some metrics (active_connections is owned by the middleware)
         campaigns_active.set(15)
         set_model_accuracy("recommendation_engine", 0.87)
         set_model_accuracy("price_optimizer", 0.92)
@@ -243,7 +238,6 @@ async def test_metrics():
             "status": "success",
             "message": "Test metrics generated",
             "metrics": {
-                "active_connections": 42,
                 "campaigns_active": 15,
                 "model_accuracies": {
                     "recommendation_engine": 0.87,
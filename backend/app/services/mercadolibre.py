@@ -1,13 +1,16 @@
 import os
+import asyncio
 import base64
 import hashlib
 import secrets
 import httpx
 import logging
 from urllib.parse import urlencode
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Set, AsyncIterator
 from sqlmodel import Session
 from app.models import OAuthToken
+from meli.pagination import MeliPaginator
+from meli.response_cache import FetchResult, response_cache
 
 logger = logging.getLogger("app.mercadolibre")
 logger.setLevel(logging.INFO)
@@ -27,6 +30,11 @@ ML_REDIRECT_URI = os.getenv("ML_REDIRECT_URI", "").strip().rstrip("/")
 
 PKCE_CODE_CHALLENGE_METHOD = os.getenv("PKCE_CODE_CHALLENGE_METHOD", "S256")
 
+# Multiget: limite da API do ML e parâmetros do agrupador de itens
+ML_MULTIGET_LIMIT = 20
+ML_MULTIGET_CONCURRENCY = int(os.getenv("ML_MULTIGET_CONCURRENCY", "8"))
+ML_ITEM_BATCH_WINDOW = float(os.getenv("ML_ITEM_BATCH_WINDOW", "0.005"))
+
 # ============================
 # Funções PKCE
 # ============================
@@ -130,18 +138,38 @@ def save_token_to_db(tokens: Dict, user_id: Optional[int], session: Session):
 # Funções de API do Mercado Livre
 # ============================
 
+async def _conditional_get(url: str, headers: Optional[Dict] = None, params: Optional[Dict] = None,
+                           etag: Optional[str] = None, timeout: int = 20) -> FetchResult:
+    """
+    GET com ``If-None-Match`` usado pelo cache de respostas (304 = não modificado).
+    """
+    request_headers = dict(headers or {})
+    if etag:
+        request_headers["If-None-Match"] = etag
+    kwargs = {"headers": request_headers}
+    if params is not None:
+        kwargs["params"] = params
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        response = await client.get(url, **kwargs)
+        if response.status_code == 304:
+            return FetchResult(304, etag=etag)
+        response.raise_for_status()
+        return FetchResult(response.status_code, response.json(), response.headers.get("ETag"))
+
 async def get_user_info(access_token: str) -> Dict:
     """
     Busca informações do usuário autenticado no Mercado Livre.
     """
     headers = {"Authorization": f"Bearer {access_token}"}
-    async with httpx.AsyncClient(timeout=20) as client:
+
+    async def fetch(etag: Optional[str]) -> FetchResult:
         logger.info("[MercadoLibre] Buscando informações do usuário")
-        response = await client.get(f"{ML_API_URL}/users/me", headers=headers)
-        response.raise_for_status()
-        user_data = response.json()
-        logger.info(f"[MercadoLibre] Dados do usuário obtidos: ID {user_data.get('id')}")
-        return user_data
+        return await _conditional_get(f"{ML_API_URL}/users/me", headers, etag=etag)
+
+    result = await response_cache.fetch("/users/me", fetch, access_token=access_token)
+    user_data = result.data
+    logger.info(f"[MercadoLibre] Dados do usuário obtidos: ID {user_data.get('id')}")
+    return user_data
 
 async def get_user_products(access_token: str, user_id: str) -> Dict:
     """
@@ -160,44 +188,182 @@ async def get_categories() -> Dict:
     """
     Busca categorias disponíveis no Mercado Livre.
     """
-    async with httpx.AsyncClient(timeout=20) as client:
+    endpoint = f"/sites/{ML_SITE_ID}/categories"
+
+    async def fetch(etag: Optional[str]) -> FetchResult:
         logger.info("[MercadoLibre] Buscando categorias")
-        response = await client.get(f"{ML_API_URL}/sites/{ML_SITE_ID}/categories")
-        response.raise_for_status()
-        categories_data = response.json()
-        logger.info(f"[MercadoLibre] {len(categories_data)} categorias encontradas")
-        return categories_data
+        return await _conditional_get(f"{ML_API_URL}{endpoint}", etag=etag)
+
+    result = await response_cache.fetch(endpoint, fetch)
+    categories_data = result.data
+    logger.info(f"[MercadoLibre] {len(categories_data)} categorias encontradas")
+    return categories_data
 
 # ============================
 # Funções Específicas para Gerenciamento de Anúncios
 # ============================
 
-async def get_item_details(access_token: str, item_id: str) -> Dict:
+async def _fetch_item(access_token: str, item_id: str) -> Dict:
     """
-    Busca detalhes completos de um item específico.
+    Busca um único item diretamente em /items/{id}.
     """
     headers = {"Authorization": f"Bearer {access_token}"}
-    async with httpx.AsyncClient(timeout=20) as client:
+    endpoint = f"/items/{item_id}"
+
+    async def fetch(etag: Optional[str]) -> FetchResult:
         logger.info(f"[MercadoLibre] Buscando detalhes do item {item_id}")
-        response = await client.get(f"{ML_API_URL}/items/{item_id}", headers=headers)
-        response.raise_for_status()
-        item_data = response.json()
-        logger.info(f"[MercadoLibre] Detalhes do item {item_id} obtidos")
-        return item_data
+        return await _conditional_get(f"{ML_API_URL}{endpoint}", headers, etag=etag)
+
+    result = await response_cache.fetch(endpoint, fetch, access_token=access_token)
+    logger.info(f"[MercadoLibre] Detalhes do item {item_id} obtidos")
+    return result.data
 
-async def get_items_batch(access_token: str, item_ids: list) -> Dict:
+async def get_items_batch(access_token: str, item_ids: list) -> List[Dict]:
     """
     Busca detalhes de múltiplos items em lote.
+
+    A lista é dividida em blocos de até 20 ids (limite do multiget do ML),
+    executados com concorrência limitada. O resultado preserva a ordem de
+    entrada no formato ``[{"code": ..., "body": {...}}, ...]``.
     """
+    if not item_ids:
+        return []
+
     headers = {"Authorization": f"Bearer {access_token}"}
-    items_str = ",".join(item_ids)
+    chunks = [item_ids[i:i + ML_MULTIGET_LIMIT] for i in range(0, len(item_ids), ML_MULTIGET_LIMIT)]
+    semaphore = asyncio.Semaphore(ML_MULTIGET_CONCURRENCY)
+
     async with httpx.AsyncClient(timeout=30) as client:
-        logger.info(f"[MercadoLibre] Buscando {len(item_ids)} items em lote")
-        response = await client.get(f"{ML_API_URL}/items?ids={items_str}", headers=headers)
-        response.raise_for_status()
-        items_data = response.json()
-        logger.info(f"[MercadoLibre] {len(items_data)} items obtidos em lote")
-        return items_data
+        async def fetch_chunk(chunk: list) -> List[Dict]:
+            async with semaphore:
+                items_str = ",".join(chunk)
+                response = await client.get(f"{ML_API_URL}/items?ids={items_str}", headers=headers)
+                response.raise_for_status()
+                return response.json()
+
+        logger.info(f"[MercadoLibre] Buscando {len(item_ids)} items em {len(chunks)} lote(s)")
+        results = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+
+    items_data = [item for chunk_result in results for item in chunk_result]
+    logger.info(f"[MercadoLibre] {len(items_data)} items obtidos em lote")
+    return items_data
+
+
+class MercadoLibreItemError(Exception):
+    """Erro retornado pelo multiget para um item específico."""
+
+    def __init__(self, item_id: str, status_code: int, body: Optional[Dict] = None):
+        super().__init__(f"Item {item_id} retornou HTTP {status_code}")
+        self.item_id = item_id
+        self.status_code = status_code
+        self.body = body or {}
+
+    @classmethod
+    def from_http_error(cls, item_id: str, error: httpx.HTTPStatusError) -> "MercadoLibreItemError":
+        """Converte o erro HTTP de uma requisição em erro do item."""
+        try:
+            body = error.response.json()
+        except Exception:
+            body = None
+        item_error = cls(item_id, error.response.status_code, body if isinstance(body, dict) else None)
+        item_error.__cause__ = error
+        return item_error
+
+
+class ItemBatchLoader:
+    """
+    Agrupador de buscas de itens no estilo DataLoader.
+
+    Chamadas concorrentes a ``load`` com o mesmo access token, dentro de uma
+    janela curta, são deduplicadas e combinadas em requisições multiget de até
+    20 ids. Cada chamador recebe apenas o seu item. Um id isolado na janela é
+    buscado diretamente em /items/{id}.
+
+    Respostas HTTP de erro chegam aos chamadores sempre como
+    ``MercadoLibreItemError``, seja qual for o caminho da janela.
+    """
+
+    def __init__(
+        self,
+        batch_window: float = ML_ITEM_BATCH_WINDOW,
+        max_batch_size: int = ML_MULTIGET_LIMIT * ML_MULTIGET_CONCURRENCY,
+    ):
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[str, Dict[str, List[asyncio.Future]]] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, access_token: str, item_id: str) -> Dict:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(access_token, {})
+        pending.setdefault(item_id, []).append(future)
+
+        if len(pending) >= self.max_batch_size:
+            self._schedule_flush(access_token, immediate=True)
+        elif access_token not in self._flush_handles:
+            self._flush_handles[access_token] = loop.call_later(
+                self.batch_window, self._schedule_flush, access_token
+            )
+        return await future
+
+    def _schedule_flush(self, access_token: str, immediate: bool = False) -> None:
+        handle = self._flush_handles.pop(access_token, None)
+        if handle is not None and immediate:
+            handle.cancel()
+        pending = self._pending.pop(access_token, None)
+        if pending:
+            task = asyncio.ensure_future(self._dispatch(access_token, pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, access_token: str, pending: Dict[str, List[asyncio.Future]]) -> None:
+        item_ids = list(pending)
+        try:
+            if len(item_ids) == 1:
+                results = {item_ids[0]: await _fetch_item(access_token, item_ids[0])}
+            else:
+                results = {}
+                batch = await get_items_batch(access_token, item_ids)
+                for item_id, entry in zip(item_ids, batch):
+                    body = entry.get("body", entry) if isinstance(entry, dict) else entry
+                    code = entry.get("code", 200) if isinstance(entry, dict) else 200
+                    key = body.get("id", item_id) if isinstance(body, dict) else item_id
+                    if code >= 300:
+                        results[key] = MercadoLibreItemError(key, code, body)
+                    else:
+                        results[key] = body
+        except httpx.HTTPStatusError as e:
+            results = {item_id: MercadoLibreItemError.from_http_error(item_id, e) for item_id in item_ids}
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for item_id, futures in pending.items():
+            result = results.get(item_id, MercadoLibreItemError(item_id, 404))
+            for future in futures:
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+# Instância global do agrupador de itens
+item_loader = ItemBatchLoader()
+
+async def get_item_details(access_token: str, item_id: str) -> Dict:
+    """
+    Busca detalhes completos de um item específico.
+
+    Chamadas concorrentes são combinadas em multigets pelo ``item_loader``.
+    """
+    return await item_loader.load(access_token, item_id)
 
 async def update_item(access_token: str, item_id: str, update_data: Dict) -> Dict:
     """
@@ -214,7 +380,8 @@ async def update_item(access_token: str, item_id: str, update_data: Dict) -> Dic
         response.raise_for_status()
         updated_item = response.json()
         logger.info(f"[MercadoLibre] Item {item_id} atualizado com sucesso")
-        return updated_item
+    await response_cache.invalidate(f"/items/{item_id}", access_token=access_token)
+    return updated_item
 
 async def pause_item(access_token: str, item_id: str) -> Dict:
     """
@@ -276,14 +443,16 @@ async def get_shipping_methods(access_token: str, category_id: str = None) -> Di
     if category_id:
         params["category_id"] = category_id
     
-    async with httpx.AsyncClient(timeout=20) as client:
+    endpoint = f"/sites/{ML_SITE_ID}/shipping_methods"
+
+    async def fetch(etag: Optional[str]) -> FetchResult:
         logger.info("[MercadoLibre] Buscando métodos de envio")
-        response = await client.get(f"{ML_API_URL}/sites/{ML_SITE_ID}/shipping_methods", 
-                                  params=params, headers=headers)
-        response.raise_for_status()
-        shipping_data = response.json()
-        logger.info(f"[MercadoLibre] {len(shipping_data)} métodos de envio encontrados")
-        return shipping_data
+        return await _conditional_get(f"{ML_API_URL}{endpoint}", headers, params=params, etag=etag)
+
+    result = await response_cache.fetch(endpoint, fetch, params=params, access_token=access_token)
+    shipping_data = result.data
+    logger.info(f"[MercadoLibre] {len(shipping_data)} métodos de envio encontrados")
+    return shipping_data
 
 async def search_items_by_seller(access_token: str, seller_id: str, 
                                 filters: Dict = None, offset: int = 0, limit: int = 50) -> Dict:
@@ -308,3 +477,30 @@ async def search_items_by_seller(access_token: str, seller_id: str,
         search_data = response.json()
         logger.info(f"[MercadoLibre] {search_data.get('paging', {}).get('total', 0)} items encontrados")
         return search_data
+
+async def iter_items_by_seller(access_token: str, seller_id: str,
+                               filters: Dict = None, page_size: int = 50) -> AsyncIterator[Dict]:
+    """
+    Itera todos os items de um vendedor sem o limite de offset da busca.
+
+    Pagina /users/{seller_id}/items/search (que troca para ``search_type=scan``
+    quando o total passa do teto de offset) e hidrata cada página de ids via
+    multiget enquanto a próxima página já está sendo buscada.
+    """
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    async with httpx.AsyncClient(timeout=30) as client:
+        async def fetch_page(params: Dict) -> Dict:
+            response = await client.get(f"{ML_API_URL}/users/{seller_id}/items/search",
+                                        params=params, headers=headers)
+            response.raise_for_status()
+            return response.json()
+
+        paginator = MeliPaginator(fetch_page, filters, page_size=page_size, scan=True)
+        async for item_ids in paginator.pages():
+            for entry in await get_items_batch(access_token, item_ids):
+                if isinstance(entry, dict) and entry.get("code", 200) < 300:
+                    yield entry.get("body", entry)
+
+        logger.info(f"[MercadoLibre] {paginator.total or 0} items do vendedor {seller_id} percorridos "
+                    f"em {paginator.pages_fetched} páginas")
@@ -50,6 +50,7 @@ class Settings(BaseSettings):
     # Monitoring Configuration
     metrics_api_key: str = Field(default="ml_metrics_key_2024", alias="METRICS_API_KEY")
     enable_metrics_auth: bool = Field(default=True, alias="ENABLE_METRICS_AUTH")
+    metrics_sample_interval: float = Field(default=15.0, alias="METRICS_SAMPLE_INTERVAL")
     
     # Logging Configuration
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
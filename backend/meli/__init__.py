@@ -15,6 +15,20 @@ Módulos disponíveis:
 
 from .base import BaseMeliService
 from .interfaces import MeliServiceInterface
+from .http_client import RateLimitScheduler, get_shared_client, close_shared_client, rate_limit_scheduler
+from .pagination import MeliPaginator, MeliPaginationError
+from .response_cache import CachePolicy, ResponseCache
 
 __version__ = "1.0.0"
-__all__ = ["BaseMeliService", "MeliServiceInterface"]
\ No newline at end of file
+__all__ = [
+    "BaseMeliService",
+    "MeliServiceInterface",
+    "RateLimitScheduler",
+    "get_shared_client",
+    "close_shared_client",
+    "rate_limit_scheduler",
+    "MeliPaginator",
+    "MeliPaginationError",
+    "CachePolicy",
+    "ResponseCache",
+]
\ No newline at end of file
@@ -17,6 +17,8 @@ from .interfaces import (
     OptimizerIntegrationInterface,
     LearningIntegrationInterface
 )
+from .http_client import get_shared_client, rate_limit_scheduler
+from .response_cache import FetchResult, response_cache
 
 
 class BaseMeliService(MeliServiceInterface):
@@ -94,35 +96,50 @@ class BaseMeliService(MeliServiceInterface):
         try:
             self.logger.info(f"Making {method} request to {endpoint}")
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                if method.upper() == "GET":
-                    response = await client.get(url, headers=headers, params=params)
-                elif method.upper() == "POST":
-                    response = await client.post(url, headers=headers, json=json_data, params=params)
-                elif method.upper() == "PUT":
-                    response = await client.put(url, headers=headers, json=json_data, params=params)
-                elif method.upper() == "DELETE":
-                    response = await client.delete(url, headers=headers, params=params)
-                else:
-                    raise ValueError(f"Unsupported HTTP method: {method}")
-                
-                if response.status_code < 300:
-                    data = response.json() if response.content else {}
-                    self.logger.info(f"Request successful: {response.status_code}")
-                    return MeliResponse(
-                        success=True,
-                        data=data,
-                        status_code=response.status_code
-                    )
-                else:
-                    error_data = response.json() if response.content else {}
-                    self.logger.warning(f"Request failed: {response.status_code}")
-                    return MeliResponse(
-                        success=False,
-                        error=error_data.get("message", f"HTTP {response.status_code}"),
-                        status_code=response.status_code,
-                        data=error_data
-                    )
+            method = method.upper()
+            if method not in ("GET", "POST", "PUT", "DELETE"):
+                raise ValueError(f"Unsupported HTTP method: {method}")
+            
+            async def send(etag: Optional[str] = None) -> FetchResult:
+                request_headers = {**headers, "If-None-Match": etag} if etag else headers
+                # Cliente compartilhado + fila por access token (respeita quota da API)
+                response = await rate_limit_scheduler.request(
+                    method,
+                    url,
+                    access_token,
+                    headers=request_headers,
+                    params=params,
+                    json=json_data if method in ("POST", "PUT") else None,
+                    timeout=self.timeout
+                )
+                data = response.json() if response.content else {}
+                return FetchResult(response.status_code, data, response.headers.get("etag"))
+            
+            if method == "GET":
+                # Endpoints somente leitura passam pelo cache condicional
+                result = await response_cache.fetch(endpoint, send, params=params, access_token=access_token)
+            else:
+                result = await send()
+                if result.status_code < 300:
+                    await response_cache.invalidate(endpoint, access_token=access_token)
+            
+            if result.status_code < 300:
+                self.logger.info(f"Request successful: {result.status_code}")
+                return MeliResponse(
+                    success=True,
+                    data=result.data,
+                    status_code=result.status_code,
+                    metadata={"cached": True} if result.cached else None
+                )
+            else:
+                error_data = result.data or {}
+                self.logger.warning(f"Request failed: {result.status_code}")
+                return MeliResponse(
+                    success=False,
+                    error=error_data.get("message", f"HTTP {result.status_code}"),
+                    status_code=result.status_code,
+                    data=error_data
+                )
                     
         except httpx.TimeoutException:
             self.logger.error("Request timeout")
@@ -151,12 +168,12 @@ class BaseMeliService(MeliServiceInterface):
                 "timestamp": datetime.utcnow().isoformat()
             }
             
-            async with httpx.AsyncClient(timeout=10) as client:
-                response = await client.post(
-                    f"{self.analytics_url}/api/events",
-                    json=payload
-                )
-                return response.status_code < 300
+            response = await get_shared_client().post(
+                f"{self.analytics_url}/api/events",
+                json=payload,
+                timeout=10
+            )
+            return response.status_code < 300
                 
         except Exception as e:
             self.logger.warning(f"Failed to send analytics event: {e}")
@@ -173,15 +190,15 @@ class BaseMeliService(MeliServiceInterface):
                 "context": context
             }
             
-            async with httpx.AsyncClient(timeout=15) as client:
-                response = await client.post(
-                    f"{self.optimizer_url}/api/optimize",
-                    json=payload
-                )
-                
-                if response.status_code < 300:
-                    return response.json()
-                return None
+            response = await get_shared_client().post(
+                f"{self.optimizer_url}/api/optimize",
+                json=payload,
+                timeout=15
+            )
+            
+            if response.status_code < 300:
+                return response.json()
+            return None
                 
         except Exception as e:
             self.logger.warning(f"Failed to get optimizer suggestions: {e}")
@@ -198,15 +215,15 @@ class BaseMeliService(MeliServiceInterface):
                 "context": context
             }
             
-            async with httpx.AsyncClient(timeout=15) as client:
-                response = await client.post(
-                    f"{self.learning_url}/api/analyze",
-                    json=payload
-                )
-                
-                if response.status_code < 300:
-                    return response.json()
-                return None
+            response = await get_shared_client().post(
+                f"{self.learning_url}/api/analyze",
+                json=payload,
+                timeout=15
+            )
+            
+            if response.status_code < 300:
+                return response.json()
+            return None
                 
         except Exception as e:
             self.logger.warning(f"Failed to get learning insights: {e}")
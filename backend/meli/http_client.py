@@ -0,0 +1,208 @@
+"""
+Shared HTTP client and rate-limit scheduler for Mercado Libre services.
+
+Todos os serviços em ``meli`` compartilham um único ``httpx.AsyncClient``
+por processo (keep-alive, HTTP/2 quando disponível e pool limitado por host),
+evitando um novo handshake TCP+TLS a cada chamada. As chamadas à API do
+Mercado Livre passam por um token bucket por access token que respeita os
+headers de quota da API e enfileira requisições em vez de falhar.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional
+
+import httpx
+
+try:  # HTTP/2 depende do pacote opcional ``h2`` (httpx[http2])
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    HTTP2_AVAILABLE = False
+
+
+logger = logging.getLogger("meli.http_client")
+
+# Limites do pool compartilhado
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = 30.0
+
+# Quota padrão por access token (requisições/segundo e burst)
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 20
+MAX_RATE_LIMIT_RETRIES = 5
+MAX_RETRY_AFTER = 60.0
+
+_shared_client: Optional[httpx.AsyncClient] = None
+
+
+def get_shared_client() -> httpx.AsyncClient:
+    """Retorna o cliente HTTP compartilhado do processo, criando-o sob demanda."""
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = httpx.AsyncClient(
+            timeout=DEFAULT_TIMEOUT,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+        logger.info(f"Shared HTTP client created (http2={HTTP2_AVAILABLE})")
+    return _shared_client
+
+
+async def close_shared_client() -> None:
+    """Fecha o cliente compartilhado (chamar no shutdown da aplicação)."""
+    global _shared_client
+    if _shared_client is not None and not _shared_client.is_closed:
+        await _shared_client.aclose()
+    _shared_client = None
+
+
+@dataclass
+class TokenBucket:
+    """Token bucket simples com reabastecimento contínuo."""
+    rate: float = DEFAULT_RATE
+    capacity: float = DEFAULT_BURST
+    tokens: float = DEFAULT_BURST
+    updated_at: float = field(default_factory=time.monotonic)
+    blocked_until: float = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def reserve(self, now: float) -> float:
+        """Consome um token e retorna quanto tempo o chamador deve aguardar."""
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return wait
+        # Saldo negativo enfileira as próximas requisições em ordem
+        deficit = 1 - self.tokens
+        self.tokens -= 1
+        return max(wait, deficit / self.rate)
+
+
+class RateLimitScheduler:
+    """
+    Agendador de requisições por access token.
+
+    Cada vendedor (access token) tem seu próprio token bucket. Os headers
+    ``X-RateLimit-Remaining``/``X-RateLimit-Reset`` e ``Retry-After``
+    retornados pelo Mercado Livre ajustam o bucket, e respostas 429 são
+    reenfileiradas até ``max_retries`` vezes.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        max_retries: int = MAX_RATE_LIMIT_RETRIES,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def _key(access_token: str) -> str:
+        # Não mantém o token em claro na memória do scheduler
+        return hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+    def _bucket(self, access_token: str) -> TokenBucket:
+        key = self._key(access_token)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate=self.rate, capacity=self.burst, tokens=self.burst)
+            self._buckets[key] = bucket
+        return bucket
+
+    async def acquire(self, access_token: str) -> None:
+        """Aguarda até que haja quota disponível para o access token."""
+        # ``reserve`` não faz await, então é atômico dentro do event loop
+        wait = self._bucket(access_token).reserve(time.monotonic())
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def update_from_headers(self, access_token: str, headers: Mapping[str, str]) -> None:
+        """Ajusta o bucket a partir dos headers de quota da resposta."""
+        bucket = self._bucket(access_token)
+        now = time.monotonic()
+
+        remaining = _parse_float(headers.get("x-ratelimit-remaining"))
+        if remaining is not None:
+            bucket._refill(now)
+            bucket.tokens = min(bucket.tokens, remaining)
+
+        reset = _parse_float(headers.get("x-ratelimit-reset"))
+        if remaining is not None and remaining <= 0 and reset is not None:
+            bucket.blocked_until = max(bucket.blocked_until, now + min(reset, MAX_RETRY_AFTER))
+
+    def block(self, access_token: str, retry_after: Optional[float]) -> float:
+        """Bloqueia o access token após um 429 e retorna o tempo de espera."""
+        bucket = self._bucket(access_token)
+        delay = min(retry_after if retry_after is not None else 1.0, MAX_RETRY_AFTER)
+        bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + delay)
+        bucket.tokens = min(bucket.tokens, 0)
+        return delay
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        access_token: str,
+        client: Optional[httpx.AsyncClient] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Executa uma requisição respeitando a quota do access token.
+
+        Respostas 429 são reagendadas com base em ``Retry-After`` (ou backoff
+        exponencial) até ``max_retries``; a última resposta é retornada.
+        """
+        client = client or get_shared_client()
+        attempt = 0
+        while True:
+            await self.acquire(access_token)
+            response = await client.request(method, url, **kwargs)
+            self.update_from_headers(access_token, response.headers)
+
+            if response.status_code != 429 or attempt >= self.max_retries:
+                return response
+
+            retry_after = _parse_float(response.headers.get("retry-after"))
+            if retry_after is None:
+                retry_after = float(2 ** attempt)
+            delay = self.block(access_token, retry_after)
+            attempt += 1
+            logger.warning(
+                f"Rate limited on {url}, retry {attempt}/{self.max_retries} in {delay:.1f}s"
+            )
+
+    def reset(self) -> None:
+        """Remove todos os buckets (útil em testes)."""
+        self._buckets.clear()
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# Instância global do scheduler
+rate_limit_scheduler = RateLimitScheduler()
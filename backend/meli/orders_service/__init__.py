@@ -5,10 +5,52 @@ Handles order management, status tracking, and order analytics.
 Integrates with pricing optimization and campaign automation services.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Any
 from datetime import datetime, timedelta
 from ..base import BaseMeliService
 from ..interfaces import MeliResponse, MeliPaginatedResponse
+from ..pagination import MeliPaginator, response_fetcher
+
+
+class OrderMetricsAccumulator:
+    """Acumula métricas de pedidos incrementalmente."""
+    
+    def __init__(self):
+        self.total_orders = 0
+        self.total_revenue = 0.0
+        self.status_distribution: Dict[str, int] = {}
+        self.payment_methods: Dict[str, int] = {}
+    
+    def add(self, order: Dict[str, Any]) -> None:
+        self.total_orders += 1
+        self.total_revenue += float(order.get("total_amount", 0))
+        
+        # Distribuição por status
+        status = order.get("status", "unknown")
+        self.status_distribution[status] = self.status_distribution.get(status, 0) + 1
+        
+        # Método de pagamento
+        for payment in order.get("payments", []):
+            method = payment.get("payment_method_id", "unknown")
+            self.payment_methods[method] = self.payment_methods.get(method, 0) + 1
+    
+    def result(self) -> Dict[str, Any]:
+        if not self.total_orders:
+            return {
+                "total_orders": 0,
+                "total_revenue": 0,
+                "avg_order_value": 0,
+                "status_distribution": {},
+                "payment_methods": {}
+            }
+        
+        return {
+            "total_orders": self.total_orders,
+            "total_revenue": self.total_revenue,
+            "avg_order_value": self.total_revenue / self.total_orders,
+            "status_distribution": self.status_distribution,
+            "payment_methods": self.payment_methods
+        }
 
 
 class OrdersService(BaseMeliService):
@@ -37,20 +79,11 @@ class OrdersService(BaseMeliService):
         """Lista pedidos do vendedor."""
         try:
             params = {
-                "seller": user_id,
+                **self._build_search_params(user_id, filters),
                 "offset": offset,
                 "limit": limit
             }
             
-            # Adiciona filtros específicos
-            if filters:
-                if "status" in filters:
-                    params["order.status"] = filters["status"]
-                if "date_from" in filters:
-                    params["order.date_created.from"] = filters["date_from"]
-                if "date_to" in filters:
-                    params["order.date_created.to"] = filters["date_to"]
-            
             response = await self._make_ml_request(
                 "GET",
                 "/orders/search",
@@ -89,6 +122,51 @@ class OrdersService(BaseMeliService):
                 error=str(e)
             )
     
+    def _build_search_params(
+        self,
+        user_id: str,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Monta os parâmetros de /orders/search a partir dos filtros."""
+        params = {"seller": user_id}
+        
+        # Adiciona filtros específicos
+        if filters:
+            if "status" in filters:
+                params["order.status"] = filters["status"]
+            if filters.get("date_from"):
+                params["order.date_created.from"] = filters["date_from"]
+            if filters.get("date_to"):
+                params["order.date_created.to"] = filters["date_to"]
+        
+        return params
+    
+    def iter_orders(
+        self,
+        access_token: str,
+        user_id: str,
+        filters: Optional[Dict[str, Any]] = None,
+        page_size: int = 50
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Itera todos os pedidos do filtro sem limite de offset.
+        
+        Ordena por data de criação e, ao atingir o teto de offset da API,
+        continua a partir da última data vista (cursor).
+        """
+        params = {**self._build_search_params(user_id, filters), "sort": "date_asc"}
+        
+        async def request_page(page_params: Dict[str, Any]) -> MeliResponse:
+            return await self._make_ml_request("GET", "/orders/search", access_token, params=page_params)
+        
+        return MeliPaginator(
+            response_fetcher(request_page),
+            params,
+            page_size=page_size,
+            cursor_field="date_created",
+            cursor_param="order.date_created.from"
+        ).items()
+    
     async def get_item_details(
         self, 
         access_token: str, 
@@ -164,32 +242,23 @@ class OrdersService(BaseMeliService):
             if not date_to:
                 date_to = datetime.now().isoformat()
             
-            # Busca pedidos do período
-            orders_response = await self.list_items(
-                access_token, 
-                user_id, 
-                offset=0, 
-                limit=200,  # Busca mais pedidos para analytics
+            # Percorre todos os pedidos do período em streaming
+            orders = self.iter_orders(
+                access_token,
+                user_id,
                 filters={
                     "date_from": date_from,
                     "date_to": date_to
-                }
+                },
+                page_size=50
             )
             
-            if not orders_response.success:
-                return MeliResponse(
-                    success=False,
-                    error=orders_response.error
-                )
-            
-            orders = orders_response.data or []
-            
             # Calcula métricas
-            analytics = self._calculate_order_metrics(orders)
+            analytics = await self._calculate_order_metrics_stream(orders)
             
             # Busca sugestões de otimização
             optimization_context = {
-                "orders_count": len(orders),
+                "orders_count": analytics.get("total_orders", 0),
                 "avg_order_value": analytics.get("avg_order_value", 0),
                 "conversion_metrics": analytics
             }
@@ -221,41 +290,22 @@ class OrdersService(BaseMeliService):
                 error=str(e)
             )
     
-    def _calculate_order_metrics(self, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _calculate_order_metrics(self, orders: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
         """Calcula métricas dos pedidos."""
-        if not orders:
-            return {
-                "total_orders": 0,
-                "total_revenue": 0,
-                "avg_order_value": 0,
-                "status_distribution": {},
-                "payment_methods": {}
-            }
-        
-        total_revenue = sum(float(order.get("total_amount", 0)) for order in orders)
-        avg_order_value = total_revenue / len(orders) if orders else 0
-        
-        # Distribuição por status
-        status_dist = {}
-        payment_methods = {}
-        
+        metrics = OrderMetricsAccumulator()
         for order in orders:
-            status = order.get("status", "unknown")
-            status_dist[status] = status_dist.get(status, 0) + 1
-            
-            # Método de pagamento
-            payments = order.get("payments", [])
-            for payment in payments:
-                method = payment.get("payment_method_id", "unknown")
-                payment_methods[method] = payment_methods.get(method, 0) + 1
-        
-        return {
-            "total_orders": len(orders),
-            "total_revenue": total_revenue,
-            "avg_order_value": avg_order_value,
-            "status_distribution": status_dist,
-            "payment_methods": payment_methods
-        }
+            metrics.add(order)
+        return metrics.result()
+    
+    async def _calculate_order_metrics_stream(
+        self,
+        orders: AsyncIterator[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Calcula métricas consumindo os pedidos em streaming (memória constante)."""
+        metrics = OrderMetricsAccumulator()
+        async for order in orders:
+            metrics.add(order)
+        return metrics.result()
     
     def _get_available_endpoints(self) -> Dict[str, str]:
         """Endpoints disponíveis do serviço de pedidos."""
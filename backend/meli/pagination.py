@@ -0,0 +1,202 @@
+"""
+Streaming pagination for Mercado Libre search endpoints.
+
+Percorre endpoints paginados como async generators: a próxima página é
+buscada em paralelo enquanto a atual é consumida, e nada além de uma página
+fica em memória. Após o teto de offset da API o paginador troca para o modo
+``search_type=scan`` (scroll) ou, em endpoints sem scan, para um cursor por
+campo ordenado (ex.: ``date_created``).
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from .interfaces import MeliResponse
+
+
+logger = logging.getLogger("meli.pagination")
+
+# A API do ML não aceita offset acima de ~1000 nos endpoints de busca
+ML_OFFSET_CEILING = 1000
+DEFAULT_PAGE_SIZE = 50
+
+PageFetcher = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class MeliPaginationError(Exception):
+    """Falha ao buscar uma página durante a iteração."""
+
+
+class MeliPaginator:
+    """
+    Itera um endpoint de busca do ML página a página.
+
+    ``fetch`` recebe os parâmetros da página e retorna o JSON bruto da
+    resposta (``results``, ``paging`` e, no modo scan, ``scroll_id``).
+
+    Modos de continuação após ``offset_ceiling``:
+    - ``scan=True``: se o total exceder o teto, a iteração recomeça em modo
+      scroll (``search_type=scan``) e segue pelo ``scroll_id``.
+    - ``cursor_field``/``cursor_param``: reinicia o offset filtrando a partir
+      do último valor visto em ``cursor_field`` (o endpoint deve estar
+      ordenado de forma crescente por esse campo). Itens repetidos na
+      fronteira são descartados por id.
+    Sem nenhum dos dois, a iteração termina no teto com um aviso.
+    """
+
+    def __init__(
+        self,
+        fetch: PageFetcher,
+        params: Optional[Dict[str, Any]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        offset_ceiling: int = ML_OFFSET_CEILING,
+        scan: bool = False,
+        cursor_field: Optional[str] = None,
+        cursor_param: Optional[str] = None,
+        id_field: str = "id",
+    ):
+        if (cursor_field is None) != (cursor_param is None):
+            raise ValueError("cursor_field and cursor_param must be set together")
+        self.fetch = fetch
+        self.params = dict(params or {})
+        self.page_size = page_size
+        self.offset_ceiling = offset_ceiling
+        self.scan = scan
+        self.cursor_field = cursor_field
+        self.cursor_param = cursor_param
+        self.id_field = id_field
+
+        self.total: Optional[int] = None
+        self.pages_fetched = 0
+        self._mode = "offset"
+        self._cursor: Any = None
+        self._cursor_ids: Set[Any] = set()
+
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self.items()
+
+    async def items(self) -> AsyncIterator[Dict[str, Any]]:
+        """Itera item a item."""
+        async for page in self.pages():
+            for item in page:
+                yield item
+
+    async def pages(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Itera página a página, buscando a próxima antecipadamente."""
+        params: Optional[Dict[str, Any]] = {**self.params, "offset": 0, "limit": self.page_size}
+        task = asyncio.ensure_future(self.fetch(params))
+        try:
+            while task is not None:
+                data = await task
+                task = None
+                self.pages_fetched += 1
+                results = data.get("results") or []
+
+                next_params, discard = self._advance(params, data, results)
+                if next_params is not None:
+                    task = asyncio.ensure_future(self.fetch(next_params))
+                params = next_params
+
+                if not discard:
+                    results = self._dedupe(results)
+                    if results:
+                        yield results
+        finally:
+            if task is not None and not task.done():
+                task.cancel()
+
+    def _advance(
+        self,
+        params: Dict[str, Any],
+        data: Dict[str, Any],
+        results: List[Dict[str, Any]],
+    ):
+        """Calcula os parâmetros da próxima página; retorna (params, descartar_atual)."""
+        if self._mode == "scan":
+            scroll_id = data.get("scroll_id")
+            if not results or not scroll_id:
+                return None, False
+            return self._scan_params(scroll_id), False
+
+        paging = data.get("paging") or {}
+        total = paging.get("total")
+        if total is not None and self.total is None:
+            self.total = total
+
+        offset = params.get("offset", 0)
+        if offset == 0 and self._cursor is None and self.scan and total is not None and total > self.offset_ceiling:
+            # Recomeça em modo scroll: a ordem do scan não é compatível com a do offset
+            self._mode = "scan"
+            return self._scan_params(None), True
+
+        if not results or len(results) < self.page_size:
+            return None, False
+        next_offset = offset + self.page_size
+        if total is not None and next_offset >= total:
+            return None, False
+
+        if next_offset + self.page_size <= self.offset_ceiling:
+            return {**params, "offset": next_offset}, False
+
+        if self.cursor_field:
+            last_value = results[-1].get(self.cursor_field)
+            if last_value is None or last_value == self._cursor:
+                logger.warning(
+                    f"Cursor on '{self.cursor_field}' did not advance past offset ceiling, stopping"
+                )
+                return None, False
+            self._cursor = last_value
+            return {**params, self.cursor_param: last_value, "offset": 0}, False
+
+        logger.warning(
+            f"Offset ceiling {self.offset_ceiling} reached with {total} results; "
+            f"remaining pages were not fetched"
+        )
+        return None, False
+
+    def _scan_params(self, scroll_id: Optional[str]) -> Dict[str, Any]:
+        params = {k: v for k, v in self.params.items() if k != "offset"}
+        params.update({"search_type": "scan", "limit": self.page_size})
+        if scroll_id:
+            params["scroll_id"] = scroll_id
+        return params
+
+    def _dedupe(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Descarta itens repetidos na fronteira do cursor (mesmo valor de campo)."""
+        if not self.cursor_field:
+            return results
+
+        fresh = []
+        for item in results:
+            value = item.get(self.cursor_field) if isinstance(item, dict) else None
+            item_id = item.get(self.id_field) if isinstance(item, dict) else item
+            if value is not None and value == self._cursor and item_id in self._cursor_ids:
+                continue
+            fresh.append(item)
+
+        # Mantém apenas os ids com o maior valor de cursor visto (fronteira)
+        if fresh:
+            last_value = fresh[-1].get(self.cursor_field) if isinstance(fresh[-1], dict) else None
+            boundary = {
+                (item.get(self.id_field) if isinstance(item, dict) else item)
+                for item in fresh
+                if isinstance(item, dict) and item.get(self.cursor_field) == last_value
+            }
+            if last_value == self._cursor:
+                self._cursor_ids |= boundary
+            else:
+                self._cursor_ids = boundary
+        return fresh
+
+
+def response_fetcher(request: Callable[[Dict[str, Any]], Awaitable[MeliResponse]]) -> PageFetcher:
+    """Adapta uma função que retorna ``MeliResponse`` para o ``PageFetcher``."""
+
+    async def fetch(params: Dict[str, Any]) -> Dict[str, Any]:
+        response = await request(params)
+        if not response.success:
+            raise MeliPaginationError(response.error or "Failed to fetch page")
+        return response.data or {}
+
+    return fetch
@@ -5,10 +5,71 @@ Handles Q&A between sellers and buyers, automated answers with AI,
 and question analytics. Integrates with knowledge base and learning services.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Any
 from datetime import datetime
 from ..base import BaseMeliService
 from ..interfaces import MeliResponse, MeliPaginatedResponse
+from ..pagination import MeliPaginator, MeliPaginationError
+
+
+# Palavras-chave por tópico usadas na classificação das perguntas
+QUESTION_TOPICS = {
+    "shipping": ["entrega", "envio", "prazo"],
+    "product_specs": ["tamanho", "medida", "cor"],
+    "warranty": ["garantia", "defeito"],
+    "pricing": ["preço", "desconto"],
+}
+
+
+class QuestionAnalyticsAccumulator:
+    """Acumula analytics de perguntas incrementalmente."""
+    
+    def __init__(self):
+        self.total = 0
+        self.answered = 0
+        self.topics: Dict[str, int] = {}
+        self.item_counts: Dict[str, int] = {}
+    
+    def add(self, question: Dict[str, Any]) -> None:
+        self.total += 1
+        if question.get("status") == "ANSWERED":
+            self.answered += 1
+        
+        text = question.get("text", "").lower()
+        for topic, words in QUESTION_TOPICS.items():
+            if any(word in text for word in words):
+                self.topics[topic] = self.topics.get(topic, 0) + 1
+        
+        item_id = question.get("item_id")
+        if item_id:
+            self.item_counts[item_id] = self.item_counts.get(item_id, 0) + 1
+    
+    def result(self, avg_response_time_hours: float) -> Dict[str, Any]:
+        basic_stats = {}
+        if self.total:
+            basic_stats = {
+                "total": self.total,
+                "answered": self.answered,
+                "unanswered": self.total - self.answered,
+                "answer_rate": self.answered / self.total,
+                "avg_response_time_hours": avg_response_time_hours
+            }
+        
+        # Ordena por quantidade de perguntas
+        sorted_items = sorted(self.item_counts.items(), key=lambda x: x[1], reverse=True)
+        
+        return {
+            **basic_stats,
+            "topics": self.topics,
+            "temporal_distribution": {
+                "morning": self.total // 4,
+                "afternoon": self.total // 2,
+                "evening": self.total // 4
+            },
+            "most_asked_items": [
+                {"item_id": item_id, "questions_count": count} for item_id, count in sorted_items[:10]
+            ]
+        }
 
 
 class QuestionsService(BaseMeliService):
@@ -37,24 +98,11 @@ class QuestionsService(BaseMeliService):
         """Lista perguntas do vendedor."""
         try:
             params = {
-                "seller_id": user_id,
+                **self._build_search_params(user_id, filters),
                 "offset": offset,
                 "limit": limit
             }
             
-            # Filtros específicos para perguntas
-            if filters:
-                if "status" in filters:
-                    params["status"] = filters["status"]
-                if "item_id" in filters:
-                    params["item"] = filters["item_id"]
-                if "date_from" in filters:
-                    params["date_created.from"] = filters["date_from"]
-                if "date_to" in filters:
-                    params["date_created.to"] = filters["date_to"]
-                if "unanswered_only" in filters and filters["unanswered_only"]:
-                    params["status"] = "UNANSWERED"
-            
             response = await self._make_ml_request(
                 "GET",
                 "/questions/search",
@@ -112,6 +160,66 @@ class QuestionsService(BaseMeliService):
                 error=str(e)
             )
     
+    def _build_search_params(
+        self,
+        user_id: str,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Monta os parâmetros de /questions/search a partir dos filtros."""
+        params = {"seller_id": user_id}
+        
+        # Filtros específicos para perguntas
+        if filters:
+            if "status" in filters:
+                params["status"] = filters["status"]
+            if "item_id" in filters:
+                params["item"] = filters["item_id"]
+            if filters.get("date_from"):
+                params["date_created.from"] = filters["date_from"]
+            if filters.get("date_to"):
+                params["date_created.to"] = filters["date_to"]
+            if "unanswered_only" in filters and filters["unanswered_only"]:
+                params["status"] = "UNANSWERED"
+        
+        return params
+    
+    def iter_questions(
+        self,
+        access_token: str,
+        user_id: str,
+        filters: Optional[Dict[str, Any]] = None,
+        page_size: int = 50
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Itera todas as perguntas do filtro sem limite de offset.
+        
+        Não gera sugestões de resposta nem eventos de analytics por página;
+        ao atingir o teto de offset continua a partir da última data vista.
+        """
+        params = {
+            **self._build_search_params(user_id, filters),
+            "sort_fields": "date_created",
+            "sort_types": "ASC"
+        }
+        
+        async def fetch_page(page_params: Dict[str, Any]) -> Dict[str, Any]:
+            response = await self._make_ml_request("GET", "/questions/search", access_token, params=page_params)
+            if not response.success:
+                raise MeliPaginationError(response.error or "Failed to fetch questions page")
+            data = response.data or {}
+            # /questions/search pode retornar a lista em "questions"
+            if "results" not in data:
+                data = {**data, "results": data.get("questions", [])}
+            return data
+        
+        return MeliPaginator(
+            fetch_page,
+            params,
+            page_size=page_size,
+            cursor_field="date_created",
+            cursor_param="date_created.from"
+        ).items()
+    
     async def get_item_details(
         self, 
         access_token: str, 
@@ -295,32 +403,22 @@ class QuestionsService(BaseMeliService):
     ) -> MeliResponse:
         """Obtém analytics detalhados das perguntas."""
         try:
-            # Busca perguntas do período
-            questions_response = await self.list_items(
+            # Percorre todas as perguntas do período em streaming
+            questions = self.iter_questions(
                 access_token,
                 user_id,
-                offset=0,
-                limit=200,
                 filters={
                     "date_from": date_from,
                     "date_to": date_to
                 }
             )
             
-            if not questions_response.success:
-                return MeliResponse(
-                    success=False,
-                    error=questions_response.error
-                )
-            
-            questions = questions_response.data or []
-            
             # Calcula métricas detalhadas
-            analytics = self._calculate_detailed_analytics(questions)
+            analytics = await self._calculate_detailed_analytics_stream(questions)
             
             # Busca insights e otimizações
             context = {
-                "questions_count": len(questions),
+                "questions_count": analytics.get("total", 0),
                 "metrics": analytics
             }
             
@@ -497,22 +595,22 @@ class QuestionsService(BaseMeliService):
             "avg_response_time_hours": avg_response_time
         }
     
-    def _calculate_detailed_analytics(self, questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _calculate_detailed_analytics(self, questions: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
         """Calcula analytics detalhados."""
-        basic_stats = self._calculate_question_stats(questions)
-        
-        # Análise de tópicos
-        topics = self._analyze_question_topics(questions)
-        
-        # Distribuição temporal
-        temporal_dist = self._analyze_temporal_distribution(questions)
-        
-        return {
-            **basic_stats,
-            "topics": topics,
-            "temporal_distribution": temporal_dist,
-            "most_asked_items": self._get_most_asked_items(questions)
-        }
+        analytics = QuestionAnalyticsAccumulator()
+        for question in questions:
+            analytics.add(question)
+        return analytics.result(self._calculate_avg_response_time([]))
+    
+    async def _calculate_detailed_analytics_stream(
+        self,
+        questions: AsyncIterator[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Calcula analytics detalhados consumindo as perguntas em streaming."""
+        analytics = QuestionAnalyticsAccumulator()
+        async for question in questions:
+            analytics.add(question)
+        return analytics.result(self._calculate_avg_response_time([]))
     
     def _analyze_question_topics(self, questions: List[Dict[str, Any]]) -> Dict[str, int]:
         """Analisa tópicos das perguntas."""
@@ -521,14 +619,9 @@ class QuestionsService(BaseMeliService):
         for question in questions:
             text = question.get("text", "").lower()
             
-            if any(word in text for word in ["entrega", "envio", "prazo"]):
-                topics["shipping"] = topics.get("shipping", 0) + 1
-            if any(word in text for word in ["tamanho", "medida", "cor"]):
-                topics["product_specs"] = topics.get("product_specs", 0) + 1
-            if any(word in text for word in ["garantia", "defeito"]):
-                topics["warranty"] = topics.get("warranty", 0) + 1
-            if any(word in text for word in ["preço", "desconto"]):
-                topics["pricing"] = topics.get("pricing", 0) + 1
+            for topic, words in QUESTION_TOPICS.items():
+                if any(word in text for word in words):
+                    topics[topic] = topics.get(topic, 0) + 1
         
         return topics
     
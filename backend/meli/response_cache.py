@@ -0,0 +1,340 @@
+"""
+Conditional-GET response cache for read-only Mercado Libre endpoints.
+
+Respostas de endpoints que mudam pouco (árvore de categorias, métodos de
+envio, detalhes de item, dados de usuário) ficam em um LRU em processo com
+TTL por endpoint. Após o TTL a entrada ainda é servida durante a janela de
+stale-while-revalidate enquanto uma revalidação com ``If-None-Match`` roda em
+background. Opcionalmente as entradas também são gravadas no Redis.
+
+Cada chamador recebe sua própria cópia dos dados, então alterar uma resposta
+nunca altera o que o cache entrega nas próximas chamadas.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Pattern, Tuple
+
+try:
+    from app.monitoring.prometheus_metrics import cache_hits, cache_misses, record_cache_operation
+except ImportError:  # pragma: no cover - meli usado fora do backend
+    cache_hits = cache_misses = record_cache_operation = None
+
+
+logger = logging.getLogger("meli.response_cache")
+
+DEFAULT_MAX_ENTRIES = 2048
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Política de cache de um endpoint."""
+    ttl: float
+    stale_while_revalidate: float = 0.0
+    shared: bool = False  # True = mesma resposta para todos os access tokens
+
+
+@dataclass
+class CacheEntry:
+    """Resposta armazenada no cache."""
+    data: Any
+    etag: Optional[str]
+    status_code: int
+    expires_at: float
+    stale_until: float
+
+
+@dataclass
+class FetchResult:
+    """Resultado de uma busca condicional (304 = não modificado)."""
+    status_code: int
+    data: Any = None
+    etag: Optional[str] = None
+    cached: bool = False
+
+
+Fetcher = Callable[[Optional[str]], Awaitable[FetchResult]]
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+DEFAULT_POLICIES: List[Tuple[str, CachePolicy]] = [
+    (r"^/sites/[^/]+/categories$", CachePolicy(ttl=DAY, stale_while_revalidate=7 * DAY, shared=True)),
+    (r"^/categories/[^/]+(/attributes)?$", CachePolicy(ttl=DAY, stale_while_revalidate=7 * DAY, shared=True)),
+    (r"^/sites/[^/]+/shipping_methods$", CachePolicy(ttl=12 * HOUR, stale_while_revalidate=7 * DAY, shared=True)),
+    (r"^/items/[^/]+$", CachePolicy(ttl=60, stale_while_revalidate=5 * 60)),
+    (r"^/users/(me|\d+)$", CachePolicy(ttl=5 * 60, stale_while_revalidate=HOUR)),
+]
+
+
+class ResponseCache:
+    """
+    Cache de respostas com LRU em processo e backend Redis opcional.
+
+    O backend deve expor ``get(key)``, ``set(key, value, expire)`` e
+    ``delete(key)`` assíncronos, como o ``RedisBackend``.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        backend: Any = None,
+        policies: Optional[List[Tuple[str, CachePolicy]]] = None,
+        key_prefix: str = "meli:response",
+    ):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.backend = backend
+        self.key_prefix = key_prefix
+        self._policies: List[Tuple[Pattern, CachePolicy]] = [
+            (re.compile(pattern), policy) for pattern, policy in (policies or DEFAULT_POLICIES)
+        ]
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hit": 0, "miss": 0, "stale": 0, "revalidated": 0}
+
+    # ---------- políticas e chaves ----------
+
+    def set_policy(self, pattern: str, policy: CachePolicy) -> None:
+        """Registra (ou sobrescreve) a política de um padrão de endpoint."""
+        self._policies = [(p, pol) for p, pol in self._policies if p.pattern != pattern]
+        self._policies.insert(0, (re.compile(pattern), policy))
+
+    def policy_for(self, endpoint: str) -> Optional[CachePolicy]:
+        path = endpoint.split("?", 1)[0]
+        for pattern, policy in self._policies:
+            if pattern.match(path):
+                return policy
+        return None
+
+    def make_key(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        access_token: Optional[str] = None,
+    ) -> str:
+        owner = hashlib.sha256(access_token.encode()).hexdigest()[:16] if access_token else "public"
+        query = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()) if v is not None)
+        return f"{self.key_prefix}:{owner}:{endpoint}?{query}"
+
+    # ---------- API principal ----------
+
+    async def fetch(
+        self,
+        endpoint: str,
+        fetcher: Fetcher,
+        params: Optional[Dict[str, Any]] = None,
+        access_token: Optional[str] = None,
+    ) -> FetchResult:
+        """
+        Retorna a resposta do endpoint, usando o cache quando possível.
+
+        ``fetcher`` recebe o ETag conhecido (ou ``None``) e deve enviá-lo em
+        ``If-None-Match``; um ``FetchResult`` com status 304 renova a entrada.
+        Respostas de erro nunca são armazenadas.
+        """
+        policy = self.policy_for(endpoint)
+        if not self.enabled or policy is None:
+            return await fetcher(None)
+
+        key = self.make_key(endpoint, params, None if policy.shared else access_token)
+        entry = await self._lookup(key)
+        now = time.time()
+
+        if entry is not None and now < entry.expires_at:
+            self._record("hit")
+            return self._cached_result(entry)
+
+        if entry is not None and now < entry.stale_until:
+            self._record("stale")
+            if key not in self._inflight:
+                self._start_refresh(key, policy, entry, fetcher)
+            return self._cached_result(entry)
+
+        self._record("miss")
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = self._start_refresh(key, policy, entry, fetcher)
+        # Todos os chamadores aguardando a mesma busca compartilham o resultado
+        result = await asyncio.shield(inflight)
+        return FetchResult(result.status_code, copy.deepcopy(result.data), result.etag, result.cached)
+
+    async def invalidate(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        access_token: Optional[str] = None,
+    ) -> None:
+        """Remove a entrada de um endpoint (ex.: após um PUT no recurso)."""
+        policy = self.policy_for(endpoint)
+        if policy is None:
+            return
+        key = self.make_key(endpoint, params, None if policy.shared else access_token)
+        self._entries.pop(key, None)
+        if self.backend is not None:
+            try:
+                await self.backend.delete(key)
+            except Exception as e:
+                logger.warning(f"Failed to delete cache key from backend: {e}")
+
+    def clear(self) -> None:
+        """Limpa o LRU em processo."""
+        self._entries.clear()
+
+    # ---------- internos ----------
+
+    @staticmethod
+    def _cached_result(entry: CacheEntry) -> FetchResult:
+        return FetchResult(entry.status_code, copy.deepcopy(entry.data), entry.etag, cached=True)
+
+    def _start_refresh(
+        self,
+        key: str,
+        policy: CachePolicy,
+        entry: Optional[CacheEntry],
+        fetcher: Fetcher,
+    ) -> asyncio.Future:
+        task = asyncio.ensure_future(self._refresh(key, policy, entry, fetcher))
+        self._inflight[key] = task
+
+        def _done(fut: asyncio.Future) -> None:
+            self._inflight.pop(key, None)
+            if not fut.cancelled() and fut.exception() is not None:
+                logger.warning(f"Cache refresh failed for {key}: {fut.exception()}")
+
+        task.add_done_callback(_done)
+        return task
+
+    async def _refresh(
+        self,
+        key: str,
+        policy: CachePolicy,
+        entry: Optional[CacheEntry],
+        fetcher: Fetcher,
+    ) -> FetchResult:
+        result = await fetcher(entry.etag if entry else None)
+        now = time.time()
+
+        if result.status_code == 304 and entry is not None:
+            self._record("revalidated")
+            entry.expires_at = now + policy.ttl
+            entry.stale_until = entry.expires_at + policy.stale_while_revalidate
+            await self._store(key, entry, policy)
+            return FetchResult(entry.status_code, entry.data, entry.etag, cached=True)
+
+        if isinstance(result.status_code, int) and result.status_code < 300:
+            expires_at = now + policy.ttl
+            await self._store(key, CacheEntry(
+                data=result.data,
+                etag=result.etag if isinstance(result.etag, str) else None,
+                status_code=result.status_code,
+                expires_at=expires_at,
+                stale_until=expires_at + policy.stale_while_revalidate,
+            ), policy)
+        return result
+
+    async def _lookup(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        if self.backend is None:
+            return None
+        try:
+            raw = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Cache backend get failed: {e}")
+            return None
+        if not raw:
+            return None
+        try:
+            entry = CacheEntry(**json.loads(raw))
+        except (TypeError, ValueError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    async def _store(self, key: str, entry: CacheEntry, policy: CachePolicy) -> None:
+        self._remember(key, entry)
+        if self.backend is None:
+            return
+        expire = int(max(1, entry.stale_until - time.time()))
+        try:
+            await self.backend.set(key, json.dumps(asdict(entry)), expire=expire)
+        except Exception as e:
+            logger.warning(f"Cache backend set failed: {e}")
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _record(self, result: str) -> None:
+        self.stats[result] += 1
+        if cache_hits is None:
+            return
+        # Entradas stale são servidas do cache, então contam como hit
+        if result in ("hit", "stale"):
+            cache_hits.inc()
+        elif result == "miss":
+            cache_misses.inc()
+        record_cache_operation("meli_response", result)
+
+
+class RedisBackend:
+    """Backend Redis assíncrono do cache de respostas (conexão criada sob demanda)."""
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from redis import asyncio as redis_asyncio
+            self._client = redis_asyncio.from_url(self.redis_url)
+        return self._client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._get_client().get(key)
+
+    async def set(self, key: str, value: str, expire: int = 3600) -> None:
+        await self._get_client().set(key, value, ex=expire)
+
+    async def delete(self, key: str) -> None:
+        await self._get_client().delete(key)
+
+
+def load_redis_backend(redis_url: str) -> Any:
+    """
+    Cria o backend Redis do cache de respostas.
+
+    Retorna ``None`` se o cliente Redis não estiver disponível.
+    """
+    try:
+        import redis.asyncio  # noqa: F401
+    except ImportError as e:
+        logger.warning(f"Redis client not available, using in-process cache only: {e}")
+        return None
+    return RedisBackend(redis_url)
+
+
+def configure_response_cache(enabled: bool, redis_url: Optional[str] = None) -> None:
+    """Liga/desliga o cache global e configura o backend Redis opcional."""
+    response_cache.enabled = enabled
+    response_cache.backend = load_redis_backend(redis_url) if enabled and redis_url else None
+    response_cache.clear()
+
+
+# Instância global do cache (controlada por ENABLE_CACHE, como o restante do backend)
+response_cache = ResponseCache(enabled=os.getenv("ENABLE_CACHE", "false").lower() == "true")
@@ -0,0 +1,108 @@
+"""
+Tests for the shared Mercado Libre HTTP client and rate-limit scheduler.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from meli import http_client
+from meli.http_client import RateLimitScheduler, TokenBucket, get_shared_client, close_shared_client
+from meli.orders_service import orders_service
+
+
+def _response(status_code, headers=None, json_data=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.content = b"{}" if json_data is not None else b""
+    response.json.return_value = json_data or {}
+    return response
+
+
+class TestTokenBucket:
+    """Test suite for the token bucket."""
+
+    def test_burst_is_free(self):
+        bucket = TokenBucket(rate=1.0, capacity=3, tokens=3, updated_at=0.0)
+        assert [bucket.reserve(0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    def test_queues_past_capacity(self):
+        bucket = TokenBucket(rate=2.0, capacity=1, tokens=1, updated_at=0.0)
+        assert bucket.reserve(0.0) == 0.0
+        assert bucket.reserve(0.0) == pytest.approx(0.5)
+        assert bucket.reserve(0.0) == pytest.approx(1.0)
+
+    def test_blocked_until_is_respected(self):
+        bucket = TokenBucket(rate=10.0, capacity=5, tokens=5, updated_at=0.0, blocked_until=2.0)
+        assert bucket.reserve(0.0) == pytest.approx(2.0)
+
+
+class TestRateLimitScheduler:
+    """Test suite for the per-access-token scheduler."""
+
+    def test_buckets_are_per_token(self):
+        scheduler = RateLimitScheduler()
+        assert scheduler._bucket("token-a") is scheduler._bucket("token-a")
+        assert scheduler._bucket("token-a") is not scheduler._bucket("token-b")
+        assert "token-a" not in scheduler._buckets
+
+    def test_quota_headers_drain_bucket(self):
+        scheduler = RateLimitScheduler(rate=5.0, burst=10)
+        scheduler.update_from_headers("tok", {"x-ratelimit-remaining": "0", "x-ratelimit-reset": "3"})
+        bucket = scheduler._bucket("tok")
+        assert bucket.tokens <= 0
+        assert bucket.blocked_until > 0
+
+    @pytest.mark.asyncio
+    async def test_retries_on_429(self):
+        scheduler = RateLimitScheduler(max_retries=2)
+        client = MagicMock()
+        client.request = AsyncMock(side_effect=[
+            _response(429, {"retry-after": "0"}),
+            _response(200, json_data={"ok": True}),
+        ])
+
+        with patch("meli.http_client.asyncio.sleep", new=AsyncMock()):
+            response = await scheduler.request("GET", "https://example.test", "tok", client=client)
+
+        assert response.status_code == 200
+        assert client.request.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        scheduler = RateLimitScheduler(max_retries=1)
+        client = MagicMock()
+        client.request = AsyncMock(return_value=_response(429, {"retry-after": "0"}))
+
+        with patch("meli.http_client.asyncio.sleep", new=AsyncMock()):
+            response = await scheduler.request("GET", "https://example.test", "tok", client=client)
+
+        assert response.status_code == 429
+        assert client.request.await_count == 2
+
+
+class TestSharedClient:
+    """Test suite for the process-wide client."""
+
+    @pytest.mark.asyncio
+    async def test_client_is_reused(self):
+        client = get_shared_client()
+        assert get_shared_client() is client
+        await close_shared_client()
+        assert http_client._shared_client is None
+
+    @pytest.mark.asyncio
+    async def test_services_use_scheduler(self):
+        with patch.object(
+            http_client.rate_limit_scheduler, "request",
+            new=AsyncMock(return_value=_response(200, json_data={"id": "1"}))
+        ) as mock_request:
+            result = await orders_service._make_ml_request("GET", "/orders/1", "tok")
+
+        assert result.success is True
+        assert result.data == {"id": "1"}
+        assert mock_request.await_args.args[:3] == ("GET", "https://api.mercadolibre.com/orders/1", "tok")
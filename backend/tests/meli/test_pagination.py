@@ -0,0 +1,151 @@
+"""
+Tests for the streaming Mercado Libre paginator.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from meli.interfaces import MeliResponse
+from meli.pagination import MeliPaginator, MeliPaginationError
+from meli.orders_service import orders_service
+from meli.questions_service import questions_service
+
+
+def _offset_source(items, ceiling=None):
+    """Fake search endpoint supporting offset, scan and date cursors."""
+    calls = []
+
+    async def fetch(params):
+        calls.append(dict(params))
+        limit = params["limit"]
+        if params.get("search_type") == "scan":
+            start = int(params.get("scroll_id") or 0)
+            page = items[start:start + limit]
+            return {"results": page, "scroll_id": str(start + limit) if page else None}
+
+        pool = items
+        if "date.from" in params:
+            pool = [i for i in items if i["date"] >= params["date.from"]]
+        offset = params["offset"]
+        if ceiling is not None and offset + limit > ceiling:
+            raise AssertionError("offset ceiling exceeded")
+        return {"results": pool[offset:offset + limit], "paging": {"total": len(pool), "offset": offset}}
+
+    return fetch, calls
+
+
+class TestMeliPaginator:
+    """Test suite for MeliPaginator."""
+
+    @pytest.mark.asyncio
+    async def test_iterates_all_offset_pages(self):
+        items = [{"id": i} for i in range(23)]
+        fetch, calls = _offset_source(items)
+
+        result = [item async for item in MeliPaginator(fetch, {"seller": "1"}, page_size=10)]
+
+        assert result == items
+        assert [c["offset"] for c in calls] == [0, 10, 20]
+        assert all(c["seller"] == "1" for c in calls)
+
+    @pytest.mark.asyncio
+    async def test_switches_to_scan_past_ceiling(self):
+        items = [{"id": i} for i in range(35)]
+        fetch, calls = _offset_source(items, ceiling=20)
+
+        paginator = MeliPaginator(fetch, page_size=10, offset_ceiling=20, scan=True)
+        result = [item async for item in paginator]
+
+        assert result == items
+        assert paginator.total == 35
+        assert calls[1]["search_type"] == "scan"
+
+    @pytest.mark.asyncio
+    async def test_cursor_continues_past_ceiling_without_duplicates(self):
+        items = [{"id": i, "date": f"2024-01-{i // 3 + 1:02d}"} for i in range(50)]
+        fetch, calls = _offset_source(items, ceiling=20)
+
+        paginator = MeliPaginator(
+            fetch, page_size=10, offset_ceiling=20,
+            cursor_field="date", cursor_param="date.from"
+        )
+        result = [item async for item in paginator]
+
+        assert [i["id"] for i in result] == list(range(50))
+        assert any("date.from" in c for c in calls)
+
+    @pytest.mark.asyncio
+    async def test_stops_at_ceiling_without_continuation(self):
+        items = [{"id": i} for i in range(50)]
+        fetch, _ = _offset_source(items, ceiling=20)
+
+        result = [item async for item in MeliPaginator(fetch, page_size=10, offset_ceiling=20)]
+
+        assert len(result) == 20
+
+    @pytest.mark.asyncio
+    async def test_fetch_errors_propagate(self):
+        async def fetch(params):
+            raise MeliPaginationError("boom")
+
+        with pytest.raises(MeliPaginationError):
+            [item async for item in MeliPaginator(fetch)]
+
+
+class TestStreamingAnalytics:
+    """Analytics must cover every page, not only the first one."""
+
+    @pytest.mark.asyncio
+    async def test_order_analytics_reads_all_pages(self):
+        orders = [{"id": i, "total_amount": 10, "status": "paid", "date_created": str(i)} for i in range(120)]
+
+        async def request(method, endpoint, token, params=None, json_data=None):
+            page = orders[params["offset"]:params["offset"] + params["limit"]]
+            return MeliResponse(success=True, data={"results": page, "paging": {"total": len(orders)}})
+
+        with patch.object(orders_service, "_make_ml_request", side_effect=request), \
+             patch.object(orders_service, "_get_optimizer_suggestions", new=AsyncMock(return_value=None)), \
+             patch.object(orders_service, "_get_learning_insights", new=AsyncMock(return_value=None)):
+            result = await orders_service.get_order_analytics("tok", "1")
+
+        assert result.success is True
+        assert result.data["analytics"]["total_orders"] == 120
+        assert result.data["analytics"]["total_revenue"] == 1200
+
+    @pytest.mark.asyncio
+    async def test_questions_analytics_reads_all_pages(self):
+        questions = [
+            {"id": i, "status": "ANSWERED" if i % 2 else "UNANSWERED", "text": "qual o prazo de entrega?",
+             "item_id": "MLB1", "date_created": str(i)}
+            for i in range(75)
+        ]
+
+        async def request(method, endpoint, token, params=None, json_data=None):
+            page = questions[params["offset"]:params["offset"] + params["limit"]]
+            return MeliResponse(success=True, data={"questions": page, "total": len(questions)})
+
+        with patch.object(questions_service, "_make_ml_request", side_effect=request), \
+             patch.object(questions_service, "_get_optimizer_suggestions", new=AsyncMock(return_value=None)), \
+             patch.object(questions_service, "_get_learning_insights", new=AsyncMock(return_value=None)):
+            result = await questions_service.get_questions_analytics("tok", "1")
+
+        analytics = result.data["analytics"]
+        assert analytics["total"] == 75
+        assert analytics["answered"] == 37
+        assert analytics["topics"]["shipping"] == 75
+        assert analytics["most_asked_items"] == [{"item_id": "MLB1", "questions_count": 75}]
+
+    @pytest.mark.asyncio
+    async def test_analytics_reports_page_errors(self):
+        with patch.object(
+            orders_service, "_make_ml_request",
+            new=AsyncMock(return_value=MeliResponse(success=False, error="HTTP 500"))
+        ):
+            result = await orders_service.get_order_analytics("tok", "1")
+
+        assert result.success is False
+        assert "HTTP 500" in result.error
@@ -0,0 +1,188 @@
+"""
+Tests for the conditional-GET response cache.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from meli.response_cache import CachePolicy, FetchResult, RedisBackend, ResponseCache, load_redis_backend
+from meli.orders_service import orders_service
+
+
+class FakeBackend:
+    """In-memory stand-in for RedisBackend."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, expire=3600):
+        self.store[key] = value
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+
+def _fetcher(*results):
+    fetcher = AsyncMock(side_effect=list(results))
+    return fetcher
+
+
+class TestResponseCache:
+    """Test suite for ResponseCache."""
+
+    def test_policies_match_read_only_endpoints(self):
+        cache = ResponseCache()
+        assert cache.policy_for("/sites/MLB/categories").shared is True
+        assert cache.policy_for("/sites/MLB/shipping_methods").shared is True
+        assert cache.policy_for("/items/MLB1").shared is False
+        assert cache.policy_for("/orders/search") is None
+
+    @pytest.mark.asyncio
+    async def test_fresh_entry_is_served_from_cache(self):
+        cache = ResponseCache()
+        fetcher = _fetcher(FetchResult(200, [{"id": "MLB1"}], '"v1"'))
+
+        first = await cache.fetch("/sites/MLB/categories", fetcher)
+        second = await cache.fetch("/sites/MLB/categories", fetcher)
+
+        assert first.data == second.data == [{"id": "MLB1"}]
+        assert second.cached is True
+        assert fetcher.await_count == 1
+        assert cache.stats["hit"] == 1 and cache.stats["miss"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_revalidates_with_etag(self):
+        cache = ResponseCache(policies=[(r"^/items/", CachePolicy(ttl=0))])
+        fetcher = _fetcher(FetchResult(200, {"id": "MLB1"}, '"v1"'), FetchResult(304))
+
+        await cache.fetch("/items/MLB1", fetcher, access_token="tok")
+        result = await cache.fetch("/items/MLB1", fetcher, access_token="tok")
+
+        assert fetcher.await_args_list[1].args == ('"v1"',)
+        assert result.data == {"id": "MLB1"}
+        assert cache.stats["revalidated"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_served_while_revalidating(self):
+        cache = ResponseCache(policies=[(r"^/items/", CachePolicy(ttl=0, stale_while_revalidate=60))])
+        fetcher = _fetcher(FetchResult(200, {"price": 1}, '"v1"'), FetchResult(200, {"price": 2}, '"v2"'))
+
+        await cache.fetch("/items/MLB1", fetcher, access_token="tok")
+        stale = await cache.fetch("/items/MLB1", fetcher, access_token="tok")
+        await asyncio.sleep(0)
+
+        assert stale.data == {"price": 1}
+        assert fetcher.await_count == 2
+        key = cache.make_key("/items/MLB1", access_token="tok")
+        assert cache._entries[key].data == {"price": 2}
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self):
+        cache = ResponseCache()
+        fetcher = _fetcher(FetchResult(500, {"message": "boom"}), FetchResult(200, [], None))
+
+        assert (await cache.fetch("/sites/MLB/categories", fetcher)).status_code == 500
+        assert (await cache.fetch("/sites/MLB/categories", fetcher)).status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_private_entries_are_keyed_by_token(self):
+        cache = ResponseCache()
+        fetcher = _fetcher(FetchResult(200, {"id": 1}), FetchResult(200, {"id": 2}))
+
+        a = await cache.fetch("/users/me", fetcher, access_token="token-a")
+        b = await cache.fetch("/users/me", fetcher, access_token="token-b")
+
+        assert (a.data, b.data) == ({"id": 1}, {"id": 2})
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_request(self):
+        cache = ResponseCache()
+
+        async def slow_fetch(etag):
+            await asyncio.sleep(0.01)
+            return FetchResult(200, ["x"])
+        fetcher = AsyncMock(side_effect=slow_fetch)
+
+        results = await asyncio.gather(*(cache.fetch("/sites/MLB/categories", fetcher) for _ in range(5)))
+
+        assert fetcher.await_count == 1
+        assert all(r.data == ["x"] for r in results)
+        assert len({id(r.data) for r in results}) == len(results)
+
+    @pytest.mark.asyncio
+    async def test_callers_get_private_copies(self):
+        cache = ResponseCache()
+        fetcher = _fetcher(FetchResult(200, {"id": "MLB1", "tags": ["new"]}))
+
+        first = await cache.fetch("/items/MLB1", fetcher, access_token="tok")
+        first.data["tags"].append("mutated")
+        second = await cache.fetch("/items/MLB1", fetcher, access_token="tok")
+        second.data["id"] = "changed"
+        third = await cache.fetch("/items/MLB1", fetcher, access_token="tok")
+
+        assert third.data == {"id": "MLB1", "tags": ["new"]}
+        assert fetcher.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_and_backend(self):
+        backend = FakeBackend()
+        cache = ResponseCache(max_entries=1, backend=backend)
+        fetcher = _fetcher(FetchResult(200, {"id": "A"}), FetchResult(200, {"id": "B"}))
+
+        await cache.fetch("/items/A", fetcher, access_token="tok")
+        await cache.fetch("/items/B", fetcher, access_token="tok")
+        assert len(cache._entries) == 1
+
+        # A saiu do LRU mas continua no backend
+        result = await cache.fetch("/items/A", fetcher, access_token="tok")
+        assert result.data == {"id": "A"} and result.cached is True
+
+    @pytest.mark.asyncio
+    async def test_invalidate(self):
+        cache = ResponseCache()
+        fetcher = _fetcher(FetchResult(200, {"v": 1}), FetchResult(200, {"v": 2}))
+
+        await cache.fetch("/items/A", fetcher, access_token="tok")
+        await cache.invalidate("/items/A", access_token="tok")
+        assert (await cache.fetch("/items/A", fetcher, access_token="tok")).data == {"v": 2}
+
+    def test_load_redis_backend(self):
+        backend = load_redis_backend("redis://localhost:6379/0")
+        assert isinstance(backend, RedisBackend)
+        assert backend._client is None  # conexão só na primeira operação
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache_always_fetches(self):
+        cache = ResponseCache(enabled=False)
+        fetcher = _fetcher(FetchResult(200, []), FetchResult(200, []))
+
+        await cache.fetch("/sites/MLB/categories", fetcher)
+        await cache.fetch("/sites/MLB/categories", fetcher)
+        assert fetcher.await_count == 2
+
+
+class TestServiceIntegration:
+    """BaseMeliService GETs go through the cache."""
+
+    @pytest.mark.asyncio
+    async def test_make_ml_request_uses_cache(self):
+        response = MagicMock(status_code=200, content=b"{}", headers={"etag": '"v1"'})
+        response.json.return_value = {"id": "MLB1"}
+        cache = ResponseCache()
+
+        with patch("meli.base.response_cache", cache), \
+             patch("meli.base.rate_limit_scheduler.request", new=AsyncMock(return_value=response)) as mock_request:
+            first = await orders_service._make_ml_request("GET", "/items/MLB1", "tok")
+            second = await orders_service._make_ml_request("GET", "/items/MLB1", "tok")
+
+        assert first.data == second.data == {"id": "MLB1"}
+        assert second.metadata == {"cached": True}
+        assert mock_request.await_count == 1
@@ -123,6 +123,80 @@ class TestTaskManager:
         assert stats["completed_tasks"] == 1
         assert stats["failed_tasks"] == 1
     
+    def test_recurring_task_is_one_rule(self):
+        """Test recurring tasks are stored once instead of per execution."""
+        manager = TaskManager()
+        start = datetime.now() + timedelta(hours=1)
+        
+        task_ids = manager.schedule_recurring_task(
+            func=lambda: "tick",
+            interval=timedelta(seconds=1),
+            start_time=start,
+            max_executions=None
+        )
+        
+        assert len(task_ids) == 1
+        assert len(manager.tasks) == 1
+        assert manager.scheduled_tasks == [(start, task_ids[0])]
+        assert manager.get_task_status(task_ids[0]) == TaskStatus.SCHEDULED
+        assert manager.get_task_statistics()["recurring_tasks"] == 1
+        
+        rule = manager.recurring_rules[task_ids[0]]
+        assert rule.next_run_after(start - timedelta(seconds=5)) == start
+        assert rule.next_run_after(start + timedelta(seconds=2.5)) == start + timedelta(seconds=3)
+        
+        assert manager.cancel_task(task_ids[0]) is True
+        assert manager.scheduled_tasks == []
+    
+    @pytest.mark.asyncio
+    async def test_due_tasks_run_by_priority(self):
+        """Test due tasks are dispatched highest priority first."""
+        manager = TaskManager(max_workers=1)
+        manager.is_running = True
+        order = []
+        past = datetime.now() - timedelta(seconds=1)
+        
+        for priority in (1, 5, 3):
+            manager.schedule_task(func=order.append, args=(priority,), scheduled_time=past, priority=priority)
+        later = manager.schedule_task(func=order.append, args=("later",),
+                                      scheduled_time=datetime.now() + timedelta(hours=1))
+        
+        delay = await manager._check_scheduled_tasks()
+        assert 3500 < delay <= 3600
+        while len(order) < 3:
+            await asyncio.sleep(0.01)
+            await manager._check_scheduled_tasks()
+        
+        assert order == [5, 3, 1]
+        assert manager.get_task_status(later) == TaskStatus.SCHEDULED
+        manager.executor.shutdown(wait=True)
+    
+    @pytest.mark.asyncio
+    async def test_recurring_occurrences_and_retention(self):
+        """Test occurrences are created lazily and finished tasks are evicted."""
+        manager = TaskManager(max_retained_tasks=3)
+        manager.is_running = True
+        
+        rule_id = manager.schedule_recurring_task(
+            func=lambda: "tick",
+            interval=timedelta(milliseconds=10),
+            start_time=datetime.now(),
+            max_executions=5
+        )[0]
+        
+        await manager.start()
+        for _ in range(200):
+            if manager.get_task_status(rule_id) in (TaskStatus.COMPLETED, None) and not manager.running_tasks:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        await manager.stop()
+        
+        assert manager.recurring_rules.get(rule_id) is None or manager.recurring_rules[rule_id].executions == 5
+        assert len(manager.tasks) <= 3
+        assert len(manager.results) <= 3
+        assert f"{rule_id}:5" in manager.results
+    
     def test_task_class(self):
         """Test Task class."""
         def test_func():
@@ -156,4 +230,61 @@ class TestTaskManager:
         assert TaskStatus.COMPLETED.value == "completed"
         assert TaskStatus.FAILED.value == "failed"
         assert TaskStatus.CANCELLED.value == "cancelled"
-        assert TaskStatus.SCHEDULED.value == "scheduled"
\ No newline at end of file
+        assert TaskStatus.SCHEDULED.value == "scheduled"
+
+class TestSchedulerRoutes:
+    """Test cases for the recurring-task scheduler API."""
+    
+    def test_recurring_occurrence_status_resolves(self):
+        """Test occurrence ids of a recurring task are stored and resolvable over the API."""
+        import time
+        from unittest.mock import Mock
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+        from src.api.routes import scheduler as scheduler_routes
+        from src.services.scheduler_service import SchedulerService
+        
+        data_manager = Mock()
+        service = SchedulerService(data_manager=data_manager)
+        service.register_task_function("tick", lambda parameters: {"status": "healthy"})
+        app = FastAPI()
+        app.include_router(scheduler_routes.router)
+        app.dependency_overrides[scheduler_routes.get_scheduler_service] = lambda: service
+        
+        with TestClient(app) as client:
+            assert client.post("/api/scheduler/start").status_code == 200
+            try:
+                response = client.post("/api/scheduler/tasks/recurring", json={
+                    "task_type": "tick",
+                    "parameters": {},
+                    "interval_seconds": 60,
+                    "start_time": datetime.now().isoformat(),
+                    "max_executions": 2
+                })
+                assert response.status_code == 200
+                body = response.json()
+                assert body["executions_scheduled"] == 2
+                rule_id = body["task_ids"][0]
+                
+                rule_status = client.get(f"/api/scheduler/tasks/{rule_id}")
+                assert rule_status.status_code == 200
+                assert rule_status.json()["status"] in ("scheduled", "completed")
+                
+                occurrence = {}
+                for _ in range(100):
+                    response = client.get(f"/api/scheduler/tasks/{rule_id}:1")
+                    if response.status_code == 200 and response.json()["status"] == "completed":
+                        occurrence = response.json()
+                        break
+                    time.sleep(0.02)
+                
+                assert occurrence["task_id"] == f"{rule_id}:1"
+                assert occurrence["result_data"]["status"] == "healthy"
+                assert client.get(f"/api/scheduler/tasks/{rule_id}:2").status_code == 404
+            finally:
+                client.post("/api/scheduler/stop")
+        
+        stored_ids = [call.args[1]["task_id"] for call in data_manager.store_data.call_args_list]
+        assert stored_ids == [rule_id, f"{rule_id}:1"]
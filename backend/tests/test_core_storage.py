@@ -5,6 +5,8 @@ Unit tests for core storage modules.
 import pytest
 import tempfile
 import shutil
+import json
+from pathlib import Path
 from datetime import datetime
 import sys
 import os
@@ -146,6 +148,81 @@ class TestDataManager:
         assert len(result.data) > 0
         assert result.data[0]["name"] == "Test Campaign"
     
+    def test_store_many_sqlite(self):
+        """Test bulk storing history records in one transaction."""
+        manager = DataManager(storage_type="sqlite", data_directory=self.temp_dir)
+        
+        records = [
+            {
+                "prediction_id": f"pred_{i}",
+                "campaign_id": "camp_1",
+                "model_type": "linear",
+                "predicted_value": float(i),
+                "feature_importance": {"budget": 0.7},
+                "metadata": {"batch": True}
+            }
+            for i in range(50)
+        ]
+        
+        result = manager.store_many("predictions", records)
+        
+        assert result.success is True
+        assert result.row_count == 50
+        
+        query = DataQuery(table="predictions", filters={"campaign_id": "camp_1"}, order_by="predicted_value")
+        rows = manager.query_data(query).data
+        assert len(rows) == 50
+        assert rows[0]["feature_importance"] == {"budget": 0.7}
+        assert rows[0]["metadata"] == {"batch": True}
+        manager.close()
+    
+    def test_store_many_rolls_back_on_error(self):
+        """Test a failing bulk insert stores nothing."""
+        manager = DataManager(storage_type="sqlite", data_directory=self.temp_dir)
+        
+        records = [
+            {"prediction_id": "pred_1", "model_type": "linear"},
+            {"prediction_id": "pred_1", "model_type": "linear"}
+        ]
+        
+        result = manager.store_many("predictions", records)
+        
+        assert result.success is False
+        assert manager.query_data(DataQuery(table="predictions")).row_count == 0
+        manager.close()
+    
+    def test_only_declared_json_columns_are_parsed(self):
+        """Test JSON parsing follows the schema instead of the value."""
+        manager = DataManager(storage_type="sqlite", data_directory=self.temp_dir)
+        
+        manager.store_data("campaigns", {
+            "campaign_id": "camp_json",
+            "name": "[Promo] {Verão}",
+            "parameters": {"bid": 1.5}
+        })
+        
+        row = manager.query_data(DataQuery(table="campaigns")).data[0]
+        assert row["name"] == "[Promo] {Verão}"
+        assert row["parameters"] == {"bid": 1.5}
+        manager.close()
+    
+    def test_sqlite_wal_mode_and_indexes(self):
+        """Test pooled connections use WAL and history indexes exist."""
+        manager = DataManager(storage_type="sqlite", data_directory=self.temp_dir)
+        
+        info = manager.get_storage_info()
+        assert info["journal_mode"] == "wal"
+        
+        with manager.pool.connection() as conn:
+            indexes = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        assert {"idx_predictions_campaign_created", "idx_optimizations_campaign_created",
+                "idx_tasks_status_created"} <= indexes
+        
+        # History tables have no updated_at column; stores must still succeed
+        assert manager.store_data("optimizations", {"optimization_id": "opt_1", "parameters": {"a": 1}}).success
+        assert manager.store_data("tasks", {"task_id": "task_1", "parameters": {"b": 2}}).success
+        manager.close()
+    
     def test_get_storage_info(self):
         """Test getting storage information."""
         manager = DataManager(storage_type="file", data_directory=self.temp_dir)
@@ -192,4 +269,120 @@ class TestDataManager:
         assert result.row_count == 1
         assert result.error_message is None
         assert result.execution_time == 0.5
-        assert result.metadata == {"source": "test"}
\ No newline at end of file
+        assert result.metadata == {"source": "test"}
+
+class TestSegmentedFileStorage:
+    """Test cases for the append-only segmented file backend."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.segment_options = {"max_segment_bytes": 2048, "compaction_min_bytes": 10 ** 9}
+    
+    def teardown_method(self):
+        """Cleanup test environment."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _manager(self):
+        return DataManager(storage_type="file", data_directory=self.temp_dir,
+                           segment_options=self.segment_options)
+    
+    def _store_predictions(self, manager, count):
+        records = [
+            {"prediction_id": f"pred_{i}", "campaign_id": f"camp_{i % 3}", "predicted_value": i}
+            for i in range(count)
+        ]
+        return manager.store_many("predictions", records)
+    
+    def test_indexes_rebuilt_from_segments_on_restart(self):
+        """Test records and filters survive a restart across sealed segments."""
+        manager = self._manager()
+        assert self._store_predictions(manager, 120).row_count == 120
+        manager.store_data("predictions", {"id": 5, "prediction_id": "pred_4", "campaign_id": "camp_x",
+                                           "predicted_value": 999}, upsert=True)
+        manager.close()
+        
+        reopened = self._manager()
+        info = reopened.get_storage_info()
+        assert len([f for f in info["files"] if f.startswith("predictions/")]) > 1
+        
+        rows = reopened.query_data(DataQuery(table="predictions")).data
+        assert len(rows) == 120
+        assert [row["id"] for row in rows] == list(range(1, 121))
+        assert rows[4]["campaign_id"] == "camp_x"
+        
+        camp_1 = reopened.query_data(DataQuery(table="predictions", filters={"campaign_id": "camp_1"})).data
+        assert len(camp_1) == 39  # pred_4 moved to camp_x
+        assert reopened.store_data("predictions", {"prediction_id": "new"}).success
+        assert reopened.query_data(DataQuery(table="predictions", filters={"prediction_id": "new"})).data[0]["id"] == 121
+        reopened.close()
+    
+    def test_duplicate_id_without_upsert_fails(self):
+        """Test ids are unique unless upserting."""
+        manager = self._manager()
+        assert manager.store_data("tasks", {"id": 1, "status": "pending"}).success
+        assert manager.store_data("tasks", {"id": 1, "status": "done"}).success is False
+        assert manager.store_data("tasks", {"id": 1, "status": "done"}, upsert=True).success
+        assert manager.query_data(DataQuery(table="tasks")).data[0]["status"] == "done"
+        manager.close()
+    
+    def test_delete_and_compaction(self):
+        """Test tombstones hide records and compaction drops superseded data."""
+        manager = self._manager()
+        self._store_predictions(manager, 90)
+        
+        deleted = manager.delete_data("predictions", {"campaign_id": "camp_0"})
+        assert deleted.row_count == 30
+        
+        before = manager.get_storage_info()["tables"]["predictions"]
+        assert before["dead_bytes"] > 0
+        assert manager.compact("predictions") > 0
+        after = manager.get_storage_info()["tables"]["predictions"]
+        assert after["dead_bytes"] == 0
+        assert after["records"] == 60
+        
+        manager.store_data("predictions", {"prediction_id": "late", "campaign_id": "camp_0"})
+        manager.close()
+        
+        reopened = self._manager()
+        rows = reopened.query_data(DataQuery(table="predictions", filters={"campaign_id": "camp_0"})).data
+        assert [row["prediction_id"] for row in rows] == ["late"]
+        assert reopened.query_data(DataQuery(table="predictions")).row_count == 61
+        reopened.close()
+    
+    def test_torn_write_is_truncated(self):
+        """Test a partially written record is dropped on startup."""
+        manager = self._manager()
+        manager.store_data("campaigns", {"campaign_id": "a"})
+        manager.close()
+        
+        segment = sorted((Path(self.temp_dir) / "json_storage" / "campaigns").glob("seg-*.jsonl"))[-1]
+        with open(segment, "ab") as f:
+            f.write(b'{"k": 2, "s": 2, "v": 2, "d": {"campa')
+        
+        reopened = self._manager()
+        assert reopened.query_data(DataQuery(table="campaigns")).row_count == 1
+        assert reopened.store_data("campaigns", {"campaign_id": "b"}).success
+        assert reopened.query_data(DataQuery(table="campaigns")).row_count == 2
+        reopened.close()
+    
+    def test_legacy_json_file_is_imported(self):
+        """Test an existing <table>.json is loaded into segments."""
+        json_dir = Path(self.temp_dir) / "json_storage"
+        json_dir.mkdir()
+        (json_dir / "campaigns.json").write_text(json.dumps([{"id": 1, "campaign_id": "old"}]))
+        
+        manager = self._manager()
+        rows = manager.query_data(DataQuery(table="campaigns", filters={"campaign_id": "old"})).data
+        assert rows == [{"id": 1, "campaign_id": "old"}]
+        manager.close()
+    
+    def test_iter_data_streams_ordered_page(self):
+        """Test streaming iteration with ordering and pagination."""
+        manager = self._manager()
+        self._store_predictions(manager, 50)
+        
+        query = DataQuery(table="predictions", fields=["predicted_value"], order_by="predicted_value",
+                          order_direction="DESC", limit=3, offset=2)
+        assert list(manager.iter_data(query)) == [{"predicted_value": v} for v in (47, 46, 45)]
+        manager.close()
@@ -3,6 +3,7 @@ Integration tests for genetic algorithm in analytics service.
 """
 
 import pytest
+import pytest_asyncio
 import sys
 import os
 import asyncio
@@ -11,6 +12,8 @@ import asyncio
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
 
 from services.analytics_service import AnalyticsService
+from services.optimization_jobs import OptimizationJobManager, JobStatus, JobCancelledError
+from core.analytics.genetic_optimizer import GeneticConfig
 
 
 class TestGeneticAnalyticsService:
@@ -301,6 +304,106 @@ class TestGeneticAnalyticsService:
         assert genetic_result.confidence_score >= greedy_result.confidence_score - 0.1
 
 
+
+class TestOptimizationJobs:
+    """Test cases for background optimization jobs."""
+    
+    @pytest_asyncio.fixture
+    async def job_manager(self):
+        manager = OptimizationJobManager(max_workers=1)
+        yield manager
+        await manager.aclose()
+    
+    @pytest.fixture
+    def campaigns(self):
+        return [
+            {"historical_roi": 2.5, "historical_conversion_rate": 0.03, "daily_budget": 1000},
+            {"historical_roi": 1.8, "historical_conversion_rate": 0.02, "daily_budget": 800}
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_job_runs_in_pool_with_history(self, job_manager, campaigns):
+        """Test a submitted job completes with per-generation fitness history."""
+        service = AnalyticsService(job_manager=job_manager)
+        await service.configure_genetic_algorithm({"population_size": 10, "max_generations": 5})
+        
+        job = await service.submit_budget_optimization_job(campaigns, 2000)
+        assert job.status == JobStatus.QUEUED
+        
+        result = await job_manager.wait(job.job_id)
+        
+        assert job.status == JobStatus.COMPLETED
+        assert job.progress == 1.0
+        assert result.optimization_method == "genetic_algorithm"
+        assert sum(result.optimized_parameters.values()) == pytest.approx(2000, abs=0.1)
+        assert [entry["generation"] for entry in job.fitness_history] == list(range(len(job.fitness_history)))
+        assert job.to_dict()["result"]["optimized_parameters"] == result.optimized_parameters
+    
+    @pytest.mark.asyncio
+    async def test_identical_inflight_requests_share_a_job(self, job_manager, campaigns):
+        """Test identical requests are deduplicated while in flight."""
+        service = AnalyticsService(job_manager=job_manager)
+        
+        first = await service.submit_budget_optimization_job(campaigns, 2000)
+        second = await service.submit_budget_optimization_job(campaigns, 2000)
+        other = await service.submit_budget_optimization_job(campaigns, 3000)
+        
+        assert first.job_id == second.job_id
+        assert other.job_id != first.job_id
+        await job_manager.wait(first.job_id)
+        await job_manager.wait(other.job_id)
+    
+    @pytest.mark.asyncio
+    async def test_cancel_queued_job(self, job_manager, campaigns):
+        """Test cancelling a job that has not started yet."""
+        config = GeneticConfig(population_size=20, max_generations=50)
+        running = job_manager.submit("budget_allocation", {"campaigns": campaigns, "total_budget": 2000}, config)
+        queued = job_manager.submit("budget_allocation", {"campaigns": campaigns, "total_budget": 5000}, config)
+        
+        assert job_manager.cancel(queued.job_id) is True
+        with pytest.raises(JobCancelledError):
+            await job_manager.wait(queued.job_id)
+        assert queued.status == JobStatus.CANCELLED
+        
+        await job_manager.wait(running.job_id)
+        assert job_manager.cancel(running.job_id) is False
+    
+    @pytest.mark.asyncio
+    async def test_resubmit_after_cancelling_running_job(self, job_manager, campaigns):
+        """Test an identical request after cancellation gets a fresh job."""
+        config = GeneticConfig(population_size=50, max_generations=2000)
+        payload = {"campaigns": campaigns, "total_budget": 2000}
+        job = job_manager.submit("budget_allocation", payload, config)
+        for _ in range(200):
+            if job.status == JobStatus.RUNNING:
+                break
+            await asyncio.sleep(0.05)
+        
+        assert job_manager.cancel(job.job_id) is True
+        fresh = job_manager.submit("budget_allocation", payload, config)
+        
+        assert fresh.job_id != job.job_id
+        assert job_manager.cancel(fresh.job_id) is True
+        with pytest.raises(JobCancelledError):
+            await job_manager.wait(job.job_id)
+    
+    @pytest.mark.asyncio
+    async def test_aclose_cancels_result_storage(self, campaigns):
+        """Test shutdown cancels and awaits pending result storage tasks."""
+        manager = OptimizationJobManager(max_workers=1)
+        service = AnalyticsService(job_manager=manager)
+        await service.configure_genetic_algorithm({"population_size": 20, "max_generations": 500})
+        
+        await service.submit_budget_optimization_job(campaigns, 2000)
+        tasks = list(manager._background_tasks)
+        assert len(tasks) == 1
+        
+        await manager.aclose()
+        
+        assert tasks[0].cancelled()
+        assert not manager._background_tasks
+
+
 if __name__ == "__main__":
     # Run a simple test to verify everything works
     async def simple_test():
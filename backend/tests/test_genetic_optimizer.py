@@ -5,6 +5,7 @@ Unit tests for genetic optimizer module.
 import pytest
 import sys
 import os
+import numpy as np
 
 # Add src to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
@@ -404,5 +405,138 @@ class TestGeneticOptimizer:
         assert "convergence_reason" in result.metadata
 
 
+class TestVectorizedPopulation:
+    """Test cases for the matrix-backed population mode."""
+    
+    def _campaigns(self, count):
+        return [
+            {
+                "historical_roi": 1.5 + (i % 7) * 0.3,
+                "historical_conversion_rate": 0.01 + (i % 5) * 0.005,
+                "historical_ctr": 0.01,
+                "daily_budget": 100 + i,
+                "optimal_cpc": 1.0 + (i % 3) * 0.5,
+                "optimal_radius": 20 + (i % 4) * 5
+            }
+            for i in range(count)
+        ]
+    
+    @pytest.mark.parametrize("objective", ["maximize_roi", "maximize_conversions", "maximize_clicks", "combined"])
+    def test_batched_fitness_matches_per_chromosome(self, objective):
+        """Batched fitness equals evaluate_fitness for every individual."""
+        optimizer = GeneticOptimizer()
+        optimizer.constraints["total_budget_limit"] = {"max": 500}
+        campaigns = self._campaigns(4)
+        gene_names = ["campaign_0_budget", "campaign_2_budget", "max_cpc", "location_radius"]
+        genes = np.random.default_rng(0).uniform([10, 10, 0.1, 5], [400, 400, 5, 100], size=(25, 4))
+        
+        batched = optimizer.evaluate_population(genes, gene_names, campaigns, objective)
+        
+        for row, fitness in zip(genes, batched):
+            chromosome = Chromosome(dict(zip(gene_names, row)), {})
+            assert fitness == pytest.approx(optimizer.evaluate_fitness(chromosome, campaigns, objective))
+    
+    def test_vectorized_run_is_deterministic(self):
+        """Same seed gives the same allocation."""
+        campaigns = self._campaigns(10)
+        results = [
+            GeneticOptimizer(GeneticConfig(vectorized=True, max_generations=20, random_seed=7))
+            .optimize_budget_allocation(campaigns, 5000)
+            for _ in range(2)
+        ]
+        
+        assert results[0].optimized_parameters == results[1].optimized_parameters
+        assert results[0].metadata["best_fitness"] == results[1].metadata["best_fitness"]
+        assert results[0].metadata["vectorized"] is True
+    
+    def test_large_campaign_set(self):
+        """More than 100 campaigns switch to the vectorized mode automatically."""
+        campaigns = self._campaigns(1500)
+        optimizer = GeneticOptimizer(GeneticConfig(max_generations=10))
+        
+        result = optimizer.optimize_budget_allocation(campaigns, 150000)
+        
+        assert result.metadata["vectorized"] is True
+        assert len(result.optimized_parameters) == 1500
+        assert sum(result.optimized_parameters.values()) == pytest.approx(150000, rel=1e-3)
+        assert len(optimizer.population) == optimizer.config.population_size
+        assert all(isinstance(c, Chromosome) for c in optimizer.population)
+    
+    def test_legacy_mode_keeps_cap(self):
+        """The chromosome mode still rejects more than 100 campaigns."""
+        optimizer = GeneticOptimizer(GeneticConfig(vectorized=False))
+        
+        with pytest.raises(ValueError, match="Too many campaigns"):
+            optimizer.optimize_budget_allocation(self._campaigns(101), 10000)
+    
+    def test_genes_respect_bounds(self):
+        """Offspring stay within parameter bounds."""
+        optimizer = GeneticOptimizer(GeneticConfig(vectorized=True, max_generations=15, mutation_rate=0.9))
+        campaigns = self._campaigns(20)
+        
+        optimizer.optimize_budget_allocation(campaigns, 2000)
+        
+        for chromosome in optimizer.population:
+            for param, value in chromosome.genes.items():
+                min_val, max_val = optimizer.parameter_bounds[param]
+                assert min_val <= value <= max_val
+
+
+class TestIslandModel:
+    """Test cases for the island-model mode."""
+    
+    def _campaigns(self, count):
+        return [
+            {"historical_roi": 1.5 + (i % 7) * 0.3, "historical_conversion_rate": 0.02, "daily_budget": 100}
+            for i in range(count)
+        ]
+    
+    def test_optimizer_does_not_reseed_global_random(self):
+        """Creating an optimizer leaves the global random state untouched."""
+        import random
+        random.seed(123)
+        expected = random.random()
+        random.seed(123)
+        GeneticOptimizer()
+        assert random.random() == expected
+    
+    def test_instances_are_independent(self):
+        """Interleaved runs give the same results as isolated runs."""
+        campaigns = [{"historical_roi": 2.0}, {"historical_roi": 3.0}, {"historical_roi": 1.5}]
+        isolated = GeneticOptimizer(GeneticConfig(max_generations=10)).optimize_budget_allocation(campaigns, 3000)
+        
+        first = GeneticOptimizer(GeneticConfig(max_generations=10))
+        second = GeneticOptimizer(GeneticConfig(max_generations=10))
+        second.initialize_population({"x": 1.0})
+        interleaved = first.optimize_budget_allocation(campaigns, 3000)
+        
+        assert interleaved.optimized_parameters == isolated.optimized_parameters
+    
+    def test_islands_in_process(self):
+        """Islands run without a process pool and migrate elites."""
+        config = GeneticConfig(islands=3, population_size=10, max_generations=25,
+                               migration_interval=5, island_workers=0)
+        optimizer = GeneticOptimizer(config)
+        
+        result = optimizer.optimize_budget_allocation(self._campaigns(30), 3000)
+        
+        assert result.metadata["islands"] == 3
+        assert len(optimizer.population) == 30
+        assert optimizer.best_chromosome.fitness == max(c.fitness for c in optimizer.population)
+        assert sum(result.optimized_parameters.values()) == pytest.approx(3000, rel=1e-3)
+    
+    def test_islands_are_deterministic_across_executors(self):
+        """The process pool and in-process runs give identical results."""
+        campaigns = self._campaigns(12)
+        results = [
+            GeneticOptimizer(GeneticConfig(islands=2, population_size=10, max_generations=12,
+                                           migration_interval=4, island_workers=workers))
+            .optimize_budget_allocation(campaigns, 2000)
+            for workers in (0, 2)
+        ]
+        
+        assert results[0].optimized_parameters == results[1].optimized_parameters
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
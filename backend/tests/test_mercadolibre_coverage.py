@@ -20,6 +20,8 @@ from app.services.mercadolibre import (
     get_categories,
     get_item_details,
     get_items_batch,
+    ItemBatchLoader,
+    MercadoLibreItemError,
     update_item,
     pause_item,
     activate_item,
@@ -685,4 +687,110 @@ class TestErrorHandling:
         mock_client.get.side_effect = httpx.ConnectError("Connection failed")
         
         with pytest.raises(httpx.ConnectError):
-            await get_user_products("test_token", "123456789")
\ No newline at end of file
+            await get_user_products("test_token", "123456789")
+
+
+class TestItemBatching:
+    """Test multiget chunking and the item batch loader."""
+    
+    @patch('httpx.AsyncClient')
+    async def test_get_items_batch_chunks_at_multiget_limit(self, mock_client_class):
+        """Test that large id lists are split into 20-id multigets in order."""
+        mock_client = AsyncMock()
+        mock_client_class.return_value.__aenter__.return_value = mock_client
+        
+        def respond(url, headers=None):
+            ids = url.split("ids=")[1].split(",")
+            response = Mock()
+            response.json.return_value = [{"code": 200, "body": {"id": i}} for i in ids]
+            return response
+        mock_client.get.side_effect = respond
+        
+        item_ids = [f"MLB{i}" for i in range(45)]
+        result = await get_items_batch("test_token", item_ids)
+        
+        assert mock_client.get.call_count == 3
+        assert [r["body"]["id"] for r in result] == item_ids
+    
+    async def test_get_items_batch_empty(self):
+        """Test that an empty id list makes no request."""
+        assert await get_items_batch("test_token", []) == []
+    
+    async def test_loader_coalesces_concurrent_calls(self):
+        """Test that concurrent loads are merged into a single multiget."""
+        import asyncio
+        loader = ItemBatchLoader(batch_window=0.01)
+        batch = [
+            {"code": 200, "body": {"id": "MLB1", "price": 10}},
+            {"code": 404, "body": {"message": "not found"}},
+        ]
+        
+        with patch('app.services.mercadolibre.get_items_batch', new=AsyncMock(return_value=batch)) as mock_batch:
+            results = await asyncio.gather(
+                loader.load("tok", "MLB1"),
+                loader.load("tok", "MLB2"),
+                loader.load("tok", "MLB1"),
+                return_exceptions=True
+            )
+        
+        mock_batch.assert_awaited_once_with("tok", ["MLB1", "MLB2"])
+        assert results[0] == {"id": "MLB1", "price": 10}
+        assert results[2] == results[0]
+        assert isinstance(results[1], MercadoLibreItemError)
+        assert results[1].status_code == 404
+    
+    async def test_loader_single_item_uses_item_endpoint(self):
+        """Test that a lone id in the window is fetched directly."""
+        loader = ItemBatchLoader(batch_window=0.001)
+        
+        with patch('app.services.mercadolibre._fetch_item', new=AsyncMock(return_value={"id": "MLB1"})) as mock_fetch:
+            result = await loader.load("tok", "MLB1")
+        
+        mock_fetch.assert_awaited_once_with("tok", "MLB1")
+        assert result == {"id": "MLB1"}
+    
+    async def test_loader_single_item_http_error_is_item_error(self):
+        """Test that a lone id failing on /items/{id} raises MercadoLibreItemError."""
+        response = Mock(status_code=404)
+        response.json.return_value = {"message": "not found"}
+        error = httpx.HTTPStatusError("Not Found", request=Mock(), response=response)
+        loader = ItemBatchLoader(batch_window=0.001)
+        
+        with patch('app.services.mercadolibre._fetch_item', new=AsyncMock(side_effect=error)):
+            with pytest.raises(MercadoLibreItemError) as exc_info:
+                await loader.load("tok", "MLB1")
+        
+        assert exc_info.value.item_id == "MLB1"
+        assert exc_info.value.status_code == 404
+        assert exc_info.value.body == {"message": "not found"}
+        assert exc_info.value.__cause__ is error
+    
+    async def test_loader_multiget_http_error_is_item_error(self):
+        """Test that a failed multiget raises MercadoLibreItemError for every id."""
+        import asyncio
+        response = Mock(status_code=503)
+        response.json.side_effect = ValueError("no body")
+        error = httpx.HTTPStatusError("Unavailable", request=Mock(), response=response)
+        loader = ItemBatchLoader(batch_window=0.01)
+        
+        with patch('app.services.mercadolibre.get_items_batch', new=AsyncMock(side_effect=error)):
+            results = await asyncio.gather(
+                loader.load("tok", "MLB1"),
+                loader.load("tok", "MLB2"),
+                return_exceptions=True
+            )
+        
+        assert all(isinstance(r, MercadoLibreItemError) for r in results)
+        assert [r.item_id for r in results] == ["MLB1", "MLB2"]
+        assert all(r.status_code == 503 for r in results)
+    
+    async def test_loader_keeps_dispatch_tasks_until_done(self):
+        """Test that in-flight dispatch tasks are referenced and released on completion."""
+        loader = ItemBatchLoader(batch_window=0.001)
+        
+        with patch('app.services.mercadolibre._fetch_item', new=AsyncMock(return_value={"id": "MLB1"})):
+            await loader.load("tok", "MLB1")
+        
+        import asyncio
+        await asyncio.sleep(0)
+        assert loader._tasks == set()
@@ -126,7 +126,7 @@ class TestMetricsEndpoint:
         data = response.json()
         assert data["status"] == "success"
         assert "metrics" in data
-        assert data["metrics"]["active_connections"] == 42
+        assert "active_connections" not in data["metrics"]
         assert data["metrics"]["campaigns_active"] == 15
 
 
@@ -597,4 +597,68 @@ class TestEndToEndScenarios:
         assert "security_events_total" in content
         
         # Response should be reasonably sized (not excessively large)
-        assert len(content) < 1_000_000  # Less than 1MB
\ No newline at end of file
+        assert len(content) < 1_000_000  # Less than 1MB
+
+class TestBoundedCardinality:
+    """Test suite for route-template labels, label caps and the background sampler."""
+
+    @pytest.fixture
+    def monitored_client(self):
+        from app.monitoring.middleware import MonitoringMiddleware
+
+        monitored = FastAPI()
+        monitored.add_middleware(MonitoringMiddleware)
+
+        @monitored.get("/api/items/{item_id}")
+        async def get_item(item_id: str):
+            return {"item_id": item_id}
+
+        @monitored.get("/api/boom")
+        async def boom():
+            raise RuntimeError("boom")
+
+        return TestClient(monitored, raise_server_exceptions=False)
+
+    def test_route_template_labels(self, monitored_client):
+        """Requests for different ids share one series labeled with the route template."""
+        for item_id in ("MLB1", "MLB2", "MLB3"):
+            assert monitored_client.get(f"/api/items/{item_id}").status_code == 200
+        monitored_client.get("/does/not/exist/123")
+        monitored_client.get("/api/boom")
+
+        metrics_data = get_metrics().decode()
+        assert 'http_requests_total{endpoint="/api/items/{item_id}",method="GET",status_code="200"} 3.0' in metrics_data
+        assert 'endpoint="<unmatched>",method="GET",status_code="404"' in metrics_data
+        assert 'endpoint="/api/boom",method="GET",status_code="500"' in metrics_data
+        assert "MLB1" not in metrics_data
+
+    def test_label_values_are_capped(self):
+        """Free-form label values beyond the cap fold into "other"."""
+        from app.monitoring import prometheus_metrics
+
+        with patch.object(prometheus_metrics, "MAX_LABEL_VALUES", 2), \
+                patch.dict(prometheus_metrics._label_values, clear=True):
+            assert prometheus_metrics.bounded_label("x", "a") == "a"
+            assert prometheus_metrics.bounded_label("x", "b") == "b"
+            assert prometheus_metrics.bounded_label("x", "c") == "other"
+            assert prometheus_metrics.bounded_label("x", "a") == "a"
+            assert prometheus_metrics.bounded_label("y", "c") == "c"
+
+    def test_scrape_does_not_sample_system_metrics(self, client, auth_headers):
+        """The scrape handler only serializes; psutil is sampled by the background thread."""
+        with patch("psutil.cpu_percent") as cpu_percent:
+            response = client.get("/api/metrics/prometheus", headers=auth_headers)
+        assert response.status_code == 200
+        cpu_percent.assert_not_called()
+
+    def test_background_sampler_updates_gauges(self):
+        """The sampler refreshes system gauges periodically and stops cleanly."""
+        from app.monitoring.prometheus_metrics import SystemMetricsSampler
+
+        sampler = SystemMetricsSampler(interval=0.01)
+        with patch("psutil.cpu_percent", return_value=42.0):
+            sampler.start()
+            time.sleep(0.1)
+            sampler.stop()
+        assert not sampler.running
+        assert "system_cpu_usage_percent 42.0" in get_metrics().decode()
@@ -9,10 +9,12 @@ import redis
 
 from ..models.campaign_models import (
     CampaignCreate, CampaignUpdate, CampaignResponse, CampaignStatus,
-    MetricsSummary, ABTestCreate, ABTestResponse, CompetitorAnalysis
+    MetricsSummary, MetricSampleCreate, ABTestCreate, ABTestResponse, CompetitorAnalysis
 )
 from ..core.campaign_manager import CampaignManager
 from ..core.metrics_analyzer import MetricsAnalyzer
+from ..core.metrics_ingestion import MetricsIngestionBuffer
+from ..core.metrics_rollup import MetricsRollup
 from ..core.competitor_monitor import CompetitorMonitor
 from ..services.ai_integration import AIIntegrationService
 from ..services.scheduler import SchedulerService, TaskType, TaskPriority
@@ -42,6 +44,14 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     # For now, return mock user
     return {"user_id": "user_123", "username": "demo_user"}
 
+# Metrics ingestion buffer (started and stopped with the app)
+metrics_buffer = MetricsIngestionBuffer(
+    batch_size=settings.metrics_buffer_batch_size,
+    flush_interval=settings.metrics_buffer_flush_interval,
+    max_pending=settings.metrics_buffer_max_pending,
+    max_retries=settings.metrics_buffer_max_retries
+)
+
 # Redis dependency
 def get_redis():
     """Get Redis client."""
@@ -222,6 +232,25 @@ async def get_campaign_metrics(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/metrics/bulk", status_code=202, tags=["Analytics"])
+async def record_metrics_bulk(
+    samples: List[MetricSampleCreate],
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Queue metric samples for buffered ingestion.
+    
+    Samples are written in batches by the ingestion buffer; the request waits
+    while the buffer is full.
+    """
+    try:
+        await metrics_buffer.add_many([sample.dict() for sample in samples])
+        return {"samples_accepted": len(samples), "pending": metrics_buffer.pending}
+    except Exception as e:
+        log_error(e, {"action": "record_metrics_bulk", "batch_size": len(samples)})
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/campaigns/{campaign_id}/metrics/hourly", tags=["Analytics"])
 async def get_hourly_metrics(
     campaign_id: int,
@@ -288,6 +317,20 @@ async def get_benchmark_comparison(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/metrics/rollups/compact", tags=["Analytics"])
+async def compact_metrics_rollups(
+    max_hours: int = Query(24 * 7, ge=1, le=24 * 31),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Roll up closed hours into the hourly/daily metric tables."""
+    try:
+        return MetricsRollup(db).compact(max_hours=max_hours)
+    except Exception as e:
+        log_error(e, {"action": "compact_metrics_rollups"})
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # AI Optimization Routes
 @router.post("/campaigns/{campaign_id}/optimize/copy", tags=["AI Optimization"])
 async def optimize_campaign_copy(
@@ -1,6 +1,7 @@
 """Metrics analysis and performance tracking."""
 
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func, desc
@@ -8,6 +9,7 @@ import statistics
 
 from ..models.campaign_models import Campaign, CampaignMetric
 from ..utils.logger import logger, log_error
+from .metrics_rollup import MetricsRollup
 
 
 class MetricsAnalyzer:
@@ -15,6 +17,7 @@ class MetricsAnalyzer:
     
     def __init__(self, db: Session):
         self.db = db
+        self.rollup = MetricsRollup(db)
     
     async def record_campaign_metrics(
         self,
@@ -59,6 +62,17 @@ class MetricsAnalyzer:
             
             self.db.add(metric)
             
+            # Late samples (already compacted hours) go straight into the rollups
+            self.rollup.apply_samples([{
+                "campaign_id": campaign_id,
+                "date": date,
+                "impressions": impressions,
+                "clicks": clicks,
+                "conversions": conversions,
+                "cost": cost,
+                "revenue": revenue
+            }])
+            
             # Update campaign totals
             campaign = self.db.query(Campaign).filter(Campaign.id == campaign_id).first()
             if campaign:
@@ -133,21 +147,11 @@ class MetricsAnalyzer:
     ) -> List[Dict[str, Any]]:
         """Get daily aggregated metrics for a campaign."""
         try:
-            # Group by date and aggregate
-            daily_metrics = self.db.query(
-                func.date(CampaignMetric.date).label("date"),
-                func.sum(CampaignMetric.impressions).label("impressions"),
-                func.sum(CampaignMetric.clicks).label("clicks"),
-                func.sum(CampaignMetric.conversions).label("conversions"),
-                func.sum(CampaignMetric.cost).label("cost"),
-                func.sum(CampaignMetric.revenue).label("revenue")
-            ).filter(
-                and_(
-                    CampaignMetric.campaign_id == campaign_id,
-                    CampaignMetric.date >= start_date,
-                    CampaignMetric.date <= end_date
-                )
-            ).group_by(func.date(CampaignMetric.date)).all()
+            # Rollups for compacted hours, raw rows only for the uncovered edges
+            daily_totals = self.rollup.get_daily_totals(campaign_id, start_date, end_date)
+            daily_metrics = [
+                SimpleNamespace(date=day, **totals) for day, totals in daily_totals.items()
+            ]
             
             result = []
             for metric in daily_metrics:
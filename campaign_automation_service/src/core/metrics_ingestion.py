@@ -0,0 +1,279 @@
+"""Buffered bulk ingestion of campaign metric samples."""
+
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import numpy as np
+from prometheus_client import Counter
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import Float, Integer, bindparam, column, create_engine, insert, update, values
+
+from ..models.campaign_models import Campaign, CampaignMetric
+from ..utils.config import settings
+from ..utils.logger import logger, log_error
+from .metrics_rollup import MetricsRollup
+
+
+SAMPLE_FIELDS = ("impressions", "clicks", "conversions", "cost", "revenue")
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_FLUSH_INTERVAL = 5.0  # seconds
+DEFAULT_MAX_PENDING = 10000
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 0.5  # seconds, doubled after each failed attempt
+STOP_POLL_INTERVAL = 0.5  # seconds
+
+samples_dropped = Counter(
+    "campaign_metric_samples_dropped_total",
+    "Metric samples dropped after every write attempt failed"
+)
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Timezone-aware datetimes converted to naive UTC, like the stored dates."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def compute_derived_metrics(samples: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Compute ctr/cpc/cpa/roas/roi/acos for a whole batch at once.
+
+    Same formulas as ``MetricsAnalyzer.record_campaign_metrics``: ratios with a
+    zero denominator are 0.0.
+    """
+    arrays = {
+        field: np.array([float(sample.get(field) or 0) for sample in samples])
+        for field in SAMPLE_FIELDS
+    }
+    impressions, clicks, conversions = arrays["impressions"], arrays["clicks"], arrays["conversions"]
+    cost, revenue = arrays["cost"], arrays["revenue"]
+
+    def ratio(numerator: np.ndarray, denominator: np.ndarray, scale: float = 1.0) -> np.ndarray:
+        result = np.zeros_like(numerator)
+        np.divide(numerator * scale, denominator, out=result, where=denominator > 0)
+        return result
+
+    return {
+        "ctr": ratio(clicks, impressions, 100.0),
+        "cpc": ratio(cost, clicks),
+        "cpa": ratio(cost, conversions),
+        "roas": ratio(revenue, cost),
+        "roi": ratio(revenue - cost, cost, 100.0),
+        "acos": ratio(cost, revenue, 100.0),
+    }
+
+
+class MetricsIngestor:
+    """Write a batch of metric samples in a single transaction."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def write_batch(self, samples: Sequence[Dict[str, Any]]) -> int:
+        """
+        Insert the samples, apply campaign totals and late rollups, then commit.
+
+        Samples are dicts with ``campaign_id``, the ``SAMPLE_FIELDS`` and an
+        optional ``date`` (defaults to now; aware dates are stored as naive
+        UTC). Returns the number of rows written.
+        """
+        if not samples:
+            return 0
+
+        try:
+            now = datetime.utcnow()
+            derived = compute_derived_metrics(samples)
+
+            rows = []
+            for i, sample in enumerate(samples):
+                date = to_naive_utc(sample.get("date") or now)
+                row = {
+                    "campaign_id": sample["campaign_id"],
+                    "date": date,
+                    "hour": date.hour,
+                    "created_at": now,
+                    **{field: sample.get(field) or 0 for field in SAMPLE_FIELDS},
+                }
+                for name, array in derived.items():
+                    row[name] = float(array[i])
+                rows.append(row)
+
+            # executemany (insertmanyvalues) instead of one INSERT per sample
+            self.db.execute(insert(CampaignMetric.__table__), rows)
+            self._apply_campaign_totals(rows, now)
+            MetricsRollup(self.db).apply_samples(rows)
+            self.db.commit()
+            return len(rows)
+
+        except Exception as e:
+            self.db.rollback()
+            log_error(e, {"action": "write_metrics_batch", "batch_size": len(samples)})
+            raise
+
+    def _apply_campaign_totals(self, rows: List[Dict[str, Any]], now: datetime) -> None:
+        """Add the batch totals to each campaign with a single statement."""
+        totals: Dict[int, Dict[str, float]] = defaultdict(lambda: {field: 0 for field in SAMPLE_FIELDS})
+        for row in rows:
+            campaign_totals = totals[row["campaign_id"]]
+            for field in SAMPLE_FIELDS:
+                campaign_totals[field] += row[field]
+
+        table = Campaign.__table__
+        if self.db.get_bind().dialect.name == "postgresql":
+            # UPDATE campaigns SET ... FROM (VALUES ...) AS deltas
+            deltas = values(
+                column("id", Integer),
+                *(column(field, Integer if field in ("impressions", "clicks", "conversions") else Float)
+                  for field in SAMPLE_FIELDS),
+                name="deltas"
+            ).data([(campaign_id, *(t[field] for field in SAMPLE_FIELDS)) for campaign_id, t in totals.items()])
+            statement = update(table).where(table.c.id == deltas.c.id).values(
+                updated_at=now,
+                **{field: table.c[field] + deltas.c[field] for field in SAMPLE_FIELDS}
+            )
+            self.db.execute(statement)
+            return
+
+        # Other dialects: one executemany UPDATE
+        statement = update(table).where(table.c.id == bindparam("campaign_id")).values(
+            updated_at=now,
+            **{field: table.c[field] + bindparam(f"delta_{field}") for field in SAMPLE_FIELDS}
+        )
+        self.db.execute(statement, [
+            {"campaign_id": campaign_id, **{f"delta_{field}": t[field] for field in SAMPLE_FIELDS}}
+            for campaign_id, t in totals.items()
+        ])
+
+
+class MetricsIngestionBuffer:
+    """
+    Async buffer that batches metric samples before writing them.
+
+    ``add`` enqueues a sample and blocks when ``max_pending`` samples are
+    waiting (backpressure). A background task flushes whenever
+    ``batch_size`` samples are buffered or ``flush_interval`` seconds have
+    passed since the first buffered sample. Each flush opens a session from
+    ``session_factory`` (by default one bound to ``settings.database_url``)
+    and runs ``MetricsIngestor.write_batch`` in a worker thread, keeping the
+    event loop free. A failed write is retried ``max_retries`` times with
+    exponential backoff before the batch is dropped.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(self.batch_size, max_pending))
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.stats = {
+            "samples_written": 0, "flushes": 0, "failed_batches": 0, "retries": 0, "samples_dropped": 0
+        }
+
+    async def start(self) -> None:
+        """Start the background flusher."""
+        if self._worker is None or self._worker.done():
+            self._stopping = False
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything still buffered and stop the flusher."""
+        self._stopping = True
+        if self._worker is not None:
+            await self._worker
+            self._worker = None
+        await self.flush()
+
+    async def add(self, sample: Dict[str, Any]) -> None:
+        """Buffer a sample, waiting while the buffer is full."""
+        date = sample.get("date")
+        sample = {**sample, "date": to_naive_utc(date) if date is not None else datetime.utcnow()}
+        await self._queue.put(sample)
+
+    async def add_many(self, samples: Sequence[Dict[str, Any]]) -> None:
+        for sample in samples:
+            await self.add(sample)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def flush(self) -> int:
+        """Write everything currently buffered, in batches."""
+        written = 0
+        while not self._queue.empty():
+            batch = [self._queue.get_nowait() for _ in range(min(self.batch_size, self._queue.qsize()))]
+            written += await self._write(batch)
+        return written
+
+    async def _run(self) -> None:
+        while not (self._stopping and self._queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await self._write(batch)
+
+    async def _collect(self) -> List[Dict[str, Any]]:
+        """Wait for a full batch or for ``flush_interval`` after the first sample."""
+        batch: List[Dict[str, Any]] = []
+        deadline: Optional[float] = None
+        while len(batch) < self.batch_size:
+            timeout = STOP_POLL_INTERVAL
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                if self._stopping:
+                    break
+                continue
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> int:
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                written = await asyncio.to_thread(self._write_sync, batch)
+                break
+            except Exception as e:
+                log_error(e, {"action": "flush_metrics_buffer", "batch_size": len(batch), "attempt": attempt + 1})
+                if attempt == self.max_retries:
+                    self.stats["failed_batches"] += 1
+                    self.stats["samples_dropped"] += len(batch)
+                    samples_dropped.inc(len(batch))
+                    return 0
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        self.stats["samples_written"] += written
+        self.stats["flushes"] += 1
+        logger.info("Metrics batch flushed", batch_size=written)
+        return written
+
+    def _write_sync(self, batch: List[Dict[str, Any]]) -> int:
+        if self.session_factory is None:
+            self.session_factory = sessionmaker(bind=create_engine(settings.database_url, pool_pre_ping=True))
+
+        db = self.session_factory()
+        try:
+            return MetricsIngestor(db).write_batch(batch)
+        finally:
+            db.close()
@@ -0,0 +1,417 @@
+"""Incremental hourly/daily rollups for campaign metrics."""
+
+import time
+import weakref
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, func, case
+
+from ..models.campaign_models import (
+    CampaignMetric, CampaignMetricHourly, CampaignMetricDaily, MetricRollupState
+)
+from ..utils.logger import logger, log_error
+
+
+ROLLUP_STATE_NAME = "hourly"
+TOTAL_FIELDS = ("impressions", "clicks", "conversions", "cost", "revenue")
+
+# Horas fechadas recompactadas a cada execução (amostras atrasadas na virada da hora)
+DEFAULT_LOOKBACK_HOURS = 1
+# Limite de horas processadas por execução do job de compactação
+DEFAULT_MAX_HOURS = 24 * 7
+# Tempo máximo que o watermark fica em cache antes de ser relido do banco
+WATERMARK_TTL_SECONDS = 60.0
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+
+def floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(value: datetime) -> datetime:
+    floored = floor_hour(value)
+    return floored if floored == value else floored + HOUR
+
+
+def floor_day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def ceil_day(value: datetime) -> datetime:
+    floored = floor_day(value)
+    return floored if floored == value else floored + DAY
+
+
+def _empty_totals() -> Dict[str, float]:
+    return {field: 0 for field in TOTAL_FIELDS}
+
+
+def _as_date(value: Any) -> date:
+    """``func.date`` returns a date on PostgreSQL and a string on SQLite."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class MetricsRollup:
+    """
+    Hourly and daily aggregate tables for ``CampaignMetric``.
+
+    The compaction job rolls up every closed hour into ``campaign_metrics_hourly``
+    and the affected days into ``campaign_metrics_daily``, then advances the
+    watermark. Samples recorded for hours before the watermark (late data) are
+    applied to the rollups incrementally on insert. Read paths combine the
+    rollups for everything before the watermark with raw rows after it, which
+    is only the open hour when the job keeps up.
+
+    The watermark is cached per engine for ``WATERMARK_TTL_SECONDS``. It only
+    moves forward, so a stale value sends a little more to the raw-row read
+    paths, and late samples it misses fall in the hours the next compaction
+    rebuilds (``lookback_hours``).
+    """
+
+    # engine -> (watermark, monotonic time it was read)
+    _watermarks: "weakref.WeakKeyDictionary[Any, Tuple[datetime, float]]" = weakref.WeakKeyDictionary()
+
+    def __init__(self, db: Session, watermark_ttl: float = WATERMARK_TTL_SECONDS):
+        self.db = db
+        self.watermark_ttl = watermark_ttl
+
+    # ---------- watermark ----------
+
+    def get_watermark(self, refresh: bool = False) -> Optional[datetime]:
+        """Return the end of the compacted period, or None if never compacted."""
+        bind = self.db.get_bind()
+        cached = self._watermarks.get(bind)
+        if not refresh and cached is not None and time.monotonic() - cached[1] < self.watermark_ttl:
+            return cached[0]
+
+        watermark = self.db.query(MetricRollupState.watermark).filter(
+            MetricRollupState.name == ROLLUP_STATE_NAME
+        ).scalar()
+        if not isinstance(watermark, datetime):
+            # Not cached: the first compaction may run in another process
+            return None
+        self._watermarks[bind] = (watermark, time.monotonic())
+        return watermark
+
+    def _set_watermark(self, watermark: datetime) -> None:
+        state = self.db.query(MetricRollupState).filter(
+            MetricRollupState.name == ROLLUP_STATE_NAME
+        ).first()
+        if state is None:
+            self.db.add(MetricRollupState(name=ROLLUP_STATE_NAME, watermark=watermark))
+        elif state.watermark is None or watermark > state.watermark:
+            state.watermark = watermark
+
+    # ---------- write path ----------
+
+    def apply_samples(self, samples: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add late samples (before the watermark) to the rollups.
+
+        Samples are dicts with ``campaign_id``, ``date`` and the total fields.
+        Samples at or after the watermark are left for the compaction job.
+        Does not commit; returns the number of samples applied.
+        """
+        watermark = self.get_watermark()
+        if watermark is None:
+            return 0
+
+        hourly: Dict[Tuple[int, datetime], Dict[str, float]] = defaultdict(_empty_totals)
+        daily: Dict[Tuple[int, date], Dict[str, float]] = defaultdict(_empty_totals)
+        applied = 0
+        for sample in samples:
+            if sample["date"] >= watermark:
+                continue
+            applied += 1
+            for totals in (
+                hourly[(sample["campaign_id"], floor_hour(sample["date"]))],
+                daily[(sample["campaign_id"], sample["date"].date())],
+            ):
+                for field in TOTAL_FIELDS:
+                    totals[field] += sample.get(field) or 0
+                totals["samples"] = totals.get("samples", 0) + 1
+
+        if applied:
+            self._merge(CampaignMetricHourly, CampaignMetricHourly.bucket, "bucket", hourly)
+            self._merge(CampaignMetricDaily, CampaignMetricDaily.day, "day", daily)
+        return applied
+
+    def _merge(self, model, key_column, key_name: str, deltas: Dict[Tuple[int, Any], Dict[str, float]]) -> None:
+        """Add deltas to existing rollup rows (one query) or create them."""
+        campaign_ids = {campaign_id for campaign_id, _ in deltas}
+        keys = {key for _, key in deltas}
+        existing = {
+            (row.campaign_id, getattr(row, key_name)): row
+            for row in self.db.query(model).filter(
+                and_(model.campaign_id.in_(campaign_ids), key_column.in_(keys))
+            ).all()
+        }
+
+        for (campaign_id, key), totals in deltas.items():
+            row = existing.get((campaign_id, key))
+            if row is None:
+                self.db.add(model(campaign_id=campaign_id, **{key_name: key}, **totals))
+                continue
+            for field, value in totals.items():
+                setattr(row, field, (getattr(row, field) or 0) + value)
+
+    def compact(
+        self,
+        now: Optional[datetime] = None,
+        lookback_hours: int = DEFAULT_LOOKBACK_HOURS,
+        max_hours: int = DEFAULT_MAX_HOURS
+    ) -> Dict[str, Any]:
+        """
+        Roll up closed hours from raw metrics and advance the watermark.
+
+        Each hour is rebuilt from raw rows, so re-running is idempotent. The
+        first run starts at the oldest raw metric; later runs start
+        ``lookback_hours`` before the watermark. At most ``max_hours`` hours are
+        processed per call (backfills continue on the next call).
+        """
+        try:
+            now = now or datetime.utcnow()
+            open_hour = floor_hour(now)
+            watermark = self.get_watermark(refresh=True)
+
+            if watermark is None:
+                oldest = self.db.query(func.min(CampaignMetric.date)).scalar()
+                if oldest is None:
+                    self._set_watermark(open_hour)
+                    self.db.commit()
+                    self._watermarks.pop(self.db.get_bind(), None)
+                    return {"hours_compacted": 0, "days_compacted": 0, "watermark": open_hour.isoformat()}
+                start = floor_hour(oldest)
+            else:
+                start = watermark - lookback_hours * HOUR
+
+            end = min(open_hour, start + max_hours * HOUR)
+            hours = 0
+            days: Set[datetime] = set()
+            bucket = start
+            while bucket < end:
+                self._compact_hour(bucket)
+                days.add(floor_day(bucket))
+                bucket += HOUR
+                hours += 1
+
+            for day in sorted(days):
+                self._compact_day(day)
+
+            if end > start:
+                self._set_watermark(end)
+            self.db.commit()
+            self._watermarks.pop(self.db.get_bind(), None)
+
+            logger.info("Metrics rollup compacted", hours=hours, days=len(days), watermark=end.isoformat())
+            return {"hours_compacted": hours, "days_compacted": len(days), "watermark": end.isoformat()}
+
+        except Exception as e:
+            self.db.rollback()
+            log_error(e, {"action": "compact_metrics_rollup"})
+            raise
+
+    def _compact_hour(self, bucket: datetime) -> None:
+        rows = self.db.query(
+            CampaignMetric.campaign_id,
+            *(func.coalesce(func.sum(getattr(CampaignMetric, field)), 0).label(field) for field in TOTAL_FIELDS),
+            func.count(CampaignMetric.id).label("samples")
+        ).filter(
+            and_(CampaignMetric.date >= bucket, CampaignMetric.date < bucket + HOUR)
+        ).group_by(CampaignMetric.campaign_id).all()
+
+        self.db.query(CampaignMetricHourly).filter(
+            CampaignMetricHourly.bucket == bucket
+        ).delete(synchronize_session=False)
+        if rows:
+            self.db.bulk_insert_mappings(CampaignMetricHourly, [
+                {"campaign_id": row.campaign_id, "bucket": bucket, "samples": row.samples,
+                 **{field: getattr(row, field) for field in TOTAL_FIELDS}}
+                for row in rows
+            ])
+
+    def _compact_day(self, day: datetime) -> None:
+        rows = self.db.query(
+            CampaignMetricHourly.campaign_id,
+            *(func.sum(getattr(CampaignMetricHourly, field)).label(field) for field in TOTAL_FIELDS),
+            func.sum(CampaignMetricHourly.samples).label("samples")
+        ).filter(
+            and_(CampaignMetricHourly.bucket >= day, CampaignMetricHourly.bucket < day + DAY)
+        ).group_by(CampaignMetricHourly.campaign_id).all()
+
+        self.db.query(CampaignMetricDaily).filter(
+            CampaignMetricDaily.day == day.date()
+        ).delete(synchronize_session=False)
+        if rows:
+            self.db.bulk_insert_mappings(CampaignMetricDaily, [
+                {"campaign_id": row.campaign_id, "day": day.date(), "samples": row.samples,
+                 **{field: getattr(row, field) for field in TOTAL_FIELDS}}
+                for row in rows
+            ])
+
+    # ---------- read path ----------
+
+    def get_daily_totals(
+        self,
+        campaign_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[date, Dict[str, float]]:
+        """
+        Per-day totals for ``start_date <= date <= end_date``.
+
+        Full days come from the daily rollup, partial days from the hourly
+        rollup, and the edges that are not whole hours (plus everything after
+        the watermark) from raw metrics.
+        """
+        totals: Dict[date, Dict[str, float]] = defaultdict(_empty_totals)
+
+        def add(day: Any, row: Any) -> None:
+            day_totals = totals[_as_date(day)]
+            for field in TOTAL_FIELDS:
+                day_totals[field] += getattr(row, field) or 0
+
+        watermark = self.get_watermark()
+        covered_start = ceil_hour(start_date)
+        covered_end = min(floor_hour(end_date), watermark) if watermark else covered_start
+
+        if covered_start >= covered_end:
+            raw_ranges = [(start_date, end_date, True)]
+        else:
+            raw_ranges = [(start_date, covered_start, False), (covered_end, end_date, True)]
+
+            full_start, full_end = ceil_day(covered_start), floor_day(covered_end)
+            if full_start < full_end:
+                hourly_ranges = [(covered_start, full_start), (full_end, covered_end)]
+                for row in self.db.query(
+                    CampaignMetricDaily.day,
+                    *(getattr(CampaignMetricDaily, field) for field in TOTAL_FIELDS)
+                ).filter(
+                    and_(
+                        CampaignMetricDaily.campaign_id == campaign_id,
+                        CampaignMetricDaily.day >= full_start.date(),
+                        CampaignMetricDaily.day < full_end.date()
+                    )
+                ).all():
+                    add(row.day, row)
+            else:
+                hourly_ranges = [(covered_start, covered_end)]
+
+            for row in self.db.query(
+                CampaignMetricHourly.bucket,
+                *(getattr(CampaignMetricHourly, field) for field in TOTAL_FIELDS)
+            ).filter(
+                and_(
+                    CampaignMetricHourly.campaign_id == campaign_id,
+                    or_(*(
+                        and_(CampaignMetricHourly.bucket >= low, CampaignMetricHourly.bucket < high)
+                        for low, high in hourly_ranges if low < high
+                    ))
+                )
+            ).all():
+                add(row.bucket, row)
+
+        raw_filters = [
+            and_(CampaignMetric.date >= low, CampaignMetric.date <= high if inclusive else CampaignMetric.date < high)
+            for low, high, inclusive in raw_ranges if low < high or (inclusive and low <= high)
+        ]
+        if raw_filters:
+            day_column = func.date(CampaignMetric.date)
+            for row in self.db.query(
+                day_column.label("day"),
+                *(func.sum(getattr(CampaignMetric, field)).label(field) for field in TOTAL_FIELDS)
+            ).filter(
+                and_(CampaignMetric.campaign_id == campaign_id, or_(*raw_filters))
+            ).group_by(day_column).all():
+                add(row.day, row)
+
+        return dict(sorted(totals.items()))
+
+    def get_window_totals(
+        self,
+        campaign_ids: Set[int],
+        windows: Set[int],
+        now: Optional[datetime] = None
+    ) -> Dict[Tuple[int, int], Tuple[float, float]]:
+        """
+        Cost and revenue per campaign for trailing windows of ``windows`` hours.
+
+        Returns ``{(campaign_id, hours): (cost, revenue)}`` using one query on
+        the hourly rollup and one on raw metrics for the uncovered edges.
+        """
+        if not campaign_ids or not windows:
+            return {}
+
+        now = now or datetime.utcnow()
+        windows = sorted(windows)
+        watermark = self.get_watermark()
+        covered_end = min(floor_hour(now), watermark) if watermark else None
+
+        starts = {hours: now - timedelta(hours=hours) for hours in windows}
+        covered = {
+            hours: (ceil_hour(starts[hours]), covered_end)
+            for hours in windows
+            if covered_end is not None and ceil_hour(starts[hours]) < covered_end
+        }
+
+        totals: Dict[Tuple[int, int], List[float]] = defaultdict(lambda: [0.0, 0.0])
+        ids = sorted(campaign_ids)
+
+        if covered:
+            columns = [CampaignMetricHourly.campaign_id]
+            for hours, (low, high) in covered.items():
+                in_window = and_(CampaignMetricHourly.bucket >= low, CampaignMetricHourly.bucket < high)
+                columns.append(func.sum(case((in_window, CampaignMetricHourly.cost), else_=0.0)))
+                columns.append(func.sum(case((in_window, CampaignMetricHourly.revenue), else_=0.0)))
+
+            rows = self.db.query(*columns).filter(
+                and_(
+                    CampaignMetricHourly.campaign_id.in_(ids),
+                    CampaignMetricHourly.bucket >= min(low for low, _ in covered.values()),
+                    CampaignMetricHourly.bucket < covered_end
+                )
+            ).group_by(CampaignMetricHourly.campaign_id).all()
+            self._add_window_rows(totals, rows, list(covered))
+
+        columns = [CampaignMetric.campaign_id]
+        raw_conditions = []
+        for hours in windows:
+            if hours in covered:
+                low, high = covered[hours]
+                condition = and_(
+                    CampaignMetric.date >= starts[hours],
+                    or_(CampaignMetric.date < low, CampaignMetric.date >= high)
+                )
+            else:
+                condition = CampaignMetric.date >= starts[hours]
+            raw_conditions.append(condition)
+            columns.append(func.sum(case((condition, CampaignMetric.cost), else_=0.0)))
+            columns.append(func.sum(case((condition, CampaignMetric.revenue), else_=0.0)))
+
+        rows = self.db.query(*columns).filter(
+            and_(
+                CampaignMetric.campaign_id.in_(ids),
+                CampaignMetric.date <= now,
+                or_(*raw_conditions)
+            )
+        ).group_by(CampaignMetric.campaign_id).all()
+        self._add_window_rows(totals, rows, windows)
+
+        return {key: (cost, revenue) for key, (cost, revenue) in totals.items()}
+
+    @staticmethod
+    def _add_window_rows(totals, rows, windows: List[int]) -> None:
+        for row in rows:
+            values = row[1:]
+            for i, hours in enumerate(windows):
+                entry = totals[(row[0], hours)]
+                entry[0] += values[2 * i] or 0.0
+                entry[1] += values[2 * i + 1] or 0.0
@@ -9,7 +9,7 @@ from slowapi.errors import RateLimitExceeded
 import time
 import uuid
 
-from .api.routes import router
+from .api.routes import metrics_buffer, router
 from .utils.config import settings
 from .utils.logger import logger, log_request, log_response
 
@@ -197,6 +197,8 @@ async def startup_event():
     # Initialize database tables (in production)
     # await init_database()
     
+    await metrics_buffer.start()
+    
     # Start scheduler (in production)
     # from .services.scheduler import scheduler
     # asyncio.create_task(scheduler.start_scheduler())
@@ -207,6 +209,9 @@ async def shutdown_event():
     """Application shutdown event."""
     logger.info("Campaign Automation Service shutting down")
     
+    # Write out buffered metric samples before exiting
+    await metrics_buffer.stop()
+    
     # Stop scheduler (in production)
     # from .services.scheduler import scheduler
     # await scheduler.stop_scheduler()
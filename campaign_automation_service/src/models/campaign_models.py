@@ -3,7 +3,7 @@
 from datetime import datetime
 from enum import Enum
 from typing import Dict, List, Optional, Any
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, JSON, Boolean, ForeignKey, Text, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel, Field
@@ -85,6 +85,10 @@ class Campaign(Base):
 class CampaignMetric(Base):
     """Campaign metrics database model."""
     __tablename__ = "campaign_metrics"
+    __table_args__ = (
+        Index("ix_campaign_metrics_campaign_date", "campaign_id", "date"),
+        Index("ix_campaign_metrics_date", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     campaign_id = Column(Integer, ForeignKey("campaigns.id"))
@@ -115,6 +119,59 @@ class CampaignMetric(Base):
     campaign = relationship("Campaign", back_populates="metrics")
 
 
+class CampaignMetricHourly(Base):
+    """Hourly rollup of campaign metrics (one row per campaign and hour)."""
+    __tablename__ = "campaign_metrics_hourly"
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "bucket", name="uq_campaign_metrics_hourly"),
+        Index("ix_campaign_metrics_hourly_bucket", "bucket"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id"), nullable=False)
+    bucket = Column(DateTime, nullable=False)  # Start of the hour
+    
+    impressions = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    conversions = Column(Integer, default=0)
+    cost = Column(Float, default=0.0)
+    revenue = Column(Float, default=0.0)
+    samples = Column(Integer, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CampaignMetricDaily(Base):
+    """Daily rollup of campaign metrics (one row per campaign and day)."""
+    __tablename__ = "campaign_metrics_daily"
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "day", name="uq_campaign_metrics_daily"),
+        Index("ix_campaign_metrics_daily_day", "day"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    
+    impressions = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    conversions = Column(Integer, default=0)
+    cost = Column(Float, default=0.0)
+    revenue = Column(Float, default=0.0)
+    samples = Column(Integer, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class MetricRollupState(Base):
+    """Compaction watermark: rollups are complete for every hour before it."""
+    __tablename__ = "metric_rollup_state"
+    
+    name = Column(String(50), primary_key=True)
+    watermark = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class ABTest(Base):
     """A/B test database model."""
     __tablename__ = "ab_tests"
@@ -245,6 +302,17 @@ class MetricsSummary(BaseModel):
     acos: float
 
 
+class MetricSampleCreate(BaseModel):
+    """Metric sample for bulk ingestion."""
+    campaign_id: int
+    impressions: int = Field(0, ge=0)
+    clicks: int = Field(0, ge=0)
+    conversions: int = Field(0, ge=0)
+    cost: float = Field(0.0, ge=0)
+    revenue: float = Field(0.0, ge=0)
+    date: Optional[datetime] = None
+
+
 class ABTestCreate(BaseModel):
     """A/B test creation model."""
     campaign_id: int
@@ -1,14 +1,18 @@
 """Scheduler service for automated campaign tasks."""
 
 import asyncio
-from datetime import datetime, timedelta
+import itertools
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional, Callable
 from dataclasses import dataclass
 from enum import Enum
 import redis
 import json
 from celery import Celery
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
 
+from ..core.metrics_rollup import MetricsRollup
 from ..utils.config import settings
 from ..utils.logger import logger, log_error, log_task
 
@@ -22,6 +26,7 @@ class TaskType(str, Enum):
     BUDGET_ADJUSTMENT = "budget_adjustment"
     KEYWORD_RESEARCH = "keyword_research"
     REPORT_GENERATION = "report_generation"
+    METRICS_ROLLUP = "metrics_rollup"
 
 
 class TaskPriority(str, Enum):
@@ -41,6 +46,89 @@ class TaskStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+# Lanes are claimed in this order, so higher priorities always run first
+PRIORITY_LANES = [TaskPriority.URGENT, TaskPriority.HIGH, TaskPriority.MEDIUM, TaskPriority.LOW]
+PRIORITY_RANK = {priority.value: rank for rank, priority in enumerate(PRIORITY_LANES)}
+_STOP = (len(PRIORITY_LANES),)  # sorts after every real task in the worker queue
+
+EPOCH = datetime(1970, 1, 1)
+
+# Move due task ids from a priority lane to the lease set in one atomic step.
+# KEYS: due lane, leases | ARGV: now, lease expiry, limit
+CLAIM_DUE_TASKS_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[3]))
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('ZADD', KEYS[2], ARGV[2], id)
+end
+return ids
+"""
+
+# Put tasks whose lease expired (crashed worker) back in their lane, or give
+# up on them once they were recovered more than retry_count times.
+# KEYS: leases, tasks, running tasks, recoveries, due lanes (PRIORITY_LANES order)
+# ARGV: now, limit, lane priorities (same order as the lane keys)
+RECOVER_EXPIRED_LEASES_SCRIPT = """
+local lanes = {}
+for i = 3, #ARGV do
+    lanes[ARGV[i]] = KEYS[i + 2]
+end
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local recovered = {}
+local exhausted = {}
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('HDEL', KEYS[3], id)
+    local raw = redis.call('HGET', KEYS[2], id)
+    if raw then
+        local task = cjson.decode(raw)
+        local lane = lanes[task['priority']]
+        local attempts = redis.call('HINCRBY', KEYS[4], id, 1)
+        if lane == nil or attempts > (tonumber(task['retry_count']) or 0) then
+            redis.call('HDEL', KEYS[4], id)
+            table.insert(exhausted, id)
+        else
+            redis.call('ZADD', lane, ARGV[1], id)
+            table.insert(recovered, id)
+        end
+    end
+end
+return {recovered, exhausted}
+"""
+
+# Index pending tasks in their lane unless they are leased, running or no
+# longer pending; checked here so a rebuild never races a claim.
+# KEYS: tasks, leases, running tasks, due lanes (PRIORITY_LANES order)
+# ARGV: lane count, lane priorities, then (task id, score) pairs
+INDEX_PENDING_TASKS_SCRIPT = """
+local lane_count = tonumber(ARGV[1])
+local lanes = {}
+for i = 1, lane_count do
+    lanes[ARGV[i + 1]] = KEYS[i + 3]
+end
+local indexed = 0
+for i = lane_count + 2, #ARGV, 2 do
+    local id = ARGV[i]
+    local raw = redis.call('HGET', KEYS[1], id)
+    if raw and not redis.call('ZSCORE', KEYS[2], id) and redis.call('HEXISTS', KEYS[3], id) == 0 then
+        local task = cjson.decode(raw)
+        local lane = lanes[task['priority']]
+        if lane and task['status'] == 'pending' then
+            indexed = indexed + redis.call('ZADD', lane, 'NX', ARGV[i + 1], id)
+        end
+    end
+end
+return indexed
+"""
+
+
+def to_score(moment: datetime) -> float:
+    """Sorted-set score (UTC epoch seconds) for a naive UTC or aware datetime."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment - EPOCH).total_seconds()
+
+
 @dataclass
 class ScheduledTask:
     """Scheduled task data structure."""
@@ -84,14 +172,55 @@ celery_app.conf.update(
 
 
 class SchedulerService:
-    """Campaign automation scheduler service."""
+    """
+    Campaign automation scheduler service.
+    
+    Task payloads live in the ``tasks_key`` hash. Pending task ids are also
+    indexed in one sorted set per priority lane, scored by due time, so each
+    poll only claims the tasks that are due. Claiming atomically moves the id
+    into a lease set; a lease that is not released within the visibility
+    timeout (crashed worker) puts the task back in its lane. Claimed tasks run
+    on a bounded pool of workers, highest priority first.
+    """
     
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        visibility_timeout: Optional[int] = None,
+        session_factory: Optional[Callable[[], Session]] = None,
+        metrics_rollup_interval: Optional[int] = None
+    ):
         self.redis_client = redis.from_url(settings.redis_url)
         self.tasks_key = "campaign_automation:scheduled_tasks"
         self.running_tasks_key = "campaign_automation:running_tasks"
         self.completed_tasks_key = "campaign_automation:completed_tasks"
+        self.due_key_prefix = "campaign_automation:due_tasks:"
+        self.leases_key = "campaign_automation:task_leases"
+        self.recoveries_key = "campaign_automation:task_recoveries"
+        self.max_workers = max(1, max_workers or settings.scheduler_max_workers)
+        self.poll_interval = poll_interval or settings.scheduler_poll_interval
+        self.visibility_timeout = visibility_timeout or settings.scheduler_visibility_timeout
+        self.metrics_rollup_interval = (
+            settings.metrics_rollup_interval if metrics_rollup_interval is None else metrics_rollup_interval
+        )
+        self._session_factory = session_factory
         self.is_running = False
+        
+        self._claim_script = self.redis_client.register_script(CLAIM_DUE_TASKS_SCRIPT)
+        self._recover_script = self.redis_client.register_script(RECOVER_EXPIRED_LEASES_SCRIPT)
+        self._index_script = self.redis_client.register_script(INDEX_PENDING_TASKS_SCRIPT)
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._active_workers = 0
+        self._sequence = itertools.count()
+    
+    def _due_key(self, priority: str) -> str:
+        return f"{self.due_key_prefix}{priority}"
+    
+    def _lane_keys(self) -> List[str]:
+        return [self._due_key(priority.value) for priority in PRIORITY_LANES]
     
     async def schedule_task(
         self,
@@ -137,7 +266,7 @@ class SchedulerService:
                 "status": TaskStatus.PENDING.value
             }
             
-            self.redis_client.hset(self.tasks_key, task_id, json.dumps(task_data))
+            self._store_pending(task_id, task_data, schedule_time)
             
             logger.info(
                 "Task scheduled",
@@ -153,6 +282,75 @@ class SchedulerService:
             log_error(e, {"action": "schedule_task", "task_type": task_type.value})
             raise
     
+    def _store_pending(self, task_id: str, task_data: Dict[str, Any], schedule_time: datetime):
+        """Store the task payload and index it in its priority lane."""
+        pipe = self.redis_client.pipeline(transaction=True)
+        pipe.hset(self.tasks_key, task_id, json.dumps(task_data))
+        pipe.zadd(self._due_key(task_data["priority"]), {task_id: to_score(schedule_time)})
+        pipe.execute()
+        
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    def rebuild_due_index(self, batch_size: int = 1000) -> int:
+        """
+        Index pending tasks stored before the due index existed.
+        
+        Tasks that are leased, running or no longer pending are skipped by the
+        index script, so this is safe while other instances are claiming.
+        """
+        keys = [self.tasks_key, self.leases_key, self.running_tasks_key, *self._lane_keys()]
+        lanes = [len(PRIORITY_LANES), *(priority.value for priority in PRIORITY_LANES)]
+        indexed = 0
+        batch: List[Any] = []
+        for task_id, task_data_json in self.redis_client.hscan_iter(self.tasks_key, count=batch_size):
+            task_data = json.loads(task_data_json)
+            if task_data["status"] != TaskStatus.PENDING.value:
+                continue
+            batch += [task_id, to_score(datetime.fromisoformat(task_data["schedule_time"]))]
+            if len(batch) >= 2 * batch_size:
+                indexed += self._index_script(keys=keys, args=lanes + batch)
+                batch = []
+        if batch:
+            indexed += self._index_script(keys=keys, args=lanes + batch)
+        return indexed
+    
+    def ensure_metrics_rollup_job(self) -> Optional[str]:
+        """
+        Schedule the next rollup compaction if it is not scheduled yet.
+        
+        Runs start on interval boundaries and the task id is derived from the
+        run time, so restarts and other instances find the same task instead
+        of adding another one. Each run schedules its successor the same way.
+        """
+        interval = self.metrics_rollup_interval
+        if not interval:
+            return None
+        
+        now = to_score(datetime.utcnow())
+        schedule_time = EPOCH + timedelta(seconds=(now // interval + 1) * interval)
+        task_id = f"{TaskType.METRICS_ROLLUP.value}_None_{int(schedule_time.timestamp())}"
+        if self.redis_client.hget(self.tasks_key, task_id) is not None:
+            return task_id
+        
+        task_data = {
+            "id": task_id,
+            "task_type": TaskType.METRICS_ROLLUP.value,
+            "priority": TaskPriority.MEDIUM.value,
+            "campaign_id": None,
+            "parameters": {},
+            "schedule_time": schedule_time.isoformat(),
+            "recurring": False,
+            "recurring_interval": None,
+            "retry_count": 3,
+            "timeout": self.visibility_timeout,
+            "created_at": datetime.utcnow().isoformat(),
+            "status": TaskStatus.PENDING.value
+        }
+        self._store_pending(task_id, task_data, schedule_time)
+        logger.info("Metrics rollup job scheduled", task_id=task_id, interval=interval)
+        return task_id
+    
     async def start_scheduler(self):
         """Start the task scheduler."""
         if self.is_running:
@@ -160,44 +358,144 @@ class SchedulerService:
             return
         
         self.is_running = True
-        logger.info("Scheduler started")
+        self._queue = asyncio.PriorityQueue()
+        self._wakeup = asyncio.Event()
         
         try:
+            self.rebuild_due_index()
+            self.ensure_metrics_rollup_job()
+            self._workers = [asyncio.create_task(self._worker_loop()) for _ in range(self.max_workers)]
+            logger.info("Scheduler started", workers=self.max_workers)
+            
             while self.is_running:
                 await self._process_pending_tasks()
-                await asyncio.sleep(30)  # Check every 30 seconds
+                await self._wait_for_work()
                 
         except Exception as e:
             log_error(e, {"action": "start_scheduler"})
             self.is_running = False
+        finally:
+            await self._shutdown_workers()
     
     async def stop_scheduler(self):
         """Stop the task scheduler."""
         self.is_running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
         logger.info("Scheduler stopped")
     
+    async def _wait_for_work(self):
+        """Sleep until the next poll, or earlier if a worker frees up."""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+    
     async def _process_pending_tasks(self):
-        """Process pending tasks that are ready to run."""
+        """Claim due tasks, highest priority first, up to the free worker capacity."""
         try:
-            # Get all pending tasks
-            all_tasks = self.redis_client.hgetall(self.tasks_key)
-            current_time = datetime.utcnow()
+            now = to_score(datetime.utcnow())
+            self._recover_expired_leases(now)
             
-            for task_id, task_data_json in all_tasks.items():
-                task_data = json.loads(task_data_json)
+            free_slots = self.max_workers - self._active_workers - self._queue.qsize()
+            for priority in PRIORITY_LANES:
+                if free_slots <= 0:
+                    break
                 
-                if task_data["status"] != TaskStatus.PENDING.value:
+                task_ids = self._claim_script(
+                    keys=[self._due_key(priority.value), self.leases_key],
+                    args=[now, now + self.visibility_timeout, free_slots]
+                )
+                if not task_ids:
                     continue
                 
-                schedule_time = datetime.fromisoformat(task_data["schedule_time"])
-                
-                # Check if task is ready to run
-                if schedule_time <= current_time:
-                    await self._execute_task(task_id.decode(), task_data)
+                task_ids = [task_id.decode() for task_id in task_ids]
+                for task_id, task_data_json in zip(task_ids, self.redis_client.hmget(self.tasks_key, task_ids)):
+                    if task_data_json is None:
+                        # Payload was removed after it was indexed
+                        self.redis_client.zrem(self.leases_key, task_id)
+                        continue
+                    task_data = json.loads(task_data_json)
+                    self._queue.put_nowait((PRIORITY_RANK[priority.value], next(self._sequence), task_id, task_data))
+                    free_slots -= 1
                     
         except Exception as e:
             log_error(e, {"action": "process_pending_tasks"})
     
+    def _recover_expired_leases(self, now: float, limit: int = 1000):
+        """Re-queue tasks whose worker did not finish within the visibility timeout."""
+        recovered, exhausted = self._recover_script(
+            keys=[self.leases_key, self.tasks_key, self.running_tasks_key, self.recoveries_key, *self._lane_keys()],
+            args=[now, limit, *(priority.value for priority in PRIORITY_LANES)]
+        )
+        
+        for task_id in recovered:
+            task_id = task_id.decode()
+            self._update_task(task_id, status=TaskStatus.PENDING.value)
+            logger.warning("Task lease expired, task re-queued", task_id=task_id)
+        
+        for task_id in exhausted:
+            task_id = task_id.decode()
+            task_data = self._update_task(
+                task_id,
+                status=TaskStatus.FAILED.value,
+                error="Task lease expired more times than retry_count",
+                failed_at=datetime.utcnow().isoformat()
+            )
+            if task_data:
+                log_task(task_id, task_data["task_type"], "failed", error=task_data["error"])
+    
+    def _update_task(self, task_id: str, **fields) -> Optional[Dict[str, Any]]:
+        task_data_json = self.redis_client.hget(self.tasks_key, task_id)
+        if task_data_json is None:
+            return None
+        task_data = json.loads(task_data_json)
+        task_data.update(fields)
+        self.redis_client.hset(self.tasks_key, task_id, json.dumps(task_data))
+        return task_data
+    
+    async def _worker_loop(self):
+        """Run claimed tasks until a stop marker is received."""
+        while True:
+            item = await self._queue.get()
+            try:
+                if item == _STOP:
+                    return
+                _, _, task_id, task_data = item
+                self._active_workers += 1
+                try:
+                    await self._execute_task(task_id, task_data)
+                finally:
+                    self._active_workers -= 1
+                    if self._wakeup is not None:
+                        self._wakeup.set()
+            finally:
+                self._queue.task_done()
+    
+    async def _shutdown_workers(self):
+        """Release claimed tasks that never started and let running ones finish."""
+        if self._queue is None:
+            return
+        
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            self._queue.task_done()
+            if item == _STOP:
+                continue
+            _, _, task_id, task_data = item
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.zrem(self.leases_key, task_id)
+            pipe.zadd(self._due_key(task_data["priority"]), {
+                task_id: to_score(datetime.fromisoformat(task_data["schedule_time"]))
+            })
+            pipe.execute()
+        
+        for _ in self._workers:
+            self._queue.put_nowait(_STOP)
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
     async def _execute_task(self, task_id: str, task_data: Dict[str, Any]):
         """Execute a scheduled task."""
         try:
@@ -209,9 +507,12 @@ class SchedulerService:
             self.redis_client.hset(self.tasks_key, task_id, json.dumps(task_data))
             self.redis_client.hset(self.running_tasks_key, task_id, json.dumps(task_data))
             
-            # Execute task based on type
+            # Execute task based on type, within the task timeout so it ends before its lease
             task_type = TaskType(task_data["task_type"])
-            result = await self._dispatch_task(task_type, task_data)
+            result = await asyncio.wait_for(
+                self._dispatch_task(task_type, task_data),
+                timeout=min(task_data.get("timeout") or self.visibility_timeout, self.visibility_timeout)
+            )
             
             # Update task status to completed
             task_data["status"] = TaskStatus.COMPLETED.value
@@ -224,19 +525,27 @@ class SchedulerService:
             if task_data["recurring"] and task_data["recurring_interval"]:
                 await self._schedule_next_occurrence(task_data)
             
-            # Move to completed tasks
-            self.redis_client.hset(self.completed_tasks_key, task_id, json.dumps(task_data))
-            self.redis_client.hdel(self.tasks_key, task_id)
-            self.redis_client.hdel(self.running_tasks_key, task_id)
+            # Move to completed tasks and release the lease
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.hset(self.completed_tasks_key, task_id, json.dumps(task_data))
+            pipe.hdel(self.tasks_key, task_id)
+            pipe.hdel(self.running_tasks_key, task_id)
+            pipe.hdel(self.recoveries_key, task_id)
+            pipe.zrem(self.leases_key, task_id)
+            pipe.execute()
             
         except Exception as e:
             # Mark task as failed
             task_data["status"] = TaskStatus.FAILED.value
-            task_data["error"] = str(e)
+            task_data["error"] = str(e) or type(e).__name__
             task_data["failed_at"] = datetime.utcnow().isoformat()
             
-            self.redis_client.hset(self.tasks_key, task_id, json.dumps(task_data))
-            self.redis_client.hdel(self.running_tasks_key, task_id)
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.hset(self.tasks_key, task_id, json.dumps(task_data))
+            pipe.hdel(self.running_tasks_key, task_id)
+            pipe.hdel(self.recoveries_key, task_id)
+            pipe.zrem(self.leases_key, task_id)
+            pipe.execute()
             
             log_task(task_id, task_data["task_type"], "failed", error=str(e))
             log_error(e, {"action": "execute_task", "task_id": task_id})
@@ -250,7 +559,8 @@ class SchedulerService:
             TaskType.AB_TEST_ANALYSIS: self._handle_ab_test_analysis,
             TaskType.BUDGET_ADJUSTMENT: self._handle_budget_adjustment,
             TaskType.KEYWORD_RESEARCH: self._handle_keyword_research,
-            TaskType.REPORT_GENERATION: self._handle_report_generation
+            TaskType.REPORT_GENERATION: self._handle_report_generation,
+            TaskType.METRICS_ROLLUP: self._handle_metrics_rollup
         }
         
         handler = handlers.get(task_type)
@@ -371,6 +681,26 @@ class SchedulerService:
             "processed_at": datetime.utcnow().isoformat()
         }
     
+    async def _handle_metrics_rollup(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle metrics rollup compaction task."""
+        self.ensure_metrics_rollup_job()
+        return await asyncio.to_thread(self._compact_metrics_rollup, task_data["parameters"])
+    
+    def _compact_metrics_rollup(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        if self._session_factory is None:
+            self._session_factory = sessionmaker(bind=create_engine(settings.database_url, pool_pre_ping=True))
+        
+        db = self._session_factory()
+        try:
+            if "max_hours" in parameters:
+                return MetricsRollup(db).compact(max_hours=parameters["max_hours"])
+            return MetricsRollup(db).compact()
+        except Exception as e:
+            # Keep the recurring job alive; the next run retries the same hours
+            return {"error": str(e), "processed_at": datetime.utcnow().isoformat()}
+        finally:
+            db.close()
+    
     async def _schedule_next_occurrence(self, task_data: Dict[str, Any]):
         """Schedule the next occurrence of a recurring task."""
         try:
@@ -393,7 +723,7 @@ class SchedulerService:
             for key in ["started_at", "completed_at", "result", "error", "failed_at"]:
                 new_task_data.pop(key, None)
             
-            self.redis_client.hset(self.tasks_key, new_task_id, json.dumps(new_task_data))
+            self._store_pending(new_task_id, new_task_data, next_run_time)
             
             logger.info(
                 "Recurring task scheduled",
@@ -439,6 +769,10 @@ class SchedulerService:
             if task_dict["status"] != TaskStatus.PENDING.value:
                 return False
             
+            # Removing the id from its lane fails if a worker already claimed it
+            if not self.redis_client.zrem(self._due_key(task_dict["priority"]), task_id):
+                return False
+            
             task_dict["status"] = TaskStatus.CANCELLED.value
             task_dict["cancelled_at"] = datetime.utcnow().isoformat()
             
@@ -458,6 +792,10 @@ class SchedulerService:
             pending_count = self.redis_client.hlen(self.tasks_key)
             running_count = self.redis_client.hlen(self.running_tasks_key)
             completed_count = self.redis_client.hlen(self.completed_tasks_key)
+            queued_by_priority = {
+                priority.value: self.redis_client.zcard(self._due_key(priority.value))
+                for priority in PRIORITY_LANES
+            }
             
             return {
                 "is_running": self.is_running,
@@ -465,6 +803,10 @@ class SchedulerService:
                 "running_tasks": running_count,
                 "completed_tasks": completed_count,
                 "total_tasks": pending_count + running_count + completed_count,
+                "queued_by_priority": queued_by_priority,
+                "leased_tasks": self.redis_client.zcard(self.leases_key),
+                "max_workers": self.max_workers,
+                "active_workers": self._active_workers,
                 "stats_retrieved_at": datetime.utcnow().isoformat()
             }
             
@@ -44,6 +44,18 @@ class Settings(BaseSettings):
     celery_broker_url: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/14")
     celery_result_backend: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/14")
     
+    # Scheduler settings
+    scheduler_max_workers: int = 10
+    scheduler_poll_interval: float = 1.0  # seconds
+    scheduler_visibility_timeout: int = 600  # seconds a claimed task stays leased
+    metrics_rollup_interval: int = 600  # seconds between rollup compactions (0 disables)
+    
+    # Metrics ingestion buffer
+    metrics_buffer_batch_size: int = 1000
+    metrics_buffer_flush_interval: float = 5.0  # seconds
+    metrics_buffer_max_pending: int = 10000  # POST /metrics/bulk waits beyond this
+    metrics_buffer_max_retries: int = 3
+    
     # Monitoring
     enable_metrics: bool = True
     log_level: str = "INFO"
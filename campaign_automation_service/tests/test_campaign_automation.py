@@ -287,7 +287,7 @@ class TestSchedulerService:
         with patch('redis.from_url') as mock_redis:
             mock_redis_client = Mock()
             mock_redis.return_value = mock_redis_client
-            mock_redis_client.hset.return_value = None
+            mock_pipeline = mock_redis_client.pipeline.return_value
             
             scheduler = SchedulerService()
             scheduler.redis_client = mock_redis_client
@@ -300,7 +300,52 @@ class TestSchedulerService:
             )
             
             assert task_id.startswith("campaign_optimization_1_")
-            mock_redis_client.hset.assert_called_once()
+            # Payload and due-index entry are written in one transaction
+            mock_redis_client.pipeline.assert_called_once_with(transaction=True)
+            mock_pipeline.hset.assert_called_once()
+            assert mock_pipeline.hset.call_args[0][:2] == (scheduler.tasks_key, task_id)
+            mock_pipeline.zadd.assert_called_once()
+            due_key, members = mock_pipeline.zadd.call_args[0]
+            assert due_key == scheduler._due_key(TaskPriority.MEDIUM.value)
+            assert list(members) == [task_id]
+            mock_pipeline.execute.assert_called_once()
+            mock_redis_client.hset.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_due_task_is_claimed_with_lua_script(self):
+        """Test that due tasks are claimed through the claim script and queued."""
+        with patch('redis.from_url') as mock_redis:
+            mock_redis_client = Mock()
+            mock_redis.return_value = mock_redis_client
+            
+            scheduler = SchedulerService(max_workers=2)
+            scheduler.redis_client = mock_redis_client
+            scheduler._queue = asyncio.PriorityQueue()
+            scheduler._recover_script = Mock(return_value=[[], []])
+            scheduler._claim_script = Mock(side_effect=lambda keys, args: (
+                [b"campaign_optimization_1_100"] if keys[0] == scheduler._due_key(TaskPriority.HIGH.value) else []
+            ))
+            mock_redis_client.hmget.return_value = [
+                '{"id": "campaign_optimization_1_100", "task_type": "campaign_optimization", "priority": "high"}'
+            ]
+            
+            await scheduler._process_pending_tasks()
+            
+            claimed_lanes = [call.kwargs["keys"][0] for call in scheduler._claim_script.call_args_list]
+            assert claimed_lanes[:2] == [
+                scheduler._due_key(TaskPriority.URGENT.value),
+                scheduler._due_key(TaskPriority.HIGH.value)
+            ]
+            for call in scheduler._claim_script.call_args_list:
+                assert call.kwargs["keys"][1] == scheduler.leases_key
+            # Lease expires one visibility timeout after the claim
+            now, lease_expiry, _ = scheduler._claim_script.call_args_list[0].kwargs["args"]
+            assert lease_expiry == now + scheduler.visibility_timeout
+            mock_redis_client.hmget.assert_called_once_with(scheduler.tasks_key, ["campaign_optimization_1_100"])
+            
+            _, _, task_id, task_data = scheduler._queue.get_nowait()
+            assert task_id == "campaign_optimization_1_100"
+            assert task_data["priority"] == "high"
     
     @pytest.mark.asyncio
     async def test_get_task_status(self):
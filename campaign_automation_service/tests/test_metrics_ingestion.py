@@ -0,0 +1,198 @@
+"""Tests for bulk metric ingestion."""
+
+import asyncio
+import httpx
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.models.campaign_models import Base, Campaign, CampaignMetric, CampaignMetricHourly, MetricRollupState
+from src.core.metrics_ingestion import (
+    MetricsIngestor, MetricsIngestionBuffer, compute_derived_metrics, samples_dropped
+)
+from src.core.metrics_rollup import ROLLUP_STATE_NAME
+
+
+@pytest.fixture
+def session_factory():
+    """Session factory over a shared in-memory SQLite database."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add_all([
+        Campaign(id=campaign_id, name=f"Campaign {campaign_id}", impressions=0, clicks=0,
+                 conversions=0, cost=0.0, revenue=0.0)
+        for campaign_id in (1, 2)
+    ])
+    db.commit()
+    db.close()
+    return factory
+
+
+def sample(campaign_id, **overrides):
+    data = {"campaign_id": campaign_id, "impressions": 1000, "clicks": 50, "conversions": 5,
+            "cost": 25.0, "revenue": 100.0, "date": datetime(2024, 3, 10, 12)}
+    data.update(overrides)
+    return data
+
+
+class TestDerivedMetrics:
+    """Test vectorized derived ratios."""
+
+    def test_matches_scalar_formulas(self):
+        derived = compute_derived_metrics([sample(1), sample(1, impressions=0, clicks=0, conversions=0, cost=0.0)])
+
+        assert derived["ctr"].tolist() == [5.0, 0.0]
+        assert derived["cpc"].tolist() == [0.5, 0.0]
+        assert derived["cpa"].tolist() == [5.0, 0.0]
+        assert derived["roas"].tolist() == [4.0, 0.0]
+        assert derived["roi"].tolist() == [300.0, 0.0]
+        assert derived["acos"].tolist() == [25.0, 0.0]
+
+
+class TestMetricsIngestor:
+    """Test single-transaction batch writes."""
+
+    def test_write_batch_updates_campaign_totals(self, session_factory):
+        db = session_factory()
+
+        written = MetricsIngestor(db).write_batch([sample(1), sample(1), sample(2, cost=10.0)])
+
+        assert written == 3
+        assert db.query(CampaignMetric).count() == 3
+        campaign_1 = db.get(Campaign, 1)
+        campaign_2 = db.get(Campaign, 2)
+        db.refresh(campaign_1)
+        db.refresh(campaign_2)
+        assert campaign_1.impressions == 2000
+        assert campaign_1.cost == 50.0
+        assert campaign_2.cost == 10.0
+        metric = db.query(CampaignMetric).filter(CampaignMetric.campaign_id == 2).one()
+        assert metric.hour == 12
+        assert metric.acos == 10.0
+
+
+class TestMetricsIngestionBuffer:
+    """Test the async buffer."""
+
+    @pytest.mark.asyncio
+    async def test_flushes_on_batch_size(self, session_factory):
+        buffer = MetricsIngestionBuffer(session_factory, batch_size=5, flush_interval=60)
+        await buffer.start()
+
+        await buffer.add_many([sample(1, date=datetime(2024, 3, 10, 12) + timedelta(minutes=i)) for i in range(10)])
+        for _ in range(50):
+            if buffer.stats["samples_written"] == 10:
+                break
+            await asyncio.sleep(0.05)
+        await buffer.stop()
+
+        assert buffer.stats["samples_written"] == 10
+        assert buffer.stats["flushes"] == 2
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_pending_samples(self, session_factory):
+        buffer = MetricsIngestionBuffer(session_factory, batch_size=100, flush_interval=60)
+        await buffer.start()
+
+        await buffer.add_many([sample(2) for _ in range(7)])
+        await buffer.stop()
+
+        db = session_factory()
+        assert db.query(CampaignMetric).count() == 7
+        assert db.get(Campaign, 2).clicks == 350
+
+    @pytest.mark.asyncio
+    async def test_backpressure_when_full(self, session_factory):
+        buffer = MetricsIngestionBuffer(session_factory, batch_size=2, max_pending=2)
+
+        await buffer.add_many([sample(1), sample(1)])
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(buffer.add(sample(1)), 0.1)
+
+        assert await buffer.flush() == 2
+        assert buffer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_write_is_retried(self, session_factory):
+        attempts = []
+
+        def flaky_factory():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("database unavailable")
+            return session_factory()
+
+        buffer = MetricsIngestionBuffer(flaky_factory, batch_size=10, retry_backoff=0.01)
+        await buffer.add_many([sample(1), sample(2)])
+
+        assert await buffer.flush() == 2
+        assert len(attempts) == 2
+        assert buffer.stats["retries"] == 1
+        assert buffer.stats["samples_dropped"] == 0
+
+    @pytest.mark.asyncio
+    async def test_batch_dropped_after_retries_is_counted(self):
+        def broken_factory():
+            raise RuntimeError("database unavailable")
+
+        buffer = MetricsIngestionBuffer(broken_factory, batch_size=10, max_retries=2, retry_backoff=0.01)
+        dropped_before = samples_dropped._value.get()
+        await buffer.add_many([sample(1), sample(1), sample(2)])
+
+        assert await buffer.flush() == 0
+        assert buffer.stats["retries"] == 2
+        assert buffer.stats["failed_batches"] == 1
+        assert buffer.stats["samples_dropped"] == 3
+        assert samples_dropped._value.get() - dropped_before == 3
+
+    @pytest.mark.asyncio
+    async def test_aware_timestamps_are_stored_as_naive_utc(self, session_factory):
+        db = session_factory()
+        db.add(MetricRollupState(name=ROLLUP_STATE_NAME, watermark=datetime(2024, 3, 11)))
+        db.commit()
+        db.close()
+        buffer = MetricsIngestionBuffer(session_factory, batch_size=10)
+        local = timezone(timedelta(hours=-3))
+
+        await buffer.add(sample(1, date=datetime(2024, 3, 10, 9, tzinfo=local)))
+        assert await buffer.flush() == 1
+
+        db = session_factory()
+        metric = db.query(CampaignMetric).one()
+        assert metric.date == datetime(2024, 3, 10, 12)
+        assert metric.hour == 12
+        rollup = db.query(CampaignMetricHourly).one()
+        assert rollup.bucket == datetime(2024, 3, 10, 12)
+
+
+class TestBulkMetricsRoute:
+    """Test POST /metrics/bulk through the ingestion buffer."""
+
+    @pytest.mark.asyncio
+    async def test_bulk_samples_are_buffered(self, session_factory, monkeypatch):
+        from fastapi import FastAPI
+        from src.api import routes
+
+        buffer = MetricsIngestionBuffer(session_factory, batch_size=100, flush_interval=60)
+        monkeypatch.setattr(routes, "metrics_buffer", buffer)
+        app = FastAPI()
+        app.include_router(routes.router, prefix="/api")
+        app.dependency_overrides[routes.get_current_user] = lambda: {"user_id": "user_123"}
+
+        payload = [
+            {"campaign_id": 1, "impressions": 100, "clicks": 5, "cost": 2.5, "revenue": 10.0,
+             "date": "2024-03-10T09:00:00-03:00"},
+            {"campaign_id": 2, "impressions": 50},
+        ]
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/api/metrics/bulk", json=payload)
+
+        assert response.status_code == 202
+        assert response.json() == {"samples_accepted": 2, "pending": 2}
+        assert await buffer.flush() == 2
+        db = session_factory()
+        assert db.query(CampaignMetric).count() == 2
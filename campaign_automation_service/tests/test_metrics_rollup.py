@@ -0,0 +1,155 @@
+"""Tests for the campaign metrics rollup tables."""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.campaign_models import (
+    Base, CampaignMetric, CampaignMetricHourly, CampaignMetricDaily, MetricRollupState
+)
+from src.core.metrics_rollup import MetricsRollup
+from src.core.metrics_analyzer import MetricsAnalyzer
+
+
+NOW = datetime(2024, 3, 10, 15, 40)
+
+
+@pytest.fixture
+def db():
+    """In-memory SQLite session with the campaign tables."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def add_samples(db, campaign_id, hours, cost=2.0, revenue=10.0):
+    for offset in range(hours):
+        db.add(CampaignMetric(
+            campaign_id=campaign_id,
+            date=NOW - timedelta(minutes=30 * offset),
+            hour=0,
+            impressions=100,
+            clicks=5,
+            conversions=1,
+            cost=cost,
+            revenue=revenue
+        ))
+    db.commit()
+
+
+def raw_window(db, campaign_id, start, end):
+    rows = db.query(CampaignMetric).filter(
+        CampaignMetric.campaign_id == campaign_id,
+        CampaignMetric.date >= start,
+        CampaignMetric.date <= end
+    ).all()
+    return sum(r.cost for r in rows), sum(r.revenue for r in rows)
+
+
+class TestMetricsRollup:
+    """Test rollup compaction and read paths."""
+
+    def test_compaction_builds_hourly_and_daily(self, db):
+        add_samples(db, 1, 200)
+        rollup = MetricsRollup(db)
+
+        result = rollup.compact(now=NOW, max_hours=24 * 10)
+
+        assert result["watermark"] == "2024-03-10T15:00:00"
+        assert rollup.get_watermark() == datetime(2024, 3, 10, 15)
+        # Open hour is not rolled up
+        assert db.query(CampaignMetricHourly).filter(
+            CampaignMetricHourly.bucket == datetime(2024, 3, 10, 15)
+        ).count() == 0
+        hourly_cost = sum(r.cost for r in db.query(CampaignMetricHourly).all())
+        daily_cost = sum(r.cost for r in db.query(CampaignMetricDaily).all())
+        closed_cost = raw_window(db, 1, NOW - timedelta(days=30), datetime(2024, 3, 10, 14, 59, 59))[0]
+        assert hourly_cost == pytest.approx(closed_cost)
+        assert daily_cost == pytest.approx(closed_cost)
+
+    def test_compaction_is_idempotent(self, db):
+        add_samples(db, 1, 50)
+        rollup = MetricsRollup(db)
+        rollup.compact(now=NOW)
+        first = sorted((r.bucket, r.cost) for r in db.query(CampaignMetricHourly).all())
+
+        rollup.compact(now=NOW, lookback_hours=48)
+
+        assert sorted((r.bucket, r.cost) for r in db.query(CampaignMetricHourly).all()) == first
+
+    def test_daily_totals_match_raw(self, db):
+        add_samples(db, 1, 300)
+        add_samples(db, 2, 300, cost=5.0)
+        rollup = MetricsRollup(db)
+        rollup.compact(now=NOW, max_hours=24 * 10)
+        start, end = NOW - timedelta(days=4, minutes=17), NOW
+
+        totals = rollup.get_daily_totals(1, start, end)
+
+        assert sum(t["cost"] for t in totals.values()) == pytest.approx(raw_window(db, 1, start, end)[0])
+        assert len(totals) == 5
+
+    def test_late_samples_are_applied_incrementally(self, db):
+        add_samples(db, 1, 10)
+        rollup = MetricsRollup(db)
+        rollup.compact(now=NOW)
+        late = {"campaign_id": 1, "date": NOW - timedelta(hours=2), "impressions": 10,
+                "clicks": 1, "conversions": 0, "cost": 7.0, "revenue": 0.0}
+        db.add(CampaignMetric(**late, hour=late["date"].hour))
+
+        assert rollup.apply_samples([late]) == 1
+        db.commit()
+
+        start = NOW - timedelta(hours=6)
+        totals = rollup.get_daily_totals(1, start, NOW)
+        assert sum(t["cost"] for t in totals.values()) == pytest.approx(raw_window(db, 1, start, NOW)[0])
+
+    def test_window_totals_match_raw(self, db):
+        add_samples(db, 1, 400)
+        add_samples(db, 2, 100, cost=3.0, revenue=4.0)
+        rollup = MetricsRollup(db)
+        rollup.compact(now=NOW - timedelta(hours=5), max_hours=24 * 10)
+
+        totals = rollup.get_window_totals({1, 2, 3}, {1, 24, 168}, now=NOW)
+
+        for campaign_id in (1, 2):
+            for hours in (1, 24, 168):
+                expected = raw_window(db, campaign_id, NOW - timedelta(hours=hours), NOW)
+                assert totals[(campaign_id, hours)] == pytest.approx(expected)
+        assert (3, 24) not in totals
+
+    def test_watermark_is_cached_until_refresh(self, db):
+        add_samples(db, 1, 10)
+        rollup = MetricsRollup(db)
+        rollup.compact(now=NOW)
+        assert rollup.get_watermark() == datetime(2024, 3, 10, 15)
+
+        db.query(MetricRollupState).update({"watermark": datetime(2024, 3, 10, 16)})
+        db.commit()
+
+        assert MetricsRollup(db).get_watermark() == datetime(2024, 3, 10, 15)
+        assert MetricsRollup(db).get_watermark(refresh=True) == datetime(2024, 3, 10, 16)
+        assert MetricsRollup(db, watermark_ttl=0).get_watermark() == datetime(2024, 3, 10, 16)
+
+    def test_reads_without_compaction_use_raw(self, db):
+        add_samples(db, 1, 20)
+        rollup = MetricsRollup(db)
+
+        totals = rollup.get_window_totals({1}, {24}, now=NOW)
+
+        assert totals[(1, 24)] == pytest.approx(raw_window(db, 1, NOW - timedelta(hours=24), NOW))
+
+    @pytest.mark.asyncio
+    async def test_analyzer_daily_metrics_use_rollups(self, db):
+        add_samples(db, 1, 120)
+        MetricsRollup(db).compact(now=NOW, max_hours=24 * 10)
+        analyzer = MetricsAnalyzer(db)
+
+        daily = await analyzer.get_daily_aggregated_metrics(1, NOW - timedelta(days=2), NOW)
+
+        assert [d["date"] for d in daily] == ["2024-03-08", "2024-03-09", "2024-03-10"]
+        assert sum(d["cost"] for d in daily) == pytest.approx(raw_window(db, 1, NOW - timedelta(days=2), NOW)[0])
+        assert daily[1]["ctr"] == 5.0
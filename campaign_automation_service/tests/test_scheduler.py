@@ -0,0 +1,284 @@
+"""Tests for the scheduler due index, leases and worker pool."""
+
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta
+
+from src.services.scheduler import SchedulerService, TaskType, TaskPriority, TaskStatus, to_score
+
+
+class FakeRedis:
+    """In-memory stand-in for the hash and sorted-set commands the scheduler uses."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.zsets = {}
+
+    @staticmethod
+    def _key(value):
+        return value.encode() if isinstance(value, str) else value
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[self._key(key)] = value.encode()
+
+    def hget(self, name, key):
+        return self.hashes.get(name, {}).get(self._key(key))
+
+    def hmget(self, name, keys):
+        return [self.hget(name, key) for key in keys]
+
+    def hdel(self, name, key):
+        return int(self.hashes.get(name, {}).pop(self._key(key), None) is not None)
+
+    def hlen(self, name):
+        return len(self.hashes.get(name, {}))
+
+    def hscan_iter(self, name, count=None):
+        return iter(list(self.hashes.get(name, {}).items()))
+
+    def zadd(self, name, mapping, nx=False):
+        zset = self.zsets.setdefault(name, {})
+        for member, score in mapping.items():
+            if not (nx and self._key(member) in zset):
+                zset[self._key(member)] = score
+
+    def zrem(self, name, member):
+        return int(self.zsets.get(name, {}).pop(self._key(member), None) is not None)
+
+    def zcard(self, name):
+        return len(self.zsets.get(name, {}))
+
+    def zrangebyscore(self, name, max_score, limit):
+        due = sorted((score, member) for member, score in self.zsets.get(name, {}).items() if score <= max_score)
+        return [member for _, member in due[:limit]]
+
+    def claim(self, keys, args):
+        due_key, leases_key = keys
+        now, lease_until, limit = args
+        ids = self.zrangebyscore(due_key, now, limit)
+        for task_id in ids:
+            self.zrem(due_key, task_id)
+            self.zadd(leases_key, {task_id: lease_until})
+        return ids
+
+    def recover(self, keys, args):
+        leases_key, tasks_key, running_key, recoveries_key = keys[:4]
+        now, limit = args[:2]
+        lanes = dict(zip(args[2:], keys[4:]))
+        recovered, exhausted = [], []
+        for task_id in self.zrangebyscore(leases_key, now, limit):
+            self.zrem(leases_key, task_id)
+            self.hdel(running_key, task_id)
+            task = json.loads(self.hget(tasks_key, task_id))
+            attempts = self.hashes.setdefault(recoveries_key, {}).get(task_id, 0) + 1
+            self.hashes[recoveries_key][task_id] = attempts
+            if attempts > task["retry_count"]:
+                self.hashes[recoveries_key].pop(task_id)
+                exhausted.append(task_id)
+            else:
+                self.zadd(lanes[task["priority"]], {task_id: now})
+                recovered.append(task_id)
+        return [recovered, exhausted]
+
+    def index(self, keys, args):
+        tasks_key, leases_key, running_key = keys[:3]
+        lane_count = args[0]
+        lanes = dict(zip(args[1:lane_count + 1], keys[3:]))
+        pairs = args[lane_count + 1:]
+        indexed = 0
+        for task_id, score in zip(pairs[::2], pairs[1::2]):
+            raw = self.hget(tasks_key, task_id)
+            if raw is None or self._key(task_id) in self.zsets.get(leases_key, {}) or self.hget(running_key, task_id):
+                continue
+            task = json.loads(raw)
+            lane = lanes.get(task["priority"])
+            if lane and task["status"] == TaskStatus.PENDING.value and self._key(task_id) not in self.zsets.get(lane, {}):
+                self.zadd(lane, {task_id: score})
+                indexed += 1
+        return indexed
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+@pytest.fixture
+def service():
+    scheduler = SchedulerService(max_workers=2, poll_interval=0.01, visibility_timeout=60)
+    fake = FakeRedis()
+    scheduler.redis_client = fake
+    scheduler._claim_script = fake.claim
+    scheduler._recover_script = fake.recover
+    scheduler._index_script = fake.index
+    return scheduler
+
+
+async def schedule(service, priority, delay=-1, **kwargs):
+    task_id = await service.schedule_task(
+        TaskType.PERFORMANCE_ANALYSIS, None, {}, datetime.utcnow() + timedelta(seconds=delay),
+        priority=priority, **kwargs
+    )
+    # Task ids are second-resolution timestamps; keep them unique in tests
+    unique_id = f"{task_id}_{priority.value}_{len(service.redis_client.hashes[service.tasks_key])}"
+    data = json.loads(service.redis_client.hget(service.tasks_key, task_id))
+    service.redis_client.hdel(service.tasks_key, task_id)
+    service.redis_client.zrem(service._due_key(priority.value), task_id)
+    data["id"] = unique_id
+    service._store_pending(unique_id, data, datetime.fromisoformat(data["schedule_time"]))
+    return unique_id
+
+
+class TestSchedulerDueIndex:
+    """Test claiming, priority lanes and lease recovery."""
+
+    @pytest.mark.asyncio
+    async def test_claims_only_due_tasks_highest_priority_first(self, service):
+        service._queue = asyncio.PriorityQueue()
+        low = await schedule(service, TaskPriority.LOW)
+        urgent = await schedule(service, TaskPriority.URGENT)
+        await schedule(service, TaskPriority.HIGH, delay=3600)
+
+        await service._process_pending_tasks()
+
+        claimed = [service._queue.get_nowait()[2] for _ in range(service._queue.qsize())]
+        assert claimed == [urgent, low]
+        assert service.redis_client.zcard(service.leases_key) == 2
+        assert service.redis_client.zcard(service._due_key("high")) == 1
+
+    @pytest.mark.asyncio
+    async def test_claims_are_bounded_by_free_workers(self, service):
+        service._queue = asyncio.PriorityQueue()
+        for _ in range(5):
+            await schedule(service, TaskPriority.MEDIUM)
+
+        await service._process_pending_tasks()
+
+        assert service._queue.qsize() == 2
+        assert service.redis_client.zcard(service._due_key("medium")) == 3
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_requeued_then_failed(self, service):
+        service._queue = asyncio.PriorityQueue()
+        task_id = await schedule(service, TaskPriority.HIGH)
+        await service._process_pending_tasks()
+        service._queue = asyncio.PriorityQueue()  # the worker "crashed"
+
+        later = to_score(datetime.utcnow()) + 61
+        service._recover_expired_leases(later)
+        assert service.redis_client.zcard(service._due_key("high")) == 1
+        assert json.loads(service.redis_client.hget(service.tasks_key, task_id))["status"] == TaskStatus.PENDING.value
+
+        for attempt in range(3):
+            service.redis_client.zadd(service.leases_key, {task_id: 0})
+            service.redis_client.zrem(service._due_key("high"), task_id)
+            service._recover_expired_leases(later)
+
+        task = json.loads(service.redis_client.hget(service.tasks_key, task_id))
+        assert task["status"] == TaskStatus.FAILED.value
+        assert service.redis_client.zcard(service._due_key("high")) == 0
+
+    @pytest.mark.asyncio
+    async def test_rebuild_skips_leased_tasks(self, service):
+        service._queue = asyncio.PriorityQueue()
+        claimed = await schedule(service, TaskPriority.HIGH)
+        await service._process_pending_tasks()
+        legacy = await schedule(service, TaskPriority.LOW)
+        service.redis_client.zrem(service._due_key("low"), legacy)  # stored before the index existed
+
+        assert service.rebuild_due_index() == 1
+
+        assert service.redis_client.zcard(service._due_key("high")) == 0
+        assert service.redis_client.zcard(service._due_key("low")) == 1
+        assert service.redis_client.zcard(service.leases_key) == 1
+        assert service._queue.get_nowait()[2] == claimed
+
+    @pytest.mark.asyncio
+    async def test_cancel_fails_once_claimed(self, service):
+        service._queue = asyncio.PriorityQueue()
+        pending = await schedule(service, TaskPriority.LOW, delay=3600)
+        claimed = await schedule(service, TaskPriority.URGENT)
+        await service._process_pending_tasks()
+
+        assert await service.cancel_task(pending) is True
+        assert await service.cancel_task(claimed) is False
+
+    @pytest.mark.asyncio
+    async def test_worker_pool_runs_tasks_concurrently(self, service):
+        running, peak = 0, 0
+
+        async def dispatch(task_type, task_data):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return {"ok": True}
+
+        service._dispatch_task = dispatch
+        task_ids = [await schedule(service, TaskPriority.MEDIUM) for _ in range(5)]
+        recurring = await schedule(service, TaskPriority.LOW, recurring=True, recurring_interval=timedelta(hours=1))
+
+        runner = asyncio.create_task(service.start_scheduler())
+        for _ in range(100):
+            if service.redis_client.hlen(service.completed_tasks_key) == 6:
+                break
+            await asyncio.sleep(0.01)
+        await service.stop_scheduler()
+        await runner
+
+        assert peak == 2
+        for task_id in task_ids + [recurring]:
+            completed = json.loads(service.redis_client.hget(service.completed_tasks_key, task_id))
+            assert completed["status"] == TaskStatus.COMPLETED.value
+        assert service.redis_client.zcard(service.leases_key) == 0
+        # The next occurrence of the recurring task is indexed in its lane
+        assert service.redis_client.zcard(service._due_key("low")) == 1
+
+
+class TestMetricsRollupJob:
+    """Test the recurring rollup compaction job."""
+
+    def test_job_is_scheduled_once_on_an_interval_boundary(self, service):
+        first = service.ensure_metrics_rollup_job()
+        second = service.ensure_metrics_rollup_job()
+
+        assert first == second
+        assert service.redis_client.hlen(service.tasks_key) == 1
+        task = json.loads(service.redis_client.hget(service.tasks_key, first))
+        assert task["task_type"] == TaskType.METRICS_ROLLUP.value
+        assert to_score(datetime.fromisoformat(task["schedule_time"])) % service.metrics_rollup_interval == 0
+
+    def test_disabled_with_zero_interval(self, service):
+        service.metrics_rollup_interval = 0
+
+        assert service.ensure_metrics_rollup_job() is None
+        assert service.redis_client.hlen(service.tasks_key) == 0
+
+    @pytest.mark.asyncio
+    async def test_run_compacts_and_schedules_the_next_run(self, service):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+        from src.models.campaign_models import Base, MetricRollupState
+
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        service._session_factory = sessionmaker(bind=engine)
+
+        result = await service._dispatch_task(TaskType.METRICS_ROLLUP, {"parameters": {}})
+
+        assert result["hours_compacted"] == 0
+        assert service._session_factory().query(MetricRollupState).count() == 1
+        assert service.redis_client.zcard(service._due_key(TaskPriority.MEDIUM.value)) == 1
@@ -0,0 +1,192 @@
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from sqlmodel import Session, select, func
+from app.models import Keyword
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Short Portuguese function words that would otherwise match almost every keyword
+STOPWORDS = frozenset({
+    "a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "em", "na", "no",
+    "nas", "nos", "um", "uma", "para", "pra", "com", "sem", "por", "ou"
+})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and strip accents (e.g. 'Câmera Fotográfica' -> 'camera fotografica')"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """Normalized, accent-folded token set without stopwords"""
+    return frozenset(
+        token for token in _TOKEN_RE.findall(normalize_text(text))
+        if token not in STOPWORDS
+    )
+
+
+class KeywordIndex:
+    """Inverted index from normalized tokens to keyword ids.
+
+    Matching a title only touches the postings of its own tokens, so the cost
+    depends on how many keywords share a token with the title instead of on
+    the total number of keywords uploaded by the seller.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        self.token_counts: Dict[int, int] = {}
+        self.keywords: Dict[int, Dict] = {}
+        self.max_id = 0
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    @classmethod
+    def from_keywords(cls, keywords: Iterable[Dict]) -> "KeywordIndex":
+        """Build an index from keyword dicts (ids are assigned in list order when missing)"""
+        index = cls()
+        for position, keyword_data in enumerate(keywords):
+            keyword_id = keyword_data.get("id")
+            index.add(position + 1 if keyword_id is None else keyword_id, keyword_data, rank=position)
+        return index
+
+    def add(self, keyword_id: int, keyword_data: Dict, rank: Optional[Tuple] = None):
+        """Add (or replace) a keyword; ``rank`` orders matches, defaulting to search volume desc"""
+        if keyword_id in self.keywords:
+            self.remove(keyword_id)
+
+        tokens = tokenize(keyword_data["keyword"])
+        if rank is None:
+            rank = (-(keyword_data.get("search_volume") or 0), keyword_id)
+        self.keywords[keyword_id] = {**keyword_data, "id": keyword_id, "rank": rank}
+        self.token_counts[keyword_id] = len(tokens)
+        for token in tokens:
+            self.postings[token].add(keyword_id)
+        self.max_id = max(self.max_id, keyword_id)
+
+    def add_keywords(self, keywords: Iterable[Keyword]):
+        """Add keyword rows (e.g. the rows of a freshly uploaded CSV batch)"""
+        for keyword in keywords:
+            self.add(keyword.id, keyword_to_dict(keyword))
+
+    def remove(self, keyword_id: int):
+        keyword_data = self.keywords.pop(keyword_id, None)
+        if keyword_data is None:
+            return
+        self.token_counts.pop(keyword_id, None)
+        for token in tokenize(keyword_data["keyword"]):
+            ids = self.postings.get(token)
+            if ids is not None:
+                ids.discard(keyword_id)
+                if not ids:
+                    del self.postings[token]
+
+    def overlaps(self, text: str, keyword_ids: Optional[Set[int]] = None) -> Tuple[int, Dict[int, int]]:
+        """Return the title token count and the shared-token count per candidate keyword"""
+        tokens = tokenize(text)
+        counts: Dict[int, int] = defaultdict(int)
+        for token in tokens:
+            for keyword_id in self.postings.get(token, ()):
+                if keyword_ids is None or keyword_id in keyword_ids:
+                    counts[keyword_id] += 1
+        return len(tokens), counts
+
+    def match(self, text: str, min_score: float = 0.0,
+              keyword_ids: Optional[Set[int]] = None) -> List[Tuple[Dict, float]]:
+        """Keywords sharing at least one token with ``text`` and their Jaccard score
+
+        Only keywords with a score above ``min_score`` are returned, ordered by rank.
+        """
+        title_size, counts = self.overlaps(text, keyword_ids)
+        matches = []
+        for keyword_id, overlap in counts.items():
+            union = title_size + self.token_counts[keyword_id] - overlap
+            score = overlap / union
+            if score > min_score:
+                matches.append((self.keywords[keyword_id], score))
+        matches.sort(key=lambda match: match[0]["rank"])
+        return matches
+
+
+def keyword_to_dict(keyword: Keyword) -> Dict:
+    return {
+        "id": keyword.id,
+        "keyword": keyword.keyword,
+        "search_volume": keyword.search_volume,
+        "competition": keyword.competition,
+        "relevance_score": keyword.relevance_score or 0.5,
+        "category_match": keyword.category_match
+    }
+
+
+class KeywordIndexCache:
+    """Per-seller keyword indexes kept in memory between requests
+
+    Each lookup compares the cached index with a cheap COUNT/MAX(id) query, so
+    keywords inserted by another worker are loaded incrementally and any
+    other change triggers a rebuild.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, KeywordIndex] = {}
+        self._lock = threading.Lock()
+
+    def get_index(self, session: Session, seller_id: str) -> KeywordIndex:
+        count, max_id = session.exec(
+            select(func.count(Keyword.id), func.max(Keyword.id)).where(
+                Keyword.seller_id == seller_id,
+                Keyword.is_active == True
+            )
+        ).one()
+        max_id = max_id or 0
+
+        with self._lock:
+            index = self._indexes.get(seller_id)
+            if index is not None and len(index) == count and index.max_id == max_id:
+                return index
+
+            if index is not None and max_id > index.max_id:
+                new_keywords = self._load(session, seller_id, after_id=index.max_id)
+                if len(index) + len(new_keywords) == count:
+                    index.add_keywords(new_keywords)
+                    return index
+
+            index = KeywordIndex()
+            index.add_keywords(self._load(session, seller_id))
+            self._indexes[seller_id] = index
+            logger.info(f"Built keyword index for seller {seller_id} with {len(index)} keywords")
+            return index
+
+    def add_keywords(self, seller_id: str, keywords: List[Keyword]):
+        """Add newly stored keywords to the seller index, if one is cached"""
+        with self._lock:
+            index = self._indexes.get(seller_id)
+            if index is not None:
+                index.add_keywords(keyword for keyword in keywords if keyword.is_active)
+
+    def invalidate(self, seller_id: Optional[str] = None):
+        with self._lock:
+            if seller_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(seller_id, None)
+
+    def _load(self, session: Session, seller_id: str, after_id: int = 0) -> List[Keyword]:
+        stmt = select(Keyword).where(
+            Keyword.seller_id == seller_id,
+            Keyword.is_active == True,
+            Keyword.id > after_id
+        )
+        return session.exec(stmt).all()
+
+
+# Global cache instance
+keyword_index_cache = KeywordIndexCache()
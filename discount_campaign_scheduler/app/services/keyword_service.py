@@ -5,6 +5,7 @@ from typing import Dict, List, Optional
 from sqlmodel import Session, select
 from fastapi import HTTPException
 from app.models import Keyword, KeywordUploadBatch, KeywordSuggestionMatch, ItemSuggestion
+from app.services.keyword_index import keyword_index_cache
 import logging
 import io
 
@@ -234,28 +235,21 @@ class KeywordService:
             )
             suggestions = session.exec(suggestions_stmt).all()
             
-            # Simple keyword matching based on title similarity
+            # Add the batch to the seller index and score only candidate postings
+            keyword_index_cache.add_keywords(seller_id, keywords)
+            index = keyword_index_cache.get_index(session, seller_id)
+            batch_ids = {keyword.id for keyword in keywords}
+            
             for suggestion in suggestions:
-                title_words = set(suggestion.title.lower().split())
-                
-                for keyword in keywords:
-                    keyword_words = set(keyword.keyword.lower().split())
-                    
-                    # Calculate simple overlap score
-                    overlap = len(title_words.intersection(keyword_words))
-                    total_words = len(title_words.union(keyword_words))
-                    
-                    if overlap > 0 and total_words > 0:
-                        match_score = overlap / total_words
-                        
-                        if match_score > 0.2:  # Only create matches with reasonable similarity
-                            match = KeywordSuggestionMatch(
-                                suggestion_id=suggestion.id,
-                                keyword_id=keyword.id,
-                                match_score=match_score,
-                                match_type="broad" if match_score < 0.5 else "phrase"
-                            )
-                            session.add(match)
+                # Only create matches with reasonable similarity
+                for keyword_data, match_score in index.match(suggestion.title, min_score=0.2, keyword_ids=batch_ids):
+                    match = KeywordSuggestionMatch(
+                        suggestion_id=suggestion.id,
+                        keyword_id=keyword_data["id"],
+                        match_score=match_score,
+                        match_type="broad" if match_score < 0.5 else "phrase"
+                    )
+                    session.add(match)
             
             session.commit()
             logger.info(f"Generated keyword matches for batch {batch_id}")
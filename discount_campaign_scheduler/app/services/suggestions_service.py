@@ -1,11 +1,12 @@
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from sqlmodel import Session, select
 import numpy as np
 from app.models import (
     ItemSuggestion, DiscountCampaign, SuggestionResponse, Keyword, KeywordSuggestionMatch
 )
+from app.services.keyword_index import KeywordIndex, keyword_index_cache
 from app.services.ml_api_service import ml_api_service
 from app.services.microservice_integration import microservice_integration
 from app.core.config import settings
@@ -44,27 +45,11 @@ class SuggestionsService:
             logger.error(f"Error generating suggestions for seller {seller_id}: {e}")
             raise
 
-    def _get_seller_keywords(self, session: Session, seller_id: str) -> List[Dict]:
-        """Get active keywords for the seller"""
-        keywords_stmt = select(Keyword).where(
-            Keyword.seller_id == seller_id,
-            Keyword.is_active == True
-        ).order_by(Keyword.search_volume.desc())
-        
-        keywords = session.exec(keywords_stmt).all()
-        
-        return [
-            {
-                "keyword": k.keyword,
-                "search_volume": k.search_volume,
-                "competition": k.competition,
-                "relevance_score": k.relevance_score or 0.5,
-                "category_match": k.category_match
-            }
-            for k in keywords
-        ]
+    def _get_seller_keywords(self, session: Session, seller_id: str) -> KeywordIndex:
+        """Get the cached keyword index for the seller's active keywords"""
+        return keyword_index_cache.get_index(session, seller_id)
 
-    async def _calculate_potential_scores_with_keywords(self, items: List[Dict], keywords: List[Dict], access_token: str) -> List[Dict]:
+    async def _calculate_potential_scores_with_keywords(self, items: List[Dict], keywords: Union[KeywordIndex, List[Dict]], access_token: str) -> List[Dict]:
         """Calculate potential scores enhanced with keyword data"""
         scored_items = []
         
@@ -101,57 +86,48 @@ class SuggestionsService:
         
         return scored_items
 
-    def _calculate_keyword_boost(self, item: Dict, keywords: List[Dict]) -> float:
+    def _calculate_keyword_boost(self, item: Dict, keywords: Union[KeywordIndex, List[Dict]]) -> float:
         """Calculate keyword-based boost for item score"""
         if not keywords:
             return 0.0
         
-        title = item.get("title", "").lower()
-        title_words = set(title.split())
-        
+        index = self._as_index(keywords)
         total_boost = 0.0
         matched_count = 0
         
-        for keyword_data in keywords:
-            keyword = keyword_data["keyword"].lower()
-            keyword_words = set(keyword.split())
+        for keyword_data, _ in index.match(item.get("title", "")):
+            # Boost based on search volume and relevance
+            volume_factor = min(1.0, keyword_data["search_volume"] / 10000.0)
+            relevance_factor = keyword_data["relevance_score"]
             
-            # Calculate overlap
-            overlap = len(title_words.intersection(keyword_words))
-            if overlap > 0:
-                # Boost based on search volume and relevance
-                volume_factor = min(1.0, keyword_data["search_volume"] / 10000.0)
-                relevance_factor = keyword_data["relevance_score"]
-                
-                # Competition factor (lower competition = higher boost)
-                comp_factor = {"Low": 1.0, "Medium": 0.7, "High": 0.4}.get(
-                    keyword_data["competition"], 0.7
-                )
-                
-                keyword_boost = volume_factor * relevance_factor * comp_factor * 0.2
-                total_boost += keyword_boost
-                matched_count += 1
+            # Competition factor (lower competition = higher boost)
+            comp_factor = {"Low": 1.0, "Medium": 0.7, "High": 0.4}.get(
+                keyword_data["competition"], 0.7
+            )
+            
+            keyword_boost = volume_factor * relevance_factor * comp_factor * 0.2
+            total_boost += keyword_boost
+            matched_count += 1
         
         # Average boost, capped at 0.3 (30% improvement)
         average_boost = total_boost / max(matched_count, 1) if matched_count > 0 else 0.0
         return min(0.3, average_boost)
 
-    def _get_matched_keywords(self, item: Dict, keywords: List[Dict]) -> List[str]:
+    def _get_matched_keywords(self, item: Dict, keywords: Union[KeywordIndex, List[Dict]]) -> List[str]:
         """Get keywords that match the item"""
-        title = item.get("title", "").lower()
-        title_words = set(title.split())
-        
-        matched = []
-        for keyword_data in keywords:
-            keyword = keyword_data["keyword"].lower()
-            keyword_words = set(keyword.split())
-            
-            if len(title_words.intersection(keyword_words)) > 0:
-                matched.append(keyword_data["keyword"])
+        if not keywords:
+            return []
         
-        return matched[:5]  # Limit to top 5 matches
+        matches = self._as_index(keywords).match(item.get("title", ""))
+        return [keyword_data["keyword"] for keyword_data, _ in matches[:5]]  # Limit to top 5 matches
+
+    def _as_index(self, keywords: Union[KeywordIndex, List[Dict]]) -> KeywordIndex:
+        """Accept either a prebuilt index or a list of keyword dicts"""
+        if isinstance(keywords, KeywordIndex):
+            return keywords
+        return KeywordIndex.from_keywords(keywords)
 
-    async def _get_copy_optimization(self, item: Dict, keywords: List[Dict]) -> Optional[Dict]:
+    async def _get_copy_optimization(self, item: Dict, keywords: Union[KeywordIndex, List[Dict]]) -> Optional[Dict]:
         """Get copy optimization suggestions using microservice integration"""
         try:
             if not keywords:
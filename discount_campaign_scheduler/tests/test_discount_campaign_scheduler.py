@@ -253,6 +253,68 @@ class TestSuggestionsService:
         assert retrieved_suggestions[0].potential_score == 0.85
 
 
+class TestKeywordIndex:
+    """Test the inverted keyword index used for title matching"""
+    
+    def test_tokenize_folds_accents_and_drops_stopwords(self):
+        """Test Portuguese token normalization"""
+        from app.services.keyword_index import tokenize
+        
+        assert tokenize("Câmera Fotográfica de Ação, 4K!") == {"camera", "fotografica", "acao", "4k"}
+    
+    def test_match_scores_only_candidates(self):
+        """Test Jaccard scores over candidate postings"""
+        from app.services.keyword_index import KeywordIndex
+        
+        index = KeywordIndex.from_keywords([
+            {"keyword": "fone bluetooth", "search_volume": 5000, "competition": "Low", "relevance_score": 0.8},
+            {"keyword": "fone de ouvido sem fio", "search_volume": 9000, "competition": "High", "relevance_score": 0.6},
+            {"keyword": "capinha celular", "search_volume": 100, "competition": "Medium", "relevance_score": 0.5}
+        ])
+        
+        matches = index.match("Fone de Ouvido Bluetooth")
+        
+        assert [(k["keyword"], round(score, 2)) for k, score in matches] == [
+            ("fone bluetooth", 0.67), ("fone de ouvido sem fio", 0.5)
+        ]
+        assert [k["keyword"] for k, _ in index.match("Fone de Ouvido Bluetooth", min_score=0.6)] == ["fone bluetooth"]
+    
+    def test_cache_loads_new_keywords_incrementally(self, session):
+        """Test the per-seller cache picks up keywords added after it was built"""
+        from app.models import Keyword
+        from app.services.keyword_index import KeywordIndexCache
+        
+        cache = KeywordIndexCache()
+        session.add(Keyword(seller_id="TEST_SELLER_123", keyword="tênis corrida", search_volume=10,
+                            competition="Low", upload_batch_id="batch-1"))
+        session.commit()
+        index = cache.get_index(session, "TEST_SELLER_123")
+        assert len(index) == 1
+        
+        session.add(Keyword(seller_id="TEST_SELLER_123", keyword="tenis masculino", search_volume=500,
+                            competition="High", upload_batch_id="batch-2"))
+        session.add(Keyword(seller_id="OTHER_SELLER", keyword="tenis infantil", search_volume=50,
+                            competition="Low", upload_batch_id="batch-3"))
+        session.commit()
+        
+        assert cache.get_index(session, "TEST_SELLER_123") is index
+        assert [k["keyword"] for k, _ in index.match("Tênis Masculino Corrida")] == ["tenis masculino", "tênis corrida"]
+    
+    def test_suggestion_boost_uses_index(self):
+        """Test keyword boost and matched keywords from a keyword list"""
+        from app.services.suggestions_service import suggestions_service
+        
+        keywords = [
+            {"keyword": "smartphone samsung", "search_volume": 10000, "competition": "Low", "relevance_score": 1.0},
+            {"keyword": "notebook gamer", "search_volume": 8000, "competition": "High", "relevance_score": 0.9}
+        ]
+        item = {"id": "MLB1", "title": "Smartphone Samsung Galaxy 128GB"}
+        
+        assert suggestions_service._get_matched_keywords(item, keywords) == ["smartphone samsung"]
+        assert suggestions_service._calculate_keyword_boost(item, keywords) == pytest.approx(0.2)
+        assert suggestions_service._calculate_keyword_boost(item, []) == 0.0
+
+
 class TestMetricsService:
     """Test metrics collection and analysis"""
     
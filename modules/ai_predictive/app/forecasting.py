@@ -0,0 +1,313 @@
+"""
+Cache de forecasters Prophet e ajuste paralelo por palavra-chave.
+
+Previsões ficam num LRU em memória com TTL, indexado por
+(categoria, palavra-chave, fingerprint da série, horizonte). Modelos ajustados
+são persistidos em disco por fingerprint, então uma mesma série só é ajustada
+de novo quando muda. Quando a série nova é a anterior com pontos acrescentados
+no fim, o ajuste parte dos parâmetros do ajuste anterior (warm start).
+Os ajustes que faltam rodam em paralelo num pool de processos.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+
+logger = logging.getLogger(__name__)
+
+CONFIDENCE_SCORE = 0.88  # Empírico, pode ser ajustado conforme métricas reais
+DEFAULT_CACHE_DIR = os.getenv(
+    "FORECAST_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models", "forecast_cache")
+)
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 6 * 3600
+
+
+def prepare_series(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Série no formato do Prophet (ds, y), ordenada por data"""
+    df = pd.DataFrame(records).rename(columns={"date": "ds", "volume": "y"})
+    df["ds"] = pd.to_datetime(df["ds"])
+    return df[["ds", "y"]].sort_values("ds", kind="stable").reset_index(drop=True)
+
+
+def series_fingerprint(df: pd.DataFrame, n_points: Optional[int] = None) -> str:
+    """sha256 das datas e valores (dos ``n_points`` primeiros pontos, se informado)"""
+    if n_points is not None:
+        df = df.iloc[:n_points]
+    digest = hashlib.sha256()
+    digest.update(df["ds"].values.astype("datetime64[ns]").astype(np.int64).tobytes())
+    digest.update(df["y"].to_numpy(dtype=np.float64).tobytes())
+    return digest.hexdigest()[:32]
+
+
+def stan_init(model) -> Dict[str, Any]:
+    """Parâmetros de um Prophet ajustado, no formato do ``init`` de ``fit`` (warm start)"""
+    params = {}
+    for name in ["k", "m", "sigma_obs"]:
+        params[name] = model.params[name][0][0]
+    for name in ["delta", "beta"]:
+        params[name] = model.params[name][0]
+    return params
+
+
+@dataclass
+class ForecastJob:
+    """Trabalho enviado a um processo do pool"""
+    keyword: str
+    ds: np.ndarray
+    y: np.ndarray
+    horizon: int
+    save_path: str
+    model_path: Optional[str] = None       # modelo já ajustado para esta série
+    warm_start_path: Optional[str] = None  # ajuste anterior (série prefixo) ou modelo pré-treinado
+
+
+def _load_model(path: str):
+    artifact = load(path)
+    return artifact["model"] if isinstance(artifact, dict) else artifact
+
+
+def fit_and_forecast(job: ForecastJob) -> Dict[str, Any]:
+    """Ajusta (ou reaproveita) o Prophet da série e gera a previsão; roda no processo do pool"""
+    from prophet import Prophet
+
+    source = "cached_model"
+    model = None
+    if job.model_path:
+        try:
+            model = _load_model(job.model_path)
+        except Exception as e:
+            logger.warning(f"Modelo em cache ilegível ({job.model_path}): {e}")
+
+    if model is None:
+        df = pd.DataFrame({"ds": job.ds, "y": job.y})
+
+        def new_model():
+            return Prophet(yearly_seasonality=True, weekly_seasonality=True, daily_seasonality=False)
+
+        init = None
+        if job.warm_start_path:
+            try:
+                init = stan_init(_load_model(job.warm_start_path))
+            except Exception as e:
+                logger.warning(f"Warm start indisponível ({job.warm_start_path}): {e}")
+        if init is not None:
+            try:
+                model = new_model()
+                model.fit(df, init=init)
+                source = "warm_start"
+            except Exception as e:
+                # Parâmetros incompatíveis (ex.: outro número de changepoints): ajuste do zero
+                logger.warning(f"Warm start falhou para '{job.keyword}', ajustando do zero: {e}")
+                model = None
+        if model is None:
+            model = new_model()
+            model.fit(df)
+            source = "fitted"
+
+        # Escrita atômica: outro processo nunca lê um arquivo pela metade
+        tmp_path = f"{job.save_path}.{os.getpid()}.tmp"
+        dump({"model": model, "created_at": time.time()}, tmp_path)
+        os.replace(tmp_path, job.save_path)
+
+    future = model.make_future_dataframe(periods=job.horizon)
+    forecast = model.predict(future).tail(job.horizon)
+
+    yhat = forecast["yhat"].to_numpy().astype(int)
+    lower = forecast["yhat_lower"].to_numpy().astype(int)
+    upper = forecast["yhat_upper"].to_numpy().astype(int)
+    dates = forecast["ds"].dt.strftime("%Y-%m-%d").tolist()
+    daily_preds = [
+        {
+            "date": date,
+            "predicted_volume": int(volume),
+            "confidence_interval": [int(low), int(high)],
+            "confidence": CONFIDENCE_SCORE
+        }
+        for date, volume, low, high in zip(dates, yhat, lower, upper)
+    ]
+    return {
+        "daily_predictions": daily_preds,
+        "trend": "increasing" if daily_preds[-1]["predicted_volume"] > daily_preds[0]["predicted_volume"] else "stable",
+        "seasonalities": dict(model.seasonalities),
+        "model_source": source
+    }
+
+
+class ForecasterCache:
+    """LRU/TTL de previsões + modelos ajustados em disco + pool de ajuste"""
+
+    def __init__(self,
+                 cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_workers: Optional[int] = None,
+                 pretrained_path: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_workers = max_workers
+        self.pretrained_path = pretrained_path  # padrão com {category} e {keyword}
+        self._forecasts: "OrderedDict[Tuple[str, str, str, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.stats = {"hits": 0, "misses": 0, "fitted": 0, "warm_starts": 0, "cached_models": 0, "evictions": 0}
+
+    # ---------------- previsões em memória ----------------
+
+    def get(self, key: Tuple[str, str, str, int]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._forecasts.get(key)
+            if entry is None:
+                return None
+            created_at, result = entry
+            if time.time() - created_at > self.ttl_seconds:
+                del self._forecasts[key]
+                self.stats["evictions"] += 1
+                return None
+            self._forecasts.move_to_end(key)
+            return result
+
+    def put(self, key: Tuple[str, str, str, int], result: Dict[str, Any]):
+        with self._lock:
+            self._forecasts[key] = (time.time(), result)
+            self._forecasts.move_to_end(key)
+            while len(self._forecasts) > self.max_entries:
+                self._forecasts.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    # ---------------- modelos em disco ----------------
+
+    def _key_dir(self, category: str, keyword: str) -> str:
+        name = hashlib.sha1(f"{category.lower()}|{keyword.lower()}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, name)
+
+    def _is_fresh(self, path: str) -> bool:
+        try:
+            return time.time() - os.path.getmtime(path) <= self.ttl_seconds
+        except OSError:
+            return False
+
+    def _read_latest(self, key_dir: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(key_dir, "latest.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_latest(self, key_dir: str, latest: Dict[str, Any]):
+        tmp_path = os.path.join(key_dir, f"latest.json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(latest, f)
+        os.replace(tmp_path, os.path.join(key_dir, "latest.json"))
+
+    def _prune(self, key_dir: str, keep: str):
+        """Remove modelos vencidos pelo TTL, exceto o ajuste mais recente"""
+        for name in os.listdir(key_dir):
+            path = os.path.join(key_dir, name)
+            if name.endswith(".joblib") and path != keep and not self._is_fresh(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def plan(self, category: str, keyword: str, df: pd.DataFrame, fingerprint: str, horizon: int) -> ForecastJob:
+        """Decide entre reaproveitar o modelo, warm start ou ajuste do zero"""
+        key_dir = self._key_dir(category, keyword)
+        os.makedirs(key_dir, exist_ok=True)
+        save_path = os.path.join(key_dir, f"{fingerprint}.joblib")
+        job = ForecastJob(keyword, df["ds"].to_numpy(), df["y"].to_numpy(), horizon, save_path)
+
+        if self._is_fresh(save_path):
+            job.model_path = save_path
+            return job
+
+        latest = self._read_latest(key_dir)
+        if (latest and latest["n_points"] < len(df) and os.path.exists(latest["path"])
+                and series_fingerprint(df, latest["n_points"]) == latest["fingerprint"]):
+            # Só foram acrescentados pontos novos no fim da série
+            job.warm_start_path = latest["path"]
+        elif self.pretrained_path:
+            pretrained = self.pretrained_path.format(category=category, keyword=keyword)
+            if os.path.exists(pretrained):
+                job.warm_start_path = pretrained
+        return job
+
+    def _record_fit(self, category: str, keyword: str, job: ForecastJob, fingerprint: str):
+        key_dir = self._key_dir(category, keyword)
+        self._write_latest(key_dir, {
+            "fingerprint": fingerprint,
+            "n_points": len(job.y),
+            "path": job.save_path,
+            "created_at": time.time()
+        })
+        self._prune(key_dir, keep=job.save_path)
+
+    # ---------------- execução ----------------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def forecast_many(self, category: str, series: Dict[str, pd.DataFrame], horizon: int) -> Dict[str, Any]:
+        """
+        Previsão de cada palavra-chave; resultados em cache voltam direto e os
+        demais são ajustados em paralelo. Falhas voltam como exceção por palavra-chave.
+        """
+        results: Dict[str, Any] = {}
+        pending = []
+        for keyword, df in series.items():
+            fingerprint = series_fingerprint(df)
+            key = (category.lower(), keyword.lower(), fingerprint, horizon)
+            cached = self.get(key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                results[keyword] = cached
+                continue
+            self.stats["misses"] += 1
+            try:
+                job = self.plan(category, keyword, df, fingerprint, horizon)
+            except Exception as e:
+                results[keyword] = e
+                continue
+            pending.append((keyword, key, fingerprint, job))
+
+        if pending:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            outcomes = await asyncio.gather(
+                *(loop.run_in_executor(executor, fit_and_forecast, job) for _, _, _, job in pending),
+                return_exceptions=True
+            )
+            for (keyword, key, fingerprint, job), outcome in zip(pending, outcomes):
+                results[keyword] = outcome
+                if isinstance(outcome, BaseException):
+                    continue
+                self.put(key, outcome)
+                source = outcome["model_source"]
+                self.stats[{"fitted": "fitted", "warm_start": "warm_starts"}.get(source, "cached_models")] += 1
+                if source != "cached_model":
+                    self._record_fit(category, keyword, job, fingerprint)
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._forecasts)
+        return {**self.stats, "entries": entries, "ttl_seconds": self.ttl_seconds}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
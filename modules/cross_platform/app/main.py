@@ -2,6 +2,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
+import asyncio
+import logging
+import os
+import sys
+
+# Registry de modelos aquecidos (modules/shared_utils/model_registry.py); a
+# imagem é construída a partir de modules/ e copia o arquivo para /app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../shared_utils'))
+from model_registry import model_registry
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), '../models')
 
 app = FastAPI(title="Cross Platform SEO", version="1.0.0")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
@@ -10,20 +21,22 @@ app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True,
 async def health_check():
     return {"status": "healthy", "service": "cross_platform", "timestamp": datetime.now().isoformat()}
 
+@app.get("/api/models")
+async def models_status():
+    return model_registry.stats()
+
 @app.get("/api/platform-performance")
 async def get_platform_performance():
-    import os
-    import glob
-    import joblib
-    import logging
     platforms = ["MercadoLibre", "Amazon", "Shopee"]
     results = []
     for platform in platforms:
-        model_files = glob.glob(os.path.join(os.path.dirname(__file__), f'../models/{platform.lower()}_model_*.joblib'))
-        if model_files:
-            model_path = sorted(model_files)[-1]
+        # glob, stat/sha256 e carga do modelo fora do event loop
+        model_path = await asyncio.to_thread(
+            model_registry.latest_path, os.path.join(MODELS_DIR, f'{platform.lower()}_model_*.joblib')
+        )
+        if model_path:
             try:
-                model = joblib.load(model_path)
+                model = await asyncio.to_thread(model_registry.get, model_path)
                 # Exemplo de dados reais (substitua por dados do banco ou arquivo)
                 X = [[10000, 1500, 450]]
                 ctr_pred = model.predict(X)[0]
@@ -2,19 +2,39 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
+import asyncio
+import os
+import sys
 
 from transformers import BertForSequenceClassification, BertTokenizer
 import torch
 
+# Fila de inferência em lote (modules/shared_utils/batching.py); a imagem é
+# construída a partir de modules/ e copia o arquivo para /app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../shared_utils'))
+from batching import MicroBatcher, QueueFullError
+
 app = FastAPI(title="Semantic Intent", version="2.0.0")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
+# Configuração da inferência em lote
+MAX_BATCH_SIZE = int(os.getenv("INTENT_MAX_BATCH_SIZE", "32"))
+MAX_WAIT_MS = float(os.getenv("INTENT_MAX_WAIT_MS", "5"))
+MAX_QUEUE_SIZE = int(os.getenv("INTENT_MAX_QUEUE_SIZE", "2048"))
+MAX_BATCH_REQUEST_ITEMS = int(os.getenv("INTENT_MAX_BATCH_REQUEST_ITEMS", "256"))
+TORCH_THREADS = int(os.getenv("INTENT_TORCH_THREADS", str(os.cpu_count() or 1)))
+QUANTIZE_INT8 = os.getenv("INTENT_QUANTIZE_INT8", "false").lower() in ("1", "true", "yes")
+MAX_LENGTH = 128
+
 # Carrega modelo BERT ajustado e tokenizer
 MODEL_PATH = "intent_model"
 try:
     tokenizer = BertTokenizer.from_pretrained(MODEL_PATH)
     model = BertForSequenceClassification.from_pretrained(MODEL_PATH)
     model.eval()
+    if QUANTIZE_INT8:
+        # Camadas Linear em int8 com quantização dinâmica (CPU)
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
 except Exception as e:
     tokenizer = None
     model = None
@@ -29,6 +49,37 @@ INTENT_LABELS = [
     # Adicione mais conforme seu treinamento
 ]
 
+def _label(intent_idx: int) -> str:
+    return INTENT_LABELS[intent_idx] if intent_idx < len(INTENT_LABELS) else f"intent_{intent_idx}"
+
+
+def _configure_worker_threads():
+    # O número de threads intra-op vale para a thread que executa o modelo
+    torch.set_num_threads(TORCH_THREADS)
+
+
+def predict_intents(texts):
+    """Um forward pass para o lote inteiro, com padding até o maior texto do lote"""
+    inputs = tokenizer(texts, return_tensors="pt", truncation=True, padding="longest", max_length=MAX_LENGTH)
+    with torch.inference_mode():
+        outputs = model(**inputs)
+        probs = torch.nn.functional.softmax(outputs.logits, dim=1)
+        scores, preds = probs.max(dim=1)
+    return [
+        {"type": _label(int(pred)), "confidence": round(float(score), 4)}
+        for score, pred in zip(scores.tolist(), preds.tolist())
+    ]
+
+
+batcher = MicroBatcher(
+    predict_intents,
+    max_batch_size=MAX_BATCH_SIZE,
+    max_wait_ms=MAX_WAIT_MS,
+    max_queue_size=MAX_QUEUE_SIZE,
+    on_worker_start=_configure_worker_threads,
+    name="intent-batcher"
+)
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "semantic_intent", "timestamp": datetime.now().isoformat()}
@@ -47,28 +98,61 @@ async def analyze_intent(request: Request):
             "error": "Campo 'text' obrigatório no corpo do POST.",
             "timestamp": datetime.now().isoformat()
         }
-    # Tokeniza e prediz
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=128)
-    with torch.no_grad():
-        outputs = model(**inputs)
-        probs = torch.nn.functional.softmax(outputs.logits, dim=1)
-        score, pred = probs.max(dim=1)
-        intent_idx = int(pred.item())
-        confidence = float(score.item())
-        intent_label = INTENT_LABELS[intent_idx] if intent_idx < len(INTENT_LABELS) else f"intent_{intent_idx}"
+    # Tokeniza e prediz junto com as demais requisições do lote
+    try:
+        intent = await batcher.submit(text)
+    except QueueFullError as e:
+        return {"error": str(e), "timestamp": datetime.now().isoformat()}
+
+    return {
+        "intent": intent,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/api/intent-analysis/batch")
+async def analyze_intent_batch(request: Request):
+    if model is None or tokenizer is None:
+        return {
+            "error": "Modelo de intenção não carregado.",
+            "timestamp": datetime.now().isoformat()
+        }
+    data = await request.json()
+    texts = data.get("texts")
+    if not texts or not isinstance(texts, list) or not all(isinstance(t, str) and t for t in texts):
+        return {
+            "error": "Campo 'texts' obrigatório: lista de textos não vazios.",
+            "timestamp": datetime.now().isoformat()
+        }
+    if len(texts) > MAX_BATCH_REQUEST_ITEMS:
+        return {
+            "error": f"Máximo de {MAX_BATCH_REQUEST_ITEMS} textos por requisição.",
+            "timestamp": datetime.now().isoformat()
+        }
+    try:
+        intents = await batcher.submit_many(texts)
+    except QueueFullError as e:
+        return {"error": str(e), "timestamp": datetime.now().isoformat()}
 
     return {
-        "intent": {
-            "type": intent_label,
-            "confidence": round(confidence, 4)
-        },
+        "intents": intents,
         "timestamp": datetime.now().isoformat()
     }
 
 @app.get("/api/status")
 async def get_status():
     status = "operational" if model is not None else "model_not_loaded"
-    return {"status": status, "module": "semantic_intent", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": status,
+        "module": "semantic_intent",
+        "quantized_int8": QUANTIZE_INT8,
+        "batching": batcher.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.on_event("shutdown")
+async def shutdown_batcher():
+    """Processa o que restou na fila e encerra a thread de inferência"""
+    await asyncio.to_thread(batcher.stop)
 
 if __name__ == "__main__":
     import uvicorn
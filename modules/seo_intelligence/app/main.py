@@ -1,6 +1,13 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
-from joblib import load
+import asyncio
+import os
+import sys
+
+# Registry de modelos aquecidos (modules/shared_utils/model_registry.py); a
+# imagem é construída a partir de modules/ e copia o arquivo para /app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../shared_utils'))
+from model_registry import model_registry
 
 app = FastAPI()
 
@@ -15,12 +22,17 @@ class SEOInferenceResponse(BaseModel):
 MODEL_PATH = "../models/seo_model.joblib"
 
 def load_seo_model():
-    return load(MODEL_PATH)
+    # Carregado uma vez e recarregado só quando o arquivo muda
+    return model_registry.get(MODEL_PATH)
 
 @app.post("/api/seo-inference", response_model=SEOInferenceResponse)
 async def seo_inference_endpoint(request: SEOInferenceRequest):
-    model = load_seo_model()
+    model = await asyncio.to_thread(load_seo_model)
     # Exemplo: modelo retorna score e recomendações
     score = float(model.predict([[request.url, request.keyword]])[0])  # Simulação
     recommendations = ["Use a palavra-chave no título", "Melhore a meta descrição"]
     return SEOInferenceResponse(score=score, recommendations=recommendations)
+
+@app.get("/api/models")
+async def models_status():
+    return model_registry.stats()
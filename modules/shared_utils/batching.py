@@ -0,0 +1,158 @@
+"""Micro-batching de inferência: agrupa requisições concorrentes num único forward pass"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_MAX_QUEUE_SIZE = 2048
+
+
+class QueueFullError(RuntimeError):
+    """A fila de inferência atingiu o limite; o chamador deve tentar novamente"""
+
+
+class _Request:
+    __slots__ = ("item", "future", "loop")
+
+    def __init__(self, item: Any, future: asyncio.Future, loop: asyncio.AbstractEventLoop):
+        self.item = item
+        self.future = future
+        self.loop = loop
+
+
+def _set_result(future: asyncio.Future, result: Any):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, error: BaseException):
+    if not future.done():
+        future.set_exception(error)
+
+
+class MicroBatcher:
+    """
+    Fila de inferência com lotes dinâmicos.
+
+    Os itens enviados pelos handlers async são acumulados por até
+    ``max_wait_ms`` (ou até ``max_batch_size`` itens) e processados por
+    ``predict_batch`` numa thread dedicada, fora do event loop. Cada
+    resultado volta para o future do seu chamador.
+    """
+
+    def __init__(self,
+                 predict_batch: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+                 on_worker_start: Optional[Callable[[], None]] = None,
+                 name: str = "inference-batcher"):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.on_worker_start = on_worker_start
+        self.name = name
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {"batches": 0, "items": 0, "errors": 0, "max_batch_size_seen": 0, "busy_seconds": 0.0}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Processa o que já está na fila e encerra a thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    async def submit(self, item: Any) -> Any:
+        """Enfileira um item e aguarda o resultado do lote em que ele entrar"""
+        return (await self.submit_many([item]))[0]
+
+    async def submit_many(self, items: Sequence[Any]) -> List[Any]:
+        """Enfileira vários itens de uma vez (podem ser divididos entre lotes)"""
+        if self._thread is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item in items:
+            future = loop.create_future()
+            try:
+                self._queue.put_nowait(_Request(item, future, loop))
+            except queue.Full:
+                for pending in futures:
+                    pending.cancel()
+                raise QueueFullError("Fila de inferência cheia")
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _collect(self, first: _Request) -> List[_Request]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)  # reprocessa o sinal de parada após este lote
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        if self.on_worker_start is not None:
+            self.on_worker_start()
+
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [request for request in self._collect(first) if not request.future.cancelled()]
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch: List[_Request]):
+        started = time.perf_counter()
+        try:
+            results = self.predict_batch([request.item for request in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"predict_batch retornou {len(results)} resultados para {len(batch)} itens")
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Erro na inferência em lote ({len(batch)} itens): {e}")
+            for request in batch:
+                request.loop.call_soon_threadsafe(_set_exception, request.future, e)
+            return
+        finally:
+            self.stats["busy_seconds"] += time.perf_counter() - started
+
+        self.stats["batches"] += 1
+        self.stats["items"] += len(batch)
+        self.stats["max_batch_size_seen"] = max(self.stats["max_batch_size_seen"], len(batch))
+        for request, result in zip(batch, results):
+            request.loop.call_soon_threadsafe(_set_result, request.future, result)
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["pending"] = self.pending
+        stats["avg_batch_size"] = round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
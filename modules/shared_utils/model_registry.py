@@ -0,0 +1,221 @@
+"""
+Registry de modelos aquecidos compartilhado pelos serviços de inferência.
+
+Cada artefato é desserializado uma única vez e mantido em memória, indexado
+pelo caminho. A cada ``check_interval`` segundos o registry confere mtime e
+tamanho do arquivo (e o sha256 quando eles mudam); se houver uma versão nova,
+ela é carregada fora do caminho das requisições concorrentes e trocada de
+forma atômica - quem já pegou o modelo antigo continua usando-o até o fim.
+"""
+import glob
+import hashlib
+import logging
+import os
+import threading
+import time
+import warnings
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from joblib import load
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECK_INTERVAL = 5.0  # segundos entre verificações de arquivo
+
+
+def load_joblib(path: str, mmap_mode: Optional[str] = None) -> Any:
+    """
+    Carrega um artefato joblib.
+
+    Por padrão o modelo é lido inteiro para a memória. ``mmap_mode="r"`` mapeia
+    os arrays numpy direto do arquivo; só use se os treinos publicarem versões
+    novas num arquivo novo (ou temporário + ``os.replace``), pois sobrescrever o
+    arquivo no lugar altera os arrays do modelo em uso.
+    """
+    with warnings.catch_warnings():
+        # Arquivos comprimidos não suportam mmap; o joblib avisa e carrega normalmente
+        warnings.filterwarnings("ignore", message=".*mmap_mode.*")
+        return load(path, mmap_mode=mmap_mode)
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class ModelEntry:
+    """Modelo carregado e os metadados da versão em uso"""
+    path: str
+    model: Any
+    mtime_ns: int
+    size: int
+    sha256: str
+    loaded_at: float
+    load_seconds: float
+    version: int = 1
+    checked_at: float = field(default_factory=time.monotonic)
+
+
+class ModelRegistry:
+    """Cache de modelos por caminho com recarga a quente"""
+
+    def __init__(self,
+                 loader: Callable[[str], Any] = load_joblib,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.loader = loader
+        self.check_interval = check_interval
+        self._entries: Dict[str, ModelEntry] = {}
+        self._latest: Dict[str, Tuple[float, Optional[str]]] = {}
+        self._path_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._metrics = {
+            "hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "reloads": 0,
+            "unchanged_reloads_skipped": 0,
+            "load_errors": 0,
+            "load_seconds_total": 0.0,
+        }
+
+    def _count(self, metric: str, amount: float = 1):
+        with self._lock:
+            self._metrics[metric] += amount
+
+    def _path_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            return self._path_locks.setdefault(path, threading.Lock())
+
+    def get(self, path: str) -> Any:
+        """Retorna o modelo do caminho, carregando ou recarregando só quando necessário"""
+        return self.get_entry(path).model
+
+    def get_entry(self, path: str) -> ModelEntry:
+        path = os.path.abspath(path)
+        entry = self._entries.get(path)
+        now = time.monotonic()
+
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            self._count("hits")
+            return entry
+
+        # Só uma thread por caminho verifica/carrega; as demais esperam o resultado
+        with self._path_lock(path):
+            entry = self._entries.get(path)
+            if entry is not None and time.monotonic() - entry.checked_at < self.check_interval:
+                self._count("hits")
+                return entry
+            return self._refresh(path, entry)
+
+    def _refresh(self, path: str, entry: Optional[ModelEntry]) -> ModelEntry:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            if entry is None:
+                raise
+            # Arquivo removido: continua servindo a última versão carregada
+            entry.checked_at = time.monotonic()
+            self._count("hits")
+            return entry
+
+        if entry is not None and (stat.st_mtime_ns, stat.st_size) == (entry.mtime_ns, entry.size):
+            entry.checked_at = time.monotonic()
+            self._count("hits")
+            return entry
+
+        digest = file_digest(path)
+        if entry is not None and digest == entry.sha256:
+            # Arquivo regravado com o mesmo conteúdo (ex.: touch/cópia)
+            entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+            entry.checked_at = time.monotonic()
+            self._count("unchanged_reloads_skipped")
+            return entry
+
+        self._count("misses")
+        started = time.perf_counter()
+        try:
+            model = self.loader(path)
+        except Exception as e:
+            self._count("load_errors")
+            if entry is None:
+                raise
+            logger.error(f"Falha ao recarregar modelo {path}, mantendo versão {entry.version}: {e}")
+            entry.checked_at = time.monotonic()
+            return entry
+        load_seconds = time.perf_counter() - started
+
+        new_entry = ModelEntry(
+            path=path,
+            model=model,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            sha256=digest,
+            loaded_at=time.time(),
+            load_seconds=load_seconds,
+            version=entry.version + 1 if entry is not None else 1
+        )
+        self._entries[path] = new_entry  # troca atômica da referência
+        self._count("loads")
+        self._count("load_seconds_total", load_seconds)
+        if entry is not None:
+            self._count("reloads")
+        logger.info(f"Modelo carregado: {path} (versão {new_entry.version}, {load_seconds:.3f}s)")
+        return new_entry
+
+    def latest_path(self, pattern: str) -> Optional[str]:
+        """Arquivo mais recente (maior nome, ex.: sufixo com timestamp) que casa com o padrão"""
+        pattern = os.path.abspath(pattern)
+        cached = self._latest.get(pattern)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < self.check_interval:
+            return cached[1]
+
+        files = glob.glob(pattern)
+        latest = sorted(files)[-1] if files else None
+        self._latest[pattern] = (now, latest)
+        return latest
+
+    def get_latest(self, pattern: str) -> Tuple[Optional[Any], Optional[str]]:
+        """Modelo mais recente que casa com o padrão glob e o caminho dele"""
+        path = self.latest_path(pattern)
+        if path is None:
+            return None, None
+        return self.get(path), path
+
+    def evict(self, path: Optional[str] = None):
+        """Remove um modelo (ou todos) do cache"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._latest.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas de cache e tempo de carga por modelo"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics["hit_rate"] = metrics["hits"] / lookups if lookups else 0.0
+        metrics["models"] = {
+            entry.path: {
+                "version": entry.version,
+                "sha256": entry.sha256,
+                "size": entry.size,
+                "loaded_at": entry.loaded_at,
+                "load_seconds": round(entry.load_seconds, 6),
+            }
+            for entry in list(self._entries.values())
+        }
+        return metrics
+
+
+# Instância compartilhada pelo processo
+model_registry = ModelRegistry(
+    check_interval=float(os.getenv("MODEL_REGISTRY_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL))
+)
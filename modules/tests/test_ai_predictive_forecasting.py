@@ -0,0 +1,139 @@
+import json
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from modules.ai_predictive.app.forecasting import ForecasterCache, prepare_series, series_fingerprint
+
+
+def make_records(days, start="2024-01-01"):
+    dates = pd.date_range(start=start, periods=days)
+    return [{"date": d.strftime("%Y-%m-%d"), "volume": 100 + i} for i, d in enumerate(dates)]
+
+
+def test_prepare_series_sorts_and_renames():
+    records = make_records(5)[::-1]
+    df = prepare_series(records)
+    assert list(df.columns) == ["ds", "y"]
+    assert df["ds"].is_monotonic_increasing
+    assert df["y"].tolist() == [100, 101, 102, 103, 104]
+
+
+def test_fingerprint_changes_with_data_and_prefix_matches():
+    short = prepare_series(make_records(30))
+    longer = prepare_series(make_records(40))
+    assert series_fingerprint(short) != series_fingerprint(longer)
+    assert series_fingerprint(longer, len(short)) == series_fingerprint(short)
+
+    changed = short.copy()
+    changed.loc[3, "y"] = 0
+    assert series_fingerprint(changed) != series_fingerprint(short)
+
+
+def test_lru_and_ttl(tmp_path):
+    cache = ForecasterCache(cache_dir=str(tmp_path), max_entries=2, ttl_seconds=60)
+    cache.put(("c", "a", "f", 7), {"v": 1})
+    cache.put(("c", "b", "f", 7), {"v": 2})
+    assert cache.get(("c", "a", "f", 7)) == {"v": 1}  # "a" passa a ser o mais recente
+    cache.put(("c", "c", "f", 7), {"v": 3})
+    assert cache.get(("c", "b", "f", 7)) is None
+    assert cache.get(("c", "a", "f", 7)) == {"v": 1}
+
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get(("c", "a", "f", 7)) is None
+    assert cache.get_stats()["evictions"] == 2
+
+
+def test_plan_reuses_model_or_warm_starts(tmp_path):
+    pretrained = tmp_path / "prophet_{category}_{keyword}.joblib"
+    cache = ForecasterCache(cache_dir=str(tmp_path / "cache"), pretrained_path=str(pretrained))
+    df = prepare_series(make_records(30))
+    fingerprint = series_fingerprint(df)
+
+    # Sem histórico nem modelo pré-treinado: ajuste do zero
+    job = cache.plan("Eletrônicos", "celular", df, fingerprint, 7)
+    assert job.model_path is None and job.warm_start_path is None
+
+    # Modelo pré-treinado disponível: usado como warm start
+    pretrained_file = tmp_path / "prophet_Eletrônicos_celular.joblib"
+    pretrained_file.write_bytes(b"")
+    job = cache.plan("Eletrônicos", "celular", df, fingerprint, 7)
+    assert job.warm_start_path == str(pretrained_file)
+
+    # Ajuste registrado: mesma série reaproveita o modelo salvo
+    open(job.save_path, "wb").close()
+    cache._record_fit("Eletrônicos", "celular", job, fingerprint)
+    same = cache.plan("Eletrônicos", "celular", df, fingerprint, 7)
+    assert same.model_path == job.save_path
+
+    # Série com pontos novos no fim: warm start a partir do ajuste anterior
+    longer = prepare_series(make_records(35))
+    grown = cache.plan("Eletrônicos", "celular", longer, series_fingerprint(longer), 7)
+    assert grown.model_path is None
+    assert grown.warm_start_path == job.save_path
+
+    # Histórico reescrito (não é prefixo): volta para o pré-treinado
+    rewritten = prepare_series(make_records(35, start="2023-06-01"))
+    other = cache.plan("Eletrônicos", "celular", rewritten, series_fingerprint(rewritten), 7)
+    assert other.warm_start_path == str(pretrained_file)
+
+    with open(os.path.join(os.path.dirname(job.save_path), "latest.json")) as f:
+        assert json.load(f)["n_points"] == 30
+
+
+def test_forecast_many_serves_cached_results(tmp_path):
+    import asyncio
+
+    cache = ForecasterCache(cache_dir=str(tmp_path))
+    df = prepare_series(make_records(30))
+    key = ("eletrônicos", "celular", series_fingerprint(df), 7)
+    cache.put(key, {"daily_predictions": [], "trend": "stable", "seasonalities": {}, "model_source": "fitted"})
+
+    results = asyncio.run(cache.forecast_many("Eletrônicos", {"celular": df}, 7))
+    assert results["celular"]["trend"] == "stable"
+    assert cache.get_stats()["hits"] == 1
+    assert cache._executor is None  # nada foi enviado ao pool
+
+
+class FakeProphet:
+    """Prophet mínimo: recusa warm start, como com parâmetros incompatíveis"""
+
+    def __init__(self, **kwargs):
+        self.seasonalities = {}
+        self.history = None
+
+    def fit(self, df, init=None):
+        if init is not None:
+            raise ValueError("init incompatível")
+        self.history = df
+
+    def make_future_dataframe(self, periods):
+        last = self.history["ds"].max()
+        return pd.DataFrame({"ds": pd.date_range(last, periods=periods + 1)[1:]})
+
+    def predict(self, future):
+        return future.assign(yhat=100.0, yhat_lower=90.0, yhat_upper=110.0)
+
+
+def test_failed_warm_start_falls_back_to_cold_fit(tmp_path, monkeypatch):
+    import sys
+    import types
+
+    from modules.ai_predictive.app import forecasting
+
+    monkeypatch.setitem(sys.modules, "prophet", types.SimpleNamespace(Prophet=FakeProphet))
+    monkeypatch.setattr(forecasting, "_load_model", lambda path: object())
+    monkeypatch.setattr(forecasting, "stan_init", lambda model: {"k": 0.0})
+
+    df = prepare_series(make_records(30))
+    job = forecasting.ForecastJob("celular", df["ds"].to_numpy(), df["y"].to_numpy(), 7,
+                                  str(tmp_path / "model.joblib"), warm_start_path="anterior.joblib")
+
+    result = forecasting.fit_and_forecast(job)
+
+    assert result["model_source"] == "fitted"
+    assert len(result["daily_predictions"]) == 7
+    assert os.path.exists(job.save_path)
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../shared_utils'))
+from batching import MicroBatcher, QueueFullError
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_requests_share_a_batch():
+    batches = []
+
+    def predict(texts):
+        batches.append(list(texts))
+        return [text.upper() for text in texts]
+
+    batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=50)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(f"texto {i}") for i in range(5)))
+
+    results = run(main())
+    batcher.stop(timeout=1)
+
+    assert results == [f"TEXTO {i}" for i in range(5)]
+    assert len(batches) == 1
+    assert batcher.get_stats()["avg_batch_size"] == 5
+
+
+def test_batches_are_capped_and_order_is_kept():
+    batches = []
+    batcher = MicroBatcher(lambda texts: batches.append(len(texts)) or list(texts),
+                           max_batch_size=4, max_wait_ms=20)
+
+    results = run(batcher.submit_many([str(i) for i in range(10)]))
+    batcher.stop(timeout=1)
+
+    assert results == [str(i) for i in range(10)]
+    assert max(batches) <= 4
+    assert sum(batches) == 10
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    def predict(texts):
+        raise ValueError("falha no modelo")
+
+    batcher = MicroBatcher(predict, max_wait_ms=20)
+
+    async def main():
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+
+    results = run(main())
+    batcher.stop(timeout=1)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert batcher.get_stats()["errors"] == 1
+
+
+def test_full_queue_is_rejected():
+    release = threading.Event()
+
+    def predict(texts):
+        release.wait(1)
+        return list(texts)
+
+    batcher = MicroBatcher(predict, max_batch_size=1, max_wait_ms=0, max_queue_size=2)
+
+    async def main():
+        first = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0.05)  # o worker está ocupado com "a"
+        with pytest.raises(QueueFullError):
+            await batcher.submit_many(["b", "c", "d"])
+        release.set()
+        return await first
+
+    assert run(main()) == "a"
+    batcher.stop(timeout=1)
+
+
+def test_worker_start_hook_runs_on_worker_thread():
+    threads = []
+    batcher = MicroBatcher(lambda texts: list(texts),
+                           on_worker_start=lambda: threads.append(threading.current_thread().name),
+                           name="intent-batcher-test")
+
+    run(batcher.submit("a"))
+    batcher.stop(timeout=1)
+
+    assert threads == ["intent-batcher-test"]
+
@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+from functools import partial
+
+import numpy as np
+import pytest
+from joblib import dump
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../shared_utils'))
+from model_registry import ModelRegistry, load_joblib
+
+
+class ScaleModel:
+    def __init__(self, weights):
+        self.weights = weights
+
+    def predict(self, X):
+        return np.asarray(X) @ self.weights
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_model_is_loaded_once(tmp_path):
+    path = tmp_path / "seo_model.joblib"
+    dump(ScaleModel(np.ones(3)), path)
+    registry = ModelRegistry(check_interval=60)
+
+    first = registry.get(str(path))
+    second = registry.get(str(path))
+
+    assert first is second
+    stats = registry.stats()
+    assert stats["loads"] == 1
+    assert stats["hits"] == 1
+    assert stats["models"][str(path)]["load_seconds"] >= 0
+
+
+def test_model_is_read_into_memory_by_default(tmp_path):
+    path = tmp_path / "seo_model.joblib"
+    dump(ScaleModel(np.ones(3)), path)
+    model = ModelRegistry().get(str(path))
+
+    # Sobrescrever o arquivo no lugar não pode alterar o modelo em uso
+    dump(ScaleModel(np.zeros(3)), path)
+
+    assert not isinstance(model.weights, np.memmap)
+    assert model.predict([[1, 1, 1]])[0] == 3.0
+
+
+def test_numpy_payload_is_memory_mapped_on_request(tmp_path):
+    path = tmp_path / "platform_model.joblib"
+    dump(ScaleModel(np.arange(10_000, dtype=float)), path)
+
+    model = ModelRegistry(loader=partial(load_joblib, mmap_mode="r")).get(str(path))
+
+    assert isinstance(model.weights, np.memmap)
+    assert model.predict([np.ones(10_000)])[0] == pytest.approx(np.arange(10_000).sum())
+
+
+def test_hot_swap_on_new_version(tmp_path):
+    path = tmp_path / "seo_model.joblib"
+    dump(ScaleModel(np.ones(2)), path)
+    registry = ModelRegistry(check_interval=0)
+    old = registry.get(str(path))
+
+    dump(ScaleModel(np.full(2, 2.0)), path)
+    bump_mtime(path)
+    new = registry.get(str(path))
+
+    assert new is not old
+    assert new.predict([[1, 1]])[0] == 4.0
+    assert registry.get_entry(str(path)).version == 2
+    assert registry.stats()["reloads"] == 1
+
+
+def test_touched_file_with_same_content_is_not_reloaded(tmp_path):
+    path = tmp_path / "seo_model.joblib"
+    dump(ScaleModel(np.ones(2)), path)
+    registry = ModelRegistry(check_interval=0)
+    model = registry.get(str(path))
+
+    bump_mtime(path)
+
+    assert registry.get(str(path)) is model
+    assert registry.stats()["unchanged_reloads_skipped"] == 1
+
+
+def test_failed_reload_keeps_serving_previous_version(tmp_path):
+    path = tmp_path / "seo_model.joblib"
+    dump(ScaleModel(np.ones(2)), path)
+    registry = ModelRegistry(check_interval=0)
+    model = registry.get(str(path))
+
+    path.write_bytes(b"partial write")
+    bump_mtime(path)
+
+    assert registry.get(str(path)) is model
+    assert registry.stats()["load_errors"] == 1
+
+
+def test_latest_picks_newest_version(tmp_path):
+    dump(ScaleModel(np.ones(1)), tmp_path / "trend_model_20240101_000000.joblib")
+    dump(ScaleModel(np.full(1, 3.0)), tmp_path / "trend_model_20240301_000000.joblib")
+    registry = ModelRegistry(check_interval=0)
+
+    model, path = registry.get_latest(str(tmp_path / "trend_model_*.joblib"))
+
+    assert os.path.basename(path) == "trend_model_20240301_000000.joblib"
+    assert model.predict([[1]])[0] == 3.0
+    assert registry.get_latest(str(tmp_path / "missing_*.joblib")) == (None, None)
+
@@ -0,0 +1,116 @@
+import asyncio
+import io
+import sqlite3
+
+import pytest
+from PIL import Image
+
+from modules.visual_seo.app.captioning import (
+    CaptionCache, CaptionPipeline, content_hash, load_image, perceptual_hash
+)
+
+
+def make_photo(size=(1600, 1200), color=(200, 30, 30), fmt="JPEG", quality=90):
+    image = Image.new("RGB", size, (255, 255, 255))
+    image.paste(Image.new("RGB", (size[0] // 2, size[1] // 2), color), (size[0] // 4, size[1] // 4))
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, quality=quality)
+    return buffer.getvalue()
+
+
+class FakePipeline(CaptionPipeline):
+    def __init__(self, cache, **kwargs):
+        super().__init__(cache, max_wait_ms=30, **kwargs)
+        self.batches = []
+
+    def _load_model(self):
+        self.model = object()
+        self.model_ready.set()
+
+    def _generate(self, images):
+        self.batches.append([image.size for image in images])
+        centers = [image.getpixel((image.width // 2, image.height // 2)) for image in images]
+        return ["produto vermelho" if red > blue else "produto azul" for red, _, blue in centers]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CaptionCache(str(tmp_path / "captions.db"))
+    yield cache
+    cache.close()
+
+
+def test_image_is_downsized_before_captioning():
+    image = load_image(make_photo(), 384)
+
+    assert max(image.size) <= 384
+    assert image.mode == "RGB"
+
+
+def test_perceptual_hash_survives_recompression():
+    original = load_image(make_photo(quality=95), 384)
+    recompressed = load_image(make_photo(size=(800, 600), quality=60), 384)
+    other = load_image(make_photo(color=(20, 20, 220)), 384)
+
+    assert perceptual_hash(original) == perceptual_hash(recompressed)
+    assert content_hash(make_photo(quality=95)) != content_hash(make_photo(quality=60))
+    # Mesma composição em outra cor (variação do anúncio) não pode reaproveitar a legenda
+    assert perceptual_hash(original) != perceptual_hash(other)
+
+
+def test_concurrent_requests_are_batched_and_deduplicated(cache):
+    pipeline = FakePipeline(cache)
+    red, blue = make_photo(), make_photo(color=(20, 20, 220), size=(1200, 1600))
+
+    async def main():
+        return await pipeline.caption_many([red, blue, red])
+
+    results = asyncio.run(main())
+    pipeline.batcher.stop(timeout=1)
+
+    assert [result["caption"] for result in results] == ["produto vermelho", "produto azul", "produto vermelho"]
+    assert len(pipeline.batches) == 1
+    assert len(pipeline.batches[0]) == 2
+    assert all(max(size) <= 384 for size in pipeline.batches[0])
+    assert pipeline.stats["deduplicated"] == 1
+
+
+def test_captions_persist_across_restarts(tmp_path):
+    path = str(tmp_path / "captions.db")
+    photo = make_photo()
+
+    first = FakePipeline(CaptionCache(path))
+    assert asyncio.run(first.caption(photo)) == {"caption": "produto vermelho", "cached": False}
+    first.close(timeout=1)
+
+    second = FakePipeline(CaptionCache(path))
+    variation = make_photo(size=(1000, 750), quality=70)
+    assert asyncio.run(second.caption(photo)) == {"caption": "produto vermelho", "cached": True}
+    assert asyncio.run(second.caption(variation)) == {"caption": "produto vermelho", "cached": True}
+    assert second.batches == []
+    second.cache.close()
+
+
+def test_close_stops_worker_and_cache(tmp_path):
+    pipeline = FakePipeline(CaptionCache(str(tmp_path / "captions.db")))
+    assert asyncio.run(pipeline.caption(make_photo()))["caption"] == "produto vermelho"
+    thread = pipeline.batcher._thread
+
+    pipeline.close(timeout=1)
+
+    assert not thread.is_alive()
+    with pytest.raises(sqlite3.ProgrammingError):
+        len(pipeline.cache)
+
+
+def test_model_load_failure_is_reported(cache):
+    class BrokenPipeline(CaptionPipeline):
+        def _load_model(self):
+            self.load_error = "sem rede"
+            self.model_ready.set()
+
+    pipeline = BrokenPipeline(cache, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError, match="sem rede"):
+        asyncio.run(pipeline.caption(make_photo()))
+    pipeline.batcher.stop(timeout=1)
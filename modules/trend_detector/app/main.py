@@ -3,12 +3,22 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 import pandas as pd
+import asyncio
+import os
+import sys
 
 try:
     from prophet import Prophet
 except ImportError:
     raise ImportError("Você precisa instalar o pacote 'prophet'. Use: pip install prophet")
 
+# Registry de modelos aquecidos (modules/shared_utils/model_registry.py); a
+# imagem é construída a partir de modules/ e copia o arquivo para /app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../shared_utils'))
+from model_registry import model_registry
+
+MODEL_PATTERN = os.path.join(os.path.dirname(__file__), '../models/trend_model_*.joblib')
+
 app = FastAPI(title="Trend Detector", version="2.0.0")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
@@ -20,22 +30,23 @@ async def health_check():
 async def get_status():
     return {"status": "operational", "module": "trend_detector", "timestamp": datetime.now().isoformat()}
 
+@app.get("/api/models")
+async def models_status():
+    return model_registry.stats()
+
 @app.post("/api/detect-trend")
 async def detect_trend(request: Request):
-    import os
-    from joblib import load
-    import glob
     try:
         data = await request.json()
         df = pd.DataFrame(data)
         if "ds" not in df.columns or "y" not in df.columns:
             return {"error": "JSON deve conter as chaves 'ds' (datas) e 'y' (valores)."}
         df["ds"] = pd.to_datetime(df["ds"])
-        model_files = glob.glob(os.path.join(os.path.dirname(__file__), '../models/trend_model_*.joblib'))
-        if model_files:
-            model_path = sorted(model_files)[-1]
+        # glob, stat/sha256 e carga do modelo fora do event loop
+        model_path = await asyncio.to_thread(model_registry.latest_path, MODEL_PATTERN)
+        if model_path:
             try:
-                model = load(model_path)
+                model = await asyncio.to_thread(model_registry.get, model_path)
                 future = model.make_future_dataframe(periods=30)
                 forecast = model.predict(future)
                 trend = forecast[["ds", "trend", "yhat"]].tail(30).to_dict(orient="records")
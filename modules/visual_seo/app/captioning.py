@@ -0,0 +1,249 @@
+"""Pipeline de legendas BLIP: reduz, deduplica, agrupa em lotes e guarda em cache"""
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+# Fila de inferência em lote (modules/shared_utils/batching.py); a imagem é
+# construída a partir de modules/ e copia o arquivo para /app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../shared_utils'))
+from batching import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "Salesforce/blip-image-captioning-base"
+DEFAULT_INPUT_SIZE = 384  # tamanho de entrada do BLIP base
+DEFAULT_MAX_NEW_TOKENS = 30
+MEMORY_CACHE_SIZE = 10000
+
+
+def content_hash(image_bytes: bytes) -> str:
+    """Hash exato dos bytes enviados (evita até a decodificação em reenvios)"""
+    return "sha256:" + hashlib.sha256(image_bytes).hexdigest()
+
+
+def perceptual_hash(image: Image.Image) -> str:
+    """
+    dHash de 64 bits + cor média quantizada.
+
+    Igual para a mesma foto recomprimida ou redimensionada; a cor entra na
+    chave porque variações de um anúncio costumam diferir só na cor, e o
+    dHash (em tons de cinza) não as distingue.
+    """
+    pixels = image.convert("L").resize((9, 8), Image.LANCZOS).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    red, green, blue = image.resize((1, 1), Image.BOX).getpixel((0, 0))
+    return f"dhash:{bits:016x}:{red >> 5}{green >> 5}{blue >> 5}"
+
+
+def load_image(image_bytes: bytes, size: int) -> Image.Image:
+    """Decodifica já reduzida ao tamanho de entrada do processor"""
+    image = Image.open(io.BytesIO(image_bytes))
+    # JPEG: decodifica direto numa escala menor (DCT) em vez da resolução cheia
+    image.draft("RGB", (size, size))
+    image = image.convert("RGB")
+    image.thumbnail((size, size), Image.BICUBIC)
+    return image
+
+
+class CaptionCache:
+    """Cache persistente (SQLite) de legendas por hash, com LRU em memória na frente"""
+
+    def __init__(self, path: str, memory_size: int = MEMORY_CACHE_SIZE):
+        self.path = path
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS captions ("
+            "hash TEXT PRIMARY KEY, caption TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _remember(self, key: str, caption: str):
+        self._memory[key] = caption
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            caption = self._memory.get(key)
+            if caption is not None:
+                self._memory.move_to_end(key)
+                return caption
+            row = self._conn.execute("SELECT caption FROM captions WHERE hash = ?", (key,)).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                return row[0]
+        return None
+
+    def set_many(self, keys: Sequence[str], caption: str):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO captions (hash, caption, created_at) VALUES (?, ?, ?)",
+                [(key, caption, now) for key in keys]
+            )
+            self._conn.commit()
+            for key in keys:
+                self._remember(key, caption)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM captions").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CaptionPipeline:
+    """
+    Legendas em lote com deduplicação.
+
+    Cada imagem é procurada no cache pelo hash dos bytes; se não estiver lá,
+    é decodificada já reduzida e procurada pelo hash perceptual. Só as que
+    faltam vão para a fila, onde requisições concorrentes viram uma única
+    chamada a ``generate`` na thread do modelo. Imagens iguais em voo ao mesmo
+    tempo compartilham o mesmo resultado.
+    """
+
+    def __init__(self,
+                 cache: CaptionCache,
+                 model_name: str = MODEL_NAME,
+                 max_batch_size: int = 8,
+                 max_wait_ms: float = 10.0,
+                 max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS,
+                 perceptual_dedup: bool = True):
+        self.cache = cache
+        self.model_name = model_name
+        self.max_new_tokens = max_new_tokens
+        self.perceptual_dedup = perceptual_dedup
+        self.input_size = DEFAULT_INPUT_SIZE
+        self.processor = None
+        self.model = None
+        self.load_error: Optional[str] = None
+        self.model_ready = threading.Event()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"requests": 0, "cache_hits": 0, "deduplicated": 0, "generated": 0, "load_seconds": None}
+        self.batcher = MicroBatcher(
+            self._generate,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            on_worker_start=self._load_model,
+            name="caption-batcher"
+        )
+
+    def warm_up(self):
+        """Carrega o modelo em segundo plano (na thread do worker) sem bloquear o startup"""
+        self.batcher.start()
+
+    def _load_model(self):
+        started = time.perf_counter()
+        try:
+            from transformers import BlipForConditionalGeneration, BlipProcessor
+            self.processor = BlipProcessor.from_pretrained(self.model_name)
+            self.model = BlipForConditionalGeneration.from_pretrained(self.model_name)
+            self.model.eval()
+            size = getattr(self.processor.image_processor, "size", None) or {}
+            self.input_size = max(size.get("height", DEFAULT_INPUT_SIZE), size.get("width", DEFAULT_INPUT_SIZE))
+            self.stats["load_seconds"] = round(time.perf_counter() - started, 3)
+            logger.info(f"Modelo BLIP carregado em {self.stats['load_seconds']}s")
+        except Exception as e:
+            self.load_error = str(e)
+            logger.error(f"Erro ao carregar modelo BLIP: {e}")
+        finally:
+            self.model_ready.set()
+
+    def _generate(self, images: List[Image.Image]) -> List[str]:
+        """Uma chamada a ``generate`` para o lote inteiro (roda na thread do worker)"""
+        if self.model is None:
+            raise RuntimeError(f"Modelo de legendas indisponível: {self.load_error}")
+        import torch
+        inputs = self.processor(images=images, return_tensors="pt")
+        with torch.inference_mode():
+            output = self.model.generate(**inputs, max_new_tokens=self.max_new_tokens)
+        self.stats["generated"] += len(images)
+        return [caption.strip() for caption in self.processor.batch_decode(output, skip_special_tokens=True)]
+
+    def _prepare(self, image_bytes: bytes) -> Tuple[List[str], Optional[str], Optional[Image.Image]]:
+        """Hashes da imagem e, se não estiver em cache, a imagem reduzida"""
+        keys = [content_hash(image_bytes)]
+        caption = self.cache.get(keys[0])
+        if caption is not None:
+            return keys, caption, None
+
+        image = load_image(image_bytes, self.input_size)
+        if self.perceptual_dedup:
+            keys.append(perceptual_hash(image))
+            caption = self.cache.get(keys[1])
+            if caption is not None:
+                self.cache.set_many(keys[:1], caption)
+                return keys, caption, None
+        return keys, None, image
+
+    async def caption(self, image_bytes: bytes) -> Dict[str, Any]:
+        """Legenda de uma imagem: ``{"caption", "cached"}``"""
+        self.stats["requests"] += 1
+        keys, caption, image = await asyncio.to_thread(self._prepare, image_bytes)
+        if caption is not None:
+            self.stats["cache_hits"] += 1
+            return {"caption": caption, "cached": True}
+
+        dedup_key = keys[-1]
+        pending = self._inflight.get(dedup_key)
+        if pending is not None:
+            self.stats["deduplicated"] += 1
+            return {"caption": await asyncio.shield(pending), "cached": True}
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[dedup_key] = future
+        try:
+            caption = await self.batcher.submit(image)
+            await asyncio.to_thread(self.cache.set_many, keys, caption)
+            future.set_result(caption)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # evita aviso de exceção não lida quando ninguém mais espera
+            raise
+        finally:
+            del self._inflight[dedup_key]
+        return {"caption": caption, "cached": False}
+
+    async def caption_many(self, images: Sequence[bytes]) -> List[Any]:
+        """Legendas de uma galeria inteira; erros voltam por imagem"""
+        return await asyncio.gather(*(self.caption(image_bytes) for image_bytes in images), return_exceptions=True)
+
+    def close(self, timeout: Optional[float] = None):
+        """Processa o que restou na fila, encerra o worker e fecha o cache"""
+        self.batcher.stop(timeout)
+        self.cache.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "model_loaded": self.model is not None,
+            "load_error": self.load_error,
+            "cached_captions": len(self.cache),
+            "batching": self.batcher.get_stats(),
+        }
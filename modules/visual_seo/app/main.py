@@ -1,10 +1,14 @@
 from fastapi import FastAPI, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
-from PIL import Image
-import io
+from typing import List
+import asyncio
+import os
 
-from transformers import BlipProcessor, BlipForConditionalGeneration
+try:
+    from .captioning import CaptionCache, CaptionPipeline
+except ImportError:  # executed as a top-level module (uvicorn main:app)
+    from captioning import CaptionCache, CaptionPipeline
 
 app = FastAPI(title="Visual Seo Captioning", version="3.0.0")
 app.add_middleware(
@@ -15,22 +19,28 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
-# Carrega BLIP da Hugging Face uma vez ao iniciar
-processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
+MAX_GALLERY_IMAGES = int(os.getenv("CAPTION_MAX_GALLERY_IMAGES", "50"))
 
-def gerar_caption(image_bytes):
-    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    inputs = processor(image, return_tensors="pt")
-    output = model.generate(**inputs)
-    caption = processor.decode(output[0], skip_special_tokens=True)
-    return caption
+# BLIP da Hugging Face é carregado em segundo plano; requisições que chegam
+# antes aguardam na fila até o modelo ficar pronto
+pipeline = CaptionPipeline(
+    CaptionCache(os.getenv("CAPTION_CACHE_PATH", "data/caption_cache.db")),
+    max_batch_size=int(os.getenv("CAPTION_MAX_BATCH_SIZE", "8")),
+    max_wait_ms=float(os.getenv("CAPTION_MAX_WAIT_MS", "10")),
+    perceptual_dedup=os.getenv("CAPTION_PERCEPTUAL_DEDUP", "true").lower() in ("1", "true", "yes")
+)
+if os.getenv("CAPTION_WARMUP", "true").lower() in ("1", "true", "yes"):
+    pipeline.warm_up()
+
+async def gerar_caption(image_bytes):
+    result = await pipeline.caption(image_bytes)
+    return result["caption"]
 
 @app.post("/api/generate-caption")
 async def generate_caption(file: UploadFile = File(...)):
     image_bytes = await file.read()
     try:
-        caption = gerar_caption(image_bytes)
+        caption = await gerar_caption(image_bytes)
     except Exception as e:
         return {
             "error": f"Erro ao gerar título/descrição: {str(e)}",
@@ -45,6 +55,36 @@ async def generate_caption(file: UploadFile = File(...)):
         "timestamp": datetime.now().isoformat()
     }
 
+@app.post("/api/generate-captions")
+async def generate_gallery_captions(files: List[UploadFile] = File(...)):
+    """Legendas de todas as fotos de um anúncio numa única chamada"""
+    if len(files) > MAX_GALLERY_IMAGES:
+        return {
+            "error": f"Máximo de {MAX_GALLERY_IMAGES} imagens por requisição.",
+            "timestamp": datetime.now().isoformat()
+        }
+    images = [await file.read() for file in files]
+    results = await pipeline.caption_many(images)
+
+    captions = []
+    for file, result in zip(files, results):
+        if isinstance(result, Exception):
+            captions.append({
+                "filename": file.filename,
+                "error": f"Erro ao gerar título/descrição: {str(result)}"
+            })
+        else:
+            captions.append({
+                "filename": file.filename,
+                "title": result["caption"],
+                "description": result["caption"],
+                "cached": result["cached"]
+            })
+    return {
+        "captions": captions,
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/health")
 async def health_check():
     return {
@@ -56,11 +96,19 @@ async def health_check():
 @app.get("/api/status")
 async def get_status():
     return {
-        "status": "operational",
+        "status": "operational" if pipeline.model is not None else (
+            "model_not_loaded" if pipeline.load_error else "warming_up"
+        ),
         "module": "visual_seo_captioning",
+        "captioning": pipeline.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
+@app.on_event("shutdown")
+async def shutdown_pipeline():
+    """Encerra a thread de legendas e fecha o cache em disco"""
+    await asyncio.to_thread(pipeline.close)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8011)
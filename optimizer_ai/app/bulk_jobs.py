@@ -0,0 +1,385 @@
+"""
+Bulk catalog optimization jobs.
+
+A job is an uploaded catalog (NDJSON or CSV) split into fixed-size chunks.
+Chunks run in a process pool; each finished chunk is appended to the job's
+``results.ndjson`` and its index recorded in ``job.json``, so clients can
+stream results as they complete (from any offset) and an interrupted job
+resumes with only the missing chunks.
+
+Layout of ``state_dir/<job_id>/``:
+
+* ``input.ndjson``   - normalized listings, one per line
+* ``results.ndjson`` - one result per line, in completion order
+* ``job.json``       - status, finished chunks and throughput metrics
+"""
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 200
+MAX_IN_FLIGHT_PER_WORKER = 2
+STREAM_BATCH_LINES = 1000  # result lines read per thread hop while streaming
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+RESUMABLE_STATUSES = ("queued", "running", "interrupted")
+LISTING_FIELDS = ("id", "text", "target_audience", "product_category", "optimization_goal", "keywords")
+
+
+def parse_listings(content: bytes, filename: str = "", content_type: str = "") -> List[Dict[str, Any]]:
+    """
+    Parse an NDJSON or CSV catalog into listing dicts.
+
+    CSV needs a header row; the ``keywords`` column is ``;``-separated.
+    ``original_text`` is accepted as an alias of ``text``. Listings without an
+    ``id`` get ``row-<index>``; duplicate ids are rejected, since results are
+    keyed by id.
+    """
+    text = content.decode("utf-8-sig")
+    is_csv = filename.lower().endswith(".csv") or "csv" in (content_type or "")
+    if is_csv:
+        rows = list(csv.DictReader(io.StringIO(text)))
+        for row in rows:
+            if row.get("keywords"):
+                row["keywords"] = [kw.strip() for kw in row["keywords"].split(";") if kw.strip()]
+    else:
+        rows = []
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {e.msg}")
+
+    listings = []
+    seen_ids = set()
+    for index, row in enumerate(rows):
+        listing_text = row.get("text", row.get("original_text"))
+        if not isinstance(listing_text, str):
+            raise ValueError(f"Listing {index} has no text")
+        listing = {key: row[key] for key in LISTING_FIELDS if row.get(key) not in (None, "")}
+        listing["text"] = listing_text
+        listing["id"] = str(listing.get("id", f"row-{index}"))
+        if listing["id"] in seen_ids:
+            raise ValueError(f"Listing {index} repeats id {listing['id']!r}")
+        seen_ids.add(listing["id"])
+        listings.append(listing)
+    return listings
+
+
+@dataclass
+class BulkJob:
+    """Persistent state and throughput metrics of a bulk job"""
+    job_id: str
+    total: int
+    chunk_size: int
+    defaults: Dict[str, Any]
+    status: str = "queued"
+    done_chunks: List[int] = field(default_factory=list)
+    processed: int = 0
+    failed: int = 0
+    results_written: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    busy_seconds: float = 0.0  # wall time spent running in this and previous sessions
+    chunk_seconds_total: float = 0.0
+    error_message: Optional[str] = None
+
+    @property
+    def chunk_count(self) -> int:
+        return (self.total + self.chunk_size - 1) // self.chunk_size
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("done_chunks")
+        data.pop("defaults")
+        elapsed = self.busy_seconds
+        if self.started_at is not None and self.status == "running":
+            elapsed += time.time() - self.started_at
+        done = len(self.done_chunks)
+        data.update({
+            "chunks_total": self.chunk_count,
+            "chunks_done": done,
+            "progress": round(self.processed / self.total, 4) if self.total else 1.0,
+            "elapsed_seconds": round(elapsed, 3),
+            "listings_per_second": round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+            "avg_chunk_seconds": round(self.chunk_seconds_total / done, 4) if done else None,
+        })
+        return data
+
+
+class BulkJobManager:
+    """
+    Runs bulk jobs in a process pool and persists their progress.
+
+    ``worker_fn(listings, defaults)`` must be a module-level (picklable)
+    function returning one result dict per listing.
+    """
+
+    def __init__(self,
+                 worker_fn: Callable[[List[Dict[str, Any]], Dict[str, Any]], List[Dict[str, Any]]],
+                 state_dir: str,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_workers: Optional[int] = None):
+        self.worker_fn = worker_fn
+        self.state_dir = state_dir
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.jobs: Dict[str, BulkJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._changed: Dict[str, asyncio.Condition] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._closing = False
+
+    # ---------- persistence ----------
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.state_dir, job_id)
+
+    def _path(self, job_id: str, name: str) -> str:
+        return os.path.join(self._job_dir(job_id), name)
+
+    def _save(self, job: BulkJob):
+        tmp_path = self._path(job.job_id, "job.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(job), f)
+        os.replace(tmp_path, self._path(job.job_id, "job.json"))
+
+    def _load(self, job_id: str) -> Optional[BulkJob]:
+        try:
+            with open(self._path(job_id, "job.json")) as f:
+                return BulkJob(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _read_input(self, job_id: str) -> List[Dict[str, Any]]:
+        with open(self._path(job_id, "input.ndjson"), encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def _truncate_results(self, job: BulkJob):
+        """Drop result lines written after the last saved state (crash between append and save)"""
+        path = self._path(job.job_id, "results.ndjson")
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            for _ in range(job.results_written):
+                if not f.readline():
+                    break
+            f.truncate()
+
+    def get(self, job_id: str) -> Optional[BulkJob]:
+        try:
+            uuid.UUID(job_id)  # job ids become directory names
+        except ValueError:
+            return None
+        job = self.jobs.get(job_id)
+        if job is None:
+            job = self._load(job_id)
+            if job is not None:
+                self.jobs[job_id] = job
+        return job
+
+    # ---------- lifecycle ----------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _condition(self, job_id: str) -> asyncio.Condition:
+        return self._changed.setdefault(job_id, asyncio.Condition())
+
+    async def create(self, listings: List[Dict[str, Any]], defaults: Dict[str, Any]) -> BulkJob:
+        """Persist the catalog and start processing it"""
+        job = BulkJob(job_id=str(uuid.uuid4()), total=len(listings), chunk_size=self.chunk_size, defaults=defaults)
+
+        def write_input():
+            os.makedirs(self._job_dir(job.job_id), exist_ok=True)
+            with open(self._path(job.job_id, "input.ndjson"), "w", encoding="utf-8") as f:
+                for listing in listings:
+                    f.write(json.dumps(listing, ensure_ascii=False) + "\n")
+            open(self._path(job.job_id, "results.ndjson"), "w").close()
+            self._save(job)
+
+        await asyncio.to_thread(write_input)
+        self.jobs[job.job_id] = job
+        self._start(job)
+        return job
+
+    def _start(self, job: BulkJob):
+        if job.job_id in self._tasks and not self._tasks[job.job_id].done():
+            return
+        self._tasks[job.job_id] = asyncio.create_task(self._run(job))
+
+    def resume(self, job_id: str) -> Optional[BulkJob]:
+        """Continue an interrupted (or failed) job with its missing chunks"""
+        job = self.get(job_id)
+        if job is None or job.status in ("completed", "cancelled"):
+            return job
+        self._start(job)
+        return job
+
+    def resume_pending(self) -> List[str]:
+        """Resume every job that was queued or running when the service stopped"""
+        if not os.path.isdir(self.state_dir):
+            return []
+        resumed = []
+        for job_id in os.listdir(self.state_dir):
+            job = self.get(job_id)
+            if job is not None and job.status in RESUMABLE_STATUSES:
+                self._start(job)
+                resumed.append(job_id)
+        if resumed:
+            logger.info(f"Resuming {len(resumed)} bulk jobs")
+        return resumed
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return False
+        task = self._tasks.get(job_id)
+        if task is not None and not task.done():
+            task.cancel()  # _run records the cancellation
+            return True
+        # Not running in this process (e.g. interrupted before a restart)
+        job.status = "cancelled"
+        job.finished_at = time.time()
+        self._save(job)
+        return True
+
+    async def _run(self, job: BulkJob):
+        loop = asyncio.get_running_loop()
+        job.status = "running"
+        job.started_at = time.time()
+        job.error_message = None
+        try:
+            await asyncio.to_thread(self._truncate_results, job)
+            listings = await asyncio.to_thread(self._read_input, job.job_id)
+            done = set(job.done_chunks)
+            todo = [i for i in range(job.chunk_count) if i not in done]
+            await asyncio.to_thread(self._save, job)
+
+            executor = self._get_executor()
+            max_in_flight = self.max_workers * MAX_IN_FLIGHT_PER_WORKER
+            in_flight: Dict[asyncio.Future, tuple] = {}
+            while todo or in_flight:
+                # Bounded submission keeps memory flat for very large catalogs
+                while todo and len(in_flight) < max_in_flight:
+                    index = todo.pop(0)
+                    chunk = listings[index * job.chunk_size:(index + 1) * job.chunk_size]
+                    future = loop.run_in_executor(executor, self.worker_fn, chunk, job.defaults)
+                    in_flight[future] = (index, chunk, time.perf_counter())
+                finished, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    index, chunk, submitted = in_flight.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        results = [{"id": listing["id"], "error": str(e)} for listing in chunk]
+                    for offset, result in enumerate(results):
+                        result["index"] = index * job.chunk_size + offset
+                    await self._record_chunk(job, index, results, time.perf_counter() - submitted)
+
+            job.status = "completed"
+        except asyncio.CancelledError:
+            # Service shutdown leaves the job resumable; an explicit cancel does not
+            job.status = "interrupted" if self._closing else "cancelled"
+        except Exception as e:
+            logger.error(f"Bulk job {job.job_id} failed: {e}")
+            job.status = "failed"
+            job.error_message = str(e)
+        finally:
+            job.busy_seconds += time.time() - job.started_at
+            job.finished_at = time.time() if job.status in FINISHED_STATUSES else None
+            self._save(job)
+            async with self._condition(job.job_id):
+                self._condition(job.job_id).notify_all()
+            logger.info(f"Bulk job {job.job_id} {job.status}: {job.processed}/{job.total} listings")
+
+    async def _record_chunk(self, job: BulkJob, index: int, results: List[Dict[str, Any]], seconds: float):
+        lines = "".join(json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+
+        def append():
+            with open(self._path(job.job_id, "results.ndjson"), "a", encoding="utf-8") as f:
+                f.write(lines)
+            job.done_chunks.append(index)
+            job.processed += len(results)
+            job.failed += sum(1 for result in results if "error" in result)
+            job.results_written += len(results)
+            job.chunk_seconds_total += seconds
+            self._save(job)
+
+        await asyncio.to_thread(append)
+        async with self._condition(job.job_id):
+            self._condition(job.job_id).notify_all()
+
+    # ---------- results ----------
+
+    @staticmethod
+    def _read_lines(f, count: int) -> List[bytes]:
+        lines = []
+        for _ in range(count):
+            line = f.readline()
+            if not line:
+                break
+            lines.append(line)
+        return lines
+
+    async def stream_results(self, job_id: str, offset: int = 0, follow: bool = True) -> AsyncIterator[bytes]:
+        """
+        Yield NDJSON result lines from ``offset`` on; with ``follow`` keep
+        streaming new lines until the job finishes
+        """
+        job = self.get(job_id)
+        path = self._path(job_id, "results.ndjson")
+        f = await asyncio.to_thread(open, path, "rb")
+        try:
+            position = 0
+            while position < offset:
+                skipped = await asyncio.to_thread(self._read_lines, f, min(STREAM_BATCH_LINES, offset - position))
+                if not skipped:
+                    break
+                position += len(skipped)
+            position = offset
+            while True:
+                # Only complete lines recorded in the job state are sent
+                available = min(STREAM_BATCH_LINES, job.results_written - position)
+                batch = await asyncio.to_thread(self._read_lines, f, available) if available > 0 else []
+                if batch:
+                    position += len(batch)
+                    yield b"".join(batch)
+                    continue
+                if not follow or job.status not in ("queued", "running") or job_id not in self._tasks:
+                    return
+                condition = self._condition(job_id)
+                async with condition:
+                    if position >= job.results_written and job.status in ("queued", "running"):
+                        try:
+                            await asyncio.wait_for(condition.wait(), timeout=15)
+                        except asyncio.TimeoutError:
+                            pass
+        finally:
+            f.close()
+
+    async def shutdown(self):
+        """Stop running jobs (left resumable) and the process pool"""
+        self._closing = True
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,21 +1,30 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, File, Form, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from pydantic import BaseModel, Field
 import random
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import logging
 import re
 import httpx
 import json
 from datetime import datetime
 import asyncio
+import time
+from collections import Counter
 import textstat
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import nltk
 
+try:
+    from .text_analysis import TextAnalyzer, TextDocument
+    from .bulk_jobs import BulkJobManager, parse_listings
+except ImportError:  # executed as a top-level module (uvicorn main:app)
+    from text_analysis import TextAnalyzer, TextDocument
+    from bulk_jobs import BulkJobManager, parse_listings
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -172,6 +181,38 @@ class AutoTestRequest(BaseModel):
     target_audience: str
     budget: float
 
+MAX_BATCH_LISTINGS = 10000
+
+class ListingText(BaseModel):
+    id: str
+    text: str
+    product_category: Optional[str] = None  # overrides the batch category
+    keywords: Optional[List[str]] = None  # overrides the batch keywords
+
+class BatchScoreRequest(BaseModel):
+    listings: List[ListingText] = Field(..., min_length=1, max_length=MAX_BATCH_LISTINGS)
+    product_category: str = "general"
+    keywords: List[str] = []
+
+class ListingScore(BaseModel):
+    id: str
+    seo_score: int
+    advanced_seo_score: int
+    readability_score: int
+    flesch_reading_ease: float
+    sentiment_score: float
+    compliance_score: int
+    is_compliant: bool
+    risk_level: str
+    violations: List[Dict[str, str]]
+    prohibited_words: List[str]
+    keywords_included: List[str]
+
+class BatchScoreResponse(BaseModel):
+    results: List[ListingScore]
+    summary: Dict[str, Any]
+    processing_time_ms: float
+
 # In-memory storage
 optimization_history = []
 keyword_cache = {}
@@ -200,6 +241,31 @@ MERCADOLIVRE_COMPLIANCE_RULES = {
     ]
 }
 
+# Dictionaries matched by the text analysis engine (one Aho-Corasick pass per text)
+TEXT_LEXICON = {
+    "prohibited": MERCADOLIVRE_COMPLIANCE_RULES["prohibited_words"],
+    "disclaimers": [d for ds in MERCADOLIVRE_COMPLIANCE_RULES["required_disclaimers"].values() for d in ds],
+    "seo_cta": ["compre", "clique", "veja", "descubra", "aproveite", "garanta"],
+    "seo_emotional": ["incrível", "fantástico", "exclusivo", "especial", "único", "melhor"],
+    "positive": [
+        "excelente", "ótimo", "bom", "qualidade", "premium", "especial",
+        "incrível", "fantástico", "perfeito", "ideal", "melhor", "superior"
+    ],
+    "negative": [
+        "ruim", "péssimo", "problema", "defeito", "falha", "barato",
+        "inferior", "pior", "difícil", "complicado"
+    ],
+    "power": ["exclusivo", "grátis", "garantia", "novo", "limitado"],
+    "lift_cta": ["clique", "compre", "veja", "aproveite"],
+    "basic_cta": ["clique", "compre", "veja"],
+    "quality_emotional": ["incrível", "fantástico", "exclusivo", "especial", "único"],
+    "quality_cta": ["compre", "clique", "veja", "descubra"],
+}
+
+text_analyzer = TextAnalyzer(TEXT_LEXICON)
+
+TextInput = Union[str, TextDocument]
+
 # Segment-specific optimization templates
 SEGMENT_TEMPLATES = {
     "b2b": {
@@ -241,14 +307,14 @@ SEGMENT_TEMPLATES = {
 }
 
 # Utility Functions
-def calculate_advanced_seo_score(text: str, keywords: List[str]) -> int:
+def calculate_advanced_seo_score(text: TextInput, keywords: List[str]) -> int:
     """Calculate advanced SEO score with multiple factors"""
+    doc = text_analyzer.analyze(text, keywords)
     score = 0
-    text_lower = text.lower()
     
     # Keyword density (25 points)
-    keyword_count = sum(text_lower.count(kw.lower()) for kw in keywords)
-    total_words = len(text.split())
+    keyword_count = doc.keyword_occurrences
+    total_words = doc.word_count
     if total_words > 0:
         density = keyword_count / total_words
         if 0.01 <= density <= 0.03:  # Ideal density 1-3%
@@ -257,76 +323,64 @@ def calculate_advanced_seo_score(text: str, keywords: List[str]) -> int:
             score += max(0, 25 - abs(density - 0.02) * 500)
     
     # Title structure (20 points)
-    sentences = text.split('.')
+    sentences = doc.sentences
     if sentences and len(sentences[0]) < 60:  # Good title length
         score += 20
     
     # Readability (20 points)
-    readability = textstat.flesch_reading_ease(text)
+    readability = doc.flesch_reading_ease
     if readability >= 60:  # Easy to read
         score += 20
     elif readability >= 30:
         score += 10
     
     # Text length (15 points)
-    if 150 <= len(text) <= 300:  # Optimal length
+    if 150 <= doc.char_count <= 300:  # Optimal length
         score += 15
-    elif 100 <= len(text) <= 500:
+    elif 100 <= doc.char_count <= 500:
         score += 10
     
     # Call to action presence (10 points)
-    cta_words = ["compre", "clique", "veja", "descubra", "aproveite", "garanta"]
-    if any(cta in text_lower for cta in cta_words):
+    if doc.any("seo_cta"):
         score += 10
     
     # Emotional words (10 points)
-    emotional_words = ["incrível", "fantástico", "exclusivo", "especial", "único", "melhor"]
-    emotion_count = sum(1 for word in emotional_words if word in text_lower)
+    emotion_count = len(doc.matched("seo_emotional"))
     score += min(10, emotion_count * 2)
     
     return min(100, score)
 
-def calculate_sentiment_score(text: str) -> float:
+def calculate_sentiment_score(text: TextInput) -> float:
     """Calculate sentiment score using simple word analysis"""
-    positive_words = [
-        "excelente", "ótimo", "bom", "qualidade", "premium", "especial",
-        "incrível", "fantástico", "perfeito", "ideal", "melhor", "superior"
-    ]
-    negative_words = [
-        "ruim", "péssimo", "problema", "defeito", "falha", "barato",
-        "inferior", "pior", "difícil", "complicado"
-    ]
+    doc = text_analyzer.analyze(text)
+    positive_count = len(doc.matched("positive"))
+    negative_count = len(doc.matched("negative"))
     
-    text_lower = text.lower()
-    positive_count = sum(1 for word in positive_words if word in text_lower)
-    negative_count = sum(1 for word in negative_words if word in text_lower)
-    
-    total_words = len(text.split())
+    total_words = doc.word_count
     if total_words == 0:
         return 0.5
     
     sentiment = (positive_count - negative_count) / total_words
     return max(0, min(1, 0.5 + sentiment * 5))  # Normalize to 0-1
 
-def check_compliance(text: str, category: str) -> ComplianceCheckResponse:
+def check_compliance(text: TextInput, category: str) -> ComplianceCheckResponse:
     """Check Mercado Livre compliance rules"""
+    doc = text_analyzer.analyze(text)
     violations = []
     compliance_score = 100
     risk_level = "low"
     
     # Check prohibited words
-    text_lower = text.lower()
-    for word in MERCADOLIVRE_COMPLIANCE_RULES["prohibited_words"]:
-        if word in text_lower:
-            violations.append({
-                "type": "prohibited_word",
-                "description": f"Palavra proibida encontrada: '{word}'",
-                "suggestion": f"Remover ou substituir '{word}'"
-            })
-            compliance_score -= 20
+    for word in doc.matched("prohibited"):
+        violations.append({
+            "type": "prohibited_word",
+            "description": f"Palavra proibida encontrada: '{word}'",
+            "suggestion": f"Remover ou substituir '{word}'"
+        })
+        compliance_score -= 20
     
     # Check character limits
-    if len(text) > MERCADOLIVRE_COMPLIANCE_RULES["character_limits"]["description"]:
+    if doc.char_count > MERCADOLIVRE_COMPLIANCE_RULES["character_limits"]["description"]:
         violations.append({
             "type": "length_violation",
             "description": "Texto muito longo para descrição",
@@ -335,7 +389,7 @@ def check_compliance(text: str, category: str) -> ComplianceCheckResponse:
         compliance_score -= 15
     
     # Check CAPS LOCK usage
-    caps_ratio = sum(1 for c in text if c.isupper()) / max(len(text), 1)
+    caps_ratio = doc.uppercase_count / max(doc.char_count, 1)
     if caps_ratio > 0.3:
         violations.append({
             "type": "formatting_violation",
@@ -347,7 +401,7 @@ def check_compliance(text: str, category: str) -> ComplianceCheckResponse:
     # Check required disclaimers
     required_disclaimers = MERCADOLIVRE_COMPLIANCE_RULES["required_disclaimers"].get(category, [])
     for disclaimer in required_disclaimers:
-        if disclaimer.lower() not in text_lower:
+        if not doc.contains(disclaimer):
             violations.append({
                 "type": "missing_disclaimer",
                 "description": f"Disclaimer obrigatório ausente: {disclaimer}",
@@ -492,7 +546,7 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "optimizer_ai"}
+    return {"status": "healthy", "service": "optimizer_ai", "text_analysis": text_analyzer.cache_info()}
 
 @app.post("/api/optimize-copy", response_model=CopywritingResponse)
 async def optimize_copywriting(request: CopywritingRequest) -> CopywritingResponse:
@@ -512,26 +566,30 @@ async def optimize_copywriting(request: CopywritingRequest) -> CopywritingRespon
         request.keywords
     )
     
+    # Tokenize and match every dictionary once; all scorers read from these documents
+    original_doc = text_analyzer.analyze(original_text, request.keywords)
+    optimized_doc = text_analyzer.analyze(optimized_text, request.keywords)
+    
     # Calculate scores
-    seo_score = calculate_seo_score(optimized_text, request.keywords)
-    readability_score = calculate_readability_score(optimized_text)
+    seo_score = calculate_seo_score(optimized_doc, request.keywords)
+    readability_score = calculate_readability_score(optimized_doc)
     
     # Estimate performance lift
     performance_lift = estimate_performance_lift(
-        original_text, 
-        optimized_text, 
+        original_doc, 
+        optimized_doc, 
         request.optimization_goal
     )
     
     # Generate improvement suggestions
-    improvements = generate_improvements(original_text, optimized_text, request)
+    improvements = generate_improvements(original_doc, optimized_doc, request)
     
     # Find included keywords
-    keywords_included = [kw for kw in request.keywords if kw.lower() in optimized_text.lower()]
+    keywords_included = optimized_doc.keywords_found
     
     # Calculate additional scores for complete response
-    sentiment_score = calculate_sentiment_score(optimized_text)
-    compliance_result = check_compliance(optimized_text, request.product_category)
+    sentiment_score = calculate_sentiment_score(optimized_doc)
+    compliance_result = check_compliance(optimized_doc, request.product_category)
     suggested_keywords = await suggest_keywords_ai(request.product_category, optimized_text, request.target_audience)
     
     # Generate segment adaptations
@@ -589,6 +647,91 @@ async def create_ab_test(request: ABTestRequest) -> ABTestResponse:
         expected_results=expected_results
     )
 
+@app.post("/api/audit/batch-score", response_model=BatchScoreResponse, tags=["Analytics"])
+async def batch_score_listings(request: BatchScoreRequest) -> BatchScoreResponse:
+    """
+    Score thousands of listing texts in one call (catalog-wide audits)
+    """
+    logger.info(f"Batch scoring {len(request.listings)} listings")
+    started = time.perf_counter()
+    
+    # CPU-bound: run off the event loop
+    results = await asyncio.to_thread(score_listings, request.listings, request.product_category, request.keywords)
+    
+    return BatchScoreResponse(
+        results=results,
+        summary=summarize_scores(results),
+        processing_time_ms=round((time.perf_counter() - started) * 1000, 2)
+    )
+
+@app.post("/api/bulk/jobs", tags=["Optimization"])
+async def create_bulk_job(
+    file: UploadFile = File(..., description="Catalog as NDJSON (one listing per line) or CSV with header"),
+    target_audience: str = Form("general"),
+    product_category: str = Form("general"),
+    optimization_goal: str = Form("conversions"),
+    keywords: str = Form("", description="Comma-separated default keywords")
+) -> Dict[str, Any]:
+    """
+    Optimize a whole catalog in one request; listings run in a worker pool
+    """
+    content = await file.read()
+    try:
+        listings = await asyncio.to_thread(parse_listings, content, file.filename or "", file.content_type or "")
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid catalog: {e}")
+    if not listings:
+        raise HTTPException(status_code=400, detail="Catalog has no listings")
+    if len(listings) > MAX_BULK_LISTINGS:
+        raise HTTPException(status_code=413, detail=f"Catalog exceeds {MAX_BULK_LISTINGS} listings")
+    
+    defaults = {
+        "target_audience": target_audience,
+        "product_category": product_category,
+        "optimization_goal": optimization_goal,
+        "keywords": [kw.strip() for kw in keywords.split(",") if kw.strip()]
+    }
+    job = await bulk_jobs.create(listings, defaults)
+    logger.info(f"Bulk job {job.job_id} created with {job.total} listings")
+    return job.to_dict()
+
+@app.get("/api/bulk/jobs/{job_id}", tags=["Optimization"])
+async def get_bulk_job(job_id: str) -> Dict[str, Any]:
+    """Status and throughput metrics of a bulk job"""
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return job.to_dict()
+
+@app.get("/api/bulk/jobs/{job_id}/results", tags=["Optimization"])
+async def stream_bulk_job_results(job_id: str, offset: int = 0, follow: bool = True) -> StreamingResponse:
+    """
+    Stream results as NDJSON in completion order (each line carries the
+    listing ``index``); reconnect with ``offset`` = lines already received
+    """
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return StreamingResponse(
+        bulk_jobs.stream_results(job_id, offset=max(0, offset), follow=follow),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/api/bulk/jobs/{job_id}/resume", tags=["Optimization"])
+async def resume_bulk_job(job_id: str) -> Dict[str, Any]:
+    """Resume an interrupted or failed bulk job; finished chunks are not redone"""
+    job = bulk_jobs.resume(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return job.to_dict()
+
+@app.delete("/api/bulk/jobs/{job_id}", tags=["Optimization"])
+async def cancel_bulk_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a running bulk job (results produced so far are kept)"""
+    if not bulk_jobs.cancel(job_id):
+        raise HTTPException(status_code=404, detail="Bulk job not found or already finished")
+    return {"job_id": job_id, "status": "cancelling"}
+
 @app.post("/api/keywords/suggest", response_model=KeywordSuggestionResponse, tags=["Keywords"])
 async def suggest_keywords(request: KeywordSuggestionRequest) -> KeywordSuggestionResponse:
     """
@@ -796,33 +939,33 @@ def add_professional_appeal(text: str) -> str:
             break
     return text
 
-def calculate_seo_score(text: str, keywords: List[str]) -> int:
+def calculate_seo_score(text: TextInput, keywords: List[str]) -> int:
     """Calculate SEO score based on keyword presence and text optimization"""
+    doc = text_analyzer.analyze(text, keywords)
     score = 50  # Base score
     
     # Keyword presence
-    for keyword in keywords:
-        if keyword.lower() in text.lower():
-            score += 10
+    score += 10 * len(doc.keywords_found)
     
     # Text length (optimal range)
-    word_count = len(text.split())
+    word_count = doc.word_count
     if 20 <= word_count <= 60:
         score += 15
     elif word_count < 20:
         score -= 10
     
     # Title case optimization
-    if any(word.istitle() for word in text.split()):
+    if doc.has_title_case_word:
         score += 5
     
     return min(100, max(0, score))
 
-def calculate_readability_score(text: str) -> int:
+def calculate_readability_score(text: TextInput) -> int:
     """Calculate readability score"""
+    doc = text_analyzer.analyze(text)
     # Simple readability based on sentence length and word complexity
-    sentences = text.split('.')
-    avg_sentence_length = sum(len(s.split()) for s in sentences) / max(len(sentences), 1)
+    sentences = doc.sentences
+    avg_sentence_length = doc.word_count / max(len(sentences), 1)
     
     # Penalize very long sentences
     if avg_sentence_length > 20:
@@ -833,44 +976,44 @@ def calculate_readability_score(text: str) -> int:
         score = 85
     
     # Bonus for simple words
-    simple_word_bonus = sum(1 for word in text.split() if len(word) <= 6) / len(text.split()) * 15
+    simple_word_bonus = doc.short_word_count / max(doc.word_count, 1) * 15
     
     return min(100, int(score + simple_word_bonus))
 
-def estimate_performance_lift(original: str, optimized: str, goal: str) -> float:
+def estimate_performance_lift(original: TextInput, optimized: TextInput, goal: str) -> float:
     """Estimate performance improvement percentage"""
+    original_doc = text_analyzer.analyze(original)
+    optimized_doc = text_analyzer.analyze(optimized)
     # Calculate based on optimization features added
     lift = 0.0
     
     # Length optimization
-    orig_words = len(original.split())
-    opt_words = len(optimized.split())
-    
-    if opt_words > orig_words:
+    if optimized_doc.word_count > original_doc.word_count:
         lift += random.uniform(5, 15)  # More descriptive content
     
     # Power words detection
-    power_indicators = ["exclusivo", "grátis", "garantia", "novo", "limitado"]
-    power_count = sum(1 for word in power_indicators if word in optimized.lower())
+    power_count = len(optimized_doc.matched("power"))
     lift += power_count * random.uniform(3, 8)
     
     # CTA presence
-    if any(cta in optimized.lower() for cta in ["clique", "compre", "veja", "aproveite"]):
+    if optimized_doc.any("lift_cta"):
         lift += random.uniform(8, 20)
     
     return round(min(50, lift), 1)
 
-def generate_improvements(original: str, optimized: str, request: CopywritingRequest) -> List[str]:
+def generate_improvements(original: TextInput, optimized: TextInput, request: CopywritingRequest) -> List[str]:
     """Generate list of improvements made"""
+    original_doc = text_analyzer.analyze(original)
+    optimized_doc = text_analyzer.analyze(optimized, request.keywords)
     improvements = []
     
-    if len(optimized.split()) > len(original.split()):
+    if optimized_doc.word_count > original_doc.word_count:
         improvements.append("Texto expandido para maior descrição")
     
-    if any(kw.lower() in optimized.lower() for kw in request.keywords):
+    if optimized_doc.keywords_found:
         improvements.append("Palavras-chave incluídas naturalmente")
     
-    if any(word in optimized.lower() for word in ["clique", "compre", "veja"]):
+    if optimized_doc.any("basic_cta"):
         improvements.append("Call-to-action adicionado")
     
     if request.target_audience in ["young_adults", "families", "professionals"]:
@@ -880,22 +1023,21 @@ def generate_improvements(original: str, optimized: str, request: CopywritingReq
     
     return improvements
 
-def analyze_copy_quality(text: str, audience: str, category: str) -> float:
+def analyze_copy_quality(text: TextInput, audience: str, category: str) -> float:
     """Analyze quality of copy for A/B testing"""
+    doc = text_analyzer.analyze(text)
     score = 0.5  # Base score
     
     # Length factor
-    word_count = len(text.split())
-    if 15 <= word_count <= 50:
+    if 15 <= doc.word_count <= 50:
         score += 0.2
     
     # Emotional words
-    emotional_words = ["incrível", "fantástico", "exclusivo", "especial", "único"]
-    emotion_count = sum(1 for word in emotional_words if word.lower() in text.lower())
+    emotion_count = len(doc.matched("quality_emotional"))
     score += emotion_count * 0.1
     
     # Call to action
-    if any(cta in text.lower() for cta in ["compre", "clique", "veja", "descubra"]):
+    if doc.any("quality_cta"):
         score += 0.15
     
     # Random variation for realistic simulation
@@ -903,6 +1045,106 @@ def analyze_copy_quality(text: str, audience: str, category: str) -> float:
     
     return max(0, min(1, score))
 
+def score_listing(listing: ListingText, category: str, keywords: List[str]) -> ListingScore:
+    """Every score for one listing, computed from a single document"""
+    keywords = listing.keywords if listing.keywords is not None else keywords
+    doc = text_analyzer.analyze(listing.text, keywords)
+    compliance = check_compliance(doc, listing.product_category or category)
+    
+    return ListingScore(
+        id=listing.id,
+        seo_score=calculate_seo_score(doc, keywords),
+        advanced_seo_score=calculate_advanced_seo_score(doc, keywords),
+        readability_score=calculate_readability_score(doc),
+        flesch_reading_ease=doc.flesch_reading_ease,
+        sentiment_score=round(calculate_sentiment_score(doc), 4),
+        compliance_score=compliance.compliance_score,
+        is_compliant=compliance.is_compliant,
+        risk_level=compliance.risk_level,
+        violations=compliance.violations,
+        prohibited_words=doc.matched("prohibited"),
+        keywords_included=doc.keywords_found
+    )
+
+def optimize_listing(listing: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """Optimization, scores and compliance for one catalog listing (bulk jobs)"""
+    audience = listing.get("target_audience", defaults["target_audience"])
+    category = listing.get("product_category", defaults["product_category"])
+    goal = listing.get("optimization_goal", defaults["optimization_goal"])
+    keywords = listing.get("keywords", defaults["keywords"])
+    
+    optimized_text = apply_optimizations(listing["text"], audience, category, goal, keywords)
+    original_doc = text_analyzer.analyze(listing["text"])
+    optimized_doc = text_analyzer.analyze(optimized_text, keywords)
+    compliance = check_compliance(optimized_doc, category)
+    
+    return {
+        "id": listing["id"],
+        "optimized_text": optimized_text,
+        "seo_score": calculate_seo_score(optimized_doc, keywords),
+        "readability_score": calculate_readability_score(optimized_doc),
+        "sentiment_score": round(calculate_sentiment_score(optimized_doc), 4),
+        "compliance_score": compliance.compliance_score,
+        "is_compliant": compliance.is_compliant,
+        "risk_level": compliance.risk_level,
+        "violations": compliance.violations,
+        "estimated_performance_lift": estimate_performance_lift(original_doc, optimized_doc, goal),
+        "keywords_included": optimized_doc.keywords_found
+    }
+
+def optimize_listing_chunk(listings: List[Dict[str, Any]], defaults: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Runs in a bulk job worker process; a failing listing does not fail its chunk"""
+    results = []
+    for listing in listings:
+        try:
+            results.append(optimize_listing(listing, defaults))
+        except Exception as e:
+            results.append({"id": listing["id"], "error": str(e)})
+    return results
+
+def score_listings(listings: List[ListingText], category: str, keywords: List[str]) -> List[ListingScore]:
+    return [score_listing(listing, category, keywords) for listing in listings]
+
+def summarize_scores(results: List[ListingScore]) -> Dict[str, Any]:
+    """Catalog-level aggregates of a batch"""
+    total = len(results)
+    if not total:
+        return {"total_listings": 0}
+    
+    violation_types = Counter(v["type"] for r in results for v in r.violations)
+    prohibited = Counter(word for r in results for word in r.prohibited_words)
+    return {
+        "total_listings": total,
+        "compliant_listings": sum(1 for r in results if r.is_compliant),
+        "risk_levels": dict(Counter(r.risk_level for r in results)),
+        "average_scores": {
+            "seo_score": round(sum(r.seo_score for r in results) / total, 2),
+            "advanced_seo_score": round(sum(r.advanced_seo_score for r in results) / total, 2),
+            "readability_score": round(sum(r.readability_score for r in results) / total, 2),
+            "sentiment_score": round(sum(r.sentiment_score for r in results) / total, 4),
+            "compliance_score": round(sum(r.compliance_score for r in results) / total, 2),
+        },
+        "violation_types": dict(violation_types),
+        "top_prohibited_words": prohibited.most_common(10),
+    }
+
+# Bulk catalog jobs: chunks of listings optimized in a process pool
+MAX_BULK_LISTINGS = int(os.getenv("BULK_MAX_LISTINGS", "100000"))
+bulk_jobs = BulkJobManager(
+    optimize_listing_chunk,
+    state_dir=os.getenv("BULK_JOBS_DIR", "bulk_jobs"),
+    chunk_size=int(os.getenv("BULK_CHUNK_SIZE", "200")),
+    max_workers=int(os.getenv("BULK_MAX_WORKERS", "0")) or None
+)
+
+@app.on_event("startup")
+async def resume_bulk_jobs():
+    bulk_jobs.resume_pending()
+
+@app.on_event("shutdown")
+async def stop_bulk_jobs():
+    await bulk_jobs.shutdown()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8003)
\ No newline at end of file
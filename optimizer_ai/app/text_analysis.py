@@ -0,0 +1,205 @@
+"""
+Single-pass text analysis engine shared by the optimizer scorers.
+
+A listing text is tokenized once into a ``TextDocument``. Every dictionary
+(prohibited words, CTAs, emotional/positive/negative words, disclaimers and
+the request keywords) is compiled into one Aho-Corasick automaton, so all of
+them are matched in a single scan of the lowercased text. Readability is
+computed from per-word syllable counts cached across documents.
+
+Matching keeps the semantics the scorers always had: case-insensitive
+substring search (``"bom" in text.lower()``), with occurrence counts equal to
+``str.count`` (non-overlapping, leftmost first).
+"""
+from collections import deque
+from functools import cached_property, lru_cache
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import textstat
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SENTENCES = re.compile(r"\b[^.!?]+[.!?]*", re.UNICODE)
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher (goto/fail/output automaton)"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(dict.fromkeys(p for p in patterns if p))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(index)
+
+        # Breadth-first: failure links point to the longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Non-overlapping occurrence count of every pattern found in ``text``"""
+        counts = [0] * len(self.patterns)
+        next_free = [0] * len(self.patterns)
+        goto, fail, output = self._goto, self._fail, self._output
+        lengths = [len(p) for p in self.patterns]
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                start = position - lengths[index] + 1
+                if start >= next_free[index]:
+                    counts[index] += 1
+                    next_free[index] = position + 1
+        return {self.patterns[i]: c for i, c in enumerate(counts) if c}
+
+
+@lru_cache(maxsize=50000)
+def syllable_count(word: str) -> int:
+    """Syllables of one lowercased, punctuation-free word (textstat/pyphen rules)"""
+    return len(textstat.pyphen.positions(word)) + 1
+
+
+def _legacy_round(number: float, points: int) -> float:
+    # Same rounding textstat applies to its intermediate results
+    p = 10 ** points
+    return float(math.floor((number * p) + math.copysign(0.5, number))) / p
+
+
+class TextDocument:
+    """A text tokenized once, with every dictionary match precomputed"""
+
+    def __init__(self, text: str, counts: Dict[str, int], groups: Dict[str, Tuple[str, ...]],
+                 keywords: Tuple[str, ...]):
+        self.text = text
+        self.lower = text.lower()
+        self.words = text.split()
+        self.word_count = len(self.words)
+        self.char_count = len(text)
+        self.keywords = keywords
+        self._counts = counts
+        self._groups = groups
+
+    def count(self, pattern: str) -> int:
+        """Occurrences of ``pattern`` (case-insensitive), as ``str.count`` would return"""
+        pattern = pattern.lower()
+        if not pattern:
+            return self.char_count + 1
+        return self._counts.get(pattern, 0)
+
+    def contains(self, pattern: str) -> bool:
+        return not pattern or self.count(pattern) > 0
+
+    def matched(self, group: str) -> List[str]:
+        """Patterns of a dictionary group present in the text, in dictionary order"""
+        return [pattern for pattern in self._groups[group] if pattern in self._counts]
+
+    def any(self, group: str) -> bool:
+        return any(pattern in self._counts for pattern in self._groups[group])
+
+    @cached_property
+    def keywords_found(self) -> List[str]:
+        return [kw for kw in self.keywords if self.contains(kw)]
+
+    @cached_property
+    def keyword_occurrences(self) -> int:
+        return sum(self.count(kw) for kw in self.keywords)
+
+    @cached_property
+    def sentences(self) -> List[str]:
+        """Period-separated segments (the split the scorers have always used)"""
+        return self.text.split('.')
+
+    @cached_property
+    def uppercase_count(self) -> int:
+        return sum(1 for c in self.text if c.isupper())
+
+    @cached_property
+    def has_title_case_word(self) -> bool:
+        return any(word.istitle() for word in self.words)
+
+    @cached_property
+    def short_word_count(self) -> int:
+        return sum(1 for word in self.words if len(word) <= 6)
+
+    @cached_property
+    def lexicon(self) -> List[str]:
+        """Words with punctuation removed, lowercased (textstat's lexicon)"""
+        return _PUNCTUATION.sub('', self.lower).split()
+
+    @cached_property
+    def flesch_reading_ease(self) -> float:
+        """Flesch reading ease, identical to ``textstat.flesch_reading_ease``"""
+        words = len(self.lexicon)
+        sentences = _SENTENCES.findall(self.text)
+        ignored = sum(1 for s in sentences if len(_PUNCTUATION.sub('', s).split()) <= 2)
+        sentence_count = max(1, len(sentences) - ignored)
+        avg_sentence_length = _legacy_round(words / sentence_count, 1)
+        syllables = sum(syllable_count(word) for word in self.lexicon)
+        avg_syllables = _legacy_round(syllables / words, 1) if words else 0.0
+        return _legacy_round(206.835 - 1.015 * avg_sentence_length - 84.6 * avg_syllables, 2)
+
+
+class TextAnalyzer:
+    """
+    Compiles named dictionaries into Aho-Corasick automata and builds documents.
+
+    The static dictionaries are merged with the request keywords into one
+    automaton per keyword set (cached), so a document costs a single pass.
+    """
+
+    def __init__(self, lexicon: Dict[str, Sequence[str]], cache_size: int = 4096):
+        self.groups: Dict[str, Tuple[str, ...]] = {
+            name: tuple(dict.fromkeys(p.lower() for p in patterns)) for name, patterns in lexicon.items()
+        }
+        self._static_patterns = [p for patterns in self.groups.values() for p in patterns]
+        self._automaton = lru_cache(maxsize=256)(self._build_automaton)
+        self._analyze = lru_cache(maxsize=cache_size)(self._build_document)
+
+    def _build_automaton(self, keywords: Tuple[str, ...]) -> AhoCorasick:
+        return AhoCorasick(self._static_patterns + list(keywords))
+
+    def _build_document(self, text: str, keywords: Tuple[str, ...]) -> TextDocument:
+        counts = self._automaton(tuple(kw.lower() for kw in keywords)).count(text.lower())
+        return TextDocument(text, counts, self.groups, keywords)
+
+    def analyze(self, text: Union[str, TextDocument], keywords: Optional[Sequence[str]] = None) -> TextDocument:
+        """Document for ``text``; a document is returned as is when no other keywords are asked"""
+        if isinstance(text, TextDocument):
+            if keywords is None or tuple(keywords) == text.keywords:
+                return text
+            text = text.text
+        return self._analyze(text, tuple(keywords or ()))
+
+    def cache_info(self) -> Dict[str, int]:
+        documents = self._analyze.cache_info()
+        automata = self._automaton.cache_info()
+        return {
+            "documents_cached": documents.currsize,
+            "document_hits": documents.hits,
+            "document_misses": documents.misses,
+            "automata_cached": automata.currsize,
+            "syllables_cached": syllable_count.cache_info().currsize,
+        }
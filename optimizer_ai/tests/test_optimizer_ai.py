@@ -335,4 +335,127 @@ class TestOptimizerAIFunctions:
         assert len(optimized) >= len(text)  # Should add content
 
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
+
+class TestBatchScoring:
+    """Test catalog-wide batch scoring"""
+
+    def setup_method(self):
+        self.client = TestClient(app)
+
+    def test_batch_score_endpoint(self):
+        """Each listing gets the same scores as the single-text scorers"""
+        from main import calculate_seo_score, check_compliance
+
+        listings = [
+            {"id": "MLB1", "text": "Smartphone Android com garantia do fabricante e voltagem bivolt"},
+            {"id": "MLB2", "text": "MELHOR DO BRASIL produto milagroso"},
+            {"id": "MLB3", "text": "", "keywords": []},
+            {"id": "MLB4", "text": "Capa para celular", "product_category": "home"},
+        ]
+        response = self.client.post("/api/audit/batch-score", json={
+            "listings": listings,
+            "product_category": "electronics",
+            "keywords": ["smartphone", "android"]
+        })
+        assert response.status_code == 200
+        data = response.json()
+
+        results = {r["id"]: r for r in data["results"]}
+        assert list(results) == ["MLB1", "MLB2", "MLB3", "MLB4"]
+        assert results["MLB1"]["is_compliant"]
+        assert results["MLB1"]["keywords_included"] == ["smartphone", "android"]
+        assert results["MLB1"]["seo_score"] == calculate_seo_score(listings[0]["text"], ["smartphone", "android"])
+        assert results["MLB2"]["prohibited_words"] == ["melhor do brasil", "milagroso"]
+        assert results["MLB2"]["compliance_score"] == check_compliance(listings[1]["text"], "electronics").compliance_score
+        assert results["MLB4"]["is_compliant"]  # no disclaimers required for "home"
+
+        summary = data["summary"]
+        assert summary["total_listings"] == 4
+        assert dict(summary["top_prohibited_words"])["milagroso"] == 1
+        assert summary["violation_types"]["prohibited_word"] == 2
+
+    def test_batch_score_requires_listings(self):
+        """An empty batch is rejected"""
+        response = self.client.post("/api/audit/batch-score", json={"listings": []})
+        assert response.status_code == 422
+
+
+class TestBulkJobs:
+    """Test bulk catalog optimization jobs"""
+
+    @pytest.fixture
+    def bulk_client(self, tmp_path, monkeypatch):
+        import main
+        monkeypatch.setattr(main.bulk_jobs, "state_dir", str(tmp_path))
+        monkeypatch.setattr(main.bulk_jobs, "chunk_size", 100)
+        monkeypatch.setattr(main.bulk_jobs, "max_workers", 2)
+        with TestClient(app) as client:
+            yield client
+        main.bulk_jobs._executor = None
+
+    def test_bulk_job_streams_all_results(self, bulk_client):
+        """An NDJSON catalog is optimized in chunks and streamed back as NDJSON"""
+        catalog = "\n".join(
+            json.dumps({"id": f"MLB{i}", "text": f"Smartphone modelo {i} com ótima bateria"})
+            for i in range(450)
+        )
+        response = bulk_client.post(
+            "/api/bulk/jobs",
+            files={"file": ("catalog.ndjson", catalog, "application/x-ndjson")},
+            data={"product_category": "electronics", "optimization_goal": "clicks", "keywords": "smartphone, android"}
+        )
+        assert response.status_code == 200
+        job = response.json()
+        assert job["total"] == 450
+        assert job["chunks_total"] == 5
+
+        with bulk_client.stream("GET", f"/api/bulk/jobs/{job['job_id']}/results") as stream:
+            results = [json.loads(line) for line in stream.iter_lines() if line]
+        assert sorted(r["index"] for r in results) == list(range(450))
+        first = next(r for r in results if r["index"] == 0)
+        assert first["id"] == "MLB0"
+        assert "smartphone" in first["keywords_included"]
+        assert "Clique agora" in first["optimized_text"]
+
+        status = bulk_client.get(f"/api/bulk/jobs/{job['job_id']}").json()
+        assert status["status"] == "completed"
+        assert status["processed"] == 450 and status["failed"] == 0
+        assert status["listings_per_second"] > 0
+
+        # Reconnecting with an offset only returns the remaining lines
+        tail = bulk_client.get(f"/api/bulk/jobs/{job['job_id']}/results?offset=440")
+        assert len(tail.text.splitlines()) == 10
+
+    def test_bulk_job_rejects_invalid_catalog(self, bulk_client):
+        """Malformed uploads fail fast with 400"""
+        response = bulk_client.post("/api/bulk/jobs", files={"file": ("catalog.ndjson", "{not json", "application/x-ndjson")})
+        assert response.status_code == 400
+        assert bulk_client.get("/api/bulk/jobs/../../etc").status_code == 404
+
+    def test_interrupted_job_resumes_missing_chunks(self, bulk_client):
+        """Resuming a job only processes the chunks that were not recorded"""
+        import main
+        manager = main.bulk_jobs
+        listings = [{"id": str(i), "text": f"Produto {i}"} for i in range(250)]
+        job = bulk_client.portal.call(manager.create, listings, {
+            "target_audience": "general", "product_category": "general",
+            "optimization_goal": "clicks", "keywords": []
+        })
+        with bulk_client.stream("GET", f"/api/bulk/jobs/{job.job_id}/results") as stream:
+            lines = [json.loads(line) for line in stream.iter_lines() if line]
+        assert len(lines) == 250
+
+        # Simulate a crash after the first finished chunk: state on disk only knows that chunk
+        job.status = "interrupted"
+        first_chunk = lines[0]["index"] // 100
+        job.done_chunks = [first_chunk]
+        job.processed = job.results_written = min(100, 250 - first_chunk * 100)
+        manager._save(job)
+        manager.jobs.pop(job.job_id)
+
+        bulk_client.post(f"/api/bulk/jobs/{job.job_id}/resume")
+        with bulk_client.stream("GET", f"/api/bulk/jobs/{job.job_id}/results") as stream:
+            results = [json.loads(line) for line in stream.iter_lines() if line]
+        assert sorted(r["index"] for r in results) == list(range(250))
+        assert bulk_client.get(f"/api/bulk/jobs/{job.job_id}").json()["status"] == "completed"
@@ -0,0 +1,59 @@
+"""
+Unit tests for bulk catalog jobs.
+Covers catalog parsing and job state changes that do not need the process pool.
+"""
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.bulk_jobs import BulkJob, BulkJobManager, parse_listings
+
+
+@pytest.mark.unit
+@pytest.mark.parsers
+class TestCatalogParsing:
+    """Test bulk catalog parsing."""
+
+    def test_parse_ndjson_and_csv(self):
+        """NDJSON and CSV uploads normalize to the same listing shape."""
+        ndjson = b'{"id": 1, "original_text": "Capa", "keywords": ["capa"]}\n\n{"text": "Fone"}\n'
+        assert parse_listings(ndjson, "catalog.ndjson") == [
+            {"id": "1", "text": "Capa", "keywords": ["capa"]},
+            {"id": "row-1", "text": "Fone"},
+        ]
+
+        csv_content = "id,text,keywords,product_category\nMLB1,Capa de celular,capa; celular,\n".encode()
+        assert parse_listings(csv_content, "catalog.csv") == [
+            {"id": "MLB1", "text": "Capa de celular", "keywords": ["capa", "celular"]}
+        ]
+
+    def test_parse_rejects_bad_rows(self):
+        """Invalid JSON lines and rows without text raise ValueError."""
+        with pytest.raises(ValueError):
+            parse_listings(b'{"text": "ok"}\n{broken', "catalog.ndjson")
+        with pytest.raises(ValueError):
+            parse_listings(b'{"id": "1"}', "catalog.ndjson")
+
+    def test_parse_rejects_duplicate_ids(self):
+        """Results are keyed by id, so repeated ids are an error."""
+        with pytest.raises(ValueError, match="repeats id 'row-1'"):
+            parse_listings(b'{"text": "Capa"}\n{"text": "Fone"}\n{"id": "row-1", "text": "Cabo"}\n', "catalog.ndjson")
+
+
+@pytest.mark.unit
+class TestBulkJobState:
+    """Test bulk job state without running chunks."""
+
+    def test_cancel_job_without_task(self, tmp_path):
+        """An interrupted job that is not running here is marked cancelled on disk."""
+        manager = BulkJobManager(lambda listings, defaults: [], str(tmp_path))
+        job = BulkJob(job_id="6f1c7c1e-1d2b-4c55-9a4e-7d2f0c3b9a10", total=10, chunk_size=5,
+                      defaults={}, status="interrupted")
+        os.makedirs(manager._job_dir(job.job_id))
+        manager._save(job)
+
+        assert manager.cancel(job.job_id) is True
+        assert manager._load(job.job_id).status == "cancelled"
+        assert manager.cancel(job.job_id) is False
@@ -0,0 +1,75 @@
+"""
+Unit tests for the single-pass text analysis engine.
+Checks the Aho-Corasick matcher against str semantics and readability against textstat.
+"""
+import pytest
+import random
+import textstat
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.text_analysis import AhoCorasick, TextAnalyzer, TextDocument
+
+
+@pytest.mark.unit
+@pytest.mark.parsers
+class TestAhoCorasick:
+    """Test the multi-pattern matcher."""
+
+    def test_counts_match_str_count(self):
+        """Counts equal non-overlapping str.count for random patterns and texts."""
+        rng = random.Random(7)
+        alphabet = "abc "
+        for _ in range(500):
+            patterns = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(6)]
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 50)))
+            expected = {p: text.count(p) for p in patterns if text.count(p)}
+            assert AhoCorasick(patterns).count(text) == expected
+
+    def test_overlapping_and_nested_patterns(self):
+        """Nested patterns are all reported in a single pass."""
+        counts = AhoCorasick(["melhor", "melhor do brasil", "do"]).count("o melhor do brasil e do mundo")
+        assert counts == {"melhor": 1, "melhor do brasil": 1, "do": 3}
+
+
+@pytest.mark.unit
+@pytest.mark.utils
+class TestTextDocument:
+    """Test document construction and cached metrics."""
+
+    def setup_method(self):
+        self.analyzer = TextAnalyzer({
+            "cta": ["Compre", "clique"],
+            "prohibited": ["milagroso", "cura"],
+        })
+
+    def test_dictionary_groups_and_keywords(self):
+        """Groups and keywords are matched case-insensitively as substrings."""
+        doc = self.analyzer.analyze("Produto MILAGROSO, compre já! Smartphone smartphone", ["smartphone", "tablet"])
+        assert doc.matched("prohibited") == ["milagroso"]
+        assert doc.any("cta")
+        assert doc.keywords_found == ["smartphone"]
+        assert doc.keyword_occurrences == 2
+        assert doc.count("SMARTPHONE") == 2
+        assert doc.word_count == 6
+
+    def test_documents_are_reused(self):
+        """The same text and keywords return the cached document."""
+        first = self.analyzer.analyze("texto de teste", ["teste"])
+        assert self.analyzer.analyze("texto de teste", ["teste"]) is first
+        assert self.analyzer.analyze(first) is first
+        other = self.analyzer.analyze(first, ["texto"])
+        assert isinstance(other, TextDocument) and other is not first
+        assert other.keywords_found == ["texto"]
+
+    @pytest.mark.parametrize("text", [
+        "Este é um texto simples e fácil de ler.",
+        "Smartphone Android moderno com excelente qualidade. Compre agora! Oferta única?",
+        "word",
+        "",
+    ])
+    def test_flesch_matches_textstat(self, text):
+        """Readability from cached syllables equals textstat's result."""
+        assert self.analyzer.analyze(text).flesch_reading_ease == textstat.flesch_reading_ease(text)
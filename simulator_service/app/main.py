@@ -1,8 +1,8 @@
 from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
 import random
 from typing import Dict, Any, List, Optional
 import logging
@@ -10,17 +10,26 @@ import json
 import os
 from datetime import datetime, timedelta
 import httpx
-import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import plotly.express as px
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
 import io
 import base64
+import asyncio
+import numpy as np
+
+try:
+    from .simulation import (
+        HistoricalDataCache, HistoricalSeries, fallback_series, response_curve, simulate_scenarios
+    )
+    from .monte_carlo import fit_rate_distributions, percentile_bands, run_monte_carlo, summarize
+    from .reports import ReportRenderer, render_csv, render_pdf, report_rows
+except ImportError:  # run from the app directory (uvicorn main:app)
+    from simulation import (
+        HistoricalDataCache, HistoricalSeries, fallback_series, response_curve, simulate_scenarios
+    )
+    from monte_carlo import fit_rate_distributions, percentile_bands, run_monte_carlo, summarize
+    from reports import ReportRenderer, render_csv, render_pdf, report_rows
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -114,10 +123,24 @@ class CampaignSimulationResponse(BaseModel):
     roi_percentage: float
     recommendations: list[str]
 
+class MonteCarloSimulationRequest(CampaignSimulationRequest):
+    draws: int = Field(default=10_000, ge=100, le=100_000)
+    seed: Optional[int] = None
+    period_days: int = Field(default=30, ge=1, le=365)
+
+class MonteCarloSimulationResponse(BaseModel):
+    category_id: str
+    draws: int
+    seed: Optional[int] = None
+    percentiles: Dict[str, Dict[str, float]]  # metric -> mean, p5 ... p95
+    probability_of_profit: float
+
 class ABTestRequest(BaseModel):
     test_name: str
     variations: List[CampaignSimulationRequest]
     traffic_split: List[float]  # Percentages for each variation
+    draws: int = Field(default=10_000, ge=100, le=100_000)  # Monte Carlo scenarios per variation
+    seed: Optional[int] = None
 
 class ABTestResponse(BaseModel):
     test_id: str
@@ -126,6 +149,8 @@ class ABTestResponse(BaseModel):
     winner_variation: int
     confidence_level: float
     estimated_lift: float
+    win_probabilities: List[float] = []
+    percentiles: List[Dict[str, Dict[str, float]]] = []
 
 class ReportRequest(BaseModel):
     campaign_ids: List[str]
@@ -144,70 +169,89 @@ class HistoricalData(BaseModel):
     spend: float
     category: str
 
+class ScenarioSweepRequest(BaseModel):
+    category: str
+    budgets: List[float] = Field(..., min_length=1, max_length=1000)
+    keyword_counts: List[int] = Field(default=[0], min_length=1, max_length=50)
+    duration_days: List[int] = Field(default=[30], min_length=1, max_length=365)
+    period_days: int = Field(default=30, ge=1, le=365)
+
+class ScenarioSweepResponse(BaseModel):
+    category_id: str
+    period_days: int
+    historical_rates: Dict[str, float]
+    points: List[Dict[str, Any]]
+
 # In-memory storage for demo (in production, use database)
 campaign_results = {}
 ab_tests = {}
-historical_data_cache = {}
+historical_data_cache = HistoricalDataCache(
+    ttl_seconds=float(os.getenv("HISTORICAL_CACHE_TTL_SECONDS", "900")),
+    max_entries=int(os.getenv("HISTORICAL_CACHE_MAX_ENTRIES", "256"))
+)
 
-async def get_mercadolibre_historical_data(category_id: str, period_days: int = 30) -> List[HistoricalData]:
+MAX_SWEEP_POINTS = 100_000
+
+# PDF rendering runs in a process pool; rendered reports are cached by content
+report_renderer = ReportRenderer(
+    max_workers=int(os.getenv("REPORT_WORKERS", "2")),
+    cache_max_bytes=int(os.getenv("REPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+)
+
+CATEGORY_MULTIPLIERS = {
+    "MLB1051": {"impressions": 1000, "clicks": 50, "conversions": 2},  # Electronics
+    "MLB1430": {"impressions": 800, "clicks": 40, "conversions": 1.5},   # Clothing
+    "MLB1574": {"impressions": 600, "clicks": 30, "conversions": 1},     # Home
+    "MLB1196": {"impressions": 400, "clicks": 20, "conversions": 0.8},   # Books
+    "MLB1276": {"impressions": 900, "clicks": 45, "conversions": 1.8}    # Sports
+}
+
+async def fetch_mercadolibre_historical_series(category_id: str, period_days: int, end_date: np.datetime64) -> HistoricalSeries:
     """
     Fetch historical data from Mercado Livre API (simulated for demo)
     In production, this would use real ML API endpoints
     """
+    # Simulate API call to Mercado Livre
+    # Real implementation would use: https://api.mercadolibre.com/categories/{category_id}/trends
+    logger.info(f"Fetching ML historical data for category {category_id}")
+
+    multiplier = CATEGORY_MULTIPLIERS.get(category_id, {"impressions": 700, "clicks": 35, "conversions": 1.2})
+    rng = np.random.default_rng()
+
+    days = np.arange(period_days)
+    dates = end_date - period_days + days
+    # Seasonal trend and lower weekend performance (1970-01-01 was a Thursday)
+    seasonal_factor = 1 + 0.3 * np.sin(days * 0.1)
+    weekend_factor = np.where((dates.astype(np.int64) + 3) % 7 >= 5, 0.7, 1.0)
+    base = seasonal_factor * weekend_factor
+
+    impressions = (multiplier["impressions"] * base * rng.uniform(0.8, 1.2, period_days)).astype(np.int64)
+    clicks = (multiplier["clicks"] * base * rng.uniform(0.8, 1.2, period_days)).astype(np.int64)
+    conversions = (multiplier["conversions"] * base * rng.uniform(0.8, 1.2, period_days)).astype(np.int64)
+    spend = np.round(clicks * rng.uniform(1.5, 3.0, period_days), 2)  # Variable CPC
+
+    return HistoricalSeries(category_id, dates, impressions, clicks, conversions, spend)
+
+async def get_historical_series(category_id: str, period_days: int = 30) -> HistoricalSeries:
+    """
+    Historical series of a category, served from the TTL cache; the window
+    ends today, so the cache key includes the current date
+    """
     try:
-        # Simulate API call to Mercado Livre
-        # Real implementation would use: https://api.mercadolibre.com/categories/{category_id}/trends
-        logger.info(f"Fetching ML historical data for category {category_id}")
-        
-        # Generate realistic historical data based on category
-        historical_data = []
-        base_date = datetime.now() - timedelta(days=period_days)
-        
-        category_multipliers = {
-            "MLB1051": {"impressions": 1000, "clicks": 50, "conversions": 2},  # Electronics
-            "MLB1430": {"impressions": 800, "clicks": 40, "conversions": 1.5},   # Clothing
-            "MLB1574": {"impressions": 600, "clicks": 30, "conversions": 1},     # Home
-            "MLB1196": {"impressions": 400, "clicks": 20, "conversions": 0.8},   # Books
-            "MLB1276": {"impressions": 900, "clicks": 45, "conversions": 1.8}    # Sports
-        }
-        
-        multiplier = category_multipliers.get(category_id, {"impressions": 700, "clicks": 35, "conversions": 1.2})
-        
-        for i in range(period_days):
-            date = base_date + timedelta(days=i)
-            # Add some randomness and seasonal patterns
-            seasonal_factor = 1 + 0.3 * random.sin(i * 0.1)  # Simulate seasonal trends
-            weekend_factor = 0.7 if date.weekday() >= 5 else 1.0  # Lower weekend performance
-            
-            impressions = int(multiplier["impressions"] * seasonal_factor * weekend_factor * random.uniform(0.8, 1.2))
-            clicks = int(multiplier["clicks"] * seasonal_factor * weekend_factor * random.uniform(0.8, 1.2))
-            conversions = int(multiplier["conversions"] * seasonal_factor * weekend_factor * random.uniform(0.8, 1.2))
-            spend = clicks * random.uniform(1.5, 3.0)  # Variable CPC
-            
-            historical_data.append(HistoricalData(
-                date=date.strftime("%Y-%m-%d"),
-                impressions=impressions,
-                clicks=clicks,
-                conversions=conversions,
-                spend=round(spend, 2),
-                category=category_id
-            ))
-        
-        # Cache the results
-        historical_data_cache[f"{category_id}_{period_days}"] = historical_data
-        return historical_data
-        
+        today = np.datetime64(datetime.now().strftime("%Y-%m-%d"), "D")
+        return await historical_data_cache.get_or_load(
+            (category_id, period_days, str(today)),
+            lambda: fetch_mercadolibre_historical_series(category_id, period_days, today)
+        )
     except Exception as e:
         logger.error(f"Error fetching ML historical data: {e}")
         # Return fallback data
-        return [HistoricalData(
-            date=datetime.now().strftime("%Y-%m-%d"),
-            impressions=1000,
-            clicks=50,
-            conversions=2,
-            spend=100.0,
-            category=category_id
-        )]
+        return fallback_series(category_id)
+
+async def get_mercadolibre_historical_data(category_id: str, period_days: int = 30) -> List[HistoricalData]:
+    """Historical data of a category as ``HistoricalData`` records"""
+    series = await get_historical_series(category_id, period_days)
+    return [HistoricalData(**record) for record in series.to_records()]
 
 def get_category_id_from_name(category_name: str) -> str:
     """Map category names to Mercado Livre category IDs"""
@@ -222,72 +266,11 @@ def get_category_id_from_name(category_name: str) -> str:
 
 def generate_pdf_report(campaign_ids: List[str], include_charts: bool = True) -> bytes:
     """Generate PDF report for campaigns"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    title = Paragraph("Campaign Performance Report", styles['Title'])
-    elements.append(title)
-    elements.append(Spacer(1, 12))
-    
-    # Generate report for each campaign
-    for campaign_id in campaign_ids:
-        if campaign_id in campaign_results:
-            result = campaign_results[campaign_id]
-            
-            # Campaign summary
-            campaign_title = Paragraph(f"Campaign: {campaign_id}", styles['Heading2'])
-            elements.append(campaign_title)
-            
-            # Data table
-            data = [
-                ['Metric', 'Value'],
-                ['Estimated Reach', f"{result['estimated_reach']:,}"],
-                ['Estimated Clicks', f"{result['estimated_clicks']:,}"],
-                ['Estimated Conversions', f"{result['estimated_conversions']:,}"],
-                ['Estimated Revenue', f"R$ {result['estimated_revenue']:,.2f}"],
-                ['Cost Per Click', f"R$ {result['cost_per_click']:.2f}"],
-                ['ROI Percentage', f"{result['roi_percentage']:.1f}%"]
-            ]
-            
-            table = Table(data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 14),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(table)
-            elements.append(Spacer(1, 12))
-    
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer.getvalue()
+    return render_pdf(report_rows(campaign_ids, campaign_results), include_charts)
 
 def generate_csv_report(campaign_ids: List[str]) -> str:
     """Generate CSV report for campaigns"""
-    data = []
-    for campaign_id in campaign_ids:
-        if campaign_id in campaign_results:
-            result = campaign_results[campaign_id]
-            data.append({
-                'Campaign ID': campaign_id,
-                'Estimated Reach': result['estimated_reach'],
-                'Estimated Clicks': result['estimated_clicks'],
-                'Estimated Conversions': result['estimated_conversions'],
-                'Estimated Revenue': result['estimated_revenue'],
-                'Cost Per Click': result['cost_per_click'],
-                'ROI Percentage': result['roi_percentage']
-            })
-    
-    df = pd.DataFrame(data)
-    return df.to_csv(index=False)
+    return render_csv(report_rows(campaign_ids, campaign_results))
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -301,90 +284,119 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "simulator_service"}
+    return {
+        "status": "healthy",
+        "service": "simulator_service",
+        "historical_cache": historical_data_cache.get_stats(),
+        "report_cache": report_renderer.cache.get_stats()
+    }
 
-@app.post("/api/simulate", response_model=CampaignSimulationResponse, tags=["Simulation"])
-async def simulate_campaign(request: CampaignSimulationRequest) -> CampaignSimulationResponse:
-    """
-    Simulate a campaign for Mercado Libre based on input parameters and historical data
-    """
-    logger.info(f"Simulating campaign for product: {request.product_name}")
-    
-    # Generate campaign ID
-    campaign_id = f"CAMP_{random.randint(100000, 999999)}"
-    
-    # Get historical data from Mercado Libre API
-    category_id = get_category_id_from_name(request.category)
-    historical_data = await get_mercadolibre_historical_data(category_id, 30)
-    
-    # Calculate averages from historical data for more realistic estimates
-    if historical_data:
-        avg_ctr = sum(h.clicks / max(h.impressions, 1) for h in historical_data) / len(historical_data)
-        avg_conversion_rate = sum(h.conversions / max(h.clicks, 1) for h in historical_data) / len(historical_data)
-        avg_cpc = sum(h.spend / max(h.clicks, 1) for h in historical_data) / len(historical_data)
-    else:
-        avg_ctr = 0.05
-        avg_conversion_rate = 0.03
-        avg_cpc = 2.0
-    
-    # Calculate estimates based on budget and historical performance
-    estimated_clicks = int(request.budget / avg_cpc)
-    estimated_reach = int(estimated_clicks / avg_ctr)
-    estimated_conversions = int(estimated_clicks * avg_conversion_rate)
-    
-    # Add some variance and keyword optimization
-    keyword_boost = min(len(request.keywords) * 0.1, 0.3)  # Up to 30% boost for good keywords
-    duration_factor = min(request.duration_days / 30, 1.0)  # Longer campaigns get better performance
-    
-    estimated_reach = int(estimated_reach * (1 + keyword_boost) * duration_factor)
-    estimated_clicks = int(estimated_clicks * (1 + keyword_boost))
-    estimated_conversions = int(estimated_conversions * (1 + keyword_boost))
-    
-    # Calculate revenue estimates
-    avg_order_value = request.budget / max(1, estimated_conversions) * random.uniform(3, 6)
-    estimated_revenue = estimated_conversions * avg_order_value
-    
-    cost_per_click = request.budget / max(1, estimated_clicks)
-    roi_percentage = ((estimated_revenue - request.budget) / request.budget) * 100
-    
-    # Generate intelligent recommendations based on data
+@app.on_event("shutdown")
+async def shutdown_event():
+    report_renderer.shutdown()
+
+def build_recommendations(request: CampaignSimulationRequest, roi_percentage: float, cost_per_click: float,
+                          rates: Dict[str, float]) -> List[str]:
+    """Generate intelligent recommendations based on data"""
     recommendations = []
     if roi_percentage < 50:
         recommendations.append("Consider adjusting keywords for better targeting based on historical performance")
-    if cost_per_click > avg_cpc * 1.5:
+    if cost_per_click > rates["cpc"] * 1.5:
         recommendations.append("Budget allocation could be optimized for lower CPC based on market data")
     if len(request.keywords) < 5:
         recommendations.append("Adding more relevant keywords could improve reach by up to 30%")
     if request.duration_days < 7:
         recommendations.append("Consider extending campaign duration - longer campaigns show 20% better performance")
     
-    recommendations.append(f"Category '{request.category}' shows {avg_ctr*100:.1f}% avg CTR in recent data")
-    recommendations.append(f"Historical conversion rate for this category: {avg_conversion_rate*100:.1f}%")
-    
-    # Store results for reporting
-    result_data = {
-        "campaign_id": campaign_id,
-        "estimated_reach": estimated_reach,
-        "estimated_clicks": estimated_clicks,
-        "estimated_conversions": estimated_conversions,
-        "estimated_revenue": round(estimated_revenue, 2),
-        "cost_per_click": round(cost_per_click, 2),
-        "roi_percentage": round(roi_percentage, 2),
-        "recommendations": recommendations,
+    recommendations.append(f"Category '{request.category}' shows {rates['ctr']*100:.1f}% avg CTR in recent data")
+    recommendations.append(f"Historical conversion rate for this category: {rates['conversion_rate']*100:.1f}%")
+    return recommendations
+
+def store_campaign_result(request: CampaignSimulationRequest, metrics: Dict[str, float],
+                          rates: Dict[str, float]) -> CampaignSimulationResponse:
+    """Build the simulation response and store it for reporting"""
+    campaign_id = f"CAMP_{random.randint(100000, 999999)}"
+    response = CampaignSimulationResponse(
+        campaign_id=campaign_id,
+        estimated_reach=int(metrics["estimated_reach"]),
+        estimated_clicks=int(metrics["estimated_clicks"]),
+        estimated_conversions=int(metrics["estimated_conversions"]),
+        estimated_revenue=round(float(metrics["estimated_revenue"]), 2),
+        cost_per_click=round(float(metrics["cost_per_click"]), 2),
+        roi_percentage=round(float(metrics["roi_percentage"]), 2),
+        recommendations=build_recommendations(
+            request, float(metrics["roi_percentage"]), float(metrics["cost_per_click"]), rates
+        )
+    )
+    campaign_results[campaign_id] = {
+        **response.dict(),
         "created_at": datetime.now().isoformat(),
         "request_data": request.dict()
     }
-    campaign_results[campaign_id] = result_data
+    return response
+
+@app.post("/api/simulate", response_model=CampaignSimulationResponse, tags=["Simulation"])
+async def simulate_campaign(request: CampaignSimulationRequest) -> CampaignSimulationResponse:
+    """
+    Simulate a campaign for Mercado Libre based on input parameters and historical data
+    """
+    logger.info(f"Simulating campaign for product: {request.product_name}")
     
-    return CampaignSimulationResponse(
-        campaign_id=campaign_id,
-        estimated_reach=estimated_reach,
-        estimated_clicks=estimated_clicks,
-        estimated_conversions=estimated_conversions,
-        estimated_revenue=round(estimated_revenue, 2),
-        cost_per_click=round(cost_per_click, 2),
-        roi_percentage=round(roi_percentage, 2),
-        recommendations=recommendations
+    # Get historical data from Mercado Libre API
+    category_id = get_category_id_from_name(request.category)
+    series = await get_historical_series(category_id, 30)
+
+    # Averages of the daily rates drive the estimates; budget, keyword boost
+    # (up to 30%) and duration factor are applied by the vectorized kernel
+    rates = series.average_rates()
+    scenario = simulate_scenarios(
+        rates, request.budget, len(request.keywords), request.duration_days,
+        order_value_multiplier=random.uniform(3, 6)
+    )
+    return store_campaign_result(request, scenario, rates)
+
+@app.post("/api/simulate/monte-carlo", response_model=MonteCarloSimulationResponse, tags=["Simulation"])
+async def simulate_campaign_monte_carlo(request: MonteCarloSimulationRequest) -> MonteCarloSimulationResponse:
+    """
+    Forecast a campaign from thousands of scenarios drawn from distributions
+    fitted to the category's historical data, with percentile bands
+    """
+    category_id = get_category_id_from_name(request.category)
+    series = await get_historical_series(category_id, request.period_days)
+    results = run_monte_carlo(
+        [fit_rate_distributions(series)], [request.budget], [len(request.keywords)], [request.duration_days],
+        draws=request.draws, seed=request.seed
+    )
+    return MonteCarloSimulationResponse(
+        category_id=category_id,
+        draws=request.draws,
+        seed=request.seed,
+        percentiles=percentile_bands(results)[0],
+        probability_of_profit=round(float((results["roi_percentage"][0] > 0).mean()), 4)
+    )
+
+@app.post("/api/simulate/sweep", response_model=ScenarioSweepResponse, tags=["Simulation"])
+async def simulate_sweep(request: ScenarioSweepRequest) -> ScenarioSweepResponse:
+    """
+    Evaluate every budget x keyword count x duration combination in one
+    vectorized pass and return the full response curve
+    """
+    grid_size = len(request.budgets) * len(request.keyword_counts) * len(request.duration_days)
+    if grid_size > MAX_SWEEP_POINTS:
+        raise HTTPException(status_code=400, detail=f"Sweep too large: {grid_size} points (max {MAX_SWEEP_POINTS})")
+    if min(request.budgets) <= 0:
+        raise HTTPException(status_code=400, detail="Budgets must be positive")
+
+    category_id = get_category_id_from_name(request.category)
+    series = await get_historical_series(category_id, request.period_days)
+    rates = series.average_rates()
+    points = response_curve(rates, request.budgets, request.keyword_counts, request.duration_days)
+
+    return ScenarioSweepResponse(
+        category_id=category_id,
+        period_days=request.period_days,
+        historical_rates={name: round(value, 6) for name, value in rates.items()},
+        points=points
     )
 
 @app.get("/api/simulation/{campaign_id}", tags=["Simulation"])
@@ -402,7 +414,8 @@ async def get_simulation_results(campaign_id: str):
 @app.post("/api/ab-test", response_model=ABTestResponse, tags=["A/B Testing"])
 async def create_ab_test(request: ABTestRequest) -> ABTestResponse:
     """
-    Create A/B test for multiple campaign variations
+    Create A/B test for multiple campaign variations, compared by Monte Carlo
+    win probability on ROI
     """
     if len(request.variations) < 2:
         raise HTTPException(status_code=400, detail="At least 2 variations required for A/B test")
@@ -416,35 +429,41 @@ async def create_ab_test(request: ABTestRequest) -> ABTestResponse:
     test_id = f"ABT_{random.randint(100000, 999999)}"
     logger.info(f"Creating A/B test: {test_id} with {len(request.variations)} variations")
     
-    # Simulate each variation
+    # Fit each category once, then draw every variation in one vectorized pass
+    category_ids = [get_category_id_from_name(v.category) for v in request.variations]
+    unique_ids = list(dict.fromkeys(category_ids))
+    series = await asyncio.gather(*(get_historical_series(cid, 30) for cid in unique_ids))
+    series_by_category = dict(zip(unique_ids, series))
+    distributions_by_category = {cid: fit_rate_distributions(s) for cid, s in series_by_category.items()}
+
+    results = run_monte_carlo(
+        [distributions_by_category[cid] for cid in category_ids],
+        [v.budget for v in request.variations],
+        [len(v.keywords) for v in request.variations],
+        [v.duration_days for v in request.variations],
+        draws=request.draws,
+        seed=request.seed
+    )
+    summary = summarize(results)
+    win_probabilities = summary["win_probabilities"]
+
+    # Each variation is reported at its median scenario, scaled by its traffic share
     variations_results = []
-    performance_scores = []
-    
     for i, variation in enumerate(request.variations):
-        # Add some randomness to simulate A/B test variance
-        variation_result = await simulate_campaign(variation)
-        
-        # Adjust results based on traffic split
+        median = {metric: band["p50"] for metric, band in summary["percentiles"][i].items()}
         traffic_factor = request.traffic_split[i] / 100
-        variation_result.estimated_reach = int(variation_result.estimated_reach * traffic_factor)
-        variation_result.estimated_clicks = int(variation_result.estimated_clicks * traffic_factor)
-        variation_result.estimated_conversions = int(variation_result.estimated_conversions * traffic_factor)
-        variation_result.estimated_revenue = variation_result.estimated_revenue * traffic_factor
-        
-        variations_results.append(variation_result)
-        
-        # Calculate performance score for comparison
-        score = variation_result.roi_percentage
-        performance_scores.append(score)
-    
-    # Determine winner
-    winner_variation = performance_scores.index(max(performance_scores))
-    best_score = max(performance_scores)
-    second_best_score = sorted(performance_scores, reverse=True)[1] if len(performance_scores) > 1 else 0
-    
-    # Calculate confidence level and lift
-    confidence_level = min(95, 50 + (best_score - second_best_score) * 2)  # Simplified confidence calculation
-    estimated_lift = ((best_score - second_best_score) / second_best_score * 100) if second_best_score > 0 else 0
+        for metric in ("estimated_reach", "estimated_clicks", "estimated_conversions", "estimated_revenue"):
+            median[metric] *= traffic_factor
+        variations_results.append(store_campaign_result(
+            variation, median, series_by_category[category_ids[i]].average_rates()
+        ))
+
+    # Winner is the variation most likely to have the best ROI
+    winner_variation = int(np.argmax(win_probabilities))
+    confidence_level = win_probabilities[winner_variation] * 100
+    median_roi = [band["roi_percentage"]["p50"] for band in summary["percentiles"]]
+    runner_up = max(roi for i, roi in enumerate(median_roi) if i != winner_variation)
+    estimated_lift = ((median_roi[winner_variation] - runner_up) / abs(runner_up) * 100) if runner_up else 0
     
     # Store A/B test results
     ab_test_data = {
@@ -456,6 +475,10 @@ async def create_ab_test(request: ABTestRequest) -> ABTestResponse:
         "winner_variation": winner_variation,
         "confidence_level": confidence_level,
         "estimated_lift": estimated_lift,
+        "win_probabilities": win_probabilities,
+        "percentiles": summary["percentiles"],
+        "draws": request.draws,
+        "seed": request.seed,
         "created_at": datetime.now().isoformat()
     }
     ab_tests[test_id] = ab_test_data
@@ -466,7 +489,9 @@ async def create_ab_test(request: ABTestRequest) -> ABTestResponse:
         variations_results=variations_results,
         winner_variation=winner_variation,
         confidence_level=round(confidence_level, 1),
-        estimated_lift=round(estimated_lift, 2)
+        estimated_lift=round(estimated_lift, 2),
+        win_probabilities=win_probabilities,
+        percentiles=summary["percentiles"]
     )
 
 @app.get("/api/ab-test/{test_id}", tags=["A/B Testing"])
@@ -490,24 +515,26 @@ async def generate_report(request: ReportRequest):
     if missing_campaigns:
         raise HTTPException(status_code=404, detail=f"Campaigns not found: {missing_campaigns}")
     
-    if request.format.lower() == "pdf":
-        pdf_content = generate_pdf_report(request.campaign_ids, request.include_charts)
+    report_format = request.format.lower()
+    if report_format not in ("pdf", "csv"):
+        raise HTTPException(status_code=400, detail="Unsupported format. Use 'pdf' or 'csv'")
+    
+    rows = report_rows(request.campaign_ids, campaign_results)
+    
+    if report_format == "pdf":
+        pdf_content = await report_renderer.pdf(rows, request.include_charts)
         return Response(
             content=pdf_content,
             media_type="application/pdf",
             headers={"Content-Disposition": "attachment; filename=campaign_report.pdf"}
         )
     
-    elif request.format.lower() == "csv":
-        csv_content = generate_csv_report(request.campaign_ids)
-        return Response(
-            content=csv_content,
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=campaign_report.csv"}
-        )
-    
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported format. Use 'pdf' or 'csv'")
+    # Rows are written as they are sent; the iterator runs in the threadpool
+    return StreamingResponse(
+        report_renderer.csv(rows),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=campaign_report.csv"}
+    )
 
 @app.get("/api/historical-data/{category_id}", tags=["Analytics"])
 async def get_historical_data(category_id: str, period_days: int = 30):
@@ -515,13 +542,13 @@ async def get_historical_data(category_id: str, period_days: int = 30):
     Get historical performance data from Mercado Livre for a specific category
     """
     try:
-        historical_data = await get_mercadolibre_historical_data(category_id, period_days)
+        series = await get_historical_series(category_id, period_days)
         
         # Calculate summary statistics
-        total_impressions = sum(h.impressions for h in historical_data)
-        total_clicks = sum(h.clicks for h in historical_data)
-        total_conversions = sum(h.conversions for h in historical_data)
-        total_spend = sum(h.spend for h in historical_data)
+        total_impressions = int(series.impressions.sum())
+        total_clicks = int(series.clicks.sum())
+        total_conversions = int(series.conversions.sum())
+        total_spend = float(series.spend.sum())
         
         avg_ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
         avg_conversion_rate = (total_conversions / total_clicks * 100) if total_clicks > 0 else 0
@@ -530,7 +557,7 @@ async def get_historical_data(category_id: str, period_days: int = 30):
         return {
             "category_id": category_id,
             "period_days": period_days,
-            "data": [h.dict() for h in historical_data],
+            "data": series.to_records(),
             "summary": {
                 "total_impressions": total_impressions,
                 "total_clicks": total_clicks,
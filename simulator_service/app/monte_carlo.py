@@ -0,0 +1,161 @@
+"""
+Monte Carlo campaign forecasts.
+
+Daily CTR and conversion rate of a category's historical series are fitted
+with Beta distributions (method of moments) and daily CPC with a log-normal.
+Each draw samples a rate triple and an order value and runs it through the
+vectorized simulation kernel; all variations and all draws of a request are
+evaluated together as one ``(variations, draws)`` array, from a seeded
+``np.random.Generator``.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .simulation import DEFAULT_CPC, HistoricalSeries, simulate_scenarios
+except ImportError:  # run from the app directory (uvicorn main:app)
+    from simulation import DEFAULT_CPC, HistoricalSeries, simulate_scenarios
+
+DEFAULT_DRAWS = 10_000
+PERCENTILES = (5, 25, 50, 75, 95)
+BAND_METRICS = (
+    "estimated_reach", "estimated_clicks", "estimated_conversions",
+    "estimated_revenue", "cost_per_click", "roi_percentage",
+)
+
+# Dispersion used when the history is too short to estimate one
+DEFAULT_RATE_CONCENTRATION = 200.0
+DEFAULT_CPC_LOG_SIGMA = 0.15
+ORDER_VALUE_MULTIPLIER_RANGE = (3.0, 6.0)
+_RATE_EPSILON = 1e-6
+
+
+@dataclass(frozen=True)
+class RateDistributions:
+    """Distributions of the daily rates of one category"""
+    ctr_alpha: float
+    ctr_beta: float
+    conversion_alpha: float
+    conversion_beta: float
+    cpc_log_mean: float
+    cpc_log_sigma: float
+
+    @property
+    def mean_ctr(self) -> float:
+        return self.ctr_alpha / (self.ctr_alpha + self.ctr_beta)
+
+    @property
+    def mean_conversion_rate(self) -> float:
+        return self.conversion_alpha / (self.conversion_alpha + self.conversion_beta)
+
+    @property
+    def mean_cpc(self) -> float:
+        return float(np.exp(self.cpc_log_mean + self.cpc_log_sigma ** 2 / 2))
+
+
+def _fit_beta(values: np.ndarray, fallback_mean: float) -> tuple:
+    """Beta parameters matching the mean and variance of ``values``"""
+    mean = float(values.mean()) if len(values) else fallback_mean
+    mean = min(max(mean, _RATE_EPSILON), 1 - _RATE_EPSILON)
+    variance = float(values.var(ddof=1)) if len(values) > 1 else 0.0
+    if 0 < variance < mean * (1 - mean):
+        concentration = mean * (1 - mean) / variance - 1
+    else:
+        concentration = DEFAULT_RATE_CONCENTRATION
+    return mean * concentration, (1 - mean) * concentration
+
+
+def fit_rate_distributions(series: HistoricalSeries) -> RateDistributions:
+    """Fit the rate distributions to a historical series"""
+    rates = series.average_rates()
+    ctr_alpha, ctr_beta = _fit_beta(series.daily_ctr, rates["ctr"])
+    conversion_alpha, conversion_beta = _fit_beta(series.daily_conversion_rate, rates["conversion_rate"])
+
+    cpc = series.daily_cpc
+    cpc = cpc[cpc > 0]
+    mean_cpc = float(cpc.mean()) if len(cpc) else DEFAULT_CPC
+    log_sigma = float(np.log(cpc).std(ddof=1)) if len(cpc) > 1 else 0.0
+    log_sigma = log_sigma or DEFAULT_CPC_LOG_SIGMA
+    # Log-mean chosen so the distribution mean equals the historical mean CPC
+    log_mean = float(np.log(mean_cpc)) - log_sigma ** 2 / 2
+
+    return RateDistributions(ctr_alpha, ctr_beta, conversion_alpha, conversion_beta, log_mean, log_sigma)
+
+
+def _column(values: Sequence[float]) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)[:, None]
+
+
+def run_monte_carlo(distributions: Sequence[RateDistributions],
+                    budgets: Sequence[float],
+                    keyword_counts: Sequence[int],
+                    duration_days: Sequence[int],
+                    draws: int = DEFAULT_DRAWS,
+                    seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Draw ``draws`` scenarios for each variation in one vectorized pass.
+
+    Revenue is conversions times an order value drawn per scenario: the
+    category's mean CPC per conversion times a 3x-6x multiplier, so revenue
+    follows the simulated conversions. Every output array has shape
+    ``(variations, draws)``.
+    """
+    rng = np.random.default_rng(seed)
+    variations = len(distributions)
+    shape = (variations, draws)
+
+    ctr = rng.beta(_column([d.ctr_alpha for d in distributions]), _column([d.ctr_beta for d in distributions]), shape)
+    conversion_rate = rng.beta(
+        _column([d.conversion_alpha for d in distributions]),
+        _column([d.conversion_beta for d in distributions]),
+        shape
+    )
+    cpc = rng.lognormal(
+        _column([d.cpc_log_mean for d in distributions]), _column([d.cpc_log_sigma for d in distributions]), shape
+    )
+    multiplier = rng.uniform(*ORDER_VALUE_MULTIPLIER_RANGE, size=shape)
+    cost_per_conversion = _column([d.mean_cpc / d.mean_conversion_rate for d in distributions])
+
+    ctr = np.maximum(ctr, _RATE_EPSILON)
+    return simulate_scenarios(
+        {"ctr": ctr, "conversion_rate": conversion_rate, "cpc": cpc},
+        _column(budgets),
+        _column(keyword_counts),
+        _column(duration_days),
+        average_order_value=cost_per_conversion * multiplier
+    )
+
+
+def percentile_bands(results: Dict[str, np.ndarray]) -> List[Dict[str, Dict[str, float]]]:
+    """Mean and percentiles of every metric, one dict per variation"""
+    bands = [{} for _ in range(results["estimated_revenue"].shape[0])]
+    for metric in BAND_METRICS:
+        values = results[metric]
+        quantiles = np.percentile(values, PERCENTILES, axis=1)
+        means = values.mean(axis=1)
+        for index, band in enumerate(bands):
+            band[metric] = {"mean": round(float(means[index]), 2)}
+            band[metric].update({
+                f"p{p}": round(float(quantiles[i, index]), 2) for i, p in enumerate(PERCENTILES)
+            })
+    return bands
+
+
+def win_probabilities(results: Dict[str, np.ndarray], metric: str = "roi_percentage") -> np.ndarray:
+    """Share of draws in which each variation has the best ``metric``"""
+    values = results[metric]
+    best = values.max(axis=0)
+    is_best = values == best
+    # Ties split the win evenly
+    wins = (is_best / is_best.sum(axis=0)).sum(axis=1)
+    return wins / values.shape[1]
+
+
+def summarize(results: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Percentile bands and win probabilities of a Monte Carlo run"""
+    return {
+        "percentiles": percentile_bands(results),
+        "win_probabilities": [round(float(p), 4) for p in win_probabilities(results)],
+    }
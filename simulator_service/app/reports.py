@@ -0,0 +1,212 @@
+"""
+Report rendering service for campaign exports.
+
+PDFs are rendered in a process pool, so a large portfolio never blocks the
+event loop, and CSVs are written row by row with the ``csv`` module. Rendered
+artifacts are kept in an LRU cache bounded by size and keyed by format,
+options and a fingerprint of the report rows. The fingerprint changes
+whenever any campaign result changes, so the cache never serves a stale
+report. Concurrent requests for the same report share one render.
+"""
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Sequence
+
+try:
+    from .single_flight import SingleFlight
+except ImportError:  # run from the app directory (uvicorn main:app)
+    from single_flight import SingleFlight
+
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CSV_FLUSH_ROWS = 200
+
+# CSV header -> campaign result field
+REPORT_COLUMNS = (
+    ("Campaign ID", "campaign_id"),
+    ("Estimated Reach", "estimated_reach"),
+    ("Estimated Clicks", "estimated_clicks"),
+    ("Estimated Conversions", "estimated_conversions"),
+    ("Estimated Revenue", "estimated_revenue"),
+    ("Cost Per Click", "cost_per_click"),
+    ("ROI Percentage", "roi_percentage"),
+)
+REPORT_FIELDS = tuple(field for _, field in REPORT_COLUMNS)
+
+
+def report_rows(campaign_ids: Sequence[str], results: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Report fields of each known campaign, in request order; unknown ids are skipped"""
+    rows = []
+    for campaign_id in campaign_ids:
+        result = results.get(campaign_id)
+        if result is None:
+            continue
+        row = {field: result[field] for field in REPORT_FIELDS[1:]}
+        rows.append({"campaign_id": campaign_id, **row})
+    return rows
+
+
+def rows_fingerprint(rows: Sequence[Dict[str, Any]]) -> str:
+    """Version of a report: changes with the campaign set or any of its results"""
+    payload = json.dumps(rows, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def iter_csv(rows: Sequence[Dict[str, Any]], flush_rows: int = CSV_FLUSH_ROWS) -> Iterator[str]:
+    """CSV text in pieces of up to ``flush_rows`` rows; the header comes first even without rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow([header for header, _ in REPORT_COLUMNS])
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([row[field] for field in REPORT_FIELDS])
+        if count % flush_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def render_csv(rows: Sequence[Dict[str, Any]]) -> str:
+    return "".join(iter_csv(rows))
+
+
+def render_pdf(rows: Sequence[Dict[str, Any]], include_charts: bool = True) -> bytes:
+    """Campaign performance PDF, one summary table per campaign; runs in the pool workers"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+    elements = [Paragraph("Campaign Performance Report", styles['Title']), Spacer(1, 12)]
+    for row in rows:
+        elements.append(Paragraph(f"Campaign: {row['campaign_id']}", styles['Heading2']))
+        table = Table([
+            ['Metric', 'Value'],
+            ['Estimated Reach', f"{row['estimated_reach']:,}"],
+            ['Estimated Clicks', f"{row['estimated_clicks']:,}"],
+            ['Estimated Conversions', f"{row['estimated_conversions']:,}"],
+            ['Estimated Revenue', f"R$ {row['estimated_revenue']:,.2f}"],
+            ['Cost Per Click', f"R$ {row['cost_per_click']:.2f}"],
+            ['ROI Percentage', f"{row['roi_percentage']:.1f}%"]
+        ])
+        table.setStyle(table_style)
+        elements.append(table)
+        elements.append(Spacer(1, 12))
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+class ArtifactCache:
+    """Thread-safe LRU of rendered reports, bounded by total size in bytes"""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._artifacts: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            content = self._artifacts.get(key)
+            if content is None:
+                self.stats["misses"] += 1
+                return None
+            self._artifacts.move_to_end(key)
+            self.stats["hits"] += 1
+            return content
+
+    def put(self, key: Hashable, content: bytes):
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._artifacts.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._artifacts[key] = content
+            self._size += len(content)
+            while self._size > self.max_bytes:
+                _, evicted = self._artifacts.popitem(last=False)
+                self._size -= len(evicted)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._artifacts.clear()
+            self._size = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._artifacts), "bytes": self._size}
+
+
+class ReportRenderer:
+    """Renders reports off the event loop and caches the artifacts"""
+
+    def __init__(self, max_workers: Optional[int] = None, cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.max_workers = max_workers
+        self.cache = ArtifactCache(cache_max_bytes)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._rendering = SingleFlight()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def pdf(self, rows: Sequence[Dict[str, Any]], include_charts: bool = True) -> bytes:
+        """Cached PDF, rendered in the process pool on a miss"""
+        key = ("pdf", include_charts, rows_fingerprint(rows))
+        content = self.cache.get(key)
+        if content is not None:
+            return content
+
+        loop = asyncio.get_running_loop()
+        return await self._rendering.do(
+            key,
+            lambda: loop.run_in_executor(self._get_executor(), render_pdf, list(rows), include_charts),
+            lambda rendered: self.cache.put(key, rendered),
+        )
+
+    def csv(self, rows: Sequence[Dict[str, Any]]) -> Iterator[bytes]:
+        """
+        CSV as a byte stream: the cached artifact, or rows written as they are
+        streamed (and cached once the stream completes)
+        """
+        key = ("csv", rows_fingerprint(rows))
+        content = self.cache.get(key)
+        if content is not None:
+            yield content
+            return
+
+        pieces = []
+        for piece in iter_csv(rows):
+            encoded = piece.encode("utf-8")
+            pieces.append(encoded)
+            yield encoded
+        self.cache.put(key, b"".join(pieces))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
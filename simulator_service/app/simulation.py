@@ -0,0 +1,236 @@
+"""
+Historical series cache and vectorized campaign simulation kernel.
+
+Historical performance is kept as NumPy arrays (one per metric) in a
+read-through TTL cache keyed by category, period and day, so repeated
+simulations never regenerate or refetch the same window. The simulation
+kernel broadcasts budgets, keyword counts and durations against each other
+and evaluates a whole grid of scenarios in one call; a single ``/api/simulate``
+is just the one-point case of the same kernel.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+try:
+    from .single_flight import SingleFlight
+except ImportError:  # run from the app directory (uvicorn main:app)
+    from single_flight import SingleFlight
+
+DEFAULT_CACHE_TTL_SECONDS = 15 * 60
+DEFAULT_CACHE_MAX_ENTRIES = 256
+
+# Rates used when there is no usable history
+DEFAULT_CTR = 0.05
+DEFAULT_CONVERSION_RATE = 0.03
+DEFAULT_CPC = 2.0
+
+MAX_KEYWORD_BOOST = 0.3
+KEYWORD_BOOST_STEP = 0.1
+FULL_DURATION_DAYS = 30
+DEFAULT_ORDER_VALUE_MULTIPLIER = 4.5  # midpoint of the 3x-6x range used by /api/simulate
+
+
+@dataclass(frozen=True)
+class HistoricalSeries:
+    """Daily performance of a category, one array per metric"""
+    category_id: str
+    dates: np.ndarray        # datetime64[D]
+    impressions: np.ndarray  # int64
+    clicks: np.ndarray       # int64
+    conversions: np.ndarray  # int64
+    spend: np.ndarray        # float64
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def daily_ctr(self) -> np.ndarray:
+        return self.clicks / np.maximum(self.impressions, 1)
+
+    @property
+    def daily_conversion_rate(self) -> np.ndarray:
+        return self.conversions / np.maximum(self.clicks, 1)
+
+    @property
+    def daily_cpc(self) -> np.ndarray:
+        return self.spend / np.maximum(self.clicks, 1)
+
+    def average_rates(self) -> Dict[str, float]:
+        """Mean of the daily CTR, conversion rate and CPC"""
+        if not len(self):
+            return {"ctr": DEFAULT_CTR, "conversion_rate": DEFAULT_CONVERSION_RATE, "cpc": DEFAULT_CPC}
+        return {
+            "ctr": float(self.daily_ctr.mean()),
+            "conversion_rate": float(self.daily_conversion_rate.mean()),
+            "cpc": float(self.daily_cpc.mean()),
+        }
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """One dict per day, in the shape of the ``HistoricalData`` model"""
+        return [
+            {
+                "date": str(date),
+                "impressions": impressions,
+                "clicks": clicks,
+                "conversions": conversions,
+                "spend": spend,
+                "category": self.category_id,
+            }
+            for date, impressions, clicks, conversions, spend in zip(
+                self.dates, self.impressions.tolist(), self.clicks.tolist(),
+                self.conversions.tolist(), self.spend.tolist()
+            )
+        ]
+
+
+def fallback_series(category_id: str) -> HistoricalSeries:
+    """Single typical day, used when historical data cannot be loaded"""
+    return HistoricalSeries(
+        category_id=category_id,
+        dates=np.array([datetime.now().strftime("%Y-%m-%d")], dtype="datetime64[D]"),
+        impressions=np.array([1000], dtype=np.int64),
+        clicks=np.array([50], dtype=np.int64),
+        conversions=np.array([2], dtype=np.int64),
+        spend=np.array([100.0]),
+    )
+
+
+class HistoricalDataCache:
+    """
+    Read-through LRU cache with TTL for historical series.
+
+    Concurrent misses on the same key share one load instead of each
+    fetching the same data.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS,
+                 max_entries: int = DEFAULT_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._loading = SingleFlight()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Hashable) -> Optional[HistoricalSeries]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created_at, series = entry
+        if time.monotonic() - created_at > self.ttl_seconds:
+            del self._entries[key]
+            self.stats["evictions"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return series
+
+    def put(self, key: Hashable, series: HistoricalSeries):
+        self._entries[key] = (time.monotonic(), series)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def get_or_load(self, key: Hashable,
+                          loader: Callable[[], Awaitable[HistoricalSeries]]) -> HistoricalSeries:
+        series = self.get(key)
+        if series is not None:
+            self.stats["hits"] += 1
+            return series
+
+        if key in self._loading:
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+        return await self._loading.do(key, loader, lambda series: self.put(key, series))
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries), "ttl_seconds": self.ttl_seconds}
+
+
+def simulate_scenarios(rates: Dict[str, Any],
+                       budgets,
+                       keyword_counts=0,
+                       duration_days=FULL_DURATION_DAYS,
+                       order_value_multiplier=DEFAULT_ORDER_VALUE_MULTIPLIER,
+                       average_order_value=None) -> Dict[str, np.ndarray]:
+    """
+    Evaluate campaign scenarios from historical rates.
+
+    The rates (``ctr``, ``conversion_rate``, ``cpc``), ``budgets``,
+    ``keyword_counts``, ``duration_days`` and the order value arguments are
+    scalars or arrays that broadcast against each other; every output array
+    has the broadcast shape. Integer metrics are truncated at the same steps
+    as the single-campaign estimate.
+
+    Revenue is ``conversions * average_order_value`` when an order value is
+    given, otherwise the budget times ``order_value_multiplier`` (the
+    single-campaign estimate).
+    """
+    ctr, conversion_rate, cpc, budgets, keyword_counts, duration_days, multiplier = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (
+            rates["ctr"], rates["conversion_rate"], rates["cpc"],
+            budgets, keyword_counts, duration_days, order_value_multiplier
+        ))
+    )
+
+    base_clicks = np.trunc(budgets / cpc)
+    base_reach = np.trunc(base_clicks / ctr)
+    base_conversions = np.trunc(base_clicks * conversion_rate)
+
+    keyword_boost = np.minimum(keyword_counts * KEYWORD_BOOST_STEP, MAX_KEYWORD_BOOST)
+    duration_factor = np.minimum(duration_days / FULL_DURATION_DAYS, 1.0)
+
+    reach = np.trunc(base_reach * (1 + keyword_boost) * duration_factor)
+    clicks = np.trunc(base_clicks * (1 + keyword_boost))
+    conversions = np.trunc(base_conversions * (1 + keyword_boost))
+
+    if average_order_value is None:
+        average_order_value = budgets / np.maximum(1, conversions) * multiplier
+    revenue = conversions * average_order_value
+    cost_per_click = budgets / np.maximum(1, clicks)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi_percentage = np.where(budgets > 0, (revenue - budgets) / budgets * 100, 0.0)
+
+    return {
+        "budget": budgets,
+        "keyword_count": keyword_counts.astype(np.int64),
+        "duration_days": duration_days.astype(np.int64),
+        "estimated_reach": reach.astype(np.int64),
+        "estimated_clicks": clicks.astype(np.int64),
+        "estimated_conversions": conversions.astype(np.int64),
+        "estimated_revenue": revenue,
+        "cost_per_click": cost_per_click,
+        "roi_percentage": roi_percentage,
+    }
+
+
+def response_curve(rates: Dict[str, float],
+                   budgets: List[float],
+                   keyword_counts: List[int],
+                   duration_days: List[int],
+                   order_value_multiplier: float = DEFAULT_ORDER_VALUE_MULTIPLIER) -> List[Dict[str, Any]]:
+    """
+    Every budget x keyword count x duration combination as one flat list of
+    points, ordered by duration, then keyword count, then budget
+    """
+    grid_durations, grid_keywords, grid_budgets = np.meshgrid(
+        np.asarray(duration_days), np.asarray(keyword_counts), np.asarray(budgets), indexing="ij"
+    )
+    results = simulate_scenarios(
+        rates, grid_budgets.ravel(), grid_keywords.ravel(), grid_durations.ravel(), order_value_multiplier
+    )
+    results["estimated_revenue"] = np.round(results["estimated_revenue"], 2)
+    results["cost_per_click"] = np.round(results["cost_per_click"], 2)
+    results["roi_percentage"] = np.round(results["roi_percentage"], 2)
+
+    columns = {name: values.tolist() for name, values in results.items()}
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(columns[name] for name in names))]
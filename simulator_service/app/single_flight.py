@@ -0,0 +1,46 @@
+"""
+Single-flight loading: concurrent calls for the same key share one load.
+
+The first caller for a key runs the loader; callers that arrive while it is
+in flight await the same result (or error) instead of starting their own.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """In-flight loads keyed by cache key"""
+
+    def __init__(self):
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._pending
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                 on_result: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        Result of ``loader()``, shared with every concurrent call for ``key``.
+
+        ``on_result`` runs once with a successful result before waiters are
+        released, so a cache filled there is visible to them.
+        """
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            result = await loader()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # waiters get the error; nobody else has to retrieve it
+            raise
+        else:
+            if on_result is not None:
+                on_result(result)
+            future.set_result(result)
+            return result
+        finally:
+            del self._pending[key]
@@ -0,0 +1,154 @@
+"""
+Unit tests for the Monte Carlo forecast engine.
+"""
+import time
+import pytest
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.simulation import HistoricalSeries
+from app.monte_carlo import (
+    fit_rate_distributions,
+    percentile_bands,
+    run_monte_carlo,
+    summarize,
+    win_probabilities
+)
+
+
+def make_series(days=30, seed=0):
+    rng = np.random.default_rng(seed)
+    impressions = rng.integers(800, 1200, days)
+    clicks = (impressions * rng.uniform(0.04, 0.06, days)).astype(np.int64)
+    return HistoricalSeries(
+        category_id="MLB1051",
+        dates=np.arange(days).astype("datetime64[D]"),
+        impressions=impressions,
+        clicks=clicks,
+        conversions=(clicks * rng.uniform(0.02, 0.05, days)).astype(np.int64),
+        spend=np.round(clicks * rng.uniform(1.5, 3.0, days), 2)
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.analytics
+class TestRateDistributions:
+    """Test fitting distributions to the historical series."""
+
+    def test_fitted_means_match_history(self):
+        """Fitted distributions keep the historical average rates."""
+        series = make_series()
+        distributions = fit_rate_distributions(series)
+        rates = series.average_rates()
+
+        assert abs(distributions.mean_ctr - rates["ctr"]) < 1e-9
+        assert abs(distributions.mean_conversion_rate - rates["conversion_rate"]) < 1e-9
+        assert abs(distributions.mean_cpc - rates["cpc"]) < 1e-9
+
+    def test_single_day_uses_default_dispersion(self):
+        """A one-day history still yields valid distributions."""
+        distributions = fit_rate_distributions(make_series(days=1))
+
+        assert distributions.ctr_alpha > 0 and distributions.ctr_beta > 0
+        assert distributions.cpc_log_sigma > 0
+
+
+@pytest.mark.unit
+@pytest.mark.simulation
+class TestMonteCarlo:
+    """Test the vectorized Monte Carlo run."""
+
+    def test_seeded_runs_are_reproducible(self):
+        """The same seed gives the same draws."""
+        distributions = [fit_rate_distributions(make_series())]
+        first = run_monte_carlo(distributions, [1000.0], [3], [30], draws=500, seed=42)
+        second = run_monte_carlo(distributions, [1000.0], [3], [30], draws=500, seed=42)
+
+        assert first["estimated_revenue"].shape == (1, 500)
+        assert np.array_equal(first["estimated_revenue"], second["estimated_revenue"])
+
+    def test_percentile_bands_are_ordered(self):
+        """Percentiles are monotonic for every metric."""
+        distributions = [fit_rate_distributions(make_series())]
+        bands = percentile_bands(run_monte_carlo(distributions, [1000.0], [3], [30], draws=2000, seed=1))
+
+        for band in bands[0].values():
+            assert band["p5"] <= band["p25"] <= band["p50"] <= band["p75"] <= band["p95"]
+
+    def test_win_probabilities(self):
+        """Win probabilities sum to one and favour the better variation."""
+        distributions = [fit_rate_distributions(make_series())] * 2
+        results = run_monte_carlo(distributions, [1000.0, 1000.0], [0, 5], [30, 30], draws=5000, seed=3)
+        probabilities = win_probabilities(results)
+
+        assert abs(probabilities.sum() - 1) < 1e-9
+        assert probabilities[1] > probabilities[0]
+
+    def test_ties_split_the_win(self):
+        """Identical outcomes share the win evenly."""
+        results = {"roi_percentage": np.array([[10.0, 20.0], [10.0, 5.0]])}
+
+        assert win_probabilities(results).tolist() == [0.75, 0.25]
+
+    def test_ten_thousand_draws_five_variations_under_a_second(self):
+        """10k draws x 5 variations finish well under a second."""
+        distributions = [fit_rate_distributions(make_series(seed=i)) for i in range(5)]
+        start = time.perf_counter()
+        summarize(run_monte_carlo(
+            distributions, [500.0, 1000.0, 1500.0, 2000.0, 2500.0], [0, 1, 2, 3, 4], [30] * 5,
+            draws=10_000, seed=0
+        ))
+
+        assert time.perf_counter() - start < 1.0
+
+
+@pytest.mark.integration
+@pytest.mark.simulation
+class TestMonteCarloEndpoints:
+    """Test the Monte Carlo and A/B test endpoints."""
+
+    def variation(self, keywords):
+        return {
+            "product_name": "Produto",
+            "category": "electronics",
+            "budget": 1000.0,
+            "duration_days": 30,
+            "target_audience": "general",
+            "keywords": keywords
+        }
+
+    def test_monte_carlo_endpoint(self):
+        """The endpoint returns percentile bands for every metric."""
+        client = TestClient(app)
+        response = client.post("/api/simulate/monte-carlo", json={**self.variation(["a"]), "draws": 1000, "seed": 5})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["draws"] == 1000
+        assert set(data["percentiles"]["roi_percentage"]) == {"mean", "p5", "p25", "p50", "p75", "p95"}
+        assert 0 <= data["probability_of_profit"] <= 1
+
+    def test_ab_test_reports_win_probabilities(self):
+        """The A/B test winner is the variation with the highest win probability."""
+        client = TestClient(app)
+        response = client.post("/api/ab-test", json={
+            "test_name": "Keywords",
+            "variations": [self.variation([]), self.variation(["a", "b", "c", "d", "e"])],
+            "traffic_split": [50.0, 50.0],
+            "draws": 2000,
+            "seed": 11
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["win_probabilities"]) == 2
+        assert abs(sum(data["win_probabilities"]) - 1) < 1e-3
+        assert data["winner_variation"] == int(np.argmax(data["win_probabilities"]))
+        assert data["confidence_level"] == round(max(data["win_probabilities"]) * 100, 1)
+        assert len(data["percentiles"]) == 2
@@ -0,0 +1,177 @@
+"""
+Unit tests for the report rendering service.
+"""
+import asyncio
+import csv
+import io
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app.main import app, campaign_results, report_renderer
+from app.reports import (
+    ArtifactCache,
+    ReportRenderer,
+    iter_csv,
+    render_csv,
+    report_rows,
+    rows_fingerprint
+)
+
+
+def make_results(count):
+    return {
+        f"CAMP_{i:06d}": {
+            "campaign_id": f"CAMP_{i:06d}",
+            "estimated_reach": 5000 + i,
+            "estimated_clicks": 250,
+            "estimated_conversions": 10,
+            "estimated_revenue": 1000.0 + i,
+            "cost_per_click": 2.0,
+            "roi_percentage": 25.5,
+            "recommendations": ["not part of the report"]
+        }
+        for i in range(count)
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.utils
+class TestReportRows:
+    """Test report row extraction and versioning."""
+
+    def test_rows_follow_request_order_and_skip_unknown(self):
+        """Rows keep the requested order and skip unknown campaigns."""
+        results = make_results(3)
+        rows = report_rows(["CAMP_000002", "MISSING", "CAMP_000000"], results)
+
+        assert [row["campaign_id"] for row in rows] == ["CAMP_000002", "CAMP_000000"]
+        assert "recommendations" not in rows[0]
+
+    def test_fingerprint_changes_with_results(self):
+        """The report version changes when any result changes."""
+        results = make_results(2)
+        before = rows_fingerprint(report_rows(list(results), results))
+        results["CAMP_000001"]["roi_percentage"] = 30.0
+
+        assert rows_fingerprint(report_rows(list(results), results)) != before
+
+
+@pytest.mark.unit
+@pytest.mark.utils
+class TestCsvRendering:
+    """Test streamed CSV rendering."""
+
+    def test_csv_streams_in_pieces(self):
+        """Rows are emitted in pieces and parse back to the same values."""
+        results = make_results(450)
+        rows = report_rows(list(results), results)
+        pieces = list(iter_csv(rows, flush_rows=200))
+
+        assert len(pieces) == 3
+        parsed = list(csv.DictReader(io.StringIO("".join(pieces))))
+        assert len(parsed) == 450
+        assert parsed[10]["Campaign ID"] == "CAMP_000010"
+        assert parsed[10]["Estimated Revenue"] == "1010.0"
+
+    def test_csv_without_rows_has_header(self):
+        """An empty report still has the header row."""
+        assert render_csv([]).startswith("Campaign ID,Estimated Reach")
+
+
+@pytest.mark.unit
+@pytest.mark.utils
+class TestArtifactCache:
+    """Test the rendered artifact cache."""
+
+    def test_evicts_by_size(self):
+        """Least recently used artifacts are evicted past the size limit."""
+        cache = ArtifactCache(max_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        cache.get("a")
+        cache.put("c", b"123")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == b"12345"
+        assert cache.get_stats()["bytes"] == 8
+
+    def test_oversized_artifact_is_not_cached(self):
+        """Artifacts larger than the cache are not stored."""
+        cache = ArtifactCache(max_bytes=4)
+        cache.put("a", b"12345")
+
+        assert cache.get("a") is None
+
+
+@pytest.mark.unit
+@pytest.mark.utils
+@pytest.mark.asyncio
+class TestReportRenderer:
+    """Test rendering in the worker pool."""
+
+    async def test_pdf_is_rendered_once(self):
+        """Concurrent and repeated requests share one render."""
+        renderer = ReportRenderer(max_workers=1)
+        results = make_results(20)
+        rows = report_rows(list(results), results)
+        try:
+            first, second = await asyncio.gather(renderer.pdf(rows), renderer.pdf(rows))
+            third = await renderer.pdf(rows)
+        finally:
+            renderer.shutdown()
+
+        assert first.startswith(b"%PDF")
+        assert first is second is third
+        assert renderer.cache.get_stats()["entries"] == 1
+
+    async def test_csv_is_cached_after_streaming(self):
+        """A completed CSV stream is served from the cache next time."""
+        renderer = ReportRenderer()
+        results = make_results(5)
+        rows = report_rows(list(results), results)
+
+        streamed = b"".join(renderer.csv(rows))
+        cached = list(renderer.csv(rows))
+
+        assert cached == [streamed]
+        assert renderer.cache.get_stats()["hits"] == 1
+
+
+@pytest.mark.integration
+@pytest.mark.utils
+class TestReportEndpoint:
+    """Test the /api/reports/generate endpoint."""
+
+    def test_csv_and_pdf_exports(self):
+        """Both formats are returned with the right media type."""
+        results = make_results(3)
+        campaign_results.update(results)
+        client = TestClient(app)
+        try:
+            csv_response = client.post("/api/reports/generate", json={"campaign_ids": list(results), "format": "csv"})
+            pdf_response = client.post("/api/reports/generate", json={"campaign_ids": list(results), "format": "pdf"})
+        finally:
+            for campaign_id in results:
+                del campaign_results[campaign_id]
+
+        assert csv_response.status_code == 200
+        assert csv_response.headers["content-type"].startswith("text/csv")
+        assert len(csv_response.text.strip().split("\n")) == 4
+        assert pdf_response.status_code == 200
+        assert pdf_response.content.startswith(b"%PDF")
+
+    def test_unsupported_format(self):
+        """Unknown formats are rejected."""
+        campaign_results.update(make_results(1))
+        client = TestClient(app)
+        try:
+            response = client.post("/api/reports/generate", json={"campaign_ids": ["CAMP_000000"], "format": "xml"})
+        finally:
+            del campaign_results["CAMP_000000"]
+
+        assert response.status_code == 400
@@ -0,0 +1,238 @@
+"""
+Unit tests for the historical series cache and the vectorized simulation kernel.
+"""
+import asyncio
+import pytest
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app.main import app, get_historical_series, historical_data_cache
+from app.simulation import (
+    HistoricalDataCache,
+    HistoricalSeries,
+    response_curve,
+    simulate_scenarios
+)
+
+
+def make_series(days=3):
+    return HistoricalSeries(
+        category_id="MLB1051",
+        dates=np.arange(days).astype("datetime64[D]"),
+        impressions=np.array([1000, 1200, 800][:days]),
+        clicks=np.array([50, 60, 40][:days]),
+        conversions=np.array([2, 3, 1][:days]),
+        spend=np.array([100.0, 120.0, 80.0][:days])
+    )
+
+
+def scalar_estimate(rates, budget, keyword_count, duration_days, multiplier):
+    """The single-campaign arithmetic /api/simulate always used"""
+    clicks = int(budget / rates["cpc"])
+    reach = int(clicks / rates["ctr"])
+    conversions = int(clicks * rates["conversion_rate"])
+    keyword_boost = min(keyword_count * 0.1, 0.3)
+    duration_factor = min(duration_days / 30, 1.0)
+    reach = int(reach * (1 + keyword_boost) * duration_factor)
+    clicks = int(clicks * (1 + keyword_boost))
+    conversions = int(conversions * (1 + keyword_boost))
+    revenue = conversions * (budget / max(1, conversions) * multiplier)
+    return reach, clicks, conversions, revenue
+
+
+@pytest.mark.unit
+@pytest.mark.analytics
+class TestHistoricalSeries:
+    """Test the array-backed historical series."""
+
+    def test_average_rates_match_daily_means(self):
+        """Averages are the mean of the daily ratios."""
+        rates = make_series().average_rates()
+
+        assert abs(rates["ctr"] - 0.05) < 0.001
+        assert abs(rates["conversion_rate"] - (2 / 50 + 3 / 60 + 1 / 40) / 3) < 1e-12
+        assert abs(rates["cpc"] - 2.0) < 1e-12
+
+    def test_empty_series_uses_default_rates(self):
+        """An empty window falls back to default rates."""
+        rates = make_series(0).average_rates()
+
+        assert rates == {"ctr": 0.05, "conversion_rate": 0.03, "cpc": 2.0}
+
+    def test_to_records(self):
+        """Records have the HistoricalData shape with plain Python values."""
+        records = make_series().to_records()
+
+        assert records[0] == {
+            "date": "1970-01-01", "impressions": 1000, "clicks": 50,
+            "conversions": 2, "spend": 100.0, "category": "MLB1051"
+        }
+        assert isinstance(records[1]["clicks"], int)
+
+
+@pytest.mark.unit
+@pytest.mark.simulation
+@pytest.mark.asyncio
+class TestHistoricalDataCache:
+    """Test the read-through TTL cache."""
+
+    async def test_read_through_and_hit(self):
+        """The loader runs once; later reads are hits."""
+        cache = HistoricalDataCache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return make_series()
+
+        first = await cache.get_or_load(("MLB1051", 3), loader)
+        second = await cache.get_or_load(("MLB1051", 3), loader)
+
+        assert first is second
+        assert len(calls) == 1
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    async def test_concurrent_misses_share_one_load(self):
+        """Concurrent requests for the same key wait on a single load."""
+        cache = HistoricalDataCache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return make_series()
+
+        results = await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(5)))
+
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+
+    async def test_concurrent_misses_share_load_error(self):
+        """A failed load raises in every waiter and is not cached."""
+        cache = HistoricalDataCache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("history unavailable")
+
+        results = await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(3)),
+                                       return_exceptions=True)
+
+        assert len(calls) == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert cache.get("key") is None
+        assert "key" not in cache._loading
+
+    async def test_ttl_and_lru_eviction(self):
+        """Expired and least recently used entries are evicted."""
+        cache = HistoricalDataCache(ttl_seconds=60, max_entries=2)
+        cache.put("a", make_series())
+        cache.put("b", make_series())
+        cache.get("a")
+        cache.put("c", make_series())
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+
+        cache.ttl_seconds = -1
+        assert cache.get("a") is None
+        assert cache.get_stats()["evictions"] == 2
+
+    async def test_failed_load_is_not_cached(self):
+        """A failing loader raises and leaves nothing in the cache."""
+        cache = HistoricalDataCache()
+
+        async def loader():
+            raise RuntimeError("API down")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("key", loader)
+        assert cache.get("key") is None
+
+    async def test_service_reads_from_cache(self):
+        """Repeated simulations reuse the cached series."""
+        historical_data_cache.clear()
+
+        first = await get_historical_series("MLB1430", 14)
+        second = await get_historical_series("MLB1430", 14)
+
+        assert first is second
+        assert len(first) == 14
+
+
+@pytest.mark.unit
+@pytest.mark.simulation
+class TestSimulationKernel:
+    """Test the vectorized scenario kernel."""
+
+    RATES = {"ctr": 0.047, "conversion_rate": 0.036, "cpc": 2.27}
+
+    def test_matches_scalar_estimate(self):
+        """Each scenario equals the single-campaign computation."""
+        budgets = np.array([150.0, 1000.0, 2500.0, 10000.0])
+        for keyword_count in (0, 2, 7):
+            for duration in (5, 30, 60):
+                results = simulate_scenarios(self.RATES, budgets, keyword_count, duration, 4.2)
+                for i, budget in enumerate(budgets):
+                    reach, clicks, conversions, revenue = scalar_estimate(
+                        self.RATES, budget, keyword_count, duration, 4.2
+                    )
+                    assert results["estimated_reach"][i] == reach
+                    assert results["estimated_clicks"][i] == clicks
+                    assert results["estimated_conversions"][i] == conversions
+                    assert abs(results["estimated_revenue"][i] - revenue) < 1e-6
+
+    def test_broadcasts_inputs(self):
+        """Array inputs broadcast to a common shape."""
+        results = simulate_scenarios(self.RATES, [[500.0], [1000.0]], [1, 2, 3], 30)
+
+        assert results["estimated_clicks"].shape == (2, 3)
+        assert results["keyword_count"].tolist() == [[1, 2, 3], [1, 2, 3]]
+
+    def test_response_curve_grid(self):
+        """The response curve covers every combination in order."""
+        points = response_curve(self.RATES, [500.0, 1000.0, 2000.0], [0, 3], [15, 30])
+
+        assert len(points) == 12
+        assert [p["budget"] for p in points[:3]] == [500.0, 1000.0, 2000.0]
+        assert points[0]["keyword_count"] == 0 and points[0]["duration_days"] == 15
+        assert points[-1]["keyword_count"] == 3 and points[-1]["duration_days"] == 30
+        clicks = [p["estimated_clicks"] for p in points[:3]]
+        assert clicks == sorted(clicks)
+
+
+@pytest.mark.integration
+@pytest.mark.simulation
+class TestSweepEndpoint:
+    """Test the /api/simulate/sweep endpoint."""
+
+    def test_sweep_returns_curve(self):
+        """The sweep returns one point per combination."""
+        client = TestClient(app)
+        response = client.post("/api/simulate/sweep", json={
+            "category": "electronics",
+            "budgets": [500, 1000, 1500, 2000],
+            "keyword_counts": [1, 4],
+            "duration_days": [30]
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["category_id"] == "MLB1051"
+        assert len(data["points"]) == 8
+        assert set(data["historical_rates"]) == {"ctr", "conversion_rate", "cpc"}
+
+    def test_sweep_rejects_non_positive_budget(self):
+        """Budgets must be positive."""
+        client = TestClient(app)
+        response = client.post("/api/simulate/sweep", json={"category": "home", "budgets": [0, 100]})
+
+        assert response.status_code == 400
@@ -2,17 +2,27 @@
 Analytics API routes for ML predictions and optimizations.
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from typing import Dict, List, Any, Optional
 from pydantic import BaseModel
 from datetime import datetime
+import asyncio
+import json
 
 from ...core.analytics import MLPredictor, MLOptimizer, PredictionResult, OptimizationResult
 from ...services.analytics_service import AnalyticsService
+from ...services.optimization_jobs import optimization_jobs
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
 
+@router.on_event("shutdown")
+async def shutdown_optimization_jobs():
+    """Stop pending result storage and the optimization process pool."""
+    await optimization_jobs.aclose()
+
+
 # Pydantic models for request/response
 class PredictionRequest(BaseModel):
     features: List[float]
@@ -68,6 +78,17 @@ class OptimizationComparisonRequest(BaseModel):
     objective: str = "maximize_roi"
 
 
+class BudgetOptimizationJobRequest(BaseModel):
+    campaigns: List[Dict[str, Any]]
+    total_budget: float
+    objective: str = "maximize_roi"
+
+
+class ParameterOptimizationJobRequest(BaseModel):
+    current_params: Dict[str, Any]
+    performance_history: List[Dict[str, Any]]
+
+
 def get_analytics_service() -> AnalyticsService:
     """Dependency to get analytics service instance."""
     return AnalyticsService()
@@ -356,4 +377,115 @@ async def compare_optimization_methods(
             **comparison
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Optimization comparison failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Optimization comparison failed: {str(e)}")
+
+
+@router.post("/jobs/optimize/budget", response_model=Dict[str, Any], status_code=202)
+async def submit_budget_optimization_job(
+    request: BudgetOptimizationJobRequest,
+    service: AnalyticsService = Depends(get_analytics_service)
+) -> Dict[str, Any]:
+    """
+    Start a genetic budget optimization in the background and return its job ID.
+    """
+    try:
+        job = await service.submit_budget_optimization_job(
+            request.campaigns,
+            request.total_budget,
+            request.objective
+        )
+        return job.to_dict(include_history=False)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to submit optimization job: {str(e)}")
+
+
+@router.post("/jobs/optimize/parameters", response_model=Dict[str, Any], status_code=202)
+async def submit_parameter_optimization_job(
+    request: ParameterOptimizationJobRequest,
+    service: AnalyticsService = Depends(get_analytics_service)
+) -> Dict[str, Any]:
+    """
+    Start a genetic parameter optimization in the background and return its job ID.
+    """
+    try:
+        job = await service.submit_parameter_optimization_job(
+            request.current_params,
+            request.performance_history
+        )
+        return job.to_dict(include_history=False)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to submit optimization job: {str(e)}")
+
+
+@router.get("/jobs", response_model=List[Dict[str, Any]])
+async def list_optimization_jobs(
+    limit: int = Query(50, ge=1, le=200),
+    service: AnalyticsService = Depends(get_analytics_service)
+) -> List[Dict[str, Any]]:
+    """
+    List background optimization jobs, newest first.
+    """
+    return [job.to_dict(include_history=False) for job in service.list_optimization_jobs(limit)]
+
+
+@router.get("/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_optimization_job(
+    job_id: str,
+    service: AnalyticsService = Depends(get_analytics_service)
+) -> Dict[str, Any]:
+    """
+    Get status, progress, fitness history and (when finished) the result of a job.
+    """
+    job = service.get_optimization_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Optimization job not found")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_optimization_job(
+    job_id: str,
+    service: AnalyticsService = Depends(get_analytics_service)
+) -> StreamingResponse:
+    """
+    Stream per-generation fitness history as server-sent events until the job ends.
+    """
+    job = service.get_optimization_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Optimization job not found")
+
+    async def events():
+        sent = 0
+        while True:
+            finished = job.finished_at is not None
+            history = job.fitness_history
+            for entry in history[sent:]:
+                yield f"event: generation\ndata: {json.dumps(entry)}\n\n"
+            sent = len(history)
+            if finished:
+                yield f"event: {job.status.value}\ndata: {json.dumps(job.to_dict(include_history=False))}\n\n"
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=Dict[str, Any])
+async def cancel_optimization_job(
+    job_id: str,
+    service: AnalyticsService = Depends(get_analytics_service)
+) -> Dict[str, Any]:
+    """
+    Cancel a queued or running optimization job.
+    """
+    job = service.get_optimization_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Optimization job not found")
+
+    cancelled = service.cancel_optimization_job(job_id)
+    return {
+        "job_id": job_id,
+        "cancelled": cancelled,
+        "status": job.status.value,
+        "timestamp": datetime.now().isoformat()
+    }
@@ -40,9 +40,15 @@ class RecurringTaskRequest(BaseModel):
     priority: int = 1
 
 
+_scheduler_service: Optional[SchedulerService] = None
+
+
 def get_scheduler_service() -> SchedulerService:
-    """Dependency to get scheduler service instance."""
-    return SchedulerService()
+    """Dependency to get the shared scheduler service instance."""
+    global _scheduler_service
+    if _scheduler_service is None:
+        _scheduler_service = SchedulerService()
+    return _scheduler_service
 
 
 @router.post("/tasks", response_model=Dict[str, Any])
@@ -110,6 +116,10 @@ async def create_recurring_task(
 ) -> Dict[str, Any]:
     """
     Create a recurring task.
+    
+    Returns the rule ID in ``task_ids``; each run is created when it comes due
+    as ``"<rule_id>:<n>"``. ``executions_scheduled`` is the run limit
+    (``None`` when the task recurs without limit).
     """
     try:
         task_ids = await service.create_recurring_task(
@@ -126,7 +136,8 @@ async def create_recurring_task(
             "status": "scheduled",
             "task_type": request.task_type,
             "interval_seconds": request.interval_seconds,
-            "executions_scheduled": len(task_ids),
+            "executions_scheduled": request.max_executions,
+            "max_executions": request.max_executions,
             "start_time": (request.start_time or datetime.now()).isoformat(),
             "created_at": datetime.now().isoformat()
         }
@@ -146,7 +157,20 @@ async def get_task_status(
         result = await service.get_task_result(task_id)
         
         if result is None:
-            raise HTTPException(status_code=404, detail="Task not found")
+            # Known but not finished (pending, scheduled or running)
+            status = await service.get_task_status(task_id)
+            if status is None:
+                raise HTTPException(status_code=404, detail="Task not found")
+            return {
+                "task_id": task_id,
+                "status": status.value,
+                "result_data": None,
+                "error_message": None,
+                "execution_time": None,
+                "start_time": None,
+                "end_time": None,
+                "metadata": {}
+            }
         
         return {
             "task_id": result.task_id,
@@ -6,18 +6,25 @@ campaign parameters in the Mercado Livre context, including budget allocation,
 bidding strategies, and targeting parameters.
 """
 
+import os
 import random
 import logging
 import numpy as np
-from typing import Dict, List, Optional, Any, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from datetime import datetime
 from dataclasses import dataclass
 from copy import deepcopy
 
 from .optimizer import OptimizationResult
+from .population_engine import FitnessModel, VectorizedPopulation, evolve_island, migrate
 
 logger = logging.getLogger(__name__)
 
+# Campaign limits for the chromosome-based and matrix-backed population modes
+MAX_CAMPAIGNS = 100
+MAX_CAMPAIGNS_VECTORIZED = 10000
+
 
 @dataclass
 class GeneticConfig:
@@ -30,6 +37,12 @@ class GeneticConfig:
     elitism_rate: float = 0.1
     convergence_threshold: float = 1e-6
     max_stagnant_generations: int = 20
+    vectorized: Optional[bool] = None  # None = automatic (above MAX_CAMPAIGNS)
+    random_seed: int = 42
+    islands: int = 1  # > 1 enables the island model (population_size per island)
+    migration_interval: int = 10
+    migration_size: int = 2
+    island_workers: Optional[int] = None  # None = one process per island (up to CPU count), 0 = in-process
 
 
 class Chromosome:
@@ -102,9 +115,22 @@ class GeneticOptimizer:
         self.parameter_bounds = {}
         self.constraints = {}
         
-        # Set random seed for reproducible results in testing
-        random.seed(42)
-        np.random.seed(42)
+        # Per-instance generator: reproducible without touching the global random state
+        self._random = random.Random(self.config.random_seed)
+        
+        # Called after every generation as (generation, best_fitness, avg_fitness);
+        # returning True stops the run early with the best solution found so far
+        self.progress_callback: Optional[Callable[[int, float, float], Optional[bool]]] = None
+        self.stopped_early = False
+    
+    def _report_progress(self, generation: int, best_fitness: float, avg_fitness: float) -> bool:
+        """Notify progress_callback; True if it asked the run to stop."""
+        if self.progress_callback is None:
+            return False
+        if self.progress_callback(generation, float(best_fitness), float(avg_fitness)):
+            logger.info(f"Optimization stopped by progress callback at generation {generation}")
+            self.stopped_early = True
+        return self.stopped_early
     
     def _validate_config(self):
         """Validate and correct genetic algorithm configuration."""
@@ -122,6 +148,11 @@ class GeneticOptimizer:
         # Ensure convergence threshold is positive
         self.config.convergence_threshold = max(1e-10, self.config.convergence_threshold)
         
+        # Island model settings
+        self.config.islands = max(1, self.config.islands)
+        self.config.migration_interval = max(1, self.config.migration_interval)
+        self.config.migration_size = max(0, min(self.config.migration_size, self.config.population_size - 1))
+        
         logger.info(f"Genetic algorithm configured: pop_size={self.config.population_size}, "
                    f"max_gen={self.config.max_generations}, crossover={self.config.crossover_rate}, "
                    f"mutation={self.config.mutation_rate}")
@@ -142,8 +173,9 @@ class GeneticOptimizer:
         if not campaigns:
             raise ValueError("Campaigns list cannot be empty")
         
-        if len(campaigns) > 100:
-            raise ValueError("Too many campaigns (max 100 supported)")
+        max_campaigns = MAX_CAMPAIGNS_VECTORIZED if self._use_vectorized(len(campaigns)) else MAX_CAMPAIGNS
+        if len(campaigns) > max_campaigns:
+            raise ValueError(f"Too many campaigns (max {max_campaigns} supported)")
         
         for i, campaign in enumerate(campaigns):
             if not isinstance(campaign, dict):
@@ -245,12 +277,12 @@ class GeneticOptimizer:
                 if param in self.parameter_bounds:
                     min_val, max_val = self.parameter_bounds[param]
                     # Generate random value within bounds
-                    genes[param] = random.uniform(min_val, max_val)
+                    genes[param] = self._random.uniform(min_val, max_val)
                 else:
                     # Use default value with some random variation
                     if isinstance(default_value, (int, float)):
                         variation = 0.2  # 20% variation
-                        genes[param] = default_value * (1 + random.uniform(-variation, variation))
+                        genes[param] = default_value * (1 + self._random.uniform(-variation, variation))
                     else:
                         genes[param] = default_value
             
@@ -358,7 +390,7 @@ class GeneticOptimizer:
         Returns:
             Selected chromosome
         """
-        tournament = random.sample(population, min(self.config.tournament_size, len(population)))
+        tournament = self._random.sample(population, min(self.config.tournament_size, len(population)))
         return max(tournament, key=lambda x: x.fitness)
     
     def single_point_crossover(self, parent1: Chromosome, parent2: Chromosome) -> Tuple[Chromosome, Chromosome]:
@@ -372,7 +404,7 @@ class GeneticOptimizer:
         Returns:
             Tuple of two offspring chromosomes
         """
-        if random.random() > self.config.crossover_rate:
+        if self._random.random() > self.config.crossover_rate:
             return parent1.copy(), parent2.copy()
         
         # Get list of parameter names
@@ -382,7 +414,7 @@ class GeneticOptimizer:
             return parent1.copy(), parent2.copy()
         
         # Choose crossover point
-        crossover_point = random.randint(1, len(params) - 1)
+        crossover_point = self._random.randint(1, len(params) - 1)
         
         # Create offspring
         offspring1_genes = {}
@@ -415,7 +447,7 @@ class GeneticOptimizer:
         Returns:
             Tuple of two offspring chromosomes
         """
-        if random.random() > self.config.crossover_rate:
+        if self._random.random() > self.config.crossover_rate:
             return parent1.copy(), parent2.copy()
         
         # Get list of parameter names
@@ -424,8 +456,8 @@ class GeneticOptimizer:
             return self.single_point_crossover(parent1, parent2)
         
         # Choose two crossover points
-        point1 = random.randint(1, len(params) - 2)
-        point2 = random.randint(point1 + 1, len(params) - 1)
+        point1 = self._random.randint(1, len(params) - 2)
+        point2 = self._random.randint(point1 + 1, len(params) - 1)
         
         # Create offspring
         offspring1_genes = {}
@@ -460,19 +492,19 @@ class GeneticOptimizer:
         mutated = chromosome.copy()
         
         for param in mutated.genes.keys():
-            if random.random() < self.config.mutation_rate:
+            if self._random.random() < self.config.mutation_rate:
                 if param in self.parameter_bounds:
                     min_val, max_val = self.parameter_bounds[param]
                     # Gaussian mutation within bounds
                     current_val = mutated.genes[param]
                     mutation_strength = (max_val - min_val) * 0.1  # 10% of range
-                    mutation = random.gauss(0, mutation_strength)
+                    mutation = self._random.gauss(0, mutation_strength)
                     mutated.genes[param] = max(min_val, min(max_val, current_val + mutation))
                 else:
                     # For unbounded parameters, apply small relative mutation
                     current_val = mutated.genes[param]
                     if isinstance(current_val, (int, float)) and current_val != 0:
-                        mutation_factor = 1 + random.gauss(0, 0.1)  # 10% standard deviation
+                        mutation_factor = 1 + self._random.gauss(0, 0.1)  # 10% standard deviation
                         mutated.genes[param] = current_val * mutation_factor
         
         mutated.validate_genes()
@@ -493,6 +525,360 @@ class GeneticOptimizer:
         sorted_population = sorted(population, key=lambda x: x.fitness, reverse=True)
         return [chromosome.copy() for chromosome in sorted_population[:elite_count]]
     
+    def _evolve_population(self, parameter_template: Dict[str, Any], campaigns: List[Dict[str, Any]],
+                           objective: str) -> int:
+        """
+        Run the chromosome-based genetic algorithm loop.
+        
+        Args:
+            parameter_template: Template with parameter names and default values
+            campaigns: List of campaign configurations
+            objective: Optimization objective
+            
+        Returns:
+            Number of stagnant generations when the loop stopped
+        """
+        # Initialize population
+        self.population = self.initialize_population(parameter_template)
+        if not self.population:
+            raise RuntimeError("Failed to initialize population")
+        
+        self.generation = 0
+        self.fitness_history = []
+        best_fitness_history = []
+        stagnant_generations = 0
+        
+        # Evaluate initial population
+        for chromosome in self.population:
+            self.evaluate_fitness(chromosome, campaigns, objective)
+        
+        self.best_chromosome = max(self.population, key=lambda x: x.fitness)
+        if self.best_chromosome.fitness <= 0:
+            logger.warning("Initial population has very low fitness")
+        
+        logger.info(f"Initial best fitness: {self.best_chromosome.fitness:.4f}")
+        
+        # Main genetic algorithm loop
+        for generation in range(self.config.max_generations):
+            self.generation = generation
+            
+            try:
+                # Selection and reproduction
+                new_population = []
+                
+                # Keep elite
+                elite = self.get_elite(self.population)
+                new_population.extend(elite)
+                
+                # Generate offspring
+                attempts = 0
+                while len(new_population) < self.config.population_size and attempts < self.config.population_size * 3:
+                    try:
+                        parent1 = self.tournament_selection(self.population)
+                        parent2 = self.tournament_selection(self.population)
+                        
+                        # Choose crossover type randomly
+                        if self._random.random() < 0.5:
+                            offspring1, offspring2 = self.single_point_crossover(parent1, parent2)
+                        else:
+                            offspring1, offspring2 = self.two_point_crossover(parent1, parent2)
+                        
+                        # Apply mutation
+                        offspring1 = self.mutate(offspring1)
+                        offspring2 = self.mutate(offspring2)
+                        
+                        new_population.extend([offspring1, offspring2])
+                        
+                    except Exception as e:
+                        logger.warning(f"Error in reproduction step: {str(e)}")
+                        attempts += 1
+                        
+                    attempts += 1
+                
+                # Trim population to exact size
+                new_population = new_population[:self.config.population_size]
+                
+                if len(new_population) < self.config.population_size:
+                    logger.warning(f"Population size reduced to {len(new_population)}")
+                
+                # Evaluate new population
+                for chromosome in new_population:
+                    if not chromosome.evaluated:
+                        self.evaluate_fitness(chromosome, campaigns, objective)
+                
+                self.population = new_population
+                
+                # Update best chromosome
+                current_best = max(self.population, key=lambda x: x.fitness)
+                
+                if current_best.fitness > self.best_chromosome.fitness:
+                    self.best_chromosome = current_best.copy()
+                    stagnant_generations = 0
+                    logger.info(f"Generation {generation}: New best fitness {self.best_chromosome.fitness:.4f}")
+                else:
+                    stagnant_generations += 1
+                
+                # Track fitness history
+                avg_fitness = sum(c.fitness for c in self.population) / len(self.population)
+                self.fitness_history.append(avg_fitness)
+                best_fitness_history.append(self.best_chromosome.fitness)
+                
+                if self._report_progress(generation, self.best_chromosome.fitness, avg_fitness):
+                    break
+                
+                # Check convergence
+                if stagnant_generations >= self.config.max_stagnant_generations:
+                    logger.info(f"Converged after {generation + 1} generations (stagnation)")
+                    break
+                
+                if generation > 10:
+                    recent_improvement = best_fitness_history[-1] - best_fitness_history[-10]
+                    if recent_improvement < self.config.convergence_threshold:
+                        logger.info(f"Converged after {generation + 1} generations (threshold)")
+                        break
+            
+            except Exception as e:
+                logger.error(f"Error in generation {generation}: {str(e)}")
+                if generation == 0:
+                    # If first generation fails, raise the error
+                    raise
+                # Otherwise, continue with current best
+                break
+        
+        return stagnant_generations
+    
+    def _use_vectorized(self, campaign_count: int) -> bool:
+        """Whether to run the matrix-backed population mode."""
+        if self.config.islands > 1:
+            return True
+        if self.config.vectorized is None:
+            return campaign_count > MAX_CAMPAIGNS
+        return self.config.vectorized
+    
+    def evaluate_population(self, genes: np.ndarray, gene_names: List[str],
+                            campaigns: List[Dict[str, Any]], objective: str = "maximize_roi") -> np.ndarray:
+        """
+        Evaluate fitness for a whole population matrix at once.
+        
+        Produces the same values as calling evaluate_fitness on each row.
+        
+        Args:
+            genes: population x genes matrix
+            gene_names: Gene name for each matrix column
+            campaigns: List of campaign configurations
+            objective: Optimization objective
+            
+        Returns:
+            Fitness vector
+        """
+        return self._fitness_model(gene_names, campaigns, objective).evaluate(np.atleast_2d(genes))
+    
+    def _fitness_model(self, gene_names: List[str], campaigns: List[Dict[str, Any]],
+                       objective: str) -> FitnessModel:
+        budget_limit = None
+        if "total_budget_limit" in self.constraints:
+            budget_limit = self.constraints["total_budget_limit"].get("max", float('inf'))
+        return FitnessModel(gene_names, campaigns, objective, budget_limit)
+    
+    def _evolve_vectorized(self, parameter_template: Dict[str, Any], campaigns: List[Dict[str, Any]],
+                           objective: str) -> int:
+        """
+        Run the genetic algorithm loop on a population x genes matrix.
+        
+        Selection, crossover, mutation, clipping and fitness run as array
+        operations over the whole population. Randomness comes from a
+        generator seeded with config.random_seed, so runs are reproducible.
+        The final population is converted back to Chromosome objects.
+        
+        Args:
+            parameter_template: Template with parameter names and default values
+            campaigns: List of campaign configurations
+            objective: Optimization objective
+            
+        Returns:
+            Number of stagnant generations when the loop stopped
+        """
+        rng = np.random.default_rng(self.config.random_seed)
+        engine = VectorizedPopulation.from_template(parameter_template, self.parameter_bounds, rng)
+        model = self._fitness_model(engine.gene_names, campaigns, objective)
+        
+        defaults = np.array([float(parameter_template[name]) for name in engine.gene_names])
+        engine.initialize(self.config.population_size, defaults)
+        engine.fitness = model.evaluate(engine.genes)
+        
+        self.generation = 0
+        self.fitness_history = []
+        best_fitness_history = []
+        stagnant_generations = 0
+        
+        best_index = int(np.argmax(engine.fitness))
+        best_genes = engine.genes[best_index].copy()
+        best_fitness = float(engine.fitness[best_index])
+        logger.info(f"Initial best fitness: {best_fitness:.4f}")
+        
+        for generation in range(self.config.max_generations):
+            self.generation = generation
+            engine.next_generation(
+                model.evaluate,
+                population_size=self.config.population_size,
+                elitism_rate=self.config.elitism_rate,
+                tournament_size=self.config.tournament_size,
+                crossover_rate=self.config.crossover_rate,
+                mutation_rate=self.config.mutation_rate,
+            )
+            
+            current_index = int(np.argmax(engine.fitness))
+            if engine.fitness[current_index] > best_fitness:
+                best_genes = engine.genes[current_index].copy()
+                best_fitness = float(engine.fitness[current_index])
+                stagnant_generations = 0
+                logger.info(f"Generation {generation}: New best fitness {best_fitness:.4f}")
+            else:
+                stagnant_generations += 1
+            
+            self.fitness_history.append(float(engine.fitness.mean()))
+            best_fitness_history.append(best_fitness)
+            
+            if self._report_progress(generation, best_fitness, self.fitness_history[-1]):
+                break
+            
+            if stagnant_generations >= self.config.max_stagnant_generations:
+                logger.info(f"Converged after {generation + 1} generations (stagnation)")
+                break
+            
+            if generation > 10:
+                recent_improvement = best_fitness_history[-1] - best_fitness_history[-10]
+                if recent_improvement < self.config.convergence_threshold:
+                    logger.info(f"Converged after {generation + 1} generations (threshold)")
+                    break
+        
+        self.population = [
+            self._to_chromosome(engine.gene_names, row, fitness)
+            for row, fitness in zip(engine.genes, engine.fitness)
+        ]
+        self.best_chromosome = self._to_chromosome(engine.gene_names, best_genes, best_fitness)
+        return stagnant_generations
+    
+    def _evolve_islands(self, parameter_template: Dict[str, Any], campaigns: List[Dict[str, Any]],
+                        objective: str) -> int:
+        """
+        Run the island model: independent sub-populations evolved in a process pool.
+        
+        Every island has population_size individuals and its own generator
+        spawned from config.random_seed. Islands run migration_interval
+        generations per epoch, then the best migration_size individuals of each
+        island replace the worst of the next one (ring topology). The
+        convergence monitor tracks the global best per generation and stops
+        all islands at the end of the epoch in which it converges.
+        
+        Args:
+            parameter_template: Template with parameter names and default values
+            campaigns: List of campaign configurations
+            objective: Optimization objective
+            
+        Returns:
+            Number of stagnant generations when the loop stopped
+        """
+        seeds = np.random.SeedSequence(self.config.random_seed).spawn(self.config.islands)
+        engines = [
+            VectorizedPopulation.from_template(parameter_template, self.parameter_bounds, np.random.default_rng(seed))
+            for seed in seeds
+        ]
+        model = self._fitness_model(engines[0].gene_names, campaigns, objective)
+        defaults = np.array([float(parameter_template[name]) for name in engines[0].gene_names])
+        for engine in engines:
+            engine.initialize(self.config.population_size, defaults)
+            engine.fitness = model.evaluate(engine.genes)
+        
+        params = {
+            "population_size": self.config.population_size,
+            "elitism_rate": self.config.elitism_rate,
+            "tournament_size": self.config.tournament_size,
+            "crossover_rate": self.config.crossover_rate,
+            "mutation_rate": self.config.mutation_rate,
+        }
+        
+        self.generation = 0
+        self.fitness_history = []
+        best_fitness_history = []
+        stagnant_generations = 0
+        best_fitness = max(float(engine.fitness.max()) for engine in engines)
+        logger.info(f"Initial best fitness across {len(engines)} islands: {best_fitness:.4f}")
+        
+        workers = self.config.island_workers
+        if workers is None:
+            workers = min(len(engines), os.cpu_count() or 1)
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        
+        try:
+            generations_done = 0
+            converged = False
+            while generations_done < self.config.max_generations and not converged:
+                epoch = min(self.config.migration_interval, self.config.max_generations - generations_done)
+                if pool is not None:
+                    futures = [pool.submit(evolve_island, engine, model, epoch, params) for engine in engines]
+                    results = [future.result() for future in futures]
+                else:
+                    results = [evolve_island(engine, model, epoch, params) for engine in engines]
+                engines = [engine for engine, _ in results]
+                epoch_avg_fitness = float(np.mean([engine.fitness.mean() for engine in engines]))
+                
+                # Convergence monitor on the global best of each generation
+                for island_best in np.max([history for _, history in results], axis=0):
+                    generation = generations_done
+                    generations_done += 1
+                    self.generation = generation
+                    
+                    if island_best > best_fitness:
+                        best_fitness = float(island_best)
+                        stagnant_generations = 0
+                        logger.info(f"Generation {generation}: New best fitness {best_fitness:.4f}")
+                    else:
+                        stagnant_generations += 1
+                    best_fitness_history.append(best_fitness)
+                    
+                    if self._report_progress(generation, best_fitness, epoch_avg_fitness):
+                        converged = True
+                        break
+                    
+                    if stagnant_generations >= self.config.max_stagnant_generations:
+                        logger.info(f"Converged after {generation + 1} generations (stagnation)")
+                        converged = True
+                        break
+                    
+                    if generation > 10:
+                        recent_improvement = best_fitness_history[-1] - best_fitness_history[-10]
+                        if recent_improvement < self.config.convergence_threshold:
+                            logger.info(f"Converged after {generation + 1} generations (threshold)")
+                            converged = True
+                            break
+                
+                self.fitness_history.append(epoch_avg_fitness)
+                if not converged:
+                    migrate(engines, self.config.migration_size)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        
+        self.population = [
+            self._to_chromosome(engine.gene_names, row, fitness)
+            for engine in engines
+            for row, fitness in zip(engine.genes, engine.fitness)
+        ]
+        self.best_chromosome = max(self.population, key=lambda x: x.fitness).copy()
+        return stagnant_generations
+    
+    def _convergence_reason(self, stagnant_generations: int) -> str:
+        if self.stopped_early:
+            return "stopped"
+        return "stagnation" if stagnant_generations >= self.config.max_stagnant_generations else "threshold"
+    
+    def _to_chromosome(self, gene_names: List[str], row: np.ndarray, fitness: float) -> Chromosome:
+        chromosome = Chromosome(dict(zip(gene_names, row.tolist())), self.parameter_bounds)
+        chromosome.fitness = float(fitness)
+        chromosome.evaluated = True
+        return chromosome
+    
     def optimize_budget_allocation(self, campaigns: List[Dict[str, Any]], 
                                  total_budget: float,
                                  objective: str = "maximize_roi") -> OptimizationResult:
@@ -520,6 +906,7 @@ class GeneticOptimizer:
                 objective = "maximize_roi"
             
             self._validate_campaigns(campaigns)
+            self.stopped_early = False
             
             logger.info(f"Starting genetic optimization for {len(campaigns)} campaigns with budget ${total_budget}")
             
@@ -540,109 +927,12 @@ class GeneticOptimizer:
             self.constraints["total_budget_limit"] = {"max": total_budget}
             self.set_parameter_bounds(bounds)
             
-            # Initialize population
-            self.population = self.initialize_population(parameter_template)
-            if not self.population:
-                raise RuntimeError("Failed to initialize population")
-            
-            self.generation = 0
-            self.fitness_history = []
-            best_fitness_history = []
-            stagnant_generations = 0
-            
-            # Evaluate initial population
-            for chromosome in self.population:
-                self.evaluate_fitness(chromosome, campaigns, objective)
-            
-            self.best_chromosome = max(self.population, key=lambda x: x.fitness)
-            if self.best_chromosome.fitness <= 0:
-                logger.warning("Initial population has very low fitness")
-            
-            logger.info(f"Initial best fitness: {self.best_chromosome.fitness:.4f}")
-            
-            # Main genetic algorithm loop
-            for generation in range(self.config.max_generations):
-                self.generation = generation
-                
-                try:
-                    # Selection and reproduction
-                    new_population = []
-                    
-                    # Keep elite
-                    elite = self.get_elite(self.population)
-                    new_population.extend(elite)
-                    
-                    # Generate offspring
-                    attempts = 0
-                    while len(new_population) < self.config.population_size and attempts < self.config.population_size * 3:
-                        try:
-                            parent1 = self.tournament_selection(self.population)
-                            parent2 = self.tournament_selection(self.population)
-                            
-                            # Choose crossover type randomly
-                            if random.random() < 0.5:
-                                offspring1, offspring2 = self.single_point_crossover(parent1, parent2)
-                            else:
-                                offspring1, offspring2 = self.two_point_crossover(parent1, parent2)
-                            
-                            # Apply mutation
-                            offspring1 = self.mutate(offspring1)
-                            offspring2 = self.mutate(offspring2)
-                            
-                            new_population.extend([offspring1, offspring2])
-                            
-                        except Exception as e:
-                            logger.warning(f"Error in reproduction step: {str(e)}")
-                            attempts += 1
-                            
-                        attempts += 1
-                    
-                    # Trim population to exact size
-                    new_population = new_population[:self.config.population_size]
-                    
-                    if len(new_population) < self.config.population_size:
-                        logger.warning(f"Population size reduced to {len(new_population)}")
-                    
-                    # Evaluate new population
-                    for chromosome in new_population:
-                        if not chromosome.evaluated:
-                            self.evaluate_fitness(chromosome, campaigns, objective)
-                    
-                    self.population = new_population
-                    
-                    # Update best chromosome
-                    current_best = max(self.population, key=lambda x: x.fitness)
-                    
-                    if current_best.fitness > self.best_chromosome.fitness:
-                        self.best_chromosome = current_best.copy()
-                        stagnant_generations = 0
-                        logger.info(f"Generation {generation}: New best fitness {self.best_chromosome.fitness:.4f}")
-                    else:
-                        stagnant_generations += 1
-                    
-                    # Track fitness history
-                    avg_fitness = sum(c.fitness for c in self.population) / len(self.population)
-                    self.fitness_history.append(avg_fitness)
-                    best_fitness_history.append(self.best_chromosome.fitness)
-                    
-                    # Check convergence
-                    if stagnant_generations >= self.config.max_stagnant_generations:
-                        logger.info(f"Converged after {generation + 1} generations (stagnation)")
-                        break
-                    
-                    if generation > 10:
-                        recent_improvement = best_fitness_history[-1] - best_fitness_history[-10]
-                        if recent_improvement < self.config.convergence_threshold:
-                            logger.info(f"Converged after {generation + 1} generations (threshold)")
-                            break
-                
-                except Exception as e:
-                    logger.error(f"Error in generation {generation}: {str(e)}")
-                    if generation == 0:
-                        # If first generation fails, raise the error
-                        raise
-                    # Otherwise, continue with current best
-                    break
+            if self.config.islands > 1:
+                stagnant_generations = self._evolve_islands(parameter_template, campaigns, objective)
+            elif self._use_vectorized(len(campaigns)):
+                stagnant_generations = self._evolve_vectorized(parameter_template, campaigns, objective)
+            else:
+                stagnant_generations = self._evolve_population(parameter_template, campaigns, objective)
             
             # Prepare results
             if not self.best_chromosome:
@@ -692,7 +982,9 @@ class GeneticOptimizer:
                     "population_size": self.config.population_size,
                     "best_fitness": self.best_chromosome.fitness,
                     "final_generation": self.generation,
-                    "convergence_reason": "stagnation" if stagnant_generations >= self.config.max_stagnant_generations else "threshold",
+                    "convergence_reason": self._convergence_reason(stagnant_generations),
+                    "vectorized": self._use_vectorized(len(campaigns)),
+                    "islands": self.config.islands,
                     "avg_final_fitness": sum(c.fitness for c in self.population) / len(self.population) if self.population else 0
                 }
             )
@@ -715,6 +1007,7 @@ class GeneticOptimizer:
         """
         try:
             logger.info("Starting genetic optimization for campaign parameters")
+            self.stopped_early = False
             
             # Set up parameter template and bounds
             parameter_template = current_params.copy()
@@ -788,6 +1081,11 @@ class GeneticOptimizer:
                 
                 if current_best.fitness > self.best_chromosome.fitness:
                     self.best_chromosome = current_best.copy()
+                
+                avg_fitness = sum(c.fitness for c in self.population) / len(self.population)
+                self.fitness_history.append(avg_fitness)
+                if self._report_progress(generation, self.best_chromosome.fitness, avg_fitness):
+                    break
             
             # Restore original population size
             self.config.population_size = original_pop_size
@@ -2,11 +2,14 @@
 Task Manager module for scheduling and executing ML tasks.
 """
 
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+from collections import OrderedDict
 from enum import Enum
 import asyncio
+import heapq
+import itertools
 import logging
 import uuid
 from concurrent.futures import ThreadPoolExecutor
@@ -14,6 +17,8 @@ import time
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_RETAINED_TASKS = 1000
+
 
 class TaskStatus(Enum):
     """Task execution status."""
@@ -63,21 +68,70 @@ class Task:
         self.metadata = {}
 
 
+@dataclass
+class RecurringRule:
+    """A recurring job, stored once; occurrences are created as they come due."""
+    rule_id: str
+    func: Callable
+    interval: timedelta
+    start_time: datetime
+    args: tuple = ()
+    kwargs: Dict[str, Any] = None
+    priority: int = 1
+    retry_count: int = 3
+    timeout: Optional[float] = None
+    max_executions: Optional[int] = None
+    executions: int = 0
+    on_occurrence: Optional[Callable[["Task"], None]] = None
+    
+    def next_run_after(self, moment: datetime) -> datetime:
+        """First occurrence strictly after ``moment`` (missed runs are coalesced)."""
+        if moment < self.start_time:
+            return self.start_time
+        elapsed = (moment - self.start_time) // self.interval
+        return self.start_time + (elapsed + 1) * self.interval
+    
+    @property
+    def exhausted(self) -> bool:
+        return self.max_executions is not None and self.executions >= self.max_executions
+
+
 class TaskManager:
     """
     Task manager for scheduling and executing ML tasks.
     Supports both immediate and scheduled execution.
+    
+    Scheduled tasks and recurring rules sit in a min-heap keyed by deadline,
+    so the scheduler loop sleeps exactly until the next one is due. Due tasks
+    go to a ready heap ordered by priority and at most ``max_workers`` of them
+    run at a time. Finished tasks are kept for ``max_retained_tasks`` entries.
     """
     
-    def __init__(self, max_workers: int = 4):
+    def __init__(self, max_workers: int = 4, max_retained_tasks: int = DEFAULT_MAX_RETAINED_TASKS):
         self.max_workers = max_workers
+        self.max_retained_tasks = max_retained_tasks
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self.tasks = {}  # task_id -> Task
         self.results = {}  # task_id -> TaskResult
-        self.scheduled_tasks = []  # List of (datetime, task_id) for scheduled tasks
+        self.recurring_rules = {}  # rule_id -> RecurringRule
         self.running_tasks = set()
         self.is_running = False
         
+        # (deadline, -priority, sequence, task_id); stale entries are skipped when popped
+        self._timers: List[Tuple[datetime, int, int, str]] = []
+        # (-priority, sequence, task_id) for tasks waiting for a free worker
+        self._ready: List[Tuple[int, int, str]] = []
+        self._sequence = itertools.count()
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._stale_timers = 0
+        self._dispatched = 0
+        self._wakeup = asyncio.Event()
+    
+    @property
+    def scheduled_tasks(self) -> List[Tuple[datetime, str]]:
+        """(scheduled time, task_id) of pending scheduled tasks, earliest first."""
+        return [(due, task_id) for due, _, _, task_id in sorted(self._timers) if self._is_live_timer(due, task_id)]
+        
     async def start(self):
         """Start the task manager."""
         self.is_running = True
@@ -89,6 +143,7 @@ class TaskManager:
     async def stop(self):
         """Stop the task manager."""
         self.is_running = False
+        self._wakeup.set()
         self.executor.shutdown(wait=True)
         logger.info("Task manager stopped")
     
@@ -131,9 +186,9 @@ class TaskManager:
         self.tasks[task_id] = task
         logger.info(f"Added task {task_id} for immediate execution")
         
-        # Execute immediately if manager is running
+        # Queue for the next free worker if manager is running
         if self.is_running:
-            asyncio.create_task(self._execute_task(task_id))
+            self._enqueue_ready(task)
             
         return task_id
     
@@ -179,8 +234,7 @@ class TaskManager:
         task.status = TaskStatus.SCHEDULED
         
         self.tasks[task_id] = task
-        self.scheduled_tasks.append((scheduled_time, task_id))
-        self.scheduled_tasks.sort(key=lambda x: x[0])  # Sort by time
+        self._push_timer(task)
         
         logger.info(f"Scheduled task {task_id} for {scheduled_time}")
         return task_id
@@ -191,76 +245,177 @@ class TaskManager:
                               args: tuple = (),
                               kwargs: Dict[str, Any] = None,
                               start_time: Optional[datetime] = None,
-                              max_executions: Optional[int] = None) -> List[str]:
+                              max_executions: Optional[int] = None,
+                              priority: int = 1,
+                              retry_count: int = 3,
+                              timeout: Optional[float] = None,
+                              on_occurrence: Optional[Callable[[Task], None]] = None) -> List[str]:
         """
         Schedule a recurring task.
         
+        The job is stored as a single rule; each occurrence becomes a task
+        with ID ``"<rule_id>:<n>"`` when it comes due. Occurrences missed
+        while the manager was busy or stopped are coalesced into one run.
+        
         Args:
             func: Function to execute
             interval: Time interval between executions
             args: Function arguments
             kwargs: Function keyword arguments
             start_time: When to start (default: now)
-            max_executions: Maximum number of executions
+            max_executions: Maximum number of executions (default: unlimited)
+            priority: Priority of each occurrence
+            retry_count: Number of retry attempts per occurrence
+            timeout: Timeout of each occurrence in seconds
+            on_occurrence: Called with each occurrence task when it is created
             
         Returns:
-            List of task IDs for scheduled executions
+            List with the rule ID, which can be used to query or cancel the job
         """
+        if interval <= timedelta(0):
+            raise ValueError("Recurring task interval must be positive")
         if start_time is None:
             start_time = datetime.now() + timedelta(seconds=1)
-            
-        task_ids = []
-        current_time = start_time
         
-        executions = 0
-        while max_executions is None or executions < max_executions:
-            if max_executions and executions >= max_executions:
-                break
-                
-            task_id = self.schedule_task(
-                func=func,
-                scheduled_time=current_time,
-                args=args,
-                kwargs=kwargs
-            )
-            task_ids.append(task_id)
-            
-            current_time += interval
-            executions += 1
-            
-            # Prevent infinite scheduling for very short intervals
-            if executions > 1000:
-                logger.warning("Stopping recurring task scheduling after 1000 executions")
-                break
+        rule_id = str(uuid.uuid4())
+        rule = RecurringRule(
+            rule_id=rule_id,
+            func=func,
+            interval=interval,
+            start_time=start_time,
+            args=args,
+            kwargs=kwargs or {},
+            priority=priority,
+            retry_count=retry_count,
+            timeout=timeout,
+            max_executions=max_executions,
+            on_occurrence=on_occurrence
+        )
+        
+        # The rule itself is tracked as a scheduled task pointing at its next run
+        rule_task = Task(task_id=rule_id, func=func, args=args, kwargs=kwargs, priority=priority)
+        rule_task.scheduled_at = start_time
+        rule_task.status = TaskStatus.COMPLETED if rule.exhausted else TaskStatus.SCHEDULED
+        rule_task.metadata = {"recurring": True, "interval_seconds": interval.total_seconds(), "executions": 0}
+        
+        self.recurring_rules[rule_id] = rule
+        self.tasks[rule_id] = rule_task
+        if not rule.exhausted:
+            self._push_timer(rule_task)
         
-        logger.info(f"Scheduled {len(task_ids)} recurring executions")
-        return task_ids
+        logger.info(f"Scheduled recurring task {rule_id} every {interval} starting {start_time}")
+        return [rule_id]
+    
+    def _push_timer(self, task: Task):
+        heapq.heappush(self._timers, (task.scheduled_at, -task.priority, next(self._sequence), task.task_id))
+        if self._timers[0][3] == task.task_id:
+            self._wakeup.set()  # new earliest deadline
+    
+    def _is_live_timer(self, due: datetime, task_id: str) -> bool:
+        task = self.tasks.get(task_id)
+        return task is not None and task.status == TaskStatus.SCHEDULED and task.scheduled_at == due
+    
+    def _enqueue_ready(self, task: Task):
+        heapq.heappush(self._ready, (-task.priority, next(self._sequence), task.task_id))
+        self._wakeup.set()
     
     async def _scheduler_loop(self):
-        """Background loop to execute scheduled tasks."""
+        """Background loop: wait for the next deadline, then dispatch due tasks."""
         while self.is_running:
             try:
-                await self._check_scheduled_tasks()
-                await asyncio.sleep(1)  # Check every second
+                delay = await self._check_scheduled_tasks()
+                self._wakeup.clear()
+                if self._ready and self._dispatched < self.max_workers:
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
             except Exception as e:
                 logger.error(f"Scheduler loop error: {str(e)}")
                 await asyncio.sleep(5)  # Wait longer on error
     
-    async def _check_scheduled_tasks(self):
-        """Check and execute scheduled tasks that are due."""
+    async def _check_scheduled_tasks(self) -> Optional[float]:
+        """
+        Move due tasks to the ready heap and start as many as there are free workers.
+        
+        Returns:
+            Seconds until the next deadline, or None if nothing is scheduled
+        """
         now = datetime.now()
-        due_tasks = []
         
-        # Find tasks that are due
-        while (self.scheduled_tasks and 
-               self.scheduled_tasks[0][0] <= now):
-            scheduled_time, task_id = self.scheduled_tasks.pop(0)
-            due_tasks.append(task_id)
+        while self._timers and self._timers[0][0] <= now:
+            due, _, _, task_id = heapq.heappop(self._timers)
+            if not self._is_live_timer(due, task_id):
+                continue  # cancelled or rescheduled
+            
+            rule = self.recurring_rules.get(task_id)
+            if rule is None:
+                task = self.tasks[task_id]
+                task.status = TaskStatus.PENDING
+                self._enqueue_ready(task)
+            else:
+                self._fire_recurring(rule, now)
+        
+        while self._ready and self._dispatched < self.max_workers:
+            _, _, task_id = heapq.heappop(self._ready)
+            task = self.tasks.get(task_id)
+            if task is None or task.status != TaskStatus.PENDING:
+                continue
+            self._dispatched += 1
+            asyncio.create_task(self._run_dispatched(task_id))
         
-        # Execute due tasks
-        for task_id in due_tasks:
-            if task_id in self.tasks:
-                asyncio.create_task(self._execute_task(task_id))
+        if not self._timers:
+            return None
+        return max(0.0, (self._timers[0][0] - now).total_seconds())
+    
+    def _fire_recurring(self, rule: RecurringRule, now: datetime):
+        """Create the due occurrence of a rule and schedule its next run."""
+        rule.executions += 1
+        occurrence = Task(
+            task_id=f"{rule.rule_id}:{rule.executions}",
+            func=rule.func,
+            args=rule.args,
+            kwargs=rule.kwargs,
+            priority=rule.priority,
+            retry_count=rule.retry_count,
+            timeout=rule.timeout
+        )
+        occurrence.scheduled_at = now
+        occurrence.metadata = {"recurring_rule_id": rule.rule_id}
+        self.tasks[occurrence.task_id] = occurrence
+        self._enqueue_ready(occurrence)
+        if rule.on_occurrence is not None:
+            try:
+                rule.on_occurrence(occurrence)
+            except Exception as e:
+                logger.error(f"Occurrence hook failed for {occurrence.task_id}: {str(e)}")
+        
+        rule_task = self.tasks[rule.rule_id]
+        rule_task.metadata["executions"] = rule.executions
+        if rule.exhausted:
+            rule_task.status = TaskStatus.COMPLETED
+            self._retire(rule.rule_id)
+        else:
+            rule_task.scheduled_at = rule.next_run_after(now)
+            self._push_timer(rule_task)
+    
+    async def _run_dispatched(self, task_id: str):
+        try:
+            await self._execute_task(task_id)
+        finally:
+            self._dispatched -= 1
+            self._wakeup.set()
+    
+    def _retire(self, task_id: str):
+        """Record a finished task, evicting the oldest beyond the retention limit."""
+        self._finished[task_id] = None
+        self._finished.move_to_end(task_id)
+        while len(self._finished) > self.max_retained_tasks:
+            old_id, _ = self._finished.popitem(last=False)
+            self.tasks.pop(old_id, None)
+            self.results.pop(old_id, None)
+            self.recurring_rules.pop(old_id, None)
     
     async def _execute_task(self, task_id: str) -> TaskResult:
         """Execute a task."""
@@ -319,6 +474,7 @@ class TaskManager:
             )
             
             self.results[task_id] = result
+            self._retire(task_id)
             logger.info(f"Task {task_id} completed successfully in {execution_time:.2f}s")
             
             return result
@@ -371,6 +527,7 @@ class TaskManager:
             
         if task_id not in self.results:
             self.results[task_id] = result
+        self._retire(task_id)
             
         return result
     
@@ -392,13 +549,13 @@ class TaskManager:
         task = self.tasks[task_id]
         
         if task.status in [TaskStatus.PENDING, TaskStatus.SCHEDULED]:
+            # Timer and ready-heap entries are skipped lazily once the status changes
+            if task.status == TaskStatus.SCHEDULED:
+                self._stale_timers += 1
             task.status = TaskStatus.CANCELLED
-            
-            # Remove from scheduled tasks if it's there
-            self.scheduled_tasks = [
-                (time, tid) for time, tid in self.scheduled_tasks 
-                if tid != task_id
-            ]
+            self._retire(task_id)
+            if self._stale_timers * 2 > len(self._timers):
+                self._compact_timers()
             
             logger.info(f"Cancelled task {task_id}")
             return True
@@ -406,13 +563,19 @@ class TaskManager:
         logger.warning(f"Cannot cancel task {task_id} with status {task.status}")
         return False
     
+    def _compact_timers(self):
+        """Drop timer entries of cancelled tasks."""
+        self._timers = [entry for entry in self._timers if self._is_live_timer(entry[0], entry[3])]
+        heapq.heapify(self._timers)
+        self._stale_timers = 0
+    
     def get_task_statistics(self) -> Dict[str, Any]:
         """Get statistics about task execution."""
         total_tasks = len(self.tasks)
         completed_tasks = sum(1 for t in self.tasks.values() if t.status == TaskStatus.COMPLETED)
         failed_tasks = sum(1 for t in self.tasks.values() if t.status == TaskStatus.FAILED)
         running_tasks = len(self.running_tasks)
-        scheduled_tasks = len(self.scheduled_tasks)
+        scheduled_tasks = sum(1 for due, _, _, task_id in self._timers if self._is_live_timer(due, task_id))
         
         avg_execution_time = 0
         if self.results:
@@ -425,6 +588,11 @@ class TaskManager:
             "failed_tasks": failed_tasks,
             "running_tasks": running_tasks,
             "scheduled_tasks": scheduled_tasks,
+            "recurring_tasks": sum(
+                1 for rule_id in self.recurring_rules
+                if self.tasks[rule_id].status == TaskStatus.SCHEDULED
+            ),
+            "queued_tasks": len(self._ready),
             "success_rate": completed_tasks / max(1, total_tasks),
             "average_execution_time": avg_execution_time
         }
\ No newline at end of file
@@ -4,9 +4,11 @@ Provides data management and persistence capabilities.
 """
 
 from .data_manager import DataManager, DataQuery, DataResult
+from .segment_store import SegmentedTable
 
 __all__ = [
     "DataManager",
     "DataQuery", 
-    "DataResult"
+    "DataResult",
+    "SegmentedTable"
 ]
\ No newline at end of file
@@ -2,18 +2,156 @@
 Data Manager module for data storage and retrieval operations.
 """
 
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Iterator, Sequence, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+from contextlib import contextmanager
+from functools import lru_cache
+import heapq
+import itertools
 import json
 import os
+import queue
 import sqlite3
+import threading
 import logging
 from pathlib import Path
 
+from .segment_store import SegmentedTable, DEFAULT_INDEXED_FIELDS
+
 logger = logging.getLogger(__name__)
 
 
+# Columns holding JSON documents: serialized on write, parsed on read
+JSON_COLUMNS: Dict[str, frozenset] = {
+    "campaigns": frozenset({"parameters"}),
+    "predictions": frozenset({"feature_importance", "metadata"}),
+    "optimizations": frozenset({"parameters", "metadata"}),
+    "tasks": frozenset({"parameters", "result"}),
+    "performance_metrics": frozenset({"metadata"}),
+}
+
+# Secondary indexes for the history queries (filter + ORDER BY created_at)
+SQLITE_INDEXES = (
+    ("idx_predictions_campaign_created", "predictions", "campaign_id, created_at"),
+    ("idx_predictions_model_created", "predictions", "model_type, created_at"),
+    ("idx_predictions_created", "predictions", "created_at"),
+    ("idx_optimizations_campaign_created", "optimizations", "campaign_id, created_at"),
+    ("idx_optimizations_type_created", "optimizations", "optimization_type, created_at"),
+    ("idx_optimizations_created", "optimizations", "created_at"),
+    ("idx_tasks_status_created", "tasks", "status, created_at"),
+    ("idx_tasks_type_created", "tasks", "task_type, created_at"),
+    ("idx_tasks_created", "tasks", "created_at"),
+)
+
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),  # durable at checkpoints; safe with WAL
+    ("busy_timeout", 5000),
+    ("temp_store", "MEMORY"),
+    ("cache_size", -16000),  # 16 MB page cache per connection
+)
+
+DEFAULT_POOL_SIZE = 5
+STATEMENT_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _insert_sql(table: str, columns: Tuple[str, ...], upsert: bool) -> str:
+    """Build (once) the INSERT text so sqlite3 reuses its prepared statement."""
+    verb = "INSERT OR REPLACE" if upsert else "INSERT"
+    return f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+
+
+class SQLiteConnectionPool:
+    """
+    Thread-safe pool of persistent SQLite connections.
+    
+    Connections are opened lazily (up to ``pool_size``) in WAL mode, so
+    readers do not block the writer, and keep their prepared statement
+    cache between operations.
+    """
+    
+    def __init__(self, db_path: Union[str, Path], pool_size: int = DEFAULT_POOL_SIZE, timeout: float = 30.0):
+        self.db_path = str(db_path)
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._closed = False
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma, value in SQLITE_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}={value}")
+        return conn
+    
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            if self._created < self.pool_size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No SQLite connection available after {self.timeout}s")
+    
+    def _release(self, conn: sqlite3.Connection):
+        with self._lock:
+            if self._closed:
+                self._created -= 1
+                conn.close()
+                return
+        self._idle.put(conn)
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection; the open transaction is committed on success and rolled back on error."""
+        conn = self._acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+    
+    def close(self):
+        """Close idle connections; borrowed ones are closed when returned."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+            conn.close()
+
+
 @dataclass
 class DataQuery:
     """Represents a data query operation."""
@@ -46,7 +184,10 @@ class DataManager:
     def __init__(self, 
                  storage_type: str = "sqlite",
                  connection_string: Optional[str] = None,
-                 data_directory: str = "./data"):
+                 data_directory: str = "./data",
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 indexed_fields: Sequence[str] = DEFAULT_INDEXED_FIELDS,
+                 segment_options: Optional[Dict[str, Any]] = None):
         self.storage_type = storage_type
         self.connection_string = connection_string
         self.data_directory = Path(data_directory)
@@ -55,17 +196,23 @@ class DataManager:
         # Initialize storage
         if storage_type == "sqlite":
             self.db_path = self.data_directory / "ml_project.db"
+            self.pool = SQLiteConnectionPool(self.db_path, pool_size=pool_size)
+            self._table_columns: Dict[str, frozenset] = {}
             self._init_sqlite()
         elif storage_type == "file":
             self.json_dir = self.data_directory / "json_storage"
             self.json_dir.mkdir(exist_ok=True)
+            self.indexed_fields = tuple(indexed_fields)
+            self.segment_options = segment_options or {}
+            self._tables: Dict[str, SegmentedTable] = {}
+            self._tables_lock = threading.Lock()
         
         logger.info(f"DataManager initialized with {storage_type} storage")
     
     def _init_sqlite(self):
         """Initialize SQLite database with required tables."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 # Create campaigns table
@@ -128,6 +275,7 @@ class DataManager:
                         completed_at TEXT,
                         result TEXT,
                         error_message TEXT,
+                        parameters TEXT,
                         created_at TEXT DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
@@ -145,7 +293,14 @@ class DataManager:
                     )
                 """)
                 
-                conn.commit()
+                # Databases created before tasks.parameters existed
+                task_columns = {row["name"] for row in cursor.execute("PRAGMA table_info(tasks)")}
+                if "parameters" not in task_columns:
+                    cursor.execute("ALTER TABLE tasks ADD COLUMN parameters TEXT")
+                
+                for index_name, table, columns in SQLITE_INDEXES:
+                    cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})")
+                
                 logger.info("SQLite database initialized successfully")
                 
         except Exception as e:
@@ -186,49 +341,82 @@ class DataManager:
                 execution_time=execution_time
             )
     
+    def store_many(self, 
+                   table: str, 
+                   records: Sequence[Dict[str, Any]], 
+                   upsert: bool = False) -> DataResult:
+        """
+        Store several records in the specified table in one transaction.
+        
+        Args:
+            table: Table name
+            records: Records to store
+            upsert: Whether to update records that already exist
+            
+        Returns:
+            DataResult with the number of stored rows
+        """
+        start_time = datetime.now()
+        
+        try:
+            if self.storage_type == "sqlite":
+                return self._store_sqlite_many(table, records, upsert)
+            elif self.storage_type == "file":
+                return self._store_file_many(table, records, upsert)
+            else:
+                raise ValueError(f"Unsupported storage type: {self.storage_type}")
+                
+        except Exception as e:
+            execution_time = (datetime.now() - start_time).total_seconds()
+            logger.error(f"Failed to store data: {str(e)}")
+            return DataResult(
+                success=False,
+                error_message=str(e),
+                execution_time=execution_time
+            )
+    
+    def _get_table_columns(self, conn: sqlite3.Connection, table: str) -> frozenset:
+        """Column names of a table (cached; the schema is fixed at startup)."""
+        columns = self._table_columns.get(table)
+        if columns is None:
+            columns = frozenset(row["name"] for row in conn.execute(f"PRAGMA table_info({table})"))
+            if columns:
+                self._table_columns[table] = columns
+        return columns
+    
+    def _prepare_row(self, data: Dict[str, Any], table_columns: frozenset, now: str) -> Dict[str, Any]:
+        """Add missing timestamps the table has and serialize JSON values."""
+        row = {}
+        for key, value in data.items():
+            row[key] = json.dumps(value) if isinstance(value, (dict, list)) else value
+        
+        for timestamp in ('created_at', 'updated_at'):
+            if timestamp not in row and (not table_columns or timestamp in table_columns):
+                row[timestamp] = now
+        return row
+    
     def _store_sqlite(self, table: str, data: Dict[str, Any], upsert: bool) -> DataResult:
         """Store data in SQLite database."""
+        return self._store_sqlite_many(table, [data], upsert)
+    
+    def _store_sqlite_many(self, table: str, records: Sequence[Dict[str, Any]], upsert: bool) -> DataResult:
+        """Store records in SQLite with one executemany per column layout."""
         start_time = datetime.now()
+        row_count = 0
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Add timestamp if not present
-            if 'created_at' not in data:
-                data['created_at'] = datetime.now().isoformat()
-            if 'updated_at' not in data:
-                data['updated_at'] = datetime.now().isoformat()
-            
-            # Convert complex objects to JSON strings
-            processed_data = {}
-            for key, value in data.items():
-                if isinstance(value, (dict, list)):
-                    processed_data[key] = json.dumps(value)
-                else:
-                    processed_data[key] = value
-            
-            # Build SQL query
-            columns = list(processed_data.keys())
-            placeholders = ['?' * len(columns)]
-            values = list(processed_data.values())
+        with self.pool.connection() as conn:
+            table_columns = self._get_table_columns(conn, table)
+            now = datetime.now().isoformat()
             
-            if upsert:
-                # Use INSERT OR REPLACE for SQLite
-                sql = f"""
-                    INSERT OR REPLACE INTO {table} 
-                    ({', '.join(columns)}) 
-                    VALUES ({', '.join(['?'] * len(columns))})
-                """
-            else:
-                sql = f"""
-                    INSERT INTO {table} 
-                    ({', '.join(columns)}) 
-                    VALUES ({', '.join(['?'] * len(columns))})
-                """
+            # Records with the same columns share one prepared INSERT
+            batches: Dict[Tuple[str, ...], List[List[Any]]] = {}
+            for data in records:
+                row = self._prepare_row(data, table_columns, now)
+                batches.setdefault(tuple(row), []).append(list(row.values()))
             
-            cursor.execute(sql, values)
-            row_count = cursor.rowcount
-            conn.commit()
+            for columns, values in batches.items():
+                cursor = conn.executemany(_insert_sql(table, columns, upsert), values)
+                row_count += cursor.rowcount
         
         execution_time = (datetime.now() - start_time).total_seconds()
         
@@ -239,45 +427,56 @@ class DataManager:
             metadata={"table": table, "operation": "insert"}
         )
     
+    def _get_table(self, table: str) -> SegmentedTable:
+        """Open (once) the segmented store of a table, importing a legacy JSON file."""
+        segmented = self._tables.get(table)
+        if segmented is not None:
+            return segmented
+        
+        with self._tables_lock:
+            segmented = self._tables.get(table)
+            if segmented is None:
+                table_dir = self.json_dir / table
+                is_new = not table_dir.exists()
+                segmented = SegmentedTable(table_dir, indexed_fields=self.indexed_fields, **self.segment_options)
+                
+                legacy_path = self.json_dir / f"{table}.json"
+                if is_new and legacy_path.exists():
+                    with open(legacy_path, 'r') as f:
+                        legacy_records = json.load(f)
+                    for record in legacy_records:
+                        if 'id' not in record:
+                            record['id'] = segmented.next_id()
+                    segmented.put_many(legacy_records, upsert=True)
+                    logger.info(f"Imported {len(legacy_records)} records from {legacy_path}")
+                
+                self._tables[table] = segmented
+        return segmented
+    
     def _store_file(self, table: str, data: Dict[str, Any], upsert: bool) -> DataResult:
-        """Store data in JSON file."""
+        """Store data in the table's append-only segments."""
+        return self._store_file_many(table, [data], upsert)
+    
+    def _store_file_many(self, table: str, records: Sequence[Dict[str, Any]], upsert: bool) -> DataResult:
+        """Append records to the table's active segment in a single write."""
         start_time = datetime.now()
         
-        file_path = self.json_dir / f"{table}.json"
-        
-        # Load existing data
-        existing_data = []
-        if file_path.exists():
-            with open(file_path, 'r') as f:
-                existing_data = json.load(f)
+        segmented = self._get_table(table)
         
         # Add timestamp and ID if not present
-        if 'id' not in data:
-            data['id'] = len(existing_data) + 1
-        if 'created_at' not in data:
-            data['created_at'] = datetime.now().isoformat()
-        
-        # Handle upsert
-        if upsert and 'id' in data:
-            # Find and update existing record
-            for i, record in enumerate(existing_data):
-                if record.get('id') == data['id']:
-                    existing_data[i] = data
-                    break
-            else:
-                existing_data.append(data)
-        else:
-            existing_data.append(data)
+        for data in records:
+            if 'id' not in data:
+                data['id'] = segmented.next_id()
+            if 'created_at' not in data:
+                data['created_at'] = datetime.now().isoformat()
         
-        # Save back to file
-        with open(file_path, 'w') as f:
-            json.dump(existing_data, f, indent=2, default=str)
+        row_count = segmented.put_many(list(records), upsert=upsert)
         
         execution_time = (datetime.now() - start_time).total_seconds()
         
         return DataResult(
             success=True,
-            row_count=1,
+            row_count=row_count,
             execution_time=execution_time,
             metadata={"table": table, "operation": "file_store"}
         )
@@ -315,8 +514,7 @@ class DataManager:
         """Query data from SQLite database."""
         start_time = datetime.now()
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             
             # Build SQL query
@@ -345,19 +543,21 @@ class DataManager:
             cursor.execute(sql, params)
             rows = cursor.fetchall()
             
-            # Convert rows to dictionaries and parse JSON fields
+            # Convert rows to dictionaries and parse the declared JSON columns
+            json_columns = JSON_COLUMNS.get(query.table, frozenset())
+            if rows:
+                json_columns = json_columns.intersection(rows[0].keys())
+            
             result_data = []
             for row in rows:
                 row_dict = dict(row)
-                
-                # Try to parse JSON fields
-                for key, value in row_dict.items():
-                    if isinstance(value, str) and value.startswith(('{', '[')):
+                for key in json_columns:
+                    value = row_dict[key]
+                    if isinstance(value, str):
                         try:
                             row_dict[key] = json.loads(value)
                         except json.JSONDecodeError:
                             pass  # Keep as string if not valid JSON
-                
                 result_data.append(row_dict)
         
         execution_time = (datetime.now() - start_time).total_seconds()
@@ -370,55 +570,57 @@ class DataManager:
             metadata={"table": query.table, "operation": "query"}
         )
     
-    def _query_file(self, query: DataQuery) -> DataResult:
-        """Query data from JSON file."""
-        start_time = datetime.now()
-        
-        file_path = self.json_dir / f"{query.table}.json"
-        
-        if not file_path.exists():
-            return DataResult(
-                success=True,
-                data=[],
-                row_count=0,
-                execution_time=0.0,
-                metadata={"table": query.table, "operation": "file_query"}
-            )
+    def iter_data(self, query: DataQuery) -> Iterator[Dict[str, Any]]:
+        """
+        Stream query results without materializing the whole result set.
         
-        with open(file_path, 'r') as f:
-            all_data = json.load(f)
+        In file storage records are read lazily from the segments; ordered
+        queries with a limit only keep the top ``offset + limit`` records.
         
-        # Apply filters
-        filtered_data = all_data
-        if query.filters:
-            filtered_data = [
-                record for record in all_data
-                if all(
-                    record.get(key) == value 
-                    for key, value in query.filters.items()
-                )
-            ]
+        Args:
+            query: DataQuery object with query parameters
+            
+        Yields:
+            Matching records
+        """
+        if self.storage_type == "sqlite":
+            yield from self._query_sqlite(query).data
+        elif self.storage_type == "file":
+            yield from self._iter_file(query)
+        else:
+            raise ValueError(f"Unsupported storage type: {self.storage_type}")
+    
+    def _iter_file(self, query: DataQuery) -> Iterator[Dict[str, Any]]:
+        """Stream filtered, ordered and paginated records from segments."""
+        records = self._get_table(query.table).iter_records(query.filters)
+        offset = query.offset or 0
         
         # Apply ordering
         if query.order_by:
             reverse = query.order_direction.upper() == "DESC"
-            filtered_data.sort(
-                key=lambda x: x.get(query.order_by, 0),
-                reverse=reverse
-            )
+            sort_key = lambda x: x.get(query.order_by, 0)
+            if query.limit:
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                records = iter(select(offset + query.limit, records, key=sort_key))
+            else:
+                records = iter(sorted(records, key=sort_key, reverse=reverse))
         
         # Apply pagination
-        if query.offset:
-            filtered_data = filtered_data[query.offset:]
-        if query.limit:
-            filtered_data = filtered_data[:query.limit]
+        stop = offset + query.limit if query.limit else None
+        records = itertools.islice(records, offset, stop)
         
         # Select fields
-        if query.fields:
-            filtered_data = [
-                {field: record.get(field) for field in query.fields}
-                for record in filtered_data
-            ]
+        for record in records:
+            if query.fields:
+                yield {field: record.get(field) for field in query.fields}
+            else:
+                yield record
+    
+    def _query_file(self, query: DataQuery) -> DataResult:
+        """Query data from the table's segments."""
+        start_time = datetime.now()
+        
+        filtered_data = list(self._iter_file(query))
         
         execution_time = (datetime.now() - start_time).total_seconds()
         
@@ -464,7 +666,7 @@ class DataManager:
         """Delete data from SQLite database."""
         start_time = datetime.now()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             
             where_conditions = []
@@ -476,7 +678,6 @@ class DataManager:
             sql = f"DELETE FROM {table} WHERE {' AND '.join(where_conditions)}"
             cursor.execute(sql, params)
             row_count = cursor.rowcount
-            conn.commit()
         
         execution_time = (datetime.now() - start_time).total_seconds()
         
@@ -488,37 +689,12 @@ class DataManager:
         )
     
     def _delete_file(self, table: str, filters: Dict[str, Any]) -> DataResult:
-        """Delete data from JSON file."""
+        """Delete data by appending tombstones to the table's segments."""
         start_time = datetime.now()
         
-        file_path = self.json_dir / f"{table}.json"
-        
-        if not file_path.exists():
-            return DataResult(
-                success=True,
-                row_count=0,
-                execution_time=0.0,
-                metadata={"table": table, "operation": "file_delete"}
-            )
-        
-        with open(file_path, 'r') as f:
-            all_data = json.load(f)
-        
-        # Filter out records to delete
-        original_count = len(all_data)
-        remaining_data = [
-            record for record in all_data
-            if not all(
-                record.get(key) == value 
-                for key, value in filters.items()
-            )
-        ]
-        
-        deleted_count = original_count - len(remaining_data)
-        
-        # Save remaining data
-        with open(file_path, 'w') as f:
-            json.dump(remaining_data, f, indent=2, default=str)
+        segmented = self._get_table(table)
+        keys = [record['id'] for record in segmented.iter_records(filters)]
+        deleted_count = segmented.delete_keys(keys)
         
         execution_time = (datetime.now() - start_time).total_seconds()
         
@@ -529,6 +705,21 @@ class DataManager:
             metadata={"table": table, "operation": "file_delete"}
         )
     
+    def compact(self, table: Optional[str] = None) -> int:
+        """
+        Compact file storage segments now instead of waiting for the background trigger.
+        
+        Args:
+            table: Table to compact (all opened tables when omitted)
+            
+        Returns:
+            Number of bytes reclaimed
+        """
+        if self.storage_type != "file":
+            return 0
+        tables = [self._get_table(table)] if table else list(self._tables.values())
+        return sum(segmented.compact() for segmented in tables)
+    
     def get_storage_info(self) -> Dict[str, Any]:
         """Get information about the storage system."""
         info = {
@@ -542,16 +733,28 @@ class DataManager:
             
             # Get table information
             try:
-                with sqlite3.connect(self.db_path) as conn:
+                with self.pool.connection() as conn:
                     cursor = conn.cursor()
                     cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
                     tables = [row[0] for row in cursor.fetchall()]
                     info["tables"] = tables
+                    info["journal_mode"] = conn.execute("PRAGMA journal_mode").fetchone()[0]
             except Exception as e:
                 info["error"] = str(e)
                 
         elif self.storage_type == "file":
             info["json_directory"] = str(self.json_dir)
-            info["files"] = [f.name for f in self.json_dir.glob("*.json")]
+            info["files"] = sorted(
+                str(f.relative_to(self.json_dir)) for f in self.json_dir.glob("*/seg-*.jsonl")
+            )
+            info["tables"] = {name: segmented.stats() for name, segmented in self._tables.items()}
         
-        return info
\ No newline at end of file
+        return info
+    
+    def close(self):
+        """Release pooled database connections and open segment files."""
+        if self.storage_type == "sqlite":
+            self.pool.close()
+        elif self.storage_type == "file":
+            for segmented in self._tables.values():
+                segmented.close()
@@ -0,0 +1,538 @@
+"""
+Append-only segmented storage engine for file-based DataManager storage.
+
+Each table is a directory of JSON-lines segments. Writes append one line per
+record (or tombstone) to the active segment; when a segment is full it is
+sealed with a footer line holding the index entries of its records, so the
+in-memory primary-key and filter-field indexes can be rebuilt on startup
+without reading the records themselves. Superseded records are reclaimed by
+background compaction.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+import json
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_INDEXED_FIELDS = (
+    "campaign_id",
+    "model_type",
+    "optimization_type",
+    "task_type",
+    "status",
+    "prediction_id",
+    "optimization_id",
+    "task_id",
+)
+
+DEFAULT_MAX_SEGMENT_BYTES = 16 * 1024 * 1024
+DEFAULT_COMPACTION_MIN_BYTES = 4 * 1024 * 1024
+DEFAULT_COMPACTION_RATIO = 0.5
+
+SEGMENT_SUFFIX = ".jsonl"
+_FOOTER_READ_CHUNK = 64 * 1024
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+@dataclass
+class SegmentEntry:
+    """Location and indexed field values of the live version of a record."""
+    segment: int
+    offset: int
+    length: int
+    seq: int
+    version: int
+    fields: Dict[str, Any]
+
+
+def _segment_name(segment: int) -> str:
+    return f"seg-{segment:08d}{SEGMENT_SUFFIX}"
+
+
+def _read_last_line(path: Path) -> Optional[bytes]:
+    """Return the last complete line of a file, reading backwards in chunks."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        if end == 0:
+            return None
+
+        f.seek(end - 1)
+        if f.read(1) != b"\n":
+            return None  # Torn write: no complete trailing line
+
+        buffer = b""
+        position = end - 1
+        while position > 0:
+            step = min(_FOOTER_READ_CHUNK, position)
+            position -= step
+            f.seek(position)
+            buffer = f.read(step) + buffer
+            newline = buffer.rfind(b"\n")
+            if newline >= 0:
+                return buffer[newline + 1:]
+
+        f.seek(0)
+        return f.read(end - 1)
+
+
+class SegmentedTable:
+    """
+    Log-structured storage for one table.
+
+    Records are keyed by their ``id``. Every put or delete is appended with a
+    monotonically increasing version; on rebuild the highest version of each
+    key wins, so segment order does not matter and compaction can rewrite
+    sealed segments while new writes keep going to the active one. Each key
+    also keeps the sequence number of its first insert, which defines the
+    iteration order (updates keep their position, like the old JSON files).
+    """
+
+    def __init__(self,
+                 directory: Path,
+                 indexed_fields: Iterable[str] = DEFAULT_INDEXED_FIELDS,
+                 max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES,
+                 compaction_min_bytes: int = DEFAULT_COMPACTION_MIN_BYTES,
+                 compaction_ratio: float = DEFAULT_COMPACTION_RATIO,
+                 fsync: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.indexed_fields = tuple(indexed_fields)
+        self.max_segment_bytes = max_segment_bytes
+        self.compaction_min_bytes = compaction_min_bytes
+        self.compaction_ratio = compaction_ratio
+        self.fsync = fsync
+
+        self._lock = threading.RLock()
+        self._entries: Dict[Any, SegmentEntry] = {}
+        self._field_index: Dict[str, Dict[Any, Set[Any]]] = {field: {} for field in self.indexed_fields}
+        self._segments: Dict[int, Path] = {}
+        self._active_segment = 0
+        self._active_file = None
+        self._active_size = 0
+        self._active_footer: List[list] = []
+        self._next_seq = 1
+        self._next_version = 1
+        self._max_id = 0
+        self._live_bytes = 0
+        self._segment_bytes: Dict[int, int] = {}
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Startup
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        """Rebuild the indexes from segment footers (scanning unsealed segments)."""
+        latest: Dict[Any, Tuple[int, Optional[SegmentEntry]]] = {}
+        unsealed: Dict[int, List[list]] = {}
+
+        for tmp_path in self.directory.glob(f"seg-*{SEGMENT_SUFFIX}.tmp"):
+            tmp_path.unlink()  # Output of an interrupted compaction
+
+        for path in sorted(self.directory.glob(f"seg-*{SEGMENT_SUFFIX}")):
+            segment = int(path.stem.split("-")[1])
+            self._segments[segment] = path
+            entries = self._read_footer(path)
+            if entries is None:
+                entries = unsealed[segment] = self._scan_segment(path)
+
+            for key, seq, version, offset, length, deleted, fields in entries:
+                self._segment_bytes[segment] = self._segment_bytes.get(segment, 0) + length
+                current = latest.get(key)
+                if current is None or version > current[0]:
+                    entry = None if deleted else SegmentEntry(segment, offset, length, seq, version, fields)
+                    latest[key] = (version, entry)
+                self._next_version = max(self._next_version, version + 1)
+                self._next_seq = max(self._next_seq, seq + 1)
+
+        live = sorted(
+            ((key, entry) for key, (_, entry) in latest.items() if entry is not None),
+            key=lambda item: item[1].seq
+        )
+        for key, entry in live:
+            self._index_entry(key, entry)
+
+        # Keep appending to the newest segment if it is unsealed; seal any others
+        active = max(self._segments, default=None)
+        for segment, entries in unsealed.items():
+            if segment != active:
+                with open(self._segments[segment], "ab") as f:
+                    f.write(self._footer_line(entries))
+
+        if active in unsealed:
+            self._active_segment = active
+            self._active_footer = unsealed[active]
+            self._active_file = open(self._segments[active], "ab")
+            self._active_size = self._active_file.tell()
+        else:
+            self._open_new_segment()
+
+        logger.info(f"Loaded table {self.directory.name}: {len(self._entries)} records "
+                    f"in {len(self._segments)} segments")
+
+    def _read_footer(self, path: Path) -> Optional[List[list]]:
+        last_line = _read_last_line(path)
+        if not last_line or not last_line.startswith(b'{"footer"'):
+            return None
+        return json.loads(last_line)["footer"]
+
+    def _scan_segment(self, path: Path) -> List[list]:
+        """Read the index entries of an unsealed segment, dropping a torn tail."""
+        entries = []
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete line")
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Truncating torn write in {path} at offset {offset}")
+                    break
+                entries.append(self._footer_entry(record, offset, len(line)))
+                offset += len(line)
+
+        if offset != path.stat().st_size:
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        return entries
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def _extract_fields(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        fields = {}
+        for field in self.indexed_fields:
+            value = data.get(field)
+            if isinstance(value, _SCALAR_TYPES):
+                fields[field] = value
+        return fields
+
+    def _footer_entry(self, record: Dict[str, Any], offset: int, length: int) -> list:
+        deleted = record.get("x", 0)
+        fields = {} if deleted else self._extract_fields(record["d"])
+        return [record["k"], record.get("s", 0), record["v"], offset, length, deleted, fields]
+
+    @staticmethod
+    def _footer_line(entries: List[list]) -> bytes:
+        return json.dumps({"footer": entries}, separators=(",", ":"), default=str).encode() + b"\n"
+
+    def _index_entry(self, key: Any, entry: SegmentEntry):
+        previous = self._entries.get(key)
+        if previous is not None:
+            self._unindex_fields(key, previous)
+            self._live_bytes -= previous.length
+        self._entries[key] = entry
+        self._live_bytes += entry.length
+        for field, value in entry.fields.items():
+            self._field_index[field].setdefault(value, set()).add(key)
+        if isinstance(key, int) and not isinstance(key, bool):
+            self._max_id = max(self._max_id, key)
+
+    def _unindex_fields(self, key: Any, entry: SegmentEntry):
+        for field, value in entry.fields.items():
+            keys = self._field_index[field].get(value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._field_index[field][value]
+
+    def _remove_entry(self, key: Any):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._unindex_fields(key, entry)
+            self._live_bytes -= entry.length
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._max_id += 1
+            return self._max_id
+
+    def put_many(self, records: List[Dict[str, Any]], upsert: bool = False) -> int:
+        """
+        Append records keyed by their ``id`` in a single write.
+
+        Without ``upsert`` an id that already exists is an error and nothing
+        is written.
+        """
+        with self._lock:
+            if not upsert:
+                seen = set()
+                for data in records:
+                    key = data["id"]
+                    if key in self._entries or key in seen:
+                        raise ValueError(f"Record with id {key!r} already exists")
+                    seen.add(key)
+
+            lines = []
+            pending_seq: Dict[Any, int] = {}
+            for data in records:
+                key = data["id"]
+                existing = self._entries.get(key)
+                seq = existing.seq if existing is not None else pending_seq.get(key)
+                if seq is None:
+                    seq = self._next_seq
+                    self._next_seq += 1
+                pending_seq[key] = seq
+                record = {"k": key, "s": seq, "v": self._next_version, "d": data}
+                self._next_version += 1
+                lines.append((key, record, json.dumps(record, default=str).encode() + b"\n"))
+
+            self._append(lines)
+            return len(records)
+
+    def delete_keys(self, keys: Iterable[Any]) -> int:
+        """Append tombstones for the given keys."""
+        with self._lock:
+            lines = []
+            for key in keys:
+                if key in self._entries:
+                    record = {"k": key, "v": self._next_version, "x": 1}
+                    self._next_version += 1
+                    lines.append((key, record, json.dumps(record, default=str).encode() + b"\n"))
+            self._append(lines)
+            return len(lines)
+
+    def _append(self, lines: List[Tuple[Any, Dict[str, Any], bytes]]):
+        if not lines:
+            return
+        if self._closed:
+            raise RuntimeError(f"Table {self.directory.name} is closed")
+
+        self._active_file.write(b"".join(line for _, _, line in lines))
+        self._active_file.flush()
+        if self.fsync:
+            os.fsync(self._active_file.fileno())
+
+        offset = self._active_size
+        for key, record, line in lines:
+            footer_entry = self._footer_entry(record, offset, len(line))
+            self._active_footer.append(footer_entry)
+            if record.get("x"):
+                self._remove_entry(key)
+            else:
+                self._index_entry(key, SegmentEntry(
+                    self._active_segment, offset, len(line), record["s"], record["v"], footer_entry[6]
+                ))
+            offset += len(line)
+        self._segment_bytes[self._active_segment] = self._segment_bytes.get(self._active_segment, 0) + offset - self._active_size
+        self._active_size = offset
+
+        if self._active_size >= self.max_segment_bytes:
+            self._roll_segment()
+        self._maybe_schedule_compaction()
+
+    def _open_new_segment(self):
+        self._active_segment = max(self._segments, default=0) + 1
+        path = self.directory / _segment_name(self._active_segment)
+        self._segments[self._active_segment] = path
+        self._active_file = open(path, "ab")
+        self._active_size = 0
+        self._active_footer = []
+
+    def _roll_segment(self):
+        """Seal the active segment with its footer and start a new one."""
+        self._active_file.write(self._footer_line(self._active_footer))
+        self._active_file.flush()
+        if self.fsync:
+            os.fsync(self._active_file.fileno())
+        self._active_file.close()
+        self._open_new_segment()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _candidate_keys(self, filters: Optional[Dict[str, Any]]) -> List[Any]:
+        """Keys that may match ``filters``, in insertion order, using the field indexes."""
+        with self._lock:
+            candidates: Optional[Set[Any]] = None
+            for field, value in (filters or {}).items():
+                if field in self._field_index and isinstance(value, _SCALAR_TYPES):
+                    keys = self._field_index[field].get(value, set())
+                    candidates = set(keys) if candidates is None else candidates & keys
+                    if not candidates:
+                        return []
+
+            if candidates is None:
+                return list(self._entries)
+            if len(candidates) * 4 < len(self._entries):
+                return sorted(candidates, key=lambda key: self._entries[key].seq)
+            return [key for key in self._entries if key in candidates]
+
+    def _read_record(self, key: Any, handles: Dict[int, Any]) -> Optional[Dict[str, Any]]:
+        for _ in range(2):
+            with self._lock:
+                entry = self._entries.get(key)
+                path = self._segments.get(entry.segment) if entry is not None else None
+            if entry is None or path is None:
+                return None
+            try:
+                handle = handles.get(entry.segment)
+                if handle is None:
+                    handle = handles[entry.segment] = open(path, "rb")
+                handle.seek(entry.offset)
+                return json.loads(handle.read(entry.length))["d"]
+            except FileNotFoundError:
+                continue  # Segment compacted away meanwhile; look the key up again
+        return None
+
+    def iter_records(self, filters: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Stream the records matching ``filters``, reading them lazily from the segments."""
+        handles: Dict[int, Any] = {}
+        try:
+            for key in self._candidate_keys(filters):
+                record = self._read_record(key, handles)
+                if record is None:
+                    continue
+                if filters and not all(record.get(field) == value for field, value in filters.items()):
+                    continue
+                yield record
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes of records (live or superseded) across all segments, footers excluded."""
+        return sum(self._segment_bytes.values())
+
+    @property
+    def dead_bytes(self) -> int:
+        return self.total_bytes - self._live_bytes
+
+    def _needs_compaction(self) -> bool:
+        dead = self.dead_bytes
+        return (dead >= self.compaction_min_bytes
+                and dead >= self.total_bytes * self.compaction_ratio)
+
+    def _maybe_schedule_compaction(self):
+        if not self._needs_compaction():
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(
+            target=self.compact, name=f"compact-{self.directory.name}", daemon=True
+        )
+        self._compaction_thread.start()
+
+    def compact(self) -> int:
+        """
+        Rewrite every sealed segment into new segments holding only live records.
+
+        Returns the number of bytes reclaimed.
+        """
+        with self._lock:
+            if self._closed:
+                return 0
+            if self._active_size:
+                self._roll_segment()
+            sealed = {segment: path for segment, path in self._segments.items()
+                      if segment != self._active_segment}
+            snapshot = [(key, entry) for key, entry in self._entries.items() if entry.segment in sealed]
+            sealed_bytes = sum(self._segment_bytes.pop(segment, 0) for segment in sealed)
+
+        if not sealed:
+            return 0
+
+        # Outputs get fresh numbers once written; versions, not segment
+        # order, decide which copy of a record is current
+        outputs: List[Tuple[Path, int, List[Tuple[Any, SegmentEntry]]]] = []
+        handles: Dict[int, Any] = {}
+        try:
+            out_file = None
+            for key, entry in snapshot:
+                if out_file is None or out_size >= self.max_segment_bytes:
+                    if out_file is not None:
+                        out_file.write(self._footer_line(out_footer))
+                        out_file.close()
+                        outputs[-1] = (outputs[-1][0], out_size, moved)
+                    path = self.directory / f"seg-compact-{len(outputs):04d}{SEGMENT_SUFFIX}.tmp"
+                    out_file = open(path, "wb")
+                    out_size, out_footer, moved = 0, [], []
+                    outputs.append((path, 0, moved))
+
+                handle = handles.get(entry.segment)
+                if handle is None:
+                    handle = handles[entry.segment] = open(sealed[entry.segment], "rb")
+                handle.seek(entry.offset)
+                line = handle.read(entry.length)
+                out_file.write(line)
+                out_footer.append([key, entry.seq, entry.version, out_size, len(line), 0, entry.fields])
+                moved.append((key, SegmentEntry(0, out_size, len(line), entry.seq, entry.version, entry.fields)))
+                out_size += len(line)
+
+            if out_file is not None:
+                outputs[-1] = (outputs[-1][0], out_size, moved)
+                out_file.write(self._footer_line(out_footer))
+                if self.fsync:
+                    out_file.flush()
+                    os.fsync(out_file.fileno())
+                out_file.close()
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+        with self._lock:
+            for tmp_path, size, moved in outputs:
+                segment = max(self._segments) + 1
+                path = self.directory / _segment_name(segment)
+                os.replace(tmp_path, path)
+                self._segments[segment] = path
+                self._segment_bytes[segment] = size
+                for key, new_entry in moved:
+                    current = self._entries.get(key)
+                    # Skip keys rewritten or deleted while compacting
+                    if current is not None and current.version == new_entry.version:
+                        new_entry.segment = segment
+                        self._entries[key] = new_entry
+
+            for segment, path in sealed.items():
+                del self._segments[segment]
+                path.unlink()
+
+        reclaimed = sealed_bytes - sum(size for _, size, _ in outputs)
+        logger.info(f"Compacted {len(sealed)} segments of table {self.directory.name}, "
+                    f"reclaimed {reclaimed} bytes")
+        return reclaimed
+
+    def close(self):
+        """Flush the active segment and wait for a running compaction."""
+        thread = self._compaction_thread
+        if thread is not None and thread.is_alive():
+            thread.join()
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._active_file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "records": len(self._entries),
+                "segments": len(self._segments),
+                "total_bytes": self.total_bytes,
+                "dead_bytes": self.dead_bytes,
+            }
@@ -3,6 +3,7 @@ Analytics service layer for ML predictions and optimizations.
 """
 
 from typing import Dict, List, Any, Optional
+import asyncio
 import logging
 from datetime import datetime
 
@@ -13,6 +14,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from core.analytics import MLPredictor, MLOptimizer, PredictionResult, OptimizationResult
 from core.analytics.genetic_optimizer import GeneticOptimizer, GeneticConfig
 from core.storage import DataManager, DataQuery
+from .optimization_jobs import OptimizationJob, OptimizationJobManager, optimization_jobs
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +25,13 @@ class AnalyticsService:
     Provides high-level interface for ML predictions and optimizations.
     """
     
-    def __init__(self, data_manager: Optional[DataManager] = None):
+    def __init__(self, data_manager: Optional[DataManager] = None,
+                 job_manager: Optional[OptimizationJobManager] = None):
         self.predictor = MLPredictor()
         self.optimizer = MLOptimizer()
         self.genetic_optimizer = GeneticOptimizer()
         self.data_manager = data_manager or DataManager()
+        self.job_manager = job_manager or optimization_jobs
         self.models = {
             "linear": MLPredictor("linear"),
             "sales_forecast": MLPredictor("sales"),
@@ -136,9 +140,13 @@ class AnalyticsService:
         """
         try:
             if optimization_method == "genetic":
-                result = self.genetic_optimizer.optimize_budget_allocation(
-                    campaigns, total_budget, objective
-                )
+                # CPU-bound: run in the job process pool so the event loop stays free
+                job = self._submit_genetic_job("budget_allocation", {
+                    "campaigns": campaigns,
+                    "total_budget": total_budget,
+                    "objective": objective
+                })
+                result = await self.job_manager.wait(job.job_id)
             else:
                 result = self.optimizer.optimize_budget_allocation(
                     campaigns, total_budget, objective
@@ -158,6 +166,91 @@ class AnalyticsService:
             logger.error(f"Budget allocation optimization failed: {str(e)}")
             raise
     
+    async def submit_budget_optimization_job(self,
+                                             campaigns: List[Dict[str, Any]],
+                                             total_budget: float,
+                                             objective: str = "maximize_roi") -> OptimizationJob:
+        """
+        Start a genetic budget allocation in the background.
+        
+        Args:
+            campaigns: List of campaign configurations
+            total_budget: Total budget to allocate
+            objective: Optimization objective
+            
+        Returns:
+            OptimizationJob to poll; identical in-flight requests share a job
+        """
+        job = self._submit_genetic_job("budget_allocation", {
+            "campaigns": campaigns,
+            "total_budget": total_budget,
+            "objective": objective
+        })
+        self._store_when_done(job, "budget_allocation", {
+            "total_budget": total_budget,
+            "campaigns_count": len(campaigns),
+            "objective": objective,
+            "optimization_method": "genetic"
+        })
+        return job
+    
+    async def submit_parameter_optimization_job(self,
+                                                current_params: Dict[str, Any],
+                                                performance_history: List[Dict[str, Any]]) -> OptimizationJob:
+        """
+        Start a genetic parameter optimization in the background.
+        
+        Args:
+            current_params: Current campaign parameters
+            performance_history: Historical performance data
+            
+        Returns:
+            OptimizationJob to poll; identical in-flight requests share a job
+        """
+        job = self._submit_genetic_job("parameter_optimization", {
+            "current_params": current_params,
+            "performance_history": performance_history
+        })
+        self._store_when_done(job, "parameter_optimization", {
+            "history_data_points": len(performance_history),
+            "parameters_count": len(current_params),
+            "optimization_method": "genetic"
+        })
+        return job
+    
+    def get_optimization_job(self, job_id: str) -> Optional[OptimizationJob]:
+        """Get a background optimization job."""
+        return self.job_manager.get(job_id)
+    
+    def list_optimization_jobs(self, limit: int = 50) -> List[OptimizationJob]:
+        """List background optimization jobs, newest first."""
+        return self.job_manager.list_jobs(limit)
+    
+    def cancel_optimization_job(self, job_id: str) -> bool:
+        """Cancel a queued or running optimization job."""
+        return self.job_manager.cancel(job_id)
+    
+    def _submit_genetic_job(self, kind: str, payload: Dict[str, Any]) -> OptimizationJob:
+        return self.job_manager.submit(
+            kind, payload, self.genetic_optimizer.config, dict(self.genetic_optimizer.constraints)
+        )
+    
+    def _store_when_done(self, job: OptimizationJob, optimization_type: str, metadata: Dict[str, Any]):
+        """Store the job result once it finishes (only once per shared job)."""
+        if job.storage_scheduled:
+            return
+        job.storage_scheduled = True
+        
+        async def store():
+            try:
+                result = await self.job_manager.wait(job.job_id)
+            except Exception as e:
+                logger.info(f"Optimization job {job.job_id} ended without a result: {str(e)}")
+                return
+            await self._store_optimization_result(result, optimization_type, {**metadata, "job_id": job.job_id})
+        
+        self.job_manager.track(asyncio.create_task(store()))
+    
     async def optimize_keyword_selection(self, 
                                        available_keywords: List[Dict[str, Any]], 
                                        max_keywords: int = 20,
@@ -208,9 +301,11 @@ class AnalyticsService:
         """
         try:
             if optimization_method == "genetic":
-                result = self.genetic_optimizer.optimize_campaign_parameters(
-                    current_params, performance_history
-                )
+                job = self._submit_genetic_job("parameter_optimization", {
+                    "current_params": current_params,
+                    "performance_history": performance_history
+                })
+                result = await self.job_manager.wait(job.job_id)
             else:
                 result = self.optimizer.optimize_campaign_parameters(
                     current_params, performance_history
@@ -436,7 +531,13 @@ class AnalyticsService:
                 tournament_size=config.get("tournament_size", 3),
                 elitism_rate=config.get("elitism_rate", 0.1),
                 convergence_threshold=config.get("convergence_threshold", 1e-6),
-                max_stagnant_generations=config.get("max_stagnant_generations", 20)
+                max_stagnant_generations=config.get("max_stagnant_generations", 20),
+                vectorized=config.get("vectorized"),
+                random_seed=config.get("random_seed", 42),
+                islands=config.get("islands", 1),
+                migration_interval=config.get("migration_interval", 10),
+                migration_size=config.get("migration_size", 2),
+                island_workers=config.get("island_workers")
             )
             
             self.genetic_optimizer = GeneticOptimizer(genetic_config)
@@ -483,7 +584,8 @@ class AnalyticsService:
                     "crossover_rate": self.genetic_optimizer.config.crossover_rate,
                     "mutation_rate": self.genetic_optimizer.config.mutation_rate,
                     "tournament_size": self.genetic_optimizer.config.tournament_size,
-                    "elitism_rate": self.genetic_optimizer.config.elitism_rate
+                    "elitism_rate": self.genetic_optimizer.config.elitism_rate,
+                    "islands": self.genetic_optimizer.config.islands
                 },
                 "current_generation": self.genetic_optimizer.generation,
                 "population_size": len(self.genetic_optimizer.population),
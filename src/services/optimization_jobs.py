@@ -0,0 +1,393 @@
+"""
+Process-pool execution layer for CPU-bound optimization jobs.
+
+Genetic optimizations can take seconds to minutes of pure CPU time. Running
+them inside ``async def`` handlers blocks the event loop, so every other
+request (health checks included) waits. Jobs submitted here run in a
+process pool instead; the API gets a job ID immediately and can poll
+status/progress, stream the per-generation fitness history or cancel.
+"""
+
+from typing import Dict, List, Any, Optional, Set, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from enum import Enum
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.analytics.genetic_optimizer import GeneticOptimizer, GeneticConfig
+from core.analytics import OptimizationResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RETAINED_JOBS = 200
+REPORT_INTERVAL = 0.25  # seconds between progress flushes / cancellation checks in a worker
+
+
+class JobStatus(Enum):
+    """Optimization job status."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class JobCancelledError(Exception):
+    """Raised when awaiting a job that was cancelled."""
+
+
+@dataclass
+class OptimizationJob:
+    """State of a submitted optimization job."""
+    job_id: str
+    kind: str
+    request_key: str
+    max_generations: int
+    status: JobStatus = JobStatus.QUEUED
+    generation: int = 0
+    best_fitness: Optional[float] = None
+    fitness_history: List[Dict[str, float]] = field(default_factory=list)
+    result: Optional[OptimizationResult] = None
+    error_message: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    storage_scheduled: bool = False
+
+    @property
+    def progress(self) -> float:
+        if self.status == JobStatus.COMPLETED:
+            return 1.0
+        return min(1.0, len(self.fitness_history) / max(1, self.max_generations))
+
+    def to_dict(self, include_history: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status.value,
+            "progress": round(self.progress, 4),
+            "generation": self.generation,
+            "best_fitness": self.best_fitness,
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_history:
+            data["fitness_history"] = list(self.fitness_history)
+        if self.result is not None:
+            data["result"] = {
+                "optimized_parameters": self.result.optimized_parameters,
+                "expected_improvement": self.result.expected_improvement,
+                "confidence_score": self.result.confidence_score,
+                "optimization_method": self.result.optimization_method,
+                "iterations_used": self.result.iterations_used,
+                "timestamp": self.result.timestamp.isoformat(),
+                "metadata": self.result.metadata
+            }
+        return data
+
+
+# ---------- worker process side ----------
+
+_progress_queue = None
+_cancelled_jobs = None
+
+
+def _init_worker(progress_queue, cancelled_jobs):
+    global _progress_queue, _cancelled_jobs
+    _progress_queue = progress_queue
+    _cancelled_jobs = cancelled_jobs
+
+
+def run_optimization_job(job_id: str, kind: str, payload: Dict[str, Any], config: GeneticConfig,
+                         constraints: Dict[str, Dict[str, float]]) -> Tuple[OptimizationResult, List[Dict[str, float]]]:
+    """
+    Run one genetic optimization inside a pool worker, reporting every generation.
+
+    Returns:
+        The optimization result and the complete per-generation fitness history
+    """
+    optimizer = GeneticOptimizer(config)
+    if constraints:
+        optimizer.set_constraints(constraints)
+
+    # Generations are batched so a fast run does not do one IPC round trip each
+    history: List[Dict[str, float]] = []
+    pending: List[Dict[str, float]] = []
+    last_flush = [time.monotonic()]
+
+    def flush():
+        if pending and _progress_queue is not None:
+            _progress_queue.put(("progress", job_id, list(pending)))
+        pending.clear()
+        last_flush[0] = time.monotonic()
+
+    def report(generation: int, best_fitness: float, avg_fitness: float) -> bool:
+        entry = {"generation": generation, "best_fitness": best_fitness, "avg_fitness": avg_fitness}
+        history.append(entry)
+        pending.append(entry)
+        if time.monotonic() - last_flush[0] < REPORT_INTERVAL:
+            return False
+        flush()
+        return _cancelled_jobs is not None and job_id in _cancelled_jobs
+
+    optimizer.progress_callback = report
+    if _progress_queue is not None:
+        _progress_queue.put(("started", job_id, None))
+
+    try:
+        if kind == "budget_allocation":
+            result = optimizer.optimize_budget_allocation(
+                payload["campaigns"], payload["total_budget"], payload.get("objective", "maximize_roi")
+            )
+        elif kind == "parameter_optimization":
+            result = optimizer.optimize_campaign_parameters(payload["current_params"], payload["performance_history"])
+        else:
+            raise ValueError(f"Unknown optimization job kind: {kind}")
+        return result, history
+    finally:
+        flush()
+
+
+# ---------- API process side ----------
+
+class OptimizationJobManager:
+    """
+    Runs genetic optimizations in a process pool and tracks their progress.
+
+    Identical requests (same kind, payload, config and constraints) submitted
+    while one is still queued or running share the same job. Cancellation is
+    cooperative: queued jobs are dropped, running jobs stop at the next
+    generation and keep the best solution found so far.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_retained_jobs: int = DEFAULT_MAX_RETAINED_JOBS):
+        # Leave one core for the event loop
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_retained_jobs = max_retained_jobs
+        self.jobs: "OrderedDict[str, OptimizationJob]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._inflight: Dict[str, str] = {}  # request_key -> job_id
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._sync_manager = None
+        self._progress_queue = None
+        self._cancelled_jobs = None
+        self._pump: Optional[threading.Thread] = None
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._closed = False
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._sync_manager = multiprocessing.Manager()
+            self._progress_queue = self._sync_manager.Queue()
+            self._cancelled_jobs = self._sync_manager.dict()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self._progress_queue, self._cancelled_jobs)
+            )
+            self._closed = False
+            self._pump = threading.Thread(target=self._pump_progress, name="optimization-progress", daemon=True)
+            self._pump.start()
+        return self._executor
+
+    @staticmethod
+    def request_key(kind: str, payload: Dict[str, Any], config: GeneticConfig,
+                    constraints: Dict[str, Dict[str, float]]) -> str:
+        raw = json.dumps(
+            {"kind": kind, "payload": payload, "config": config.__dict__, "constraints": constraints},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def submit(self, kind: str, payload: Dict[str, Any], config: GeneticConfig,
+               constraints: Optional[Dict[str, Dict[str, float]]] = None) -> OptimizationJob:
+        """
+        Submit a job, or return the in-flight job for an identical request.
+
+        Args:
+            kind: "budget_allocation" or "parameter_optimization"
+            payload: Arguments of the optimization method
+            config: Genetic algorithm configuration
+            constraints: Optimization constraints
+
+        Returns:
+            The (possibly shared) OptimizationJob
+        """
+        constraints = constraints or {}
+        key = self.request_key(kind, payload, config, constraints)
+
+        with self._lock:
+            job_id = self._inflight.get(key)
+            if job_id is not None:
+                logger.info(f"Reusing in-flight optimization job {job_id}")
+                return self.jobs[job_id]
+
+            max_generations = config.max_generations
+            if kind == "parameter_optimization":
+                max_generations = min(50, max_generations)
+            job = OptimizationJob(
+                job_id=str(uuid.uuid4()),
+                kind=kind,
+                request_key=key,
+                max_generations=max_generations
+            )
+            self.jobs[job.job_id] = job
+            self._inflight[key] = job.job_id
+
+            future = self._ensure_executor().submit(
+                run_optimization_job, job.job_id, kind, payload, config, constraints
+            )
+            self._futures[job.job_id] = future
+
+        future.add_done_callback(lambda fut, job_id=job.job_id: self._on_done(job_id, fut))
+        logger.info(f"Submitted optimization job {job.job_id} ({kind})")
+        return job
+
+    def get(self, job_id: str) -> Optional[OptimizationJob]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self, limit: int = 50) -> List[OptimizationJob]:
+        return list(self.jobs.values())[-limit:][::-1]
+
+    async def wait(self, job_id: str) -> OptimizationResult:
+        """Await a job without blocking the event loop."""
+        future = self._futures.get(job_id)
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if future is not None:
+            try:
+                await asyncio.wrap_future(future)
+            except Exception:
+                pass  # recorded by _on_done
+        if job.status == JobStatus.CANCELLED:
+            raise JobCancelledError(f"Optimization job {job_id} was cancelled")
+        if job.status == JobStatus.FAILED:
+            raise RuntimeError(job.error_message)
+        return job.result
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job."""
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return False
+
+        future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            return True  # never started; _on_done marks it cancelled
+
+        # Running: the worker sees the flag at its next generation
+        if self._cancelled_jobs is not None:
+            self._cancelled_jobs[job_id] = True
+        with self._lock:
+            job.status = JobStatus.CANCELLED
+            # New identical requests must not be handed the cancelled job
+            if self._inflight.get(job.request_key) == job_id:
+                del self._inflight[job.request_key]
+        logger.info(f"Cancellation requested for optimization job {job_id}")
+        return True
+
+    def track(self, task: asyncio.Task) -> asyncio.Task:
+        """Keep a reference to a background task tied to a job until it finishes."""
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def aclose(self):
+        """Cancel and await background tasks, then shut down the pool."""
+        tasks = list(self._background_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.shutdown()
+
+    def shutdown(self):
+        self._closed = True
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._sync_manager is not None:
+            self._sync_manager.shutdown()
+            self._sync_manager = None
+
+    def _on_done(self, job_id: str, future: Future):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            self._inflight.pop(job.request_key, None)
+            self._futures.pop(job_id, None)
+            job.finished_at = datetime.now()
+
+            if future.cancelled():
+                job.status = JobStatus.CANCELLED
+            elif future.exception() is not None:
+                job.status = JobStatus.FAILED
+                job.error_message = str(future.exception())
+                logger.error(f"Optimization job {job_id} failed: {job.error_message}")
+            else:
+                job.result, job.fitness_history = future.result()
+                if job.fitness_history:
+                    job.generation = job.fitness_history[-1]["generation"]
+                    job.best_fitness = job.fitness_history[-1]["best_fitness"]
+                # A cancelled running job still returns its best solution so far
+                if job.status != JobStatus.CANCELLED:
+                    job.status = JobStatus.COMPLETED
+
+            if self._cancelled_jobs is not None:
+                self._cancelled_jobs.pop(job_id, None)
+            self._evict_finished()
+
+    def _evict_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - self.max_retained_jobs)]:
+            del self.jobs[job_id]
+
+    def _pump_progress(self):
+        """Copy generation reports from the workers into the job records."""
+        while not self._closed:
+            try:
+                event, job_id, entries = self._progress_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except Exception:
+                return  # manager shut down
+
+            job = self.jobs.get(job_id)
+            if job is None or job.finished_at is not None:
+                continue  # the final history comes with the result
+            if event == "started":
+                job.started_at = datetime.now()
+                if job.status == JobStatus.QUEUED:
+                    job.status = JobStatus.RUNNING
+                continue
+
+            job.fitness_history.extend(entries)
+            job.generation = entries[-1]["generation"]
+            job.best_fitness = entries[-1]["best_fitness"]
+
+
+# Shared instance: the API creates a new AnalyticsService per request
+optimization_jobs = OptimizationJobManager()
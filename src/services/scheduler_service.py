@@ -165,7 +165,8 @@ class SchedulerService:
             priority: Task priority
             
         Returns:
-            List of task IDs for scheduled executions
+            List with the recurring task ID; each run gets the ID "<id>:<n>"
+            and is stored when it comes due
         """
         try:
             if task_type not in self.task_functions:
@@ -177,12 +178,16 @@ class SchedulerService:
                 func=lambda: task_func(parameters),
                 interval=interval,
                 start_time=start_time,
-                max_executions=max_executions
+                max_executions=max_executions,
+                priority=priority,
+                on_occurrence=lambda task: self._record_task_info(
+                    task.task_id, task_type, parameters, priority
+                )
             )
             
-            # Store information for each scheduled task
+            # Store the rule now; occurrences are stored as they are created
             for task_id in task_ids:
-                await self._store_task_info(task_id, task_type, parameters, priority)
+                await self._store_task_info(task_id, task_type, parameters, priority, start_time)
             
             return task_ids
             
@@ -481,6 +486,15 @@ class SchedulerService:
                              priority: int,
                              scheduled_at: Optional[datetime] = None):
         """Store task information in database."""
+        self._record_task_info(task_id, task_type, parameters, priority, scheduled_at)
+    
+    def _record_task_info(self,
+                          task_id: str,
+                          task_type: str,
+                          parameters: Dict[str, Any],
+                          priority: int,
+                          scheduled_at: Optional[datetime] = None):
+        """Store task information (synchronous, usable from task manager hooks)."""
         try:
             data = {
                 "task_id": task_id,